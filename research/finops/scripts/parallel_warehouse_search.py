@@ -1,14 +1,10 @@
 #!/usr/bin/env python3
-import os
-import requests
-import json
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[3] / "scripts"))
+from snowresearch.client import get_client
 
-API_KEY = os.environ.get("PARALLEL_API_KEY")
-HEADERS = {
-    "x-api-key": API_KEY,
-    "Content-Type": "application/json",
-    "parallel-beta": "search-extract-2025-10-10"
-}
 
 queries = [
     "Snowflake warehouse auto-suspend auto-resume configuration optimization",
@@ -25,14 +21,7 @@ for query in queries:
         "limit": 10
     }
     try:
-        resp = requests.post(
-            "https://api.parallel.ai/v1beta/search",
-            headers=HEADERS,
-            json=payload,
-            timeout=60
-        )
-        resp.raise_for_status()
-        data = resp.json()
+        data = get_client().search(payload, timeout=60)
         
         results = data.get("data", {}).get("results", [])
         for r in results:
@@ -1,17 +1,17 @@
 #!/usr/bin/env python3
 """Extract detailed content from priority URLs using Parallel API"""
+import argparse
 import os
-import requests
 import json
 from datetime import datetime, timezone
-import time
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[3] / "scripts"))
+from snowresearch.batching import extract_many
+from snowresearch.cache import add_cache_flags, apply_cache_flags
+from snowresearch.client import get_client
 
-API_KEY = os.environ.get("PARALLEL_API_KEY")
-HEADERS = {
-    "x-api-key": API_KEY,
-    "Content-Type": "application/json",
-    "parallel-beta": "search-extract-2025-10-10"
-}
 
 # Priority URLs from the search results
 PRIORITY_URLS = [
@@ -23,23 +23,6 @@ PRIORITY_URLS = [
     "https://www.snowflake.com/en/developers/guides/well-architected-framework-cost-optimization-and-finops/",
 ]
 
-def parallel_extract(url):
-    """Extract detailed content from a URL"""
-    payload = {
-        "urls": [url]
-    }
-    try:
-        resp = requests.post(
-            "https://api.parallel.ai/v1beta/extract",
-            headers=HEADERS,
-            json=payload,
-            timeout=90
-        )
-        resp.raise_for_status()
-        return resp.json()
-    except Exception as e:
-        return {"error": str(e), "url": url}
-
 def main():
     timestamp = datetime.now(timezone.utc)
     print("="*70)
@@ -47,15 +30,11 @@ def main():
     print(f"Started: {timestamp.isoformat()}")
     print("="*70)
     
-    extracts = []
-    for url in PRIORITY_URLS:
-        print(f"\n→ Extracting: {url}")
-        result = parallel_extract(url)
-        extracts.append({
-            "url": url,
-            "extract": result
-        })
-        time.sleep(1)  # Be polite to API
+    extracted = extract_many(
+        PRIORITY_URLS,
+        on_result=lambda url, rec, n: print(f"\n→ Extracted: {url} (batch of {n})"),
+    )
+    extracts = [{"url": url, "extract": extracted[url]} for url in PRIORITY_URLS]
     
     # Save extract results
     out_dir = f"/home/ubuntu/.openclaw/workspace/research/finops/{timestamp.strftime('%Y-%m-%d')}"
@@ -77,4 +56,8 @@ def main():
     return extracts
 
 if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description=__doc__)
+    add_cache_flags(ap)
+    apply_cache_flags(ap.parse_args())
     main()
+    print("\n[POOL] " + get_client().summary())
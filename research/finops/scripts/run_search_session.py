@@ -1,17 +1,18 @@
 #!/usr/bin/env python3
 """Run Parallel Search for Snowflake FinOps topics - March 4, 2026"""
+import argparse
 import os
-import requests
 import json
 from datetime import datetime, timezone
-import time
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[3] / "scripts"))
+from snowresearch.cache import add_cache_flags, apply_cache_flags
+from snowresearch.client import get_client
+from snowresearch.executor import run_concurrent
+from snowresearch.pipeline import SelectionPolicy
 
-API_KEY = os.environ.get("PARALLEL_API_KEY")
-HEADERS = {
-    "x-api-key": API_KEY,
-    "Content-Type": "application/json",
-    "parallel-beta": "search-extract-2025-10-10"
-}
 
 SEARCH_TOPICS = [
     {
@@ -53,14 +54,7 @@ def parallel_search(queries, objective):
         "objective": objective
     }
     try:
-        resp = requests.post(
-            "https://api.parallel.ai/v1beta/search",
-            headers=HEADERS,
-            json=payload,
-            timeout=120
-        )
-        resp.raise_for_status()
-        return resp.json()
+        return get_client().search(payload, timeout=120)
     except Exception as e:
         return {"error": str(e)}
 
@@ -74,9 +68,12 @@ def main():
     all_results = []
     all_urls = []
     
-    for topic in SEARCH_TOPICS:
-        print(f"\n→ Searching: {topic['topic']}")
-        result = parallel_search(topic["queries"], topic["objective"])
+    searched = run_concurrent(
+        lambda topic: parallel_search(topic["queries"], topic["objective"]),
+        SEARCH_TOPICS,
+        on_result=lambda i, topic, r, secs: print(f"\n→ Searching: {topic['topic']} ({secs:.1f}s)"),
+    )
+    for topic, result in zip(SEARCH_TOPICS, searched):
         all_results.append({
             "topic": topic["topic"],
             "queries": topic["queries"],
@@ -84,7 +81,7 @@ def main():
             "results": result
         })
         
-        # Collect URLs from results
+        # Collect URLs from results (full excerpts and the objective feed the local ranking)
         if "results" in result:
             for r in result["results"]:
                 url = r.get("url")
@@ -93,27 +90,18 @@ def main():
                         "url": url,
                         "title": r.get("title", "N/A"),
                         "topic": topic["topic"],
-                        "publish_date": r.get("publish_date", "N/A")
+                        "publish_date": r.get("publish_date", "N/A"),
+                        "excerpts": r.get("excerpts") or [],
+                        "objective": topic["objective"],
                     })
-        
-        time.sleep(0.5)
-    
-    # Deduplicate and prioritize docs
-    seen = set()
-    unique_urls = []
-    for u in all_urls:
-        if u["url"] not in seen and "snowflake" in u["url"].lower():
-            seen.add(u["url"])
-            unique_urls.append(u)
-    
-    print(f"\n✓ Found {len(unique_urls)} unique Snowflake-related URLs")
     
-    # Prioritize docs.snowflake.com
-    docs_urls = [u for u in unique_urls if "docs.snowflake.com" in u["url"]]
-    other_urls = [u for u in unique_urls if "docs.snowflake.com" not in u["url"]]
+    # Snowflake URLs only, ranked locally across all topics (relevance, authority,
+    # freshness, novelty); the best 8 docs pages + 7 others
+    policy = SelectionPolicy(max_docs=8, max_other=7, ranking=True, ledger=get_client().ledger)
+    policy.admit(all_urls)
+    final_urls = policy.rank([t["topic"] for t in SEARCH_TOPICS])
     
-    # Take up to 15 priority URLs
-    final_urls = docs_urls[:8] + other_urls[:7]
+    print(f"\n✓ Found {policy.unique_count} unique Snowflake-related URLs")
     
     # Save search results
     out_dir = f"/home/ubuntu/.openclaw/workspace/research/finops/{timestamp.strftime('%Y-%m-%d')}"
@@ -133,9 +121,13 @@ def main():
     print(f"\n[PHASE 1] Search results saved to: {search_out}")
     print(f"\nPriority URLs for extraction ({len(final_urls)}):")
     for i, u in enumerate(final_urls, 1):
-        print(f"  {i}. [{u['topic']}] {u['url']}")
+        print(f"  {i}. [{u['topic']}] {u['url']}" + (f" ({u['ranking']['score']:.2f})" if "ranking" in u else ""))
     
     return final_urls
 
 if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description=__doc__)
+    add_cache_flags(ap)
+    apply_cache_flags(ap.parse_args())
     main()
+    print("\n[POOL] " + get_client().summary())
@@ -2,9 +2,12 @@
 """Parallel API search script for continuous research."""
 import os
 import json
-import requests
 import sys
 import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "scripts"))
+from snowresearch.client import ParallelAPIError, get_client
 
 def parallel_search(objective, topn=10):
     """Search using Parallel API."""
@@ -13,29 +16,16 @@ def parallel_search(objective, topn=10):
         print("Error: PARALLEL_API_KEY not set", file=sys.stderr)
         sys.exit(1)
     
-    headers = {
-        'Content-Type': 'application/json',
-        'x-api-key': api_key,
-        'parallel-beta': 'search-extract-2025-10-10'
-    }
-    
     payload = {
         'objective': objective,
         'topn': topn
     }
     
-    response = requests.post(
-        'https://api.parallel.ai/v1beta/search',
-        headers=headers,
-        json=payload,
-        timeout=60
-    )
-    
-    if response.status_code != 200:
-        print(f"Error: {response.status_code} - {response.text}", file=sys.stderr)
+    try:
+        return get_client().search(payload, timeout=60)
+    except ParallelAPIError as e:
+        print(f"Error: {e.status} - {e.body}", file=sys.stderr)
         sys.exit(1)
-    
-    return response.json()
 
 def parallel_extract(urls):
     """Extract content from URLs using Parallel API."""
@@ -44,28 +34,15 @@ def parallel_extract(urls):
         print("Error: PARALLEL_API_KEY not set", file=sys.stderr)
         sys.exit(1)
     
-    headers = {
-        'Content-Type': 'application/json',
-        'x-api-key': api_key,
-        'parallel-beta': 'search-extract-2025-10-10'
-    }
-    
     payload = {
         'urls': urls
     }
     
-    response = requests.post(
-        'https://api.parallel.ai/v1beta/extract',
-        headers=headers,
-        json=payload,
-        timeout=120
-    )
-    
-    if response.status_code != 200:
-        print(f"Error: {response.status_code} - {response.text}", file=sys.stderr)
+    try:
+        return get_client().extract(payload, timeout=120)
+    except ParallelAPIError as e:
+        print(f"Error: {e.status} - {e.body}", file=sys.stderr)
         sys.exit(1)
-    
-    return response.json()
 
 if __name__ == '__main__':
     import argparse
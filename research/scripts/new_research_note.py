@@ -8,6 +8,9 @@ import argparse
 from datetime import datetime, timezone
 from pathlib import Path
 
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "scripts"))
+from snowresearch.notes import load_topics
+
 def create_note(topic, slug):
     """Create a new research note from template."""
     workspace = os.environ.get('WORKSPACE', '/home/ubuntu/.openclaw/workspace')
@@ -17,7 +20,7 @@ def create_note(topic, slug):
     time_str = now.strftime('%H%M')
     
     # Validate topic
-    valid_topics = ['finops', 'native-apps', 'snowpark', 'scs', 'governance', 'observability']
+    valid_topics = list(load_topics())
     if topic not in valid_topics:
         print(f"Error: Invalid topic '{topic}'. Must be one of: {', '.join(valid_topics)}", file=sys.stderr)
         sys.exit(1)
@@ -1,43 +1,31 @@
 #!/usr/bin/env python3
 """Search for Snowflake budget/forecasting/cost alerts sources using Parallel API."""
 import json
-import requests
-import os
+import sys
+from pathlib import Path
 from datetime import datetime
 
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "scripts"))
+from snowresearch.client import get_client
+from snowresearch.urls import canonical
+
 def parallel_search(query, max_results=10):
     """Call Parallel Search API."""
-    url = "https://api.parallel.ai/v1beta/search"
-    headers = {
-        "Content-Type": "application/json",
-        "x-api-key": os.environ.get("PARALLEL_API_KEY", ""),
-        "parallel-beta": "search-extract-2025-10-10"
-    }
     payload = {
         "query": query,
         "max_results": max_results,
         "include_content": True
     }
-    resp = requests.post(url, headers=headers, json=payload, timeout=60)
-    resp.raise_for_status()
-    return resp.json()
+    return get_client().search(payload, timeout=60)
 
 def parallel_extract(urls):
     """Call Parallel Extract API for deep reads."""
-    url = "https://api.parallel.ai/v1beta/extract"
-    headers = {
-        "Content-Type": "application/json",
-        "x-api-key": os.environ.get("PARALLEL_API_KEY", ""),
-        "parallel-beta": "search-extract-2025-10-10"
-    }
     payload = {
         "urls": urls,
         "include_content": True,
         "max_length": 20000
     }
-    resp = requests.post(url, headers=headers, json=payload, timeout=120)
-    resp.raise_for_status()
-    return resp.json()
+    return get_client().extract(payload, timeout=120)
 
 if __name__ == "__main__":
     # Multi-query search for budget/forecasting topics
@@ -73,9 +61,9 @@ if __name__ == "__main__":
     for result in all_results:
         for item in result.get("results", []):
             url = item.get("url", "")
-            if url and url not in seen:
+            if url and canonical(url) not in seen:
                 urls_to_extract.append(url)
-                seen.add(url)
+                seen.add(canonical(url))
                 if len(urls_to_extract) >= 6:
                     break
         if len(urls_to_extract) >= 6:
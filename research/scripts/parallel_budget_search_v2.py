@@ -1,61 +1,41 @@
 #!/usr/bin/env python3
 """Search for Snowflake budget/forecasting/cost alerts sources using Parallel API v2."""
 import json
-import requests
-import os
+import sys
+from pathlib import Path
 from datetime import datetime, timezone
 
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "scripts"))
+from snowresearch.client import get_client
+from snowresearch.urls import canonical
+
 def parallel_search(query, max_results=10):
     """Call Parallel Search API with correct payload."""
-    url = "https://api.parallel.ai/v1beta/search"
-    headers = {
-        "Content-Type": "application/json",
-        "x-api-key": os.environ.get("PARALLEL_API_KEY", ""),
-        "parallel-beta": "search-extract-2025-10-10"
-    }
     payload = {
         "objective": query,  # Required field
         "max_results": max_results,
         "include_content": True
     }
-    resp = requests.post(url, headers=headers, json=payload, timeout=60)
-    resp.raise_for_status()
-    return resp.json()
+    return get_client().search(payload, timeout=60)
 
 def parallel_extract(urls):
     """Call Parallel Extract API for deep reads."""
-    url = "https://api.parallel.ai/v1beta/extract"
-    headers = {
-        "Content-Type": "application/json",
-        "x-api-key": os.environ.get("PARALLEL_API_KEY", ""),
-        "parallel-beta": "search-extract-2025-10-10"
-    }
     payload = {
         "urls": urls,
         "include_content": True,
         "max_length": 20000
     }
-    resp = requests.post(url, headers=headers, json=payload, timeout=120)
-    resp.raise_for_status()
-    return resp.json()
+    return get_client().extract(payload, timeout=120)
 
 def parallel_chat(messages, model="sonnet", temperature=0.3):
     """Call Parallel Chat Completions for synthesis."""
-    url = "https://api.parallel.ai/v1beta/chat/completions"
-    headers = {
-        "Content-Type": "application/json",
-        "x-api-key": os.environ.get("PARALLEL_API_KEY", ""),
-        "parallel-beta": "search-extract-2025-10-10"
-    }
     payload = {
         "model": model,
         "messages": messages,
         "temperature": temperature,
         "max_tokens": 4000
     }
-    resp = requests.post(url, headers=headers, json=payload, timeout=120)
-    resp.raise_for_status()
-    return resp.json()
+    return get_client().post_json("/v1beta/chat/completions", payload, timeout=120)
 
 if __name__ == "__main__":
     # Focused search on budget/forecasting topics
@@ -92,8 +72,9 @@ if __name__ == "__main__":
         for item in result.get("results", []):
             url = item.get("url", "")
             score = item.get("score", 0)
-            if url and url not in url_scores:
-                url_scores[url] = {
+            if url and canonical(url) not in url_scores:
+                url_scores[canonical(url)] = {
+                    "url": url,
                     "score": score,
                     "title": item.get("title", ""),
                     "snippet": item.get("snippet", "")
@@ -101,7 +82,7 @@ if __name__ == "__main__":
     
     # Sort by score and take top 7
     sorted_urls = sorted(url_scores.items(), key=lambda x: x[1]["score"], reverse=True)
-    urls_to_extract = [url for url, _ in sorted_urls[:7]]
+    urls_to_extract = [info["url"] for _, info in sorted_urls[:7]]
     
     print(f"\nExtracting {len(urls_to_extract)} URLs:")
     for url, info in sorted_urls[:7]:
@@ -1,8 +1,12 @@
 #!/usr/bin/env python3
 """Debug Parallel API with simpler requests."""
 import json
-import requests
 import os
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "scripts"))
+from snowresearch.client import get_client
 
 def test_parallel_search():
     url = "https://api.parallel.ai/v1beta/search"
@@ -22,9 +26,11 @@ def test_parallel_search():
     print(f"Payload: {json.dumps(payload, indent=2)}")
     
     try:
-        resp = requests.post(url, headers=headers, json=payload, timeout=30)
-        print(f"Status: {resp.status_code}")
-        print(f"Response: {resp.text[:500]}")
+        client = get_client()
+        status, _, body = client.request("POST", url, json.dumps(payload).encode("utf-8"), headers, timeout=30)
+        print(f"Status: {status}")
+        print(f"Response: {body.decode('utf-8', errors='replace')[:500]}")
+        print(f"Pool: {client.stats()}")
     except Exception as e:
         print(f"Error: {e}")
 
@@ -5,8 +5,10 @@ Parallel Extract API client for deep reading sources.
 import os
 import sys
 import json
-import urllib.request
-import urllib.error
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "scripts"))
+from snowresearch.client import ParallelAPIError, get_client
 
 def extract(urls, prompt=None):
     """Extract content from URLs using Parallel AI API."""
@@ -15,13 +17,6 @@ def extract(urls, prompt=None):
         print("Error: PARALLEL_API_KEY not set", file=sys.stderr)
         sys.exit(1)
     
-    api_url = "https://api.parallel.ai/v1beta/extract"
-    headers = {
-        "Content-Type": "application/json",
-        "x-api-key": api_key,
-        "parallel-beta": "search-extract-2025-10-10"
-    }
-    
     if isinstance(urls, str):
         urls = [urls]
     
@@ -32,18 +27,10 @@ def extract(urls, prompt=None):
     if prompt:
         data["prompt"] = prompt
     
-    req = urllib.request.Request(
-        api_url,
-        data=json.dumps(data).encode('utf-8'),
-        headers=headers,
-        method='POST'
-    )
-    
     try:
-        with urllib.request.urlopen(req, timeout=120) as response:
-            return json.loads(response.read().decode('utf-8'))
-    except urllib.error.HTTPError as e:
-        print(f"HTTP Error {e.code}: {e.read().decode('utf-8')}", file=sys.stderr)
+        return get_client().extract(data, timeout=120)
+    except ParallelAPIError as e:
+        print(f"HTTP Error {e.status}: {e.body}", file=sys.stderr)
         sys.exit(1)
     except Exception as e:
         print(f"Error: {e}", file=sys.stderr)
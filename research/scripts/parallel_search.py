@@ -5,8 +5,10 @@ Parallel Search API client for discovering sources.
 import os
 import sys
 import json
-import urllib.request
-import urllib.error
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "scripts"))
+from snowresearch.client import ParallelAPIError, get_client
 
 def search(query, num_results=5):
     """Search using Parallel AI API."""
@@ -15,30 +17,15 @@ def search(query, num_results=5):
         print("Error: PARALLEL_API_KEY not set", file=sys.stderr)
         sys.exit(1)
     
-    url = "https://api.parallel.ai/v1beta/search"
-    headers = {
-        "Content-Type": "application/json",
-        "x-api-key": api_key,
-        "parallel-beta": "search-extract-2025-10-10"
-    }
-    
     data = {
         "objective": query,
         "num_results": num_results
     }
     
-    req = urllib.request.Request(
-        url,
-        data=json.dumps(data).encode('utf-8'),
-        headers=headers,
-        method='POST'
-    )
-    
     try:
-        with urllib.request.urlopen(req, timeout=60) as response:
-            return json.loads(response.read().decode('utf-8'))
-    except urllib.error.HTTPError as e:
-        print(f"HTTP Error {e.code}: {e.read().decode('utf-8')}", file=sys.stderr)
+        return get_client().search(data, timeout=60)
+    except ParallelAPIError as e:
+        print(f"HTTP Error {e.status}: {e.body}", file=sys.stderr)
         sys.exit(1)
     except Exception as e:
         print(f"Error: {e}", file=sys.stderr)
@@ -4,7 +4,9 @@ import os
 import sys
 from datetime import datetime, timezone
 
-TOPICS = ["finops", "native-apps", "snowpark", "scs", "governance", "observability"]
+from snowresearch.notes import load_topics
+
+TOPICS = list(load_topics())
 
 def create_research_note(topic, slug):
     """Create a new research note file."""
@@ -3,42 +3,26 @@
 import os
 import sys
 import json
-import urllib.request
-import urllib.error
 
-API_URL = "https://api.parallel.ai/v1beta/search"
+from snowresearch.client import ParallelAPIError, get_client
+
 
 def search(query, max_results=10):
     """Search using Parallel AI API."""
-    api_key = os.environ.get("PARALLEL_API_KEY")
-    if not api_key:
+    if not os.environ.get("PARALLEL_API_KEY"):
         print("Error: PARALLEL_API_KEY not set", file=sys.stderr)
         sys.exit(1)
 
-    headers = {
-        "Content-Type": "application/json",
-        "x-api-key": api_key,
-        "parallel-beta": "search-extract-2025-10-10"
-    }
-
     # Use search_queries instead of query
-    payload = json.dumps({
+    payload = {
         "search_queries": [query],
         "max_results": max_results
-    }).encode("utf-8")
-
-    req = urllib.request.Request(
-        API_URL,
-        data=payload,
-        headers=headers,
-        method="POST"
-    )
+    }
 
     try:
-        with urllib.request.urlopen(req, timeout=120) as response:
-            return json.loads(response.read().decode("utf-8"))
-    except urllib.error.HTTPError as e:
-        print(f"HTTP Error: {e.code} - {e.read().decode()}", file=sys.stderr)
+        return get_client().search(payload, timeout=120)
+    except ParallelAPIError as e:
+        print(f"HTTP Error: {e.status} - {e.body}", file=sys.stderr)
         sys.exit(1)
     except Exception as e:
         print(f"Error: {e}", file=sys.stderr)
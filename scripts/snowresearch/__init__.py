@@ -0,0 +1,31 @@
+"""Shared building blocks for the Parallel research scripts and session runners.
+
+Scripts outside ``scripts/`` add it to ``sys.path`` before importing, e.g.:
+
+  sys.path.insert(0, str(Path(__file__).resolve().parents[3] / "scripts"))
+  from snowresearch.client import get_client
+
+The names below are resolved on first access, so ``import snowresearch``
+(and the ``research`` CLI) does not pay for ``http.client`` until a
+command actually talks to the API.
+"""
+
+_LAZY = {
+    "CircuitOpenError": "snowresearch.retry",
+    "ParallelAPIError": "snowresearch.client",
+    "ParallelClient": "snowresearch.client",
+    "get_client": "snowresearch.client",
+}
+
+__all__ = sorted(_LAZY)
+
+
+def __getattr__(name: str):
+    module = _LAZY.get(name)
+    if module is None:
+        raise AttributeError(f"module 'snowresearch' has no attribute {name!r}")
+    import importlib
+
+    value = getattr(importlib.import_module(module), name)
+    globals()[name] = value
+    return value
@@ -0,0 +1,449 @@
+"""Query-tag cost attribution by execution-time overlap: a streaming interval sweep.
+
+``FINOPS_INTELLIGENCE.FACT_WAREHOUSE_QUERY_TAG_DAY``
+(``sql/finops_intelligence_phase0_attribution_contract.sql``) sums each
+tag's per-query credits per day, then spreads the warehouse's idle credits
+over the tags in proportion. How much of a warehouse-hour a query got
+depends on what else ran next to it, and on a multi-cluster warehouse
+with millions of queries a day that is most of the story. :class:`Allocator`
+splits each metered warehouse-hour directly:
+
+- a query's execution interval (``END_TIME - EXECUTION_TIME`` to
+  ``END_TIME``) is cut at hour boundaries;
+- per warehouse-hour, a sweep over the sorted start/end events splits
+  each stretch of busy time equally between the queries running in it
+  (k concurrent queries get 1/k of it each). A query's weight is its
+  concurrency-weighted execution time, and the weights add up to the
+  hour's busy time;
+- the hour's ``CREDITS_ATTRIBUTED_COMPUTE_QUERIES`` and its idle
+  remainder (``CREDITS_USED_COMPUTE`` minus that) are split by weight;
+- the idle credits of metered hours in which no query ran go to the
+  day's tags in proportion to what they were allocated, the SQL's
+  ``IDLE_PROPORTIONAL`` rule.
+
+Sorting the events is the O(n log n) step. The sweep itself is a
+cumulative sum: with ``G(t)`` the running integral of 1/k, a query's
+weight is ``G(end) - G(start)``, so NumPy does it in a few passes.
+
+The input is a stream of hour-partitioned chunks (:meth:`Allocator.feed`),
+each with the queries that started in its hours. Executions that run
+past a chunk's end carry into the next one, so memory is bounded by the
+chunk. :func:`parquet_chunks` cuts ``QUERY_HISTORY`` Parquet (e.g. from
+:mod:`snowresearch.synth`) into such chunks along its row groups.
+
+Untagged queries are allocated too: they occupy the warehouse. Their
+credits are reported under a NULL tag, which the SQL drops.
+:func:`validate` runs the SQL procedure on the same data in the
+emulator and compares each tag's share of its warehouse-day. Needs numpy
+and pyarrow; ``validate`` also needs duckdb.
+
+Usage:
+  scripts/research allocate --data /tmp/synth [--out /tmp/alloc.parquet] [--validate]
+
+  from snowresearch.allocate import allocate_dir
+  table, stats = allocate_dir("/tmp/synth")
+"""
+
+from __future__ import annotations
+
+import json
+import time
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, Iterable, Iterator
+
+HOUR_US = 3_600_000_000
+CHUNK_ROWS = 1_000_000  # queries swept at once (whole hours, so a busy hour may exceed it)
+_WH_BITS = 24  # warehouse ids and tag codes are packed with the day into one int64 key
+_TAG_BITS = 24
+
+QUERY_COLUMNS = ("WAREHOUSE_ID", "QUERY_TAG", "START_TIME", "END_TIME", "EXECUTION_TIME")
+METERING_COLUMNS = (
+    "START_TIME", "WAREHOUSE_ID", "WAREHOUSE_NAME", "CREDITS_USED_COMPUTE", "CREDITS_ATTRIBUTED_COMPUTE_QUERIES",
+)
+
+
+def _np() -> Any:
+    try:
+        import numpy
+    except ImportError:
+        raise RuntimeError("the allocator needs numpy (pip install numpy)") from None
+    return numpy
+
+
+def _pa() -> Any:
+    try:
+        import pyarrow
+        import pyarrow.compute  # noqa: F401
+        import pyarrow.parquet  # noqa: F401
+    except ImportError:
+        raise RuntimeError("the allocator needs pyarrow (pip install pyarrow)") from None
+    return pyarrow
+
+
+@dataclass
+class AllocStats:
+    chunks: int = 0
+    queries: int = 0
+    pieces: int = 0  # query-hour intervals swept
+    max_carry: int = 0  # most executions carried into a later chunk at once
+    metered: float = 0.0  # CREDITS_USED_COMPUTE in the metering rows
+    allocated: float = 0.0
+    unmetered_queries: int = 0  # query-hours on a warehouse-hour without a metering row
+    seconds: float = 0.0
+
+    def summary(self) -> str:
+        rate = self.queries / self.seconds if self.seconds else 0.0
+        return (
+            f"{self.queries:,d} queries ({self.pieces:,d} query-hours) in {self.chunks} chunks, "
+            f"{self.seconds:.1f}s ({rate / 1e6:.2f}M queries/s); "
+            f"{self.allocated:,.3f} of {self.metered:,.3f} credits allocated"
+        )
+
+
+class Allocator:
+    """Feed hour-partitioned chunks of queries in time order, then :meth:`result`."""
+
+    def __init__(self, metering: Any):
+        """``metering``: a pyarrow table with :data:`METERING_COLUMNS` (``WAREHOUSE_METERING_HISTORY``)."""
+        self.np, self.pa = _np(), _pa()
+        np, pa = self.np, self.pa
+        hour = _micros(pa, metering["START_TIME"]) // HOUR_US
+        wh = np.asarray(metering["WAREHOUSE_ID"].to_numpy(zero_copy_only=False), dtype=np.int64)
+        if len(wh) and int(wh.max()) >= 1 << _WH_BITS:
+            raise ValueError(f"WAREHOUSE_ID above {1 << _WH_BITS} is not supported")
+        keys = (wh << 32) | hour
+        order = np.argsort(keys, kind="stable")
+        self.keys = keys[order]
+        self.compute = _floats(np, metering["CREDITS_USED_COMPUTE"])[order]
+        attributed = _floats(np, metering["CREDITS_ATTRIBUTED_COMPUTE_QUERIES"])[order]
+        self.attributed = np.minimum(attributed, self.compute)
+        self.used = np.zeros(len(keys), dtype=bool)  # metering rows that some query was swept against
+        pairs = metering.select(["WAREHOUSE_ID", "WAREHOUSE_NAME"])
+        pairs = pairs.cast(pa.schema([pa.field("WAREHOUSE_ID", pa.int64()), pa.field("WAREHOUSE_NAME", pa.string())]))
+        pairs = pairs.group_by(["WAREHOUSE_ID", "WAREHOUSE_NAME"]).aggregate([])
+        self.warehouses: dict[int, str] = dict(zip(pairs["WAREHOUSE_ID"].to_pylist(), pairs["WAREHOUSE_NAME"].to_pylist()))
+        self.tags: list[str | None] = [None]  # code 0: untagged
+        self._tag_codes: dict[str, int] = {}
+        self._carry = (np.zeros(0, np.int64),) * 4  # start, end, warehouse, tag
+        self._hi: int | None = None
+        self._out: list[tuple[Any, Any, Any]] = []  # per chunk: distinct keys, their query and idle credits
+        self.stats = AllocStats(metered=float(self.compute.sum()))
+
+    def _tag_column(self, column: Any) -> Any:
+        """Global tag codes for a QUERY_TAG column ('' and NULL are untagged)."""
+        np, pa, pc = self.np, self.pa, self.pa.compute
+        column = column.combine_chunks() if isinstance(column, pa.ChunkedArray) else column
+        if not pa.types.is_dictionary(column.type):
+            column = pc.dictionary_encode(column)
+        lookup = np.zeros(len(column.dictionary), dtype=np.int64)
+        for i, tag in enumerate(column.dictionary.to_pylist()):
+            if tag:
+                code = self._tag_codes.get(tag)
+                if code is None:
+                    code = self._tag_codes[tag] = len(self.tags)
+                    self.tags.append(tag)
+                lookup[i] = code
+        if len(self.tags) >= 1 << _TAG_BITS:
+            raise ValueError(f"more than {1 << _TAG_BITS} distinct query tags")
+        idx = column.indices.fill_null(0).to_numpy(zero_copy_only=False)
+        codes = lookup[idx] if len(lookup) else np.zeros(len(idx), dtype=np.int64)
+        if column.null_count:
+            codes[np.asarray(column.is_null().to_numpy(zero_copy_only=False))] = 0
+        return codes
+
+    def feed(self, queries: Any, hi: int) -> None:
+        """Allocate one chunk: ``queries`` (:data:`QUERY_COLUMNS`) started before ``hi`` (µs, on an hour)
+        and after the previous chunk's ``hi``; executions past ``hi`` carry into the next chunk."""
+        np, pa = self.np, self.pa
+        if hi % HOUR_US:
+            raise ValueError("chunks must end on an hour")
+        if self._hi is not None and hi <= self._hi:
+            raise ValueError("chunks must be fed in time order")
+        started = time.perf_counter()
+        self._hi = hi
+        self.stats.chunks += 1
+        self.stats.queries += queries.num_rows
+
+        end = _micros(pa, queries["END_TIME"])
+        exec_us = _floats(np, queries["EXECUTION_TIME"]) * 1000
+        start = end - exec_us.astype(np.int64)
+        wh = queries["WAREHOUSE_ID"]
+        valid = np.asarray(wh.is_valid().to_numpy(zero_copy_only=False)) & (end > start)
+        wh = np.asarray(wh.fill_null(0).to_numpy(zero_copy_only=False), dtype=np.int64)
+        tag = self._tag_column(queries["QUERY_TAG"])
+        cs, ce, cw, ct = self._carry
+        s = np.concatenate([cs, start[valid]])
+        e = np.concatenate([ce, end[valid]])
+        w = np.concatenate([cw, wh[valid]])
+        t = np.concatenate([ct, tag[valid]])
+
+        # Executions still running at hi carry over, from hi on.
+        late = e > hi
+        self._carry = (np.maximum(s[late], hi), e[late], w[late], t[late])
+        self.stats.max_carry = max(self.stats.max_carry, int(late.sum()))
+
+        # Cut every execution at hour boundaries (up to hi).
+        first = s // HOUR_US
+        last = (np.minimum(e, hi) - 1) // HOUR_US
+        n = np.maximum(last - first + 1, 0)
+        n[s >= hi] = 0
+        rep = np.repeat(np.arange(len(s)), n)
+        offset = np.arange(len(rep)) - np.repeat(np.cumsum(n) - n, n)
+        hour = first[rep] + offset
+        ps = np.maximum(s[rep], hour * HOUR_US)
+        pe = np.minimum(np.minimum(e[rep], hi), (hour + 1) * HOUR_US)
+        keep = pe > ps
+        rep, hour, ps, pe = rep[keep], hour[keep], ps[keep], pe[keep]
+        pieces = len(rep)
+        self.stats.pieces += pieces
+        if pieces:
+            self._sweep(rep, hour, ps, pe, w, t)
+        self.stats.seconds += time.perf_counter() - started
+
+    def _sweep(self, rep: Any, hour: Any, ps: Any, pe: Any, w: Any, t: Any) -> None:
+        np = self.np
+        cells, cell = np.unique((w[rep] << 32) | hour, return_inverse=True)
+        pieces = len(rep)
+        times = np.concatenate([ps, pe])
+        cell2 = np.concatenate([cell, cell])
+        delta = np.concatenate([np.ones(pieces, np.int64), -np.ones(pieces, np.int64)])
+        order = np.lexsort((delta, times, cell2))  # by cell, then time; ends before starts at a tie
+        times, cell2, delta = times[order], cell2[order], delta[order]
+        running = np.cumsum(delta)  # each cell's events balance, so this restarts at 0 per cell
+        gap = np.zeros(len(times))
+        same = cell2[1:] == cell2[:-1]
+        gap[:-1] = np.where(same, times[1:] - times[:-1], 0)
+        busy = np.where(running > 0, gap, 0.0)
+        share = np.where(running > 0, gap / np.maximum(running, 1), 0.0)
+        g = np.concatenate([[0.0], np.cumsum(share)[:-1]])  # G at each event, before its own segment
+        pos = np.empty(2 * pieces, dtype=np.int64)
+        pos[order] = np.arange(2 * pieces)
+        weight = g[pos[pieces:]] - g[pos[:pieces]]
+        busy_cell = np.bincount(cell2, busy, len(cells))
+
+        at = np.minimum(np.searchsorted(self.keys, cells), max(len(self.keys) - 1, 0))
+        metered = self.keys[at] == cells if len(self.keys) else np.zeros(len(cells), bool)
+        self.used[at[metered & (busy_cell > 0)]] = True
+        compute = np.where(metered, self.compute[at] if len(self.keys) else 0.0, 0.0)
+        attributed = np.where(metered, self.attributed[at] if len(self.keys) else 0.0, 0.0)
+        self.stats.unmetered_queries += int((~metered[cell]).sum())
+        frac = weight / np.maximum(busy_cell[cell], 1e-9)
+        day = hour // 24
+        key = (day << (_WH_BITS + _TAG_BITS)) | (w[rep] << _TAG_BITS) | t[rep]
+        # Keep only per-(day, warehouse, tag) sums, so memory tracks the tags, not the queries.
+        self._out.append(_sums(np, key, attributed[cell] * frac, (compute - attributed)[cell] * frac))
+
+    def result(self) -> Any:
+        """Allocation per (usage_date, warehouse_name, query_tag), shaped like FACT_WAREHOUSE_QUERY_TAG_DAY."""
+        np, pa = self.np, self.pa
+        parts = self._out or [(np.zeros(0, np.int64), np.zeros(0), np.zeros(0))]
+        keys, query, idle = _sums(np, *(np.concatenate(col) for col in zip(*parts)))
+
+        # Metered hours without a query: their idle goes to the day's tags, in proportion to their credits.
+        spare = ~self.used
+        day_wh = ((self.keys[spare] & 0xFFFFFFFF) // 24 << _WH_BITS) | (self.keys[spare] >> 32)
+        pools, pool_inv = np.unique(day_wh, return_inverse=True)
+        pool = np.bincount(pool_inv, self.compute[spare], len(pools))
+        groups, group = np.unique(keys >> _TAG_BITS, return_inverse=True)  # (day, warehouse) of each row
+        total = query + idle
+        group_total = np.bincount(group, total, len(groups))
+        at = np.searchsorted(pools, groups).clip(0, max(len(pools) - 1, 0))
+        group_pool = np.where(pools[at] == groups, pool[at], 0.0) if len(pools) else np.zeros(len(groups))
+        idle += np.where(group_total[group] > 0, group_pool[group] * total / np.maximum(group_total[group], 1e-12), 0.0)
+        total = query + idle
+        self.stats.allocated = float(total.sum())
+
+        day = keys >> (_WH_BITS + _TAG_BITS)
+        wh = (keys >> _TAG_BITS) & ((1 << _WH_BITS) - 1)
+        tag = keys & ((1 << _TAG_BITS) - 1)
+        return pa.table({
+            "usage_date": pa.array(day.astype("datetime64[D]")),
+            "warehouse_name": pa.array([self.warehouses.get(int(i), str(int(i))) for i in wh], pa.string()),
+            "query_tag": pa.array([self.tags[int(c)] for c in tag], pa.string()),
+            "query_credits": pa.array(query),
+            "idle_credits_allocated": pa.array(idle),
+            "total_credits_allocated": pa.array(total),
+        })
+
+
+def _sums(np: Any, key: Any, query: Any, idle: Any) -> tuple[Any, Any, Any]:
+    """Distinct ``key``s with their summed query and idle credits."""
+    keys, inv = np.unique(key, return_inverse=True)
+    return keys, np.bincount(inv, query, len(keys)), np.bincount(inv, idle, len(keys))
+
+
+def _micros(pa: Any, column: Any) -> Any:
+    """A timestamp column as int64 microseconds since the epoch (naive = UTC)."""
+    column = column.cast(pa.timestamp("us", tz=getattr(column.type, "tz", None)))
+    return _np().asarray(column.cast(pa.int64()).to_numpy(zero_copy_only=False), dtype="int64")
+
+
+def _floats(np: Any, column: Any) -> Any:
+    return np.asarray(column.cast(_pa().float64()).fill_null(0).to_numpy(zero_copy_only=False), dtype=float)
+
+
+def parquet_chunks(
+    folder: str | Path, columns: Iterable[str] = QUERY_COLUMNS, *, max_rows: int = CHUNK_ROWS
+) -> Iterator[tuple[Any, int]]:
+    """``(queries, hi)`` chunks for :meth:`Allocator.feed` from ``QUERY_HISTORY`` Parquet files.
+
+    Row groups are read in file order. Consecutive row groups whose
+    START_TIME ranges share an hour are read together, so that every
+    chunk ends on an hour that the next one starts after. The data must
+    be in time order at row-group grain, as :mod:`snowresearch.synth`
+    writes it. Unordered data raises ValueError; sort it first. A chunk
+    of more than ``max_rows`` queries is fed in runs of whole hours, since
+    the sweep's working memory grows with the rows fed at once.
+    """
+    pa = _pa()
+    pq = pa.parquet
+    files = sorted(Path(folder).glob("*.parquet"))
+    if not files:
+        raise FileNotFoundError(f"no Parquet files in {folder}")
+    columns = list(columns)
+    pending: list[tuple[Any, int]] = []  # (file, row group)
+    done = hi = None  # the last chunk's end; the pending chunk's end
+    for path in files:
+        f = pq.ParquetFile(path)
+        at = f.schema_arrow.get_field_index("START_TIME")
+        for rg in range(f.num_row_groups):
+            stats = f.metadata.row_group(rg).column(at).statistics
+            if stats is None or not stats.has_min_max:
+                raise ValueError(f"{path.name}: row group {rg} has no START_TIME statistics")
+            first, last = (_micros(pa, pa.array([stats.min, stats.max])) // HOUR_US * HOUR_US).tolist()
+            if done is not None and first < done:
+                raise ValueError(f"{path.name}: row group {rg} starts before the previous chunk ends; sort by START_TIME first")
+            if pending and first >= hi:
+                yield from _split(_read(pq, pending, columns), hi, max_rows)
+                pending, done = [], hi
+            pending.append((f, rg))
+            hi = max(hi or 0, last + HOUR_US) if pending[1:] else last + HOUR_US
+    if pending:
+        yield from _split(_read(pq, pending, columns), hi, max_rows)
+
+
+def _split(table: Any, hi: int, max_rows: int) -> Iterator[tuple[Any, int]]:
+    """``table`` as runs of whole START_TIME hours of about ``max_rows`` rows, the last ending at ``hi``."""
+    if table.num_rows <= max_rows:
+        yield table, hi
+        return
+    np, pa = _np(), _pa()
+    hour = _micros(pa, table["START_TIME"]) // HOUR_US
+    hours, counts = np.unique(hour, return_counts=True)
+    run = np.cumsum(counts) // max_rows  # hours in one run share a number
+    cuts = [int(h) for h, a, b in zip(hours[1:], run[:-1], run[1:]) if b != a]
+    lo = None
+    for end in [*cuts, hi // HOUR_US]:
+        keep = hour < end if lo is None else (hour >= lo) & (hour < end)
+        yield table.filter(pa.array(keep)), end * HOUR_US
+        lo = end
+
+
+def _read(pq: Any, groups: list[tuple[Any, int]], columns: list[str]) -> Any:
+    pa = _pa()
+    tables = [f.read_row_group(rg, columns=columns) for f, rg in groups]
+    return tables[0] if len(tables) == 1 else pa.concat_tables(tables, promote_options="permissive")
+
+
+def allocate_dir(data: str | Path, *, progress: Any = None) -> tuple[Any, AllocStats]:
+    """Allocate ``<data>/ACCOUNT_USAGE.WAREHOUSE_METERING_HISTORY`` over ``<data>/ACCOUNT_USAGE.QUERY_HISTORY``."""
+    pa = _pa()
+    data = Path(data)
+    metering = pa.parquet.read_table(data / "ACCOUNT_USAGE.WAREHOUSE_METERING_HISTORY", columns=list(METERING_COLUMNS))
+    alloc = Allocator(metering)
+    del metering
+    for queries, hi in parquet_chunks(data / "ACCOUNT_USAGE.QUERY_HISTORY"):
+        alloc.feed(queries, hi)
+        if progress:
+            progress(alloc.stats)
+    started = time.perf_counter()
+    table = alloc.result()
+    alloc.stats.seconds += time.perf_counter() - started
+    return table, alloc.stats
+
+
+@dataclass
+class Validation:
+    """The sweep against ``FACT_WAREHOUSE_QUERY_TAG_DAY``, compared as each tag's share of its warehouse-day."""
+
+    pairs: int = 0  # (day, warehouse, tag) rows in both
+    sweep_only: int = 0
+    sql_only: int = 0
+    mean_share_diff: float = 0.0  # percentage points
+    max_share_diff: float = 0.0
+    sweep_credits: float = 0.0  # tagged
+    sql_credits: float = 0.0
+    metered: float = 0.0
+    allocated: float = 0.0  # tagged and untagged
+    worst: list[dict[str, Any]] = field(default_factory=list)
+    seconds: float = 0.0
+
+    def summary(self) -> str:
+        return (
+            f"{self.pairs:,d} (day, warehouse, tag) rows in both ({self.sweep_only} sweep-only, {self.sql_only} SQL-only); "
+            f"share of warehouse-day differs by {self.mean_share_diff:.3f} pp on average, {self.max_share_diff:.3f} pp at most; "
+            f"tagged credits {self.sweep_credits:,.3f} sweep vs {self.sql_credits:,.3f} SQL; "
+            f"{self.allocated:,.3f} of {self.metered:,.3f} metered credits allocated"
+        )
+
+    def as_dict(self) -> dict[str, Any]:
+        return asdict(self)
+
+
+def validate(data: str | Path, table: Any, stats: AllocStats, *, sql_dir: str | Path | None = None, worst: int = 5) -> Validation:
+    """Run ``SP_REFRESH_FACTS`` over ``data`` in :mod:`snowresearch.sqlemu` and compare it with ``table``.
+
+    The two differ by design: the SQL counts each query's credits on its
+    start day (including cloud services) and drops untagged queries, while
+    the sweep splits each hour by overlap. Shares within a warehouse-day
+    should still agree closely on data where attribution follows
+    execution time, as the synthetic data's does.
+    """
+    from datetime import datetime
+
+    from snowresearch import sqlemu
+
+    started = time.perf_counter()
+    data = Path(data)
+    meta = json.loads((data / "_profile.json").read_text(encoding="utf-8"))
+    span = datetime.fromisoformat(meta["end"]) - datetime.fromisoformat(meta["start"])
+    emu = sqlemu.Emulator()
+    emu.load(data)
+    for report in emu.run_dir(sql_dir):
+        if report.failed:
+            line, head, error = report.failed[0]
+            raise RuntimeError(f"{report.file}:{line}: {head}: {error}")
+    emu.call("FINOPS_INTELLIGENCE.SP_REFRESH_FACTS", span.days + 1)
+    rows = emu.conn.execute(
+        "SELECT usage_date, warehouse_name, query_tag, total_credits_allocated::DOUBLE"
+        " FROM finops_intelligence.fact_warehouse_query_tag_day"
+    ).fetchall()
+    sql = {(d, w, t): c for d, w, t, c in rows}
+    sweep = {
+        (d, w, t): c
+        for d, w, t, c in zip(*(table[c].to_pylist() for c in ("usage_date", "warehouse_name", "query_tag", "total_credits_allocated")))
+        if t is not None
+    }
+    out = Validation(metered=stats.metered, allocated=stats.allocated)
+    out.sweep_credits, out.sql_credits = sum(sweep.values()), sum(sql.values())
+    shares = [_shares(sweep), _shares(sql)]
+    common = shares[0].keys() & shares[1].keys()
+    out.pairs, out.sweep_only, out.sql_only = len(common), len(shares[0].keys() - common), len(shares[1].keys() - common)
+    diffs = sorted(((abs(shares[0][k] - shares[1][k]) * 100, k) for k in common), reverse=True)
+    if diffs:
+        out.mean_share_diff = sum(d for d, _ in diffs) / len(diffs)
+        out.max_share_diff = diffs[0][0]
+    out.worst = [
+        {"usage_date": str(k[0]), "warehouse_name": k[1], "query_tag": k[2], "sweep_share": shares[0][k], "sql_share": shares[1][k]}
+        for _, k in diffs[:worst]
+    ]
+    out.seconds = time.perf_counter() - started
+    return out
+
+
+def _shares(credits: dict[tuple, float]) -> dict[tuple, float]:
+    totals: dict[tuple, float] = {}
+    for (d, w, _), c in credits.items():
+        totals[d, w] = totals.get((d, w), 0.0) + c
+    return {k: c / totals[k[:2]] for k, c in credits.items() if totals[k[:2]] > 0}
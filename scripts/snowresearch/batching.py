@@ -0,0 +1,274 @@
+"""Adaptive multi-URL batching for the extract phase.
+
+``/v1beta/extract`` accepts a ``urls`` array; sending one URL per call with
+a ``time.sleep(1)`` in between makes the extract phase the longest part of
+a session. ``ExtractDispatcher`` groups pending URLs into batches and keeps
+a few batches in flight over the shared client. Batch size follows what
+the API has actually been doing:
+
+- per-URL latency and response bytes (EWMA) are scaled against a latency
+  and a payload-size target, so slow or heavy pages get smaller batches;
+- the recent batch failure rate shrinks the next batch further;
+- a batch that fails as a whole on a timeout, 5xx or 429 is split in
+  half and both halves are re-queued, so one bad URL ends up failing
+  alone instead of sinking the rest. Other errors (400, 401, 403, an
+  open circuit) would fail every half too, so they fail the batch's
+  URLs at once.
+
+Per-URL fetch failures the API reports inside a 200 response (``errors``)
+are not batch failures; they are handed back on that URL's record.
+
+When the client has a response cache, each URL is looked up under its
+single-URL request key before batching, and successful per-URL records are
+stored under that key, so a page is reused whichever batch fetched it.
+Before that, the client's URL ledger (:mod:`snowresearch.ledger`) serves
+any page extracted within its freshness window, whatever payload fetched
+it; every page fetched here is recorded in the ledger.
+
+Usage:
+  from snowresearch.batching import extract_many
+
+  by_url = extract_many(urls, {"include_graph_data": True})
+  by_url[url]   # same shape as a single-URL extract response, or {"error", "url"}
+"""
+
+from __future__ import annotations
+
+import json
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import asdict, dataclass
+from typing import Any, Callable, Iterable
+
+from snowresearch.client import EXTRACT_PATH, ParallelClient, get_client
+from snowresearch.urls import canonical, learn_redirect
+
+DEFAULT_CONCURRENCY = 3
+DEFAULT_INITIAL_BATCH = 4
+DEFAULT_MAX_BATCH = 10
+# Keep a batch comfortably inside the per-call timeout and the response small
+# enough that a retry after a split is cheap.
+DEFAULT_TARGET_LATENCY = 30.0
+DEFAULT_TARGET_BYTES = 4_000_000
+DEFAULT_TIMEOUT = 120.0
+EWMA_ALPHA = 0.3
+
+
+@dataclass
+class BatchStats:
+    batches: int = 0
+    failed_batches: int = 0
+    splits: int = 0
+    urls_ok: int = 0
+    urls_failed: int = 0
+    latency_per_url: float | None = None
+    bytes_per_url: float | None = None
+    error_rate: float = 0.0
+
+
+def _ewma(prev: float | None, value: float) -> float:
+    return value if prev is None else EWMA_ALPHA * value + (1 - EWMA_ALPHA) * prev
+
+
+def split_response(urls: list[str], resp: dict[str, Any]) -> dict[str, dict[str, Any]]:
+    """Split a multi-URL extract response into one single-URL response per requested URL.
+
+    Results are matched on the URL the API echoes back; anything it rewrote
+    is matched on canonical form (trailing slashes, locales). When exactly
+    one result and one URL are left over, the result is that URL's: a
+    redirect, remembered so the target URL dedups against the one asked
+    for from then on. With more left over there is no telling which page
+    is which, so the URLs without a match get an ``{"error", "url"}``
+    record instead of someone else's content.
+    """
+    shared = {k: v for k, v in resp.items() if k not in ("results", "errors")}
+    out: dict[str, dict[str, Any]] = {u: {**shared, "results": [], "errors": []} for u in urls}
+    loose = {canonical(u): u for u in urls}
+    unmatched: list[tuple[str, dict[str, Any]]] = []
+
+    for kind in ("results", "errors"):
+        for item in resp.get(kind) or []:
+            url = item.get("url") if isinstance(item, dict) else None
+            target = url if url in out else loose.get(canonical(url)) if url else None
+            if target is None:
+                unmatched.append((kind, item))
+            else:
+                out[target][kind].append(item)
+
+    empty = [u for u in urls if not out[u]["results"] and not out[u]["errors"]]
+    if not unmatched or not empty:
+        return out
+    if len(unmatched) == len(empty) == 1:
+        kind, item = unmatched[0]
+        out[empty[0]][kind].append(item)
+        if kind == "results" and item.get("url"):
+            learn_redirect(empty[0], item["url"])
+        return out
+    for url in empty:
+        out[url] = {"error": f"extract response could not be matched to this URL ({len(unmatched)} unmatched in the response)",
+                    "url": url}
+    return out
+
+
+def _splittable(exc: BaseException) -> bool:
+    """Whether a failed batch is worth bisecting: timeouts, 5xx and 429, not bad requests or keys."""
+    status = getattr(exc, "status", None)
+    if status is not None:
+        return status == 429 or status >= 500
+    return isinstance(exc, TimeoutError)
+
+
+class ExtractDispatcher:
+    """Send URLs to the extract endpoint in adaptively sized, concurrent batches."""
+
+    def __init__(
+        self,
+        client: ParallelClient | None = None,
+        payload: dict[str, Any] | None = None,
+        *,
+        concurrency: int = DEFAULT_CONCURRENCY,
+        initial_batch: int = DEFAULT_INITIAL_BATCH,
+        max_batch: int = DEFAULT_MAX_BATCH,
+        target_latency: float = DEFAULT_TARGET_LATENCY,
+        target_bytes: int = DEFAULT_TARGET_BYTES,
+        timeout: float = DEFAULT_TIMEOUT,
+        source: str | None = None,
+    ):
+        self.client = client or get_client()
+        self.source = source
+        self.payload = {k: v for k, v in (payload or {}).items() if k != "urls"}
+        self.concurrency = max(1, concurrency)
+        self.initial_batch = max(1, min(initial_batch, max_batch))
+        self.max_batch = max(1, max_batch)
+        self.target_latency = target_latency
+        self.target_bytes = target_bytes
+        self.timeout = timeout
+        self.stats = BatchStats()
+        self._lock = threading.Lock()
+
+    def _single(self, url: str) -> dict[str, Any]:
+        return {"urls": [url], **self.payload}
+
+    def next_batch_size(self) -> int:
+        with self._lock:
+            s = self.stats
+            if s.latency_per_url is None or s.bytes_per_url is None:
+                size = float(self.initial_batch)
+            else:
+                by_latency = self.target_latency / max(s.latency_per_url, 1e-3)
+                by_bytes = self.target_bytes / max(s.bytes_per_url, 1.0)
+                size = min(by_latency, by_bytes)
+            size *= 1.0 - s.error_rate
+            return max(1, min(self.max_batch, int(size)))
+
+    def _observe(self, n: int, seconds: float, nbytes: int, failed: bool) -> None:
+        with self._lock:
+            s = self.stats
+            s.batches += 1
+            s.error_rate = _ewma(s.error_rate, 1.0 if failed else 0.0)
+            if failed:
+                s.failed_batches += 1
+            else:
+                s.latency_per_url = _ewma(s.latency_per_url, seconds / n)
+                s.bytes_per_url = _ewma(s.bytes_per_url, nbytes / n)
+
+    def _send(self, batch: list[str]) -> dict[str, Any]:
+        started = time.monotonic()
+        try:
+            # post_json, not extract(): run() has already consulted the ledger for these URLs.
+            resp = self.client.post_json(EXTRACT_PATH, {"urls": batch, **self.payload}, timeout=self.timeout)
+        except Exception:
+            self._observe(len(batch), time.monotonic() - started, 0, failed=True)
+            raise
+        self._observe(len(batch), time.monotonic() - started, len(json.dumps(resp)), failed=False)
+        return resp
+
+    def run(
+        self,
+        urls: Iterable[str],
+        on_result: Callable[[str, dict[str, Any], int], Any] | None = None,
+    ) -> dict[str, dict[str, Any]]:
+        """Extract every URL; returns ``{url: record}`` in input order.
+
+        ``on_result(url, record, batch_size)`` fires as each URL finishes
+        (``batch_size`` is 0 for a ledger or cache hit).
+        """
+        ordered = list(dict.fromkeys(urls))
+        pending: deque[list[str]] = deque()
+        queue: deque[str] = deque()
+        results: dict[str, dict[str, Any]] = {}
+        cache = self.client.cache
+        ledger = getattr(self.client, "ledger", None)
+
+        def finish(url: str, record: dict[str, Any], n: int) -> None:
+            results[url] = record
+            with self._lock:
+                if "error" in record or (record.get("errors") and not record.get("results")):
+                    self.stats.urls_failed += 1
+                else:
+                    self.stats.urls_ok += 1
+            if on_result is not None:
+                on_result(url, record, n)
+
+        for url in ordered:
+            hit = ledger.lookup(url, self.payload) if ledger is not None else None
+            if hit is None and cache is not None:
+                hit = cache.get(EXTRACT_PATH, self._single(url))
+            if hit is not None:
+                finish(url, hit, 0)
+            else:
+                queue.append(url)
+
+        with ThreadPoolExecutor(max_workers=self.concurrency) as pool:
+            in_flight: dict[Future, list[str]] = {}
+            while queue or pending or in_flight:
+                while len(in_flight) < self.concurrency and (pending or queue):
+                    if pending:
+                        batch = pending.popleft()
+                    else:
+                        size = self.next_batch_size()
+                        batch = [queue.popleft() for _ in range(min(size, len(queue)))]
+                    in_flight[pool.submit(self._send, batch)] = batch
+
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for fut in done:
+                    batch = in_flight.pop(fut)
+                    try:
+                        resp = fut.result()
+                    except Exception as e:
+                        if len(batch) == 1 or not _splittable(e):
+                            for url in batch:
+                                finish(url, {"error": str(e), "url": url}, len(batch))
+                        else:
+                            mid = len(batch) // 2
+                            with self._lock:
+                                self.stats.splits += 1
+                            pending.appendleft(batch[mid:])
+                            pending.appendleft(batch[:mid])
+                        continue
+                    for url, record in split_response(batch, resp).items():
+                        if cache is not None and len(batch) > 1 and record.get("results"):
+                            cache.put(EXTRACT_PATH, self._single(url), record)
+                        if ledger is not None:
+                            ledger.record(url, record, source=self.source)
+                        finish(url, record, len(batch))
+
+        return {u: results[u] for u in ordered}
+
+    def summary(self) -> dict[str, Any]:
+        with self._lock:
+            return asdict(self.stats)
+
+
+def extract_many(
+    urls: Iterable[str],
+    payload: dict[str, Any] | None = None,
+    *,
+    client: ParallelClient | None = None,
+    on_result: Callable[[str, dict[str, Any], int], Any] | None = None,
+    **kwargs: Any,
+) -> dict[str, dict[str, Any]]:
+    """One-shot helper for session runners; see :class:`ExtractDispatcher`."""
+    return ExtractDispatcher(client, payload, **kwargs).run(urls, on_result=on_result)
@@ -0,0 +1,256 @@
+"""Content-addressed on-disk response cache for Parallel search/extract calls.
+
+Near-identical searches and extracts are re-run day after day, each one a
+fresh paid call. :class:`ResponseCache` sits under :class:`ParallelClient`:
+responses are keyed by a SHA-256 of the endpoint plus a canonical form of
+the payload (extract ``urls`` canonicalized by :mod:`snowresearch.urls`,
+so ``http://``, trailing-slash and ``#anchor`` variants share an entry),
+stored gzip-compressed, expired per endpoint, and evicted
+least-recently-used once the cache grows past its byte budget.
+
+Layout:
+  <dir>/<key[:2]>/<key>.json.gz   {"endpoint", "stored_at", "ttl", "response"}
+
+A file's mtime doubles as its LRU clock (bumped on every hit).
+
+Env:
+  PARALLEL_CACHE            on (default) | refresh (ignore hits, still store) | off
+  PARALLEL_CACHE_DIR        default: ~/.cache/snowresearch/parallel
+  PARALLEL_CACHE_MAX_BYTES  default: 512 MiB
+
+Scripts with argparse expose the same switch via ``add_cache_flags`` /
+``apply_cache_flags`` (``--no-cache``, ``--refresh``).
+"""
+
+from __future__ import annotations
+
+import argparse
+import gzip
+import hashlib
+import json
+import os
+import threading
+import time
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any
+
+from snowresearch.urls import canonical
+
+MODES = ("on", "refresh", "off")
+DEFAULT_DIR = Path.home() / ".cache" / "snowresearch" / "parallel"
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+
+HOUR = 3600
+DAY = 24 * HOUR
+# Extracted pages change slowly; open searches a little faster; searches that
+# ask for fresh results (``freshness``) are only reused within a few hours.
+EXTRACT_TTL = 7 * DAY
+SEARCH_TTL = DAY
+FRESH_SEARCH_TTL = 6 * HOUR
+
+# Request fields whose order does not change the answer.
+_UNORDERED_LISTS = {"urls", "search_queries"}
+
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    misses: int = 0
+    expired: int = 0
+    stores: int = 0
+    evictions: int = 0
+    bytes_saved: int = 0
+
+
+def _normalize(value: Any, key: str | None = None) -> Any:
+    if isinstance(value, dict):
+        return {k: _normalize(v, k) for k, v in sorted(value.items()) if v is not None}
+    if isinstance(value, list):
+        items = [_normalize(v) for v in value]
+        if key == "urls":
+            items = [canonical(v) if isinstance(v, str) else v for v in items]
+        if key in _UNORDERED_LISTS and all(isinstance(v, str) for v in items):
+            return sorted(set(items))
+        return items
+    if isinstance(value, str):
+        return " ".join(value.split())
+    return value
+
+
+def endpoint_of(url: str) -> str:
+    """``https://api.parallel.ai/v1beta/search`` -> ``/v1beta/search``."""
+    if "://" in url:
+        url = "/" + url.split("://", 1)[1].split("/", 1)[-1]
+    return url.split("?", 1)[0].rstrip("/")
+
+
+def cache_key(endpoint: str, payload: dict[str, Any]) -> str:
+    canonical = json.dumps(
+        {"endpoint": endpoint_of(endpoint), "payload": _normalize(payload)},
+        sort_keys=True,
+        separators=(",", ":"),
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def ttl_for(endpoint: str, payload: dict[str, Any]) -> int:
+    """Seconds a response may be reused; 0 means never cache it."""
+    ep = endpoint_of(endpoint)
+    if ep.endswith("/extract"):
+        return EXTRACT_TTL
+    if ep.endswith("/search"):
+        return FRESH_SEARCH_TTL if payload.get("freshness") else SEARCH_TTL
+    return 0
+
+
+class ResponseCache:
+    """Gzip-compressed JSON responses on disk with per-endpoint TTLs and size-bounded LRU eviction."""
+
+    def __init__(self, directory: str | Path | None = None, max_bytes: int | None = None, mode: str = "on"):
+        if mode not in MODES:
+            raise ValueError(f"cache mode must be one of {MODES}, got {mode!r}")
+        self.dir = Path(directory or os.environ.get("PARALLEL_CACHE_DIR") or DEFAULT_DIR)
+        self.max_bytes = max_bytes if max_bytes is not None else int(
+            os.environ.get("PARALLEL_CACHE_MAX_BYTES", DEFAULT_MAX_BYTES)
+        )
+        self.mode = mode
+        self._stats = CacheStats()
+        self._lock = threading.Lock()
+        self._total: int | None = None
+
+    @classmethod
+    def from_env(cls) -> ResponseCache:
+        return cls(mode=os.environ.get("PARALLEL_CACHE", "on").strip().lower() or "on")
+
+    def _path(self, key: str) -> Path:
+        return self.dir / key[:2] / f"{key}.json.gz"
+
+    def get(self, endpoint: str, payload: dict[str, Any]) -> dict[str, Any] | None:
+        if self.mode != "on" or not ttl_for(endpoint, payload):
+            return None
+        path = self._path(cache_key(endpoint, payload))
+        try:
+            raw = path.read_bytes()
+            entry = json.loads(gzip.decompress(raw))
+        except FileNotFoundError:
+            with self._lock:
+                self._stats.misses += 1
+            return None
+        except (OSError, ValueError, EOFError):
+            # Truncated or corrupt entry: treat as a miss and let the next store replace it.
+            with self._lock:
+                self._stats.misses += 1
+            return None
+
+        if time.time() - entry.get("stored_at", 0) > entry.get("ttl", 0):
+            with self._lock:
+                self._stats.expired += 1
+                self._stats.misses += 1
+            return None
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        with self._lock:
+            self._stats.hits += 1
+            self._stats.bytes_saved += len(raw)
+        return entry["response"]
+
+    def put(self, endpoint: str, payload: dict[str, Any], response: dict[str, Any]) -> None:
+        ttl = ttl_for(endpoint, payload)
+        # A response carrying per-URL fetch errors would pin those failures for the whole TTL.
+        if self.mode == "off" or not ttl or response.get("errors"):
+            return
+        path = self._path(cache_key(endpoint, payload))
+        entry = {"endpoint": endpoint_of(endpoint), "stored_at": time.time(), "ttl": ttl, "response": response}
+        data = gzip.compress(json.dumps(entry, separators=(",", ":")).encode("utf-8"), compresslevel=6)
+        with self._lock:
+            before = self._disk_total()
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(f".tmp{os.getpid()}.{threading.get_ident()}")
+        tmp.write_bytes(data)
+        try:
+            old = path.stat().st_size
+        except FileNotFoundError:
+            old = 0
+        os.replace(tmp, path)
+        with self._lock:
+            self._stats.stores += 1
+            total = self._total = (self._total if self._total is not None else before) + len(data) - old
+        if total > self.max_bytes:
+            self.evict()
+
+    def _disk_total(self) -> int:
+        if self._total is None:
+            self._total = sum(size for _, _, size in self._entries())
+        return self._total
+
+    def _entries(self) -> list[tuple[float, Path, int]]:
+        out = []
+        if not self.dir.exists():
+            return out
+        for sub in self.dir.iterdir():
+            if not sub.is_dir():
+                continue
+            for p in sub.glob("*.json.gz"):
+                try:
+                    st = p.stat()
+                except FileNotFoundError:
+                    continue
+                out.append((st.st_mtime, p, st.st_size))
+        return out
+
+    def evict(self, target: float = 0.9) -> int:
+        """Delete least-recently-used entries until the cache is under ``target`` of its budget."""
+        entries = sorted(self._entries())
+        total = sum(size for _, _, size in entries)
+        limit = self.max_bytes * target
+        removed = 0
+        for _, path, size in entries:
+            if total <= limit:
+                break
+            try:
+                path.unlink()
+            except FileNotFoundError:
+                pass
+            total -= size
+            removed += 1
+        with self._lock:
+            self._total = total
+            self._stats.evictions += removed
+        return removed
+
+    def clear(self) -> int:
+        n = 0
+        for _, path, _ in self._entries():
+            path.unlink(missing_ok=True)
+            n += 1
+        with self._lock:
+            self._total = 0
+        return n
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            return {**asdict(self._stats), "mode": self.mode, "bytes_on_disk": self._total}
+
+
+def add_cache_flags(ap: argparse.ArgumentParser) -> None:
+    g = ap.add_mutually_exclusive_group()
+    g.add_argument("--no-cache", action="store_true", help="bypass the response cache entirely")
+    g.add_argument("--refresh", action="store_true", help="ignore cached responses but store fresh ones")
+
+
+def apply_cache_flags(args: argparse.Namespace) -> None:
+    """Switch the shared client's cache and ledger mode from parsed ``--no-cache`` / ``--refresh`` flags."""
+    from snowresearch.client import get_client
+
+    client = get_client()
+    mode = "off" if getattr(args, "no_cache", False) else "refresh" if getattr(args, "refresh", False) else None
+    if mode is None:
+        return
+    # The URL ledger is a cache too; bypassing one without the other would be surprising.
+    for store in (client.cache, client.ledger):
+        if store is not None:
+            store.mode = mode
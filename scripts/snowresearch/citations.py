@@ -0,0 +1,465 @@
+"""Citation graph: which notes cite which pages, and which stored searches/extracts fetched them.
+
+Notes cite their sources by hand in a ``## Links & Citations`` (or
+``Links / references``) section, and nothing tied a note in
+``research/finops/2026-03-04/`` to the session JSON and extract payloads
+it was written from. :func:`build` parses every note's links section
+(the whole note when it has none), canonicalizes the URLs, and walks
+every stored payload (``research/**/*.json`` and the segment store) for
+the URLs each record searched or extracted. The result is a bipartite
+graph with three edge sets over one URL table:
+
+- ``cites``    note -> URL
+- ``searched`` record -> URL (it came back in a search result)
+- ``extracted`` record -> URL (its page was extracted)
+
+Each edge set is stored as CSR adjacency arrays (``ptr``/``idx``, uint32)
+in both directions, so "which notes depend on this page",
+"what was this note built from" and "which extracts were never cited"
+are array slices over the saved graph, with no file rescans.
+
+Updates are incremental: files whose ``(mtime, size)`` (or hash) is
+unchanged keep their rows, changed files are re-parsed, removed ones
+dropped, and the arrays are re-packed (nodes renumbered, orphan URLs
+dropped) on save.
+
+Layout:
+  <dir>/graph.json      nodes (notes, records, urls) and the per-file manifest
+  <dir>/adjacency.bin   the uint32 arrays, in the order graph.json lists them
+
+Usage:
+  scripts/research citations build [--rebuild]
+  scripts/research citations depends https://docs.snowflake.com/en/user-guide/cost-attributing
+  scripts/research citations sources research/finops/2026-03-04/2026-03-04_0118_org-usage-rate-sheet-attribution.md
+  scripts/research citations uncited --since 2026-03-01 --top 20
+
+Env:
+  RESEARCH_CITATIONS  graph directory (default: ~/.cache/snowresearch/citations)
+  RESEARCH_DIR        corpus root (default: <repo>/research)
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import re
+import time
+from array import array
+from collections import Counter
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Iterator
+
+from snowresearch.index import _sha1, file_kind, file_time, research_dir
+
+DEFAULT_DIR = Path.home() / ".cache" / "snowresearch" / "citations"
+FORMAT_VERSION = 1
+EDGES = ("cites", "searched", "extracted")
+
+_LINKS_HEADING = re.compile(r"^(#{1,4})\s+.*\b(links?|references|citations|sources)\b", re.IGNORECASE)
+_HEADING = re.compile(r"^(#{1,6})\s")
+_URL = re.compile(r"https?://[^\s<>\"'`|\]]+")
+
+
+def default_dir() -> Path:
+    return Path(os.environ.get("RESEARCH_CITATIONS") or DEFAULT_DIR)
+
+
+def canonical(url: str) -> str:
+    from snowresearch import urls
+
+    return urls.canonical(url.rstrip(".,;:*_'\""))
+
+
+def _trim(url: str) -> str:
+    # A markdown link's closing parenthesis, unless the URL opened one itself.
+    while url.endswith(")") and url.count(")") > url.count("("):
+        url = url[:-1]
+    return url.rstrip(".,;:*_'\"")
+
+
+def note_links(text: str) -> list[str]:
+    """Canonical URLs a note cites: its links section(s), or the whole note when it has none."""
+    lines = text.splitlines()
+    picked: list[str] = []
+    level = None
+    for line in lines:
+        m = _HEADING.match(line)
+        if m:
+            links = _LINKS_HEADING.match(line)
+            if links:
+                level = len(links.group(1))
+                continue
+            if level is not None and len(m.group(1)) <= level:
+                level = None
+        if level is not None:
+            picked.append(line)
+    body = "\n".join(picked) if picked else text
+    return list(dict.fromkeys(canonical(_trim(u)) for u in _URL.findall(body)))
+
+
+def _payload_urls(fp: Any, kind: str, out: dict[str, Any]) -> None:
+    """Fill ``out["searched"]``/``out["extracted"]`` (canonical URL -> None) and ``out["session"]`` from one payload.
+
+    ``extract_id``/``search_id`` context decides a result's kind, else
+    ``kind``. Filled as the stream goes, so a truncated file keeps what
+    came before the cut.
+    """
+    from snowresearch.jsonstream import iter_results
+
+    for result, ctx in iter_results(fp, with_context=True):
+        k = "extract" if "extract_id" in ctx else "search" if "search_id" in ctx else kind
+        out["extracted" if k == "extract" else "searched"][canonical(result["url"])] = None
+        if out.get("session") is None and isinstance(ctx.get("session"), str):
+            out["session"] = ctx["session"]
+
+
+# -- graph -----------------------------------------------------------------
+
+
+def _csr(rows: list[list[int]]) -> tuple[array, array]:
+    ptr, idx = array("I", [0]), array("I")
+    for row in rows:
+        idx.extend(row)
+        ptr.append(len(idx))
+    return ptr, idx
+
+
+def _reverse(rows: list[list[int]], n: int) -> list[list[int]]:
+    out: list[list[int]] = [[] for _ in range(n)]
+    for src, row in enumerate(rows):
+        for dst in row:
+            out[dst].append(src)
+    return out
+
+
+@dataclass
+class BuildStats:
+    scanned: int = 0
+    unchanged: int = 0
+    parsed: int = 0
+    removed: int = 0
+    notes: int = 0
+    records: int = 0
+    urls: int = 0
+    edges: dict[str, int] = field(default_factory=dict)
+    errors: dict[str, str] = field(default_factory=dict)
+    seconds: float = 0.0
+
+    def summary(self) -> str:
+        edges = ", ".join(f"{v} {k}" for k, v in self.edges.items())
+        return (
+            f"{self.scanned} files scanned, {self.parsed} parsed, {self.unchanged} unchanged, {self.removed} removed, "
+            f"{len(self.errors)} unreadable in {self.seconds:.2f}s; {self.notes} notes, {self.records} records, "
+            f"{self.urls} urls ({edges})"
+        )
+
+
+class CitationGraph:
+    """Notes, payload records and URLs, with CSR adjacency in both directions for each edge set."""
+
+    def __init__(self) -> None:
+        self.notes: list[dict[str, Any]] = []  # {"path", "at"}
+        self.records: list[dict[str, Any]] = []  # {"key", "file", "kind", "session", "at"}
+        self.urls: list[str] = []
+        self.files: dict[str, dict[str, Any]] = {}  # rel -> {"mtime", "size", "sha1", "error"?}
+        self.arrays: dict[str, array] = {}
+        self._url_ids: dict[str, int] | None = None
+        self._note_ids: dict[str, int] | None = None
+
+    # -- persistence
+
+    @classmethod
+    def load(cls, directory: str | Path | None = None) -> CitationGraph:
+        d = Path(directory or default_dir())
+        g = cls()
+        try:
+            meta = json.loads((d / "graph.json").read_text())
+        except (OSError, ValueError):
+            return g
+        from snowresearch.urls import VERSION as URL_VERSION
+
+        if meta.get("version") != FORMAT_VERSION or meta.get("url_version") != URL_VERSION:
+            return g  # URLs keyed under other canonical rules: rebuild
+        g.notes, g.records, g.urls, g.files = meta["notes"], meta["records"], meta["urls"], meta["files"]
+        data = (d / "adjacency.bin").read_bytes()
+        pos = 0
+        for name, n in meta["arrays"]:
+            a = array("I")
+            a.frombytes(data[pos : pos + 4 * n])
+            g.arrays[name] = a
+            pos += 4 * n
+        return g
+
+    def save(self, directory: str | Path | None = None) -> None:
+        d = Path(directory or default_dir())
+        d.mkdir(parents=True, exist_ok=True)
+        order = sorted(self.arrays)
+        blob = d / "adjacency.bin"
+        tmp = blob.with_suffix(f".tmp{os.getpid()}")
+        with open(tmp, "wb") as f:
+            for name in order:
+                self.arrays[name].tofile(f)
+        from snowresearch.urls import VERSION as URL_VERSION
+
+        meta = {
+            "version": FORMAT_VERSION,
+            "url_version": URL_VERSION,
+            "notes": self.notes,
+            "records": self.records,
+            "urls": self.urls,
+            "files": self.files,
+            "arrays": [[name, len(self.arrays[name])] for name in order],
+        }
+        graph = d / "graph.json"
+        gtmp = graph.with_suffix(f".tmp{os.getpid()}")
+        gtmp.write_text(json.dumps(meta, separators=(",", ":")))
+        os.replace(tmp, blob)
+        os.replace(gtmp, graph)
+
+    # -- adjacency
+
+    def row(self, name: str, i: int) -> array:
+        ptr, idx = self.arrays[f"{name}.ptr"], self.arrays[f"{name}.idx"]
+        return idx[ptr[i] : ptr[i + 1]]
+
+    def rows(self, name: str, n: int) -> list[list[int]]:
+        return [list(self.row(name, i)) for i in range(n)] if f"{name}.ptr" in self.arrays else [[] for _ in range(n)]
+
+    def pack(self, edges: dict[str, list[list[int]]]) -> None:
+        """Renumber away orphan URLs, then store forward and reverse CSR for each edge set."""
+        used = sorted({u for rows in edges.values() for row in rows for u in row})
+        remap = {old: new for new, old in enumerate(used)}
+        self.urls = [self.urls[u] for u in used]
+        self._url_ids = None
+        self.arrays = {}
+        for name, rows in edges.items():
+            rows = [sorted({remap[u] for u in row}) for row in rows]
+            self.arrays[f"{name}.ptr"], self.arrays[f"{name}.idx"] = _csr(rows)
+            self.arrays[f"{name}.rptr"], self.arrays[f"{name}.ridx"] = _csr(_reverse(rows, len(self.urls)))
+
+    def url_id(self, url: str) -> int | None:
+        if self._url_ids is None:
+            self._url_ids = {u: i for i, u in enumerate(self.urls)}
+        return self._url_ids.get(canonical(url))
+
+    def note_id(self, path: str) -> int | None:
+        if self._note_ids is None:
+            self._note_ids = {n["path"]: i for i, n in enumerate(self.notes)}
+        path = path.removeprefix("./")
+        return self._note_ids.get(path if path.startswith("research/") else f"research/{path}")
+
+    def citing(self, url_id: int, name: str = "cites") -> array:
+        """Sources (notes or records) with an edge of kind ``name`` to ``url_id``."""
+        ptr, idx = self.arrays[f"{name}.rptr"], self.arrays[f"{name}.ridx"]
+        return idx[ptr[url_id] : ptr[url_id + 1]]
+
+    def degree(self, name: str, reverse: bool = False) -> list[int]:
+        ptr = self.arrays[f"{name}.{'rptr' if reverse else 'ptr'}"]
+        return [ptr[i + 1] - ptr[i] for i in range(len(ptr) - 1)]
+
+
+# -- build -----------------------------------------------------------------
+
+
+def _sources(root: Path) -> Iterator[tuple[str, Path]]:
+    for path in sorted(root.glob("**/*")):
+        if not path.is_file() or path.suffix not in (".md", ".json"):
+            continue
+        rel = path.relative_to(root).as_posix()
+        if rel.startswith("sessions/") or rel.startswith("store/"):
+            continue
+        yield f"research/{rel}", path
+
+
+def build(
+    root: str | Path | None = None,
+    directory: str | Path | None = None,
+    *,
+    rebuild: bool = False,
+    store: Any = None,
+) -> tuple[CitationGraph, BuildStats]:
+    """Bring the saved graph up to date with the notes, payload files and segment store."""
+    started = time.monotonic()
+    root = Path(root or research_dir())
+    old = CitationGraph() if rebuild else CitationGraph.load(directory)
+    stats = BuildStats()
+
+    # Unpack the saved graph into per-file rows keyed by URL string, so unchanged files keep theirs.
+    cites = old.rows("cites", len(old.notes))
+    searched = old.rows("searched", len(old.records))
+    extracted = old.rows("extracted", len(old.records))
+    note_rows = {n["path"]: (n, [old.urls[u] for u in cites[i]]) for i, n in enumerate(old.notes)}
+    record_rows: dict[str, list[tuple[dict[str, Any], list[str], list[str]]]] = {}
+    for i, r in enumerate(old.records):
+        record_rows.setdefault(r["file"], []).append(
+            (r, [old.urls[u] for u in searched[i]], [old.urls[u] for u in extracted[i]])
+        )
+
+    files: dict[str, dict[str, Any]] = {}
+    for rel, path in _sources(root):
+        stats.scanned += 1
+        st = path.stat()
+        prev = old.files.get(rel)
+        if prev and prev["mtime"] == st.st_mtime and prev["size"] == st.st_size:
+            files[rel] = prev
+            stats.unchanged += 1
+            continue
+        sha1 = _sha1(path)
+        files[rel] = {"mtime": st.st_mtime, "size": st.st_size, "sha1": sha1}
+        if prev and prev["sha1"] == sha1:
+            stats.unchanged += 1
+            continue
+        stats.parsed += 1
+        at = file_time(path, rel, st.st_mtime)
+        if path.suffix == ".md":
+            note_rows[rel] = ({"path": rel, "at": at}, note_links(path.read_text(errors="replace")))
+            continue
+        found: dict[str, Any] = {"searched": {}, "extracted": {}, "session": None}
+        try:
+            with open(path, "rb") as f:
+                _payload_urls(f, file_kind(path, {}), found)
+        except ValueError as e:
+            n = len(found["searched"]) + len(found["extracted"])
+            files[rel]["error"] = stats.errors[rel] = f"invalid JSON: {e}" + (f" ({n} urls salvaged)" if n else "")
+        s, x = list(found["searched"]), list(found["extracted"])
+        record = {"key": rel, "file": rel, "kind": "extract" if x else "search", "session": found["session"] or path.stem, "at": at}
+        record_rows[rel] = [(record, s, x)] if s or x else []
+
+    if store is None:
+        from snowresearch.storage import available_store
+
+        store = available_store()
+    for day in store.days() if store is not None else ():
+        rel = f"store:{day}"
+        stats.scanned += 1
+        st = store.day_stat(day)
+        prev = old.files.get(rel)
+        files[rel] = {"mtime": st.st_mtime, "size": st.st_size, "sha1": ""}
+        if prev and prev["mtime"] == st.st_mtime and prev["size"] == st.st_size:
+            stats.unchanged += 1
+            continue
+        stats.parsed += 1
+        rows = []
+        for rec in store.scan(since=day, until=day):
+            source = rec.meta.get("source", "")
+            if source.startswith("research/") and (root / source[len("research/"):]).exists():
+                continue  # migrated but not deleted; the file itself is a record
+            found = {"searched": {}, "extracted": {}, "session": None}
+            with rec.open() as f:
+                _payload_urls(f, rec.kind, found)
+            s, x = list(found["searched"]), list(found["extracted"])
+            if s or x:
+                key = f"{rel}/{rec.name or len(rows)}"
+                rows.append(({"key": key, "file": rel, "kind": rec.kind, "session": found["session"] or rec.name, "at": rec.at}, s, x))
+        record_rows[rel] = rows
+
+    stats.removed = len(set(old.files) - set(files))
+    g = CitationGraph()
+    g.files = files
+    url_ids: dict[str, int] = {}
+
+    def ids(urls: list[str]) -> list[int]:
+        return [url_ids.setdefault(u, len(url_ids)) for u in urls]
+
+    edges: dict[str, list[list[int]]] = {name: [] for name in EDGES}
+    for rel in sorted(note_rows):
+        if rel in files:
+            node, urls = note_rows[rel]
+            g.notes.append(node)
+            edges["cites"].append(ids(urls))
+    for rel in sorted(record_rows):
+        if rel in files:
+            for node, s, x in record_rows[rel]:
+                g.records.append(node)
+                edges["searched"].append(ids(s))
+                edges["extracted"].append(ids(x))
+    g.urls = list(url_ids)
+    g.pack(edges)
+    g.save(directory)
+
+    stats.notes, stats.records, stats.urls = len(g.notes), len(g.records), len(g.urls)
+    stats.edges = {name: len(g.arrays[f"{name}.idx"]) for name in EDGES}
+    stats.seconds = time.monotonic() - started
+    return g, stats
+
+
+# -- queries ---------------------------------------------------------------
+
+
+def depends(g: CitationGraph, url: str) -> dict[str, Any]:
+    """Notes citing ``url``, and the records that searched or extracted it."""
+    u = g.url_id(url)
+    if u is None:
+        return {"url": canonical(url), "notes": [], "extracted_by": [], "searched_by": []}
+    return {
+        "url": g.urls[u],
+        "notes": [g.notes[i] for i in g.citing(u)],
+        "extracted_by": [g.records[i] for i in g.citing(u, "extracted")],
+        "searched_by": [g.records[i] for i in g.citing(u, "searched")],
+    }
+
+
+def sources(g: CitationGraph, note: str) -> list[dict[str, Any]] | None:
+    """Each URL ``note`` cites, with the extract records (then searches) that fetched it.
+
+    Records from the note's own directory and from before the note come first.
+    """
+    n = g.note_id(note)
+    if n is None:
+        return None
+    me = g.notes[n]
+    folder = me["path"].rsplit("/", 1)[0]
+    at = me.get("at") or ""
+
+    def order(r: dict[str, Any]) -> tuple:
+        return (r["file"].rsplit("/", 1)[0] != folder, (r.get("at") or "") > at, -_stamp(r.get("at")))
+
+    out = []
+    for u in g.row("cites", n):
+        out.append({
+            "url": g.urls[u],
+            "extracted_by": sorted((g.records[i] for i in g.citing(u, "extracted")), key=order),
+            "searched_by": sorted((g.records[i] for i in g.citing(u, "searched")), key=order),
+        })
+    return out
+
+
+def _stamp(at: str | None) -> float:
+    try:
+        from datetime import datetime
+
+        return datetime.fromisoformat((at or "")[:19]).timestamp()
+    except ValueError:
+        return 0.0
+
+
+@dataclass
+class Uncited:
+    url: str
+    extracts: int
+    last: str | None
+    sessions: list[str]
+
+
+def uncited(g: CitationGraph, *, since: str | None = None) -> tuple[list[Uncited], dict[str, int]]:
+    """Extracted URLs no note cites (most re-extracted first), and totals for the share."""
+    cited = g.degree("cites", reverse=True)
+    rows = []
+    total = Counter()
+    for u, n_cited in enumerate(cited):
+        recs = [g.records[i] for i in g.citing(u, "extracted")]
+        if since:
+            recs = [r for r in recs if (r.get("at") or "") >= since]
+        if not recs:
+            continue
+        total["extracted_urls"] += 1
+        total["extracts"] += len(recs)
+        if n_cited:
+            total["cited_urls"] += 1
+            continue
+        total["uncited_extracts"] += len(recs)
+        last = max((r.get("at") or "" for r in recs), default="") or None
+        rows.append(Uncited(g.urls[u], len(recs), last, sorted({str(r.get("session")) for r in recs})))
+    rows.sort(key=lambda r: (-r.extracts, r.url))
+    return rows, dict(total)
@@ -0,0 +1,890 @@
+"""``research``: one entry point for the Parallel research helpers.
+
+Replaces the per-directory copies of ``parallel_search.py`` /
+``parallel_extract.py`` / ``parallel_chat.py`` / ``new_research_note.py``
+(each with its own payload shape) with subcommands over the shared client,
+and runs the session specs in ``research/sessions/`` (several at once share
+one DAG, pool, cache and budget).
+
+Cron starts this many times a day, so module import stays cheap: only
+``argparse`` is loaded up front, and each subcommand imports the client,
+cache, pipeline, etc. when it runs. ``--timing`` prints where the time
+went; ``research startup`` measures whole-process start-up.
+
+Usage:
+  scripts/research search "Snowflake Native Apps release notes" --objective "..." --max-results 5
+  scripts/research search "QUERY_ATTRIBUTION_HISTORY idle time" --rank --dedup
+  scripts/research extract https://docs.snowflake.com/en/user-guide/cost-optimize --objective "..."
+  scripts/research chat "Summarize ..." --stream --out notes/draft.md
+  scripts/research session list
+  scripts/research session run warehouse-sizing-research [--resume <log.jsonl>]
+  scripts/research session run warehouse-sizing-research warehouse-auto-suspend-research --max-searches 20
+  scripts/research index
+  scripts/research query WAREHOUSE_METERING_HISTORY idle --kind extract -n 5
+  scripts/research ledger import && scripts/research ledger show https://docs.snowflake.com/en/user-guide/cost-attributing
+  scripts/research store migrate --dry-run && scripts/research store ls --kind extract --since 2026-03-01
+  scripts/research dedup --json /tmp/dedup.json
+  scripts/research columnar export && scripts/research columnar report --topic finops
+  scripts/research entities index && scripts/research entities where ORG_USAGE.RATE_SHEET_DAILY
+  scripts/research citations build && scripts/research citations uncited --since 2026-03-01
+  scripts/research sql check && scripts/research sql bench --scales 1,10,100 --json /tmp/bench.json
+  scripts/research synth --profile bursty-etl --days 30 --out /tmp/synth && scripts/research sql bench --data /tmp/synth
+  scripts/research sql replay --scale 50 --ticks 16 --late-share 0.05     (full vs incremental telemetry refresh)
+  scripts/research allocate --data /tmp/synth --validate --out /tmp/alloc.parquet     (query-tag cost by execution overlap)
+  scripts/research note --topic finops --slug cost-attribution-mart
+  scripts/research startup -n 20
+
+Env:
+  PARALLEL_API_KEY   (required for search/extract/chat/session)
+  RESEARCH_TIMING    1 = same as --timing
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+import time
+
+STARTUP_BUDGET_MS = 100.0
+
+
+def _cache_flags(ap: argparse.ArgumentParser) -> None:
+    # Same switches as snowresearch.cache.add_cache_flags, declared here so
+    # building the parser does not import the cache module.
+    g = ap.add_mutually_exclusive_group()
+    g.add_argument("--no-cache", action="store_true", help="bypass the response cache entirely")
+    g.add_argument("--refresh", action="store_true", help="ignore cached responses but store fresh ones")
+
+
+def _require_key() -> None:
+    if not os.environ.get("PARALLEL_API_KEY"):
+        print("PARALLEL_API_KEY is not set", file=sys.stderr)
+        sys.exit(2)
+
+
+def _client(args: argparse.Namespace):
+    from snowresearch.cache import apply_cache_flags
+    from snowresearch.client import get_client
+
+    apply_cache_flags(args)
+    return get_client()
+
+
+def _print_json(obj, truncate: int = 0) -> None:
+    import json
+
+    raw = json.dumps(obj, indent=2 if sys.stdout.isatty() else None, ensure_ascii=False)
+    if truncate and len(raw) > truncate:
+        raw = raw[:truncate] + "\n[truncated]\n"
+    print(raw)
+
+
+# -- subcommands -----------------------------------------------------------
+
+
+def cmd_search(args: argparse.Namespace) -> int:
+    _require_key()
+    payload = {
+        "objective": args.objective or " ".join(args.queries),
+        "search_queries": args.queries,
+        "max_results": args.max_results,
+        "excerpts": {"max_chars_per_result": args.max_chars},
+    }
+    from snowresearch.client import ParallelAPIError
+
+    try:
+        resp = _client(args).search(payload, timeout=args.timeout)
+    except ParallelAPIError as e:
+        print(f"HTTP Error: {e.status} - {e.body}", file=sys.stderr)
+        return 1
+    except Exception as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    if args.dedup and isinstance(resp, dict) and isinstance(resp.get("results"), list):
+        from snowresearch.dedup import collapse
+
+        try:
+            resp["results"], dropped = collapse(resp["results"])
+        except RuntimeError as e:
+            print(f"Error: {e}", file=sys.stderr)
+            return 1
+        print(f"[DEDUP] {dropped} near-duplicate excerpt passages collapsed", file=sys.stderr)
+    if args.rank and isinstance(resp, dict) and isinstance(resp.get("results"), list):
+        from snowresearch.ranking import Ranker
+
+        try:
+            ranker = Ranker(ledger=getattr(_client(args), "ledger", None))
+        except RuntimeError as e:
+            print(f"Error: {e}", file=sys.stderr)
+            return 1
+        results = [r for r in resp["results"] if isinstance(r, dict) and r.get("url")]
+        ranked = ranker.rank(results, payload["objective"], [r.get("excerpts") for r in results])
+        for r, score in ranked:
+            r["ranking"] = score.as_dict()
+            print(f"[RANK] {score.explain(ranker.weights)}  {r['url']}", file=sys.stderr)
+        resp["results"] = [r for r, _ in ranked]
+    _print_json(resp, args.truncate)
+    return 0
+
+
+def cmd_extract(args: argparse.Namespace) -> int:
+    _require_key()
+    payload = {"excerpts": True, "full_content": bool(args.full_content)}
+    if args.objective:
+        payload["objective"] = args.objective
+    from snowresearch.batching import extract_many
+
+    by_url = extract_many(args.urls, payload, client=_client(args))
+    failed = [u for u, rec in by_url.items() if "error" in rec]
+    for url in failed:
+        print(f"Error: {url}: {by_url[url]['error']}", file=sys.stderr)
+    _print_json(by_url[args.urls[0]] if len(args.urls) == 1 else by_url, args.truncate)
+    return 1 if len(failed) == len(by_url) else 0
+
+
+def cmd_chat(args: argparse.Namespace) -> int:
+    _require_key()
+    messages = []
+    if args.system.strip():
+        messages.append({"role": "system", "content": args.system.strip()})
+    messages.append({"role": "user", "content": args.query})
+    payload = {"model": args.model, "stream": False, "messages": messages}
+    client = _client(args)
+
+    if args.stream:
+        from snowresearch.streaming import stream_chat
+
+        out = open(args.out, "w") if args.out else sys.stdout
+
+        def write(chunk: str) -> None:
+            out.write(chunk)
+            out.flush()
+
+        try:
+            _, stats = stream_chat(payload, url=args.url, client=client, max_chars=args.max_chars, on_text=write)
+        except Exception as e:
+            print(f"request failed: {e}", file=sys.stderr)
+            return 1
+        write("\n\n[truncated]\n" if stats.truncated else "\n")
+        if out is not sys.stdout:
+            out.close()
+            print(f"wrote {args.out}", file=sys.stderr)
+        print(f"[stream] {stats.summary()}", file=sys.stderr)
+        return 0
+
+    try:
+        obj = client.chat(payload, url=args.url, timeout=60)
+    except Exception as e:
+        print(f"request failed: {e}", file=sys.stderr)
+        return 1
+    try:
+        text = obj["choices"][0]["message"]["content"]
+    except (KeyError, IndexError, TypeError):
+        import json
+
+        text = json.dumps(obj)
+    if args.max_chars and len(text) > args.max_chars:
+        text = text[: args.max_chars] + "\n\n[truncated]"
+    if args.out:
+        with open(args.out, "w") as f:
+            f.write(text + "\n")
+        print(f"wrote {args.out}", file=sys.stderr)
+    else:
+        print(text)
+    return 0
+
+
+def cmd_session(args: argparse.Namespace) -> int:
+    from snowresearch import specs
+
+    if args.action == "list":
+        for name in specs.list_specs():
+            spec = specs.load_spec(name)
+            print(f"{name:45s} {len(spec['queries']):3d} queries  {spec.get('title', '')}")
+        return 0
+    if not args.names:
+        print("session name required", file=sys.stderr)
+        return 2
+    try:
+        loaded = [specs.load_spec(name) for name in args.names]
+    except (FileNotFoundError, RuntimeError, ValueError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 2
+    if args.action == "show":
+        for spec in loaded:
+            _print_json(spec)
+        return 0
+    if args.resume and len(loaded) > 1:
+        print("--resume takes a single session", file=sys.stderr)
+        return 2
+    _require_key()
+    client = _client(args)
+    results = specs.run_specs(
+        loaded,
+        resume=args.resume,
+        concurrency=args.concurrency,
+        budget={"search": args.max_searches, "extract": args.max_extract_urls},
+        quiet=args.quiet,
+    )
+    print("\n[POOL] " + client.summary(), file=sys.stderr)
+    return 0 if all(r.path for r in results.values()) else 1
+
+
+def cmd_index(args: argparse.Namespace) -> int:
+    from snowresearch.index import connect, index_stats, ingest
+
+    conn = connect(args.db)
+    result = ingest(args.root, conn, rebuild=args.rebuild)
+    print(f"[INDEX] {result.summary()}")
+    for rel, error in sorted(result.errors.items()) if args.verbose else ():
+        print(f"  ✗ {rel}: {error}", file=sys.stderr)
+    print(f"[INDEX] {index_stats(conn)}")
+    return 0
+
+
+def cmd_query(args: argparse.Namespace) -> int:
+    import sqlite3
+
+    from snowresearch.index import connect, search
+
+    started = time.perf_counter()
+    try:
+        hits = search(
+            " ".join(args.terms),
+            connect(args.db),
+            limit=args.n,
+            kind=args.kind,
+            topic=args.topic,
+            any_term=args.any,
+            raw=args.raw,
+            unique_urls=not args.all,
+        )
+    except sqlite3.OperationalError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 2
+    elapsed = (time.perf_counter() - started) * 1000
+    if args.json:
+        from dataclasses import asdict
+
+        _print_json([asdict(h) for h in hits])
+    else:
+        for i, h in enumerate(hits, 1):
+            tags = ", ".join(t for t in (h.kind, h.topic, (h.fetched_at or "")[:10]) if t)
+            print(f"{i}. {h.title or h.url}  ({tags}; bm25 {-h.score:.2f})")
+            print(f"   {h.url}")
+            print(f"   {' '.join(h.snippet.split())}")
+    print(f"[QUERY] {len(hits)} hits in {elapsed:.1f} ms", file=sys.stderr)
+    return 0 if hits else 1
+
+
+def cmd_ledger(args: argparse.Namespace) -> int:
+    from snowresearch.ledger import UrlLedger, import_archive
+
+    ledger = UrlLedger(max_age_days=args.max_age)
+    if args.action == "import":
+        files, records = import_archive(ledger, args.root)
+        print(f"[LEDGER] imported {records} pages from {files} extract files")
+    elif args.action == "prune":
+        print(f"[LEDGER] forgot {ledger.prune(args.older_than)} entries older than {args.older_than:g} days")
+    elif args.action == "show":
+        for url in args.urls:
+            entry = ledger.entry(url)
+            if entry is None:
+                from snowresearch.urls import canonical
+
+                print(f"{url}: not in ledger (looked up as {canonical(url)})")
+                continue
+            fresh = "fresh" if entry.age_days <= ledger.max_age_days else "stale"
+            print(
+                f"{entry.url}\n  extracted {entry.age_days:.1f} days ago ({fresh}) by {entry.source or '?'}; "
+                f"{entry.fetches} fetches, {entry.changes} content changes, served locally {entry.served}x\n"
+                f"  {'full content' if entry.full_content else 'excerpts'}, {entry.bytes} bytes at {ledger.dir / entry.location}"
+            )
+    print(f"[LEDGER] {ledger.summary()}")
+    return 0
+
+
+def cmd_store(args: argparse.Namespace) -> int:
+    from snowresearch.storage import SegmentStore, migrate
+
+    try:
+        store = SegmentStore(args.store)
+        if args.action == "migrate":
+            m = migrate(store, args.root, delete=args.delete, dry_run=args.dry_run)
+            print(
+                f"[STORE] {m.migrated} payloads {'would be ' if args.dry_run else ''}migrated, "
+                f"{m.duplicates} duplicates, {m.source_bytes / 1e6:.1f} MB of JSON in {m.files} files, "
+                f"{len(m.skipped)} non-response files skipped"
+                + (f", {m.deleted} files deleted" if m.deleted else "")
+            )
+            for rel in m.unreadable:
+                print(f"  ✗ {rel}: not valid JSON, left in place", file=sys.stderr)
+        elif args.action == "ls":
+            for rec in store.records(kind=args.kind, since=args.since, until=args.until):
+                print(f"{rec.ref}  {rec.kind:7s} {rec.at}  {rec.size:>9d} B  {rec.name or ''}  {rec.meta.get('source', '')}")
+        elif args.action == "cat":
+            for ref in args.refs:
+                _print_json(store.get(ref))
+        elif args.action == "scan":
+            started = time.perf_counter()
+            n = size = 0
+            for rec in store.scan(kind=args.kind, since=args.since, until=args.until):
+                n += 1
+                size += rec.size
+            secs = time.perf_counter() - started
+            print(f"[STORE] scanned {n} payloads ({size / 1e6:.1f} MB decoded) in {secs * 1000:.0f} ms")
+        st = store.stats()
+        print(
+            f"[STORE] {st.records} payloads in {st.segments} segments at {store.root}: "
+            f"{st.raw_bytes / 1e6:.1f} MB JSON -> {st.stored_bytes / 1e6:.1f} MB ({st.ratio:.1f}x)",
+            file=sys.stderr,
+        )
+    except (KeyError, RuntimeError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    return 0
+
+
+def cmd_dedup(args: argparse.Namespace) -> int:
+    from snowresearch.dedup import scan_archive
+
+    try:
+        report = scan_archive(args.root, threshold=args.threshold, coverage=args.coverage)
+    except RuntimeError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    print(f"[DEDUP] {report.summary()}")
+    for (domain, mirror), n in report.mirrors.most_common(args.top):
+        print(f"  {mirror} mirrors {domain}: {n} passages")
+    for url, info in list(report.covered.items())[: args.top]:
+        print(f"  ≈ {url} ({info['coverage']:.0%} covered by {info['covered_by'][0]})")
+    if args.json:
+        import json
+
+        with open(args.json, "w") as f:
+            json.dump(report.to_json(), f, indent=2)
+        print(f"[DEDUP] report written to {args.json}", file=sys.stderr)
+    return 0
+
+
+def cmd_columnar(args: argparse.Namespace) -> int:
+    from snowresearch import columnar
+
+    try:
+        if args.action == "export":
+            st = columnar.export(args.out, args.root, rebuild=args.rebuild)
+            print(f"[COLUMNAR] {st.summary()} -> {args.out or columnar.default_root()}")
+            return 0
+        r = columnar.report(args.out, topic=args.topic, top=args.top)
+    except (RuntimeError, FileNotFoundError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    if args.json:
+        _print_json(r)
+        return 0
+    print(f"[COLUMNAR] {r['rows']['results']} search results, {r['rows']['extracts']} extracts (report in {r['ms']:.0f} ms)")
+    print("\nTop domains (results, distinct URLs):")
+    for d in r["domains"]:
+        print(f"  {d['domain']:40s} {d['url_count']:6d} {d['url_count_distinct']:6d}")
+    dist = r["distribution"]
+    print(f"\nRank p10/p50/p90: {dist['rank_quantiles']}; scored results: {dist['scored']}"
+          + (f", score p10/p50/p90: {[round(q, 3) for q in dist['score_quantiles']]}" if dist["scored"] else ""))
+    print("\nPublish-date age at fetch (median days):")
+    for m in r["publish_drift"]:
+        print(f"  {m['month']}  {m['age_approximate_median']:7.0f}  ({m['age_count']} dated results)")
+    print("\nPer topic (results, distinct URLs, extracted, docs share):")
+    for t in r["topics"]:
+        print(f"  {t['topic']:28s} {t['url_count']:6d} {t['url_count_distinct']:6d} {t['extracted_mean']:8.0%} {t['docs_mean']:8.0%}")
+    return 0
+
+
+def cmd_entities(args: argparse.Namespace) -> int:
+    from snowresearch import entities
+
+    conn = entities.connect(args.db)
+    if args.action == "index":
+        st = entities.ingest(args.root, conn, rebuild=args.rebuild)
+        print(f"[ENTITIES] {st.summary()}")
+        for rel, error in sorted(st.errors.items()) if args.verbose else ():
+            print(f"  ✗ {rel}: {error}", file=sys.stderr)
+        return 0
+    if args.action == "list":
+        rows = entities.entity_counts(conn)
+        print(f"{'object':48s} {'hits':>6s} {'sql':>4s} {'notes':>6s} {'urls':>5s}")
+        for name, hits, sql, notes, urls in rows[: args.top]:
+            print(f"{name:48s} {hits:6d} {sql:4d} {notes:6d} {urls:5d}")
+        print(f"[ENTITIES] {len(rows)} objects mentioned")
+        return 0
+    if not args.names:
+        print("Error: where needs an object name", file=sys.stderr)
+        return 1
+    started = time.perf_counter()
+    found = 0
+    for name in args.names:
+        mentions = entities.where(name, conn, kind=args.kind, limit=args.n)
+        found += bool(mentions)
+        if args.json:
+            from dataclasses import asdict
+
+            _print_json([asdict(m) for m in mentions])
+            continue
+        if not mentions:
+            close = entities.suggest(name, conn)
+            print(f"{name}: no {args.kind + ' ' if args.kind else ''}mentions"
+                  + (f" (did you mean {', '.join(close)}?)" if close else ""))
+            continue
+        print(f"{name}:")
+        for m in mentions:
+            where = f"{m.file}:{m.line}" if m.kind in ("sql", "note") else f"{m.file} ({m.kind})"
+            qual = f"{m.schema}." if m.schema else ""
+            print(f"  {where}  {qual}{m.entity}" + (f" ×{m.hits}" if m.hits > 1 else ""))
+            if m.url:
+                print(f"    {m.url}")
+            if args.context:
+                print(f"    {m.context}")
+    elapsed = (time.perf_counter() - started) * 1000
+    print(f"[ENTITIES] {found}/{len(args.names)} found in {elapsed:.1f} ms", file=sys.stderr)
+    return 0 if found else 1
+
+
+def cmd_citations(args: argparse.Namespace) -> int:
+    from snowresearch import citations
+
+    if args.action == "build":
+        _, st = citations.build(args.root, args.dir, rebuild=args.rebuild)
+        print(f"[CITATIONS] {st.summary()}")
+        for rel, error in sorted(st.errors.items()) if args.verbose else ():
+            print(f"  ✗ {rel}: {error}", file=sys.stderr)
+        return 0
+    started = time.perf_counter()
+    g = citations.CitationGraph.load(args.dir)
+    if not g.files:
+        print("Error: no citation graph yet; run `research citations build`", file=sys.stderr)
+        return 1
+    if args.action in ("depends", "sources") and not args.target:
+        print(f"Error: {args.action} needs a {'URL' if args.action == 'depends' else 'note path'}", file=sys.stderr)
+        return 1
+    if args.action == "depends":
+        out = citations.depends(g, args.target)
+        if args.json:
+            _print_json(out)
+        else:
+            print(f"{out['url']}: cited by {len(out['notes'])} notes; extracted by {len(out['extracted_by'])}, "
+                  f"searched by {len(out['searched_by'])} records")
+            for n in out["notes"]:
+                print(f"  ← {n['path']}")
+            for r in out["extracted_by"][: args.top]:
+                print(f"  ⇠ {r['key']} ({r['session']}, {(r.get('at') or '')[:16]})")
+        found = bool(out["notes"] or out["extracted_by"] or out["searched_by"])
+    elif args.action == "sources":
+        out = citations.sources(g, args.target)
+        if out is None:
+            print(f"Error: {args.target} is not a note in the graph", file=sys.stderr)
+            return 1
+        if args.json:
+            _print_json(out)
+        else:
+            for src in out:
+                fetched = src["extracted_by"][:1] or src["searched_by"][:1]
+                how = "extracted" if src["extracted_by"] else "searched" if src["searched_by"] else "never fetched"
+                print(f"{src['url']}  [{how}]")
+                for r in fetched:
+                    print(f"  ⇠ {r['key']} ({r['session']}, {(r.get('at') or '')[:16]})")
+        found = bool(out)
+    else:
+        rows, total = citations.uncited(g, since=args.since)
+        if args.json:
+            from dataclasses import asdict
+
+            _print_json({"totals": total, "uncited": [asdict(r) for r in rows]})
+        else:
+            extracts = total.get("extracts", 0)
+            print(f"{len(rows)} of {total.get('extracted_urls', 0)} extracted URLs never cited; "
+                  f"{total.get('uncited_extracts', 0)} of {extracts} extracts"
+                  + (f" ({total.get('uncited_extracts', 0) / extracts:.0%})" if extracts else "")
+                  + (f" since {args.since}" if args.since else ""))
+            for r in rows[: args.top]:
+                print(f"  {r.extracts:3d}× {r.url}  (last {(r.last or '')[:10]}; {', '.join(r.sessions[:3])})")
+        found = bool(rows)
+    elapsed = (time.perf_counter() - started) * 1000
+    print(f"[CITATIONS] {args.action} in {elapsed:.1f} ms (graph load included)", file=sys.stderr)
+    return 0 if found else 1
+
+
+def cmd_sql(args: argparse.Namespace) -> int:
+    from snowresearch import sqlemu
+
+    try:
+        if args.action == "check":
+            reports = sqlemu.check(args.dir)
+            for r in reports:
+                print(f"[SQL] {r.file}: {r.summary()}")
+                for line, head, error in r.failed:
+                    print(f"  ✗ {line}: {head}: {error}")
+                for line, why in r.skipped if args.verbose else ():
+                    print(f"  - {line}: skipped ({why})")
+                for note in r.notes:
+                    print(f"  ! {note}")
+            return 1 if any(r.failed for r in reports) else 0
+        if args.action == "replay":
+            return _sql_replay(args)
+        scales = [float(s) for s in args.scales.split(",") if s.strip()]
+        progress = (lambda msg: print(f"[SQL] {msg}", file=sys.stderr)) if args.verbose else None
+        report = sqlemu.bench(scales, repeat=args.repeat, sql_dir=args.dir, days=args.days,
+                              database=args.database, data=args.data, progress=progress)
+    except (RuntimeError, ValueError, FileNotFoundError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    cols = report.scales()
+    print(f"{'step':72s} " + " ".join(f"{f'{s:g}×':>10s}" for s in cols) + "   growth")
+    for (kind, name), by_scale in report.table().items():
+        if kind == "step" and not args.steps:
+            continue
+        label = "  " + name.split(": ", 1)[-1] if kind == "step" else name
+        cells = " ".join(f"{by_scale[s].seconds * 1000:8.0f}ms" if s in by_scale else f"{'-':>10s}" for s in cols)
+        k = report.growth(by_scale)
+        flag = "" if k is None else f"   {k:.2f}" + (" super-linear" if k > sqlemu.SUPERLINEAR else "")
+        print(f"{label[:72]:72s} {cells}{flag}")
+    for f in report.failed:
+        print(f"  ✗ {f}")
+    print(f"[SQL] {len(report.rows)} timings at {', '.join(f'{s:g}×' for s in cols)}; {len(report.lint)} lint findings"
+          " (see `research sql check`)")
+    if args.json:
+        import json
+
+        with open(args.json, "w") as f:
+            json.dump(report.as_dict(), f, indent=2)
+        print(f"[SQL] report written to {args.json}", file=sys.stderr)
+    rc = 1 if report.failed else 0
+    if args.baseline:
+        import json
+
+        with open(args.baseline) as f:
+            baseline = sqlemu.BenchReport.from_dict(json.load(f))
+        slower = report.regressions(baseline, args.tolerance)
+        for line in slower:
+            print(f"  ▲ {line}")
+        print(f"[SQL] {len(slower)} regressions vs {args.baseline} (tolerance {args.tolerance:g}×)")
+        rc = rc or (1 if slower else 0)
+    return rc
+
+
+def _sql_replay(args: argparse.Namespace) -> int:
+    from snowresearch import sqlemu
+
+    progress = (lambda msg: print(f"[SQL] {msg}", file=sys.stderr)) if args.verbose else None
+    report = sqlemu.replay(args.ticks, scale=args.scale, data=args.data, late_share=args.late_share,
+                           late_max_minutes=args.late_max, sql_dir=args.dir, progress=progress)
+    print(f"{'variant':14s} {'runs':>5s} {'seconds':>9s} {'EVENTS_VIEW rows':>17s} {'all rows':>12s} {'merged':>10s}")
+    for variant in sqlemu.REPLAY:
+        t = report.totals(variant)
+        print(f"{variant:14s} {int(t['runs']):5d} {t['seconds']:9.2f} {int(t['source_scanned']):17,d} "
+              f"{int(t['scanned']):12,d} {int(t['merged']):10,d}")
+    print(f"[SQL] replay: {report.summary()}")
+    if args.json:
+        import json
+
+        with open(args.json, "w") as f:
+            json.dump(report.as_dict(), f, indent=2)
+        print(f"[SQL] report written to {args.json}", file=sys.stderr)
+    return 1 if report.mismatched else 0
+
+
+def cmd_synth(args: argparse.Namespace) -> int:
+    from snowresearch import synth
+
+    try:
+        profile = synth.Profile.named(
+            args.profile, warehouses=args.warehouses, days=args.days, queries_per_day=args.queries_per_day,
+            events_per_day=args.events_per_day, tags=args.tags, end=args.end, chunk_rows=args.chunk_rows,
+            seed=args.seed,
+        )
+        st = synth.Generator(profile).write(args.out, fmt=args.format, compression=args.compression)
+    except (RuntimeError, ValueError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    for view, n in st.rows.items():
+        print(f"  {view:48s} {n:>12,d}")
+    print(f"[SYNTH] {profile.name}: {st.summary()} -> {args.out}")
+    return 0
+
+
+def cmd_allocate(args: argparse.Namespace) -> int:
+    from snowresearch import allocate
+
+    progress = (lambda st: print(f"[ALLOCATE] {st.summary()}", file=sys.stderr)) if args.verbose else None
+    try:
+        table, stats = allocate.allocate_dir(args.data, progress=progress)
+        print(f"[ALLOCATE] {stats.summary()}")
+        if args.out:
+            import pyarrow.parquet
+
+            pyarrow.parquet.write_table(table, args.out)
+            print(f"[ALLOCATE] {table.num_rows:,d} (day, warehouse, tag) rows written to {args.out}")
+        check = allocate.validate(args.data, table, stats, sql_dir=args.dir) if args.validate else None
+    except (RuntimeError, ValueError, FileNotFoundError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    if check:
+        print(f"[ALLOCATE] vs FACT_WAREHOUSE_QUERY_TAG_DAY: {check.summary()}")
+        for w in check.worst:
+            print(f"  {w['usage_date']} {w['warehouse_name']:16s} {w['query_tag']:24s} "
+                  f"sweep {w['sweep_share']:7.2%}  SQL {w['sql_share']:7.2%}")
+    if args.json:
+        import json
+        from dataclasses import asdict
+
+        with open(args.json, "w") as f:
+            json.dump({"stats": asdict(stats), "validation": check.as_dict() if check else None}, f, indent=2)
+        print(f"[ALLOCATE] report written to {args.json}", file=sys.stderr)
+    return 0
+
+
+def cmd_note(args: argparse.Namespace) -> int:
+    from snowresearch.notes import create_note
+
+    try:
+        path = create_note(args.topic, args.slug, args.workspace)
+    except (ValueError, FileExistsError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    print(path)
+    return 0
+
+
+def cmd_startup(args: argparse.Namespace) -> int:
+    """Time whole-process start-up (interpreter + imports + parse) of a no-op invocation."""
+    import statistics
+    import subprocess
+
+    launcher = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "research")
+    cmd = [sys.executable, launcher, "--version"]
+    baseline = [sys.executable, "-c", "pass"]
+
+    def run(argv: list[str]) -> float:
+        t = time.perf_counter()
+        subprocess.run(argv, check=True, stdout=subprocess.DEVNULL)
+        return (time.perf_counter() - t) * 1000
+
+    python = statistics.median(run(baseline) for _ in range(args.n))
+    samples = sorted(run(cmd) for _ in range(args.n))
+    median = statistics.median(samples)
+    print(
+        f"research --version: median {median:.1f} ms, p90 {samples[int(0.9 * (len(samples) - 1))]:.1f} ms "
+        f"over {args.n} runs (bare python: {python:.1f} ms, research overhead: {median - python:.1f} ms)"
+    )
+    return 0 if median - python < STARTUP_BUDGET_MS else 1
+
+
+# -- parser ----------------------------------------------------------------
+
+
+def build_parser() -> argparse.ArgumentParser:
+    ap = argparse.ArgumentParser(prog="research", description="Parallel research helpers (search, extract, chat, sessions, notes).")
+    ap.add_argument("--version", action="store_true", help="print version and exit (no-op for start-up timing)")
+    ap.add_argument("--timing", action="store_true", default=bool(os.environ.get("RESEARCH_TIMING")), help="print start-up and command timing to stderr")
+    sub = ap.add_subparsers(dest="command", metavar="command")
+
+    p = sub.add_parser("search", help="Parallel Search")
+    p.add_argument("queries", nargs="+", metavar="query")
+    p.add_argument("--objective", help="search objective (default: the queries)")
+    p.add_argument("--max-results", type=int, default=10)
+    p.add_argument("--max-chars", type=int, default=8000, help="max excerpt chars per result")
+    p.add_argument("--timeout", type=float, default=120)
+    p.add_argument("--truncate", type=int, default=0, help="truncate printed output chars")
+    p.add_argument("--dedup", action="store_true", help="collapse near-duplicate excerpts across results")
+    p.add_argument("--rank", action="store_true", help="re-order results by local relevance score (printed to stderr)")
+    _cache_flags(p)
+    p.set_defaults(fn=cmd_search)
+
+    p = sub.add_parser("extract", help="Parallel Extract (batched)")
+    p.add_argument("urls", nargs="+", metavar="url")
+    p.add_argument("--objective")
+    p.add_argument("--full-content", action="store_true")
+    p.add_argument("--truncate", type=int, default=0)
+    _cache_flags(p)
+    p.set_defaults(fn=cmd_extract)
+
+    p = sub.add_parser("chat", help="Parallel Chat Completions")
+    p.add_argument("query")
+    p.add_argument("--system", default="")
+    p.add_argument("--model", default="research")
+    p.add_argument("--url", default="https://api.parallel.ai/chat/completions")
+    p.add_argument("--max-chars", type=int, default=12000)
+    p.add_argument("--stream", action="store_true", help="stream tokens as they arrive; stops early at --max-chars")
+    p.add_argument("--out", help="write the text to this note file instead of stdout")
+    p.set_defaults(fn=cmd_chat, no_cache=False, refresh=False)
+
+    p = sub.add_parser("session", help="run a session spec from research/sessions/")
+    p.add_argument("action", choices=["list", "show", "run"])
+    p.add_argument("names", nargs="*", metavar="name", help="spec name(s) or path(s); several run as one DAG")
+    p.add_argument("--resume", metavar="SESSION", help="session log (.jsonl) of an interrupted run (single session only)")
+    p.add_argument("--concurrency", type=int, default=None, help="DAG nodes in flight (default: $PARALLEL_CONCURRENCY or 8)")
+    p.add_argument("--max-searches", type=int, default=None, help="search calls allowed across all sessions")
+    p.add_argument("--max-extract-urls", type=int, default=None, help="URLs sent to extract across all sessions")
+    p.add_argument("--quiet", action="store_true")
+    _cache_flags(p)
+    p.set_defaults(fn=cmd_session)
+
+    p = sub.add_parser("index", help="index research/**/*.json into the SQLite FTS5 database (incremental)")
+    p.add_argument("--root", default=None, help="corpus root (default: $RESEARCH_DIR or <repo>/research)")
+    p.add_argument("--db", default=None, help="index path (default: $RESEARCH_INDEX)")
+    p.add_argument("--rebuild", action="store_true", help="drop and re-index everything")
+    p.add_argument("-v", "--verbose", action="store_true", help="list unreadable files")
+    p.set_defaults(fn=cmd_index)
+
+    p = sub.add_parser("query", help="BM25-ranked search over the research index")
+    p.add_argument("terms", nargs="+", metavar="term")
+    p.add_argument("-n", type=int, default=10, help="max hits")
+    p.add_argument("--kind", choices=["search", "extract"])
+    p.add_argument("--topic", help="see research/topics.json")
+    p.add_argument("--any", action="store_true", help="match any term (default: all)")
+    p.add_argument("--raw", action="store_true", help="pass the terms through as an FTS5 expression")
+    p.add_argument("--all", action="store_true", help="keep every hit, not just the best per URL")
+    p.add_argument("--json", action="store_true")
+    p.add_argument("--db", default=None, help="index path (default: $RESEARCH_INDEX)")
+    p.set_defaults(fn=cmd_query)
+
+    p = sub.add_parser("ledger", help="cross-session URL ledger of extracted pages")
+    p.add_argument("action", choices=["stats", "show", "import", "prune"])
+    p.add_argument("urls", nargs="*", metavar="url", help="for show")
+    p.add_argument("--max-age", type=float, default=None, help="freshness window in days (default: $PARALLEL_LEDGER_MAX_AGE or 14)")
+    p.add_argument("--older-than", type=float, default=90.0, help="for prune: days")
+    p.add_argument("--root", default=None, help="for import: corpus root (default: <repo>/research)")
+    p.set_defaults(fn=cmd_ledger)
+
+    p = sub.add_parser("store", help="zstd segment storage for raw search/extract payloads")
+    p.add_argument("action", choices=["stats", "ls", "cat", "scan", "migrate"])
+    p.add_argument("refs", nargs="*", metavar="ref", help="for cat: <date>:<offset> from ls")
+    p.add_argument("--store", default=None, help="store root (default: $RESEARCH_STORE or ~/.cache/snowresearch/store)")
+    p.add_argument("--kind", choices=["search", "extract"])
+    p.add_argument("--since", help="YYYY-MM-DD")
+    p.add_argument("--until", help="YYYY-MM-DD")
+    p.add_argument("--root", default=None, help="for migrate: tree to collect *.json dumps from (default: repo)")
+    p.add_argument("--delete", action="store_true", help="for migrate: remove files once they are in the store")
+    p.add_argument("--dry-run", action="store_true")
+    p.set_defaults(fn=cmd_store)
+
+    p = sub.add_parser("dedup", help="near-duplicate excerpts and covered URLs across the stored archive")
+    p.add_argument("--root", default=None, help="corpus root (default: $RESEARCH_DIR or <repo>/research)")
+    p.add_argument("--threshold", type=float, default=0.8, help="passage similarity (estimated Jaccard) that counts as duplicate")
+    p.add_argument("--coverage", type=float, default=0.8, help="share of a page's passages found elsewhere to call it covered")
+    p.add_argument("--top", type=int, default=20, help="mirror pairs / covered URLs to list")
+    p.add_argument("--json", metavar="PATH", help="write the full report as JSON")
+    p.set_defaults(fn=cmd_dedup)
+
+    p = sub.add_parser("columnar", help="Parquet export of all search results and extracts, and reports over it")
+    p.add_argument("action", choices=["export", "report"])
+    p.add_argument("--out", default=None, help="dataset root (default: $RESEARCH_COLUMNAR)")
+    p.add_argument("--root", default=None, help="for export: corpus root (default: <repo>/research)")
+    p.add_argument("--rebuild", action="store_true", help="for export: rewrite both tables from scratch")
+    p.add_argument("--topic", help="for report: one topic only")
+    p.add_argument("--top", type=int, default=10, help="for report: domains to list")
+    p.add_argument("--json", action="store_true")
+    p.set_defaults(fn=cmd_columnar)
+
+    p = sub.add_parser("entities", help="where Snowflake objects are mentioned across notes, SQL and payloads")
+    p.add_argument("action", choices=["index", "where", "list"])
+    p.add_argument("names", nargs="*", metavar="object", help="for where: QUERY_HISTORY, ORG_USAGE.RATE_SHEET_DAILY, ...")
+    p.add_argument("--kind", choices=["sql", "note", "search", "extract"], help="for where: one kind of source")
+    p.add_argument("-n", type=int, default=None, help="for where: max mentions per object")
+    p.add_argument("--context", action="store_true", help="for where: show the text around each mention")
+    p.add_argument("--top", type=int, default=40, help="for list: objects to show")
+    p.add_argument("--root", default=None, help="for index: corpus root (default: $RESEARCH_DIR or <repo>/research)")
+    p.add_argument("--rebuild", action="store_true", help="for index: rescan everything")
+    p.add_argument("-v", "--verbose", action="store_true", help="for index: list unreadable files")
+    p.add_argument("--json", action="store_true")
+    p.add_argument("--db", default=None, help="index path (default: $RESEARCH_ENTITIES)")
+    p.set_defaults(fn=cmd_entities)
+
+    p = sub.add_parser("citations", help="graph of notes -> cited URLs <- stored searches/extracts")
+    p.add_argument("action", choices=["build", "depends", "sources", "uncited"])
+    p.add_argument("target", nargs="?", help="for depends: a URL; for sources: a note path")
+    p.add_argument("--since", help="for uncited: only extracts from this date (YYYY-MM-DD) on")
+    p.add_argument("--top", type=int, default=20, help="rows to list")
+    p.add_argument("--root", default=None, help="for build: corpus root (default: $RESEARCH_DIR or <repo>/research)")
+    p.add_argument("--rebuild", action="store_true", help="for build: re-parse everything")
+    p.add_argument("-v", "--verbose", action="store_true", help="for build: list unreadable files")
+    p.add_argument("--json", action="store_true")
+    p.add_argument("--dir", default=None, help="graph directory (default: $RESEARCH_CITATIONS)")
+    p.set_defaults(fn=cmd_citations)
+
+    p = sub.add_parser("sql", help="run sql/*.sql on DuckDB stand-ins: lint check, scale benchmarks, refresh replay")
+    p.add_argument("action", choices=["check", "bench", "replay"])
+    p.add_argument("--scales", default="1,10,100", help="for bench: comma-separated scale factors")
+    p.add_argument("--repeat", type=int, default=3, help="for bench: runs per step (median reported)")
+    p.add_argument("--days", type=int, default=None, help="for bench: days of usage history at every scale")
+    p.add_argument("--steps", action="store_true", help="for bench: also list the statements inside procedures")
+    p.add_argument("--database", default=":memory:", help="for bench: DuckDB file instead of memory (spills to disk)")
+    p.add_argument("--json", metavar="PATH", help="for bench/replay: write the report as JSON")
+    p.add_argument("--baseline", metavar="PATH", help="for bench: an earlier --json report; rc 1 on regressions")
+    p.add_argument("--tolerance", type=float, default=1.5, help="for bench: slowdown factor that counts as a regression")
+    p.add_argument("--data", metavar="DIR", help="for bench/replay: `research synth` output instead of synthetic scales")
+    p.add_argument("--scale", type=float, default=1, help="for replay: scale factor of the synthetic events")
+    p.add_argument("--ticks", type=int, default=16, help="for replay: task runs, 15 minutes apart")
+    p.add_argument("--late-share", type=float, default=0.05, help="for replay: share of events that arrive late")
+    p.add_argument("--late-max", type=float, default=45, help="for replay: latest arrival, in minutes after the event")
+    p.add_argument("--dir", default=None, help="SQL directory (default: <repo>/sql)")
+    p.add_argument("-v", "--verbose", action="store_true", help="progress on stderr; list skipped statements")
+    p.set_defaults(fn=cmd_sql)
+
+    p = sub.add_parser("synth", help="generate synthetic ACCOUNT_USAGE/EVENTS_VIEW data as Parquet or CSV")
+    p.add_argument("--out", required=True, help="output directory (replaced if it holds earlier synth output)")
+    p.add_argument("--profile", default="mixed", help="diurnal, bursty-etl, idle-heavy, multi-cluster or mixed")
+    p.add_argument("--format", choices=["parquet", "csv"], default="parquet")
+    p.add_argument("--compression", default="snappy", help="for parquet: snappy, zstd, none, ...")
+    p.add_argument("--warehouses", type=int)
+    p.add_argument("--days", type=int)
+    p.add_argument("--queries-per-day", type=int)
+    p.add_argument("--events-per-day", type=int)
+    p.add_argument("--tags", type=int, help="distinct QUERY_TAG values")
+    p.add_argument("--end", help="exclusive end, ISO date (default: today 00:00 UTC)")
+    p.add_argument("--chunk-rows", type=int, help="queries held in memory at once")
+    p.add_argument("--seed", type=int)
+    p.set_defaults(fn=cmd_synth)
+
+    p = sub.add_parser("allocate", help="split metered warehouse-hours over query tags by execution overlap")
+    p.add_argument("--data", required=True, help="`research synth` output (or the same ACCOUNT_USAGE Parquet layout)")
+    p.add_argument("--out", metavar="PATH", help="write the (day, warehouse, tag) allocation as Parquet")
+    p.add_argument("--validate", action="store_true", help="compare with FACT_WAREHOUSE_QUERY_TAG_DAY in the emulator")
+    p.add_argument("--json", metavar="PATH", help="write stats and the validation as JSON")
+    p.add_argument("--dir", default=None, help="for --validate: SQL directory (default: <repo>/sql)")
+    p.add_argument("-v", "--verbose", action="store_true", help="progress per chunk on stderr")
+    p.set_defaults(fn=cmd_allocate)
+
+    p = sub.add_parser("note", help="scaffold a research note")
+    p.add_argument("--topic", required=True, help="see research/topics.json")
+    p.add_argument("--slug", required=True)
+    p.add_argument("--workspace", default=None, help="workspace root (default: $OPENCLAW_WORKSPACE)")
+    p.set_defaults(fn=cmd_note)
+
+    p = sub.add_parser("startup", help="measure process start-up time")
+    p.add_argument("-n", type=int, default=10)
+    p.set_defaults(fn=cmd_startup)
+    return ap
+
+
+def main(argv: list[str] | None = None, started: float | None = None) -> int:
+    """``started`` is ``time.perf_counter()`` taken by the launcher before any import."""
+    entered = time.perf_counter()
+    args = build_parser().parse_args(argv)
+    parsed = time.perf_counter()
+    if args.version:
+        print("research 1")
+        rc = 0
+    elif not getattr(args, "fn", None):
+        build_parser().print_help()
+        rc = 2
+    else:
+        rc = args.fn(args)
+    if args.timing:
+        done = time.perf_counter()
+        first = started if started is not None else entered
+        print(
+            f"[timing] imports {(entered - first) * 1000:.1f} ms, parse {(parsed - entered) * 1000:.1f} ms, "
+            f"command {(done - parsed) * 1000:.1f} ms, total {(done - first) * 1000:.1f} ms "
+            f"(modules loaded: {len(sys.modules)})",
+            file=sys.stderr,
+        )
+    return rc
@@ -0,0 +1,522 @@
+"""Shared Parallel API client with a pooled, keep-alive HTTP session.
+
+A fresh connection per call costs a TLS handshake for each of the 7-15
+searches and up to 12 extracts in a session. This module keeps connections
+open per host and hands them back out, so a session pays the handshake once
+per concurrent connection instead of once per call. Every JSON call goes
+through a :class:`~snowresearch.retry.RetryPolicy` (backoff on 429/5xx,
+hedging past p95, per-endpoint circuit breaker).
+
+Usage:
+  from snowresearch.client import get_client
+
+  client = get_client()
+  res = client.search({"objective": "...", "search_queries": ["..."]})
+  ext = client.extract({"urls": ["https://docs.snowflake.com/..."]})
+  print(client.stats())
+
+Env:
+  PARALLEL_API_KEY          (required for API calls)
+  PARALLEL_MAX_PER_HOST     max open connections per host (default: 8)
+  PARALLEL_CACHE            response cache mode, see :mod:`snowresearch.cache`
+  PARALLEL_RETRIES          max attempts per call, see :mod:`snowresearch.retry`
+  PARALLEL_HEDGE            0 disables hedged search/extract requests
+  PARALLEL_ARCHIVE          off disables appending raw search/extract responses to the
+                            segment store (:mod:`snowresearch.storage`; on when zstandard is installed)
+"""
+
+from __future__ import annotations
+
+import gzip
+import http.client
+import json
+import os
+import threading
+import time
+from dataclasses import asdict, dataclass, field
+from typing import Any, Iterator
+from urllib.parse import urlsplit
+
+from snowresearch.cache import ResponseCache, endpoint_of
+from snowresearch.ledger import UrlLedger
+from snowresearch.retry import RetryPolicy
+from snowresearch.storage import SegmentStore, available_store
+
+API_BASE = "https://api.parallel.ai"
+SEARCH_PATH = "/v1beta/search"
+EXTRACT_PATH = "/v1beta/extract"
+CHAT_PATH = "/chat/completions"
+BETA_HEADER = "search-extract-2025-10-10"
+
+DEFAULT_TIMEOUT = 120.0
+DEFAULT_MAX_PER_HOST = 8
+# Servers usually drop idle keep-alive sockets after ~60s; don't hand out
+# anything older than this.
+DEFAULT_IDLE_TIMEOUT = 50.0
+
+# Read-only lookups that are safe (if not free) to send twice.
+HEDGED_PATHS = (SEARCH_PATH, EXTRACT_PATH)
+
+# Raised when a pooled keep-alive socket was closed by the server between
+# requests. The request never reached the server, so it is safe to replay.
+_STALE_ERRORS = (
+    http.client.RemoteDisconnected,
+    http.client.CannotSendRequest,
+    BrokenPipeError,
+    ConnectionResetError,
+    ConnectionAbortedError,
+)
+
+
+class ParallelAPIError(Exception):
+    """Non-2xx response from the Parallel API."""
+
+    def __init__(self, status: int, body: str, url: str = "", headers: dict[str, str] | None = None):
+        super().__init__(f"HTTP {status} from {url}: {body[:500]}")
+        self.status = status
+        self.body = body
+        self.url = url
+        self.headers = headers or {}
+
+
+@dataclass
+class HostStats:
+    opened: int = 0
+    reused: int = 0
+    requests: int = 0
+    errors: int = 0
+    stale_retries: int = 0
+    bytes_received: int = 0
+    wait_seconds: float = 0.0
+
+    @property
+    def reuse_ratio(self) -> float:
+        return self.reused / self.requests if self.requests else 0.0
+
+
+@dataclass
+class _Host:
+    scheme: str
+    host: str
+    port: int | None
+    idle: list[tuple[http.client.HTTPConnection, float]] = field(default_factory=list)
+    in_use: int = 0
+    stats: HostStats = field(default_factory=HostStats)
+
+
+class ConnectionPool:
+    """Thread-safe keep-alive connection pool with a per-host connection cap.
+
+    ``acquire`` blocks once ``max_per_host`` connections to a host are in use,
+    so concurrent callers share a bounded set of sockets instead of opening
+    one each.
+    """
+
+    def __init__(
+        self,
+        max_per_host: int = DEFAULT_MAX_PER_HOST,
+        timeout: float = DEFAULT_TIMEOUT,
+        idle_timeout: float = DEFAULT_IDLE_TIMEOUT,
+    ):
+        if max_per_host < 1:
+            raise ValueError("max_per_host must be >= 1")
+        self.max_per_host = max_per_host
+        self.timeout = timeout
+        self.idle_timeout = idle_timeout
+        self._hosts: dict[tuple[str, str, int | None], _Host] = {}
+        self._cond = threading.Condition()
+
+    def _host(self, key: tuple[str, str, int | None]) -> _Host:
+        h = self._hosts.get(key)
+        if h is None:
+            h = self._hosts[key] = _Host(*key)
+        return h
+
+    def acquire(self, scheme: str, host: str, port: int | None) -> tuple[http.client.HTTPConnection, bool]:
+        """Return ``(connection, reused)`` for the host, waiting for a free slot if needed."""
+        key = (scheme, host, port)
+        started = time.monotonic()
+        with self._cond:
+            h = self._host(key)
+            while True:
+                now = time.monotonic()
+                while h.idle:
+                    conn, idle_since = h.idle.pop()
+                    if now - idle_since <= self.idle_timeout:
+                        h.in_use += 1
+                        h.stats.wait_seconds += now - started
+                        return conn, True
+                    conn.close()
+                if h.in_use < self.max_per_host:
+                    h.in_use += 1
+                    h.stats.opened += 1
+                    h.stats.wait_seconds += now - started
+                    break
+                self._cond.wait()
+        return self._connect(scheme, host, port), False
+
+    def release(self, conn: http.client.HTTPConnection, scheme: str, host: str, port: int | None, reusable: bool) -> None:
+        with self._cond:
+            h = self._host((scheme, host, port))
+            h.in_use -= 1
+            if reusable:
+                h.idle.append((conn, time.monotonic()))
+            else:
+                conn.close()
+            self._cond.notify()
+
+    def discard(self, scheme: str, host: str, port: int | None) -> http.client.HTTPConnection:
+        """Replace a stale pooled connection with a fresh one, keeping the slot."""
+        with self._cond:
+            h = self._host((scheme, host, port))
+            h.stats.opened += 1
+            h.stats.stale_retries += 1
+        return self._connect(scheme, host, port)
+
+    def _connect(self, scheme: str, host: str, port: int | None) -> http.client.HTTPConnection:
+        if scheme == "https":
+            return http.client.HTTPSConnection(host, port, timeout=self.timeout)
+        return http.client.HTTPConnection(host, port, timeout=self.timeout)
+
+    def record(self, scheme: str, host: str, port: int | None, *, reused: bool, nbytes: int = 0, error: bool = False) -> None:
+        with self._cond:
+            s = self._host((scheme, host, port)).stats
+            s.requests += 1
+            s.reused += int(reused)
+            s.bytes_received += nbytes
+            s.errors += int(error)
+
+    def stats(self) -> dict[str, dict[str, Any]]:
+        with self._cond:
+            out = {}
+            for (scheme, host, port), h in self._hosts.items():
+                name = f"{scheme}://{host}" + (f":{port}" if port else "")
+                out[name] = {
+                    **asdict(h.stats),
+                    "reuse_ratio": round(h.stats.reuse_ratio, 3),
+                    "idle": len(h.idle),
+                    "in_use": h.in_use,
+                }
+            return out
+
+    def close(self) -> None:
+        with self._cond:
+            for h in self._hosts.values():
+                for conn, _ in h.idle:
+                    conn.close()
+                h.idle.clear()
+
+
+class ParallelClient:
+    """Parallel Search/Extract/Chat client over a shared :class:`ConnectionPool`."""
+
+    def __init__(
+        self,
+        api_key: str | None = None,
+        base_url: str = API_BASE,
+        pool: ConnectionPool | None = None,
+        timeout: float = DEFAULT_TIMEOUT,
+        cache: ResponseCache | None = None,
+        retry: RetryPolicy | None = None,
+        ledger: UrlLedger | None = None,
+        archive: SegmentStore | None = None,
+    ):
+        self.api_key = api_key if api_key is not None else os.environ.get("PARALLEL_API_KEY", "")
+        self.base_url = base_url.rstrip("/")
+        self.pool = pool or ConnectionPool(timeout=timeout)
+        self.timeout = timeout
+        self.cache = cache
+        self.retry = retry or RetryPolicy()
+        self.ledger = ledger
+        self.archive = archive
+        self.archived = 0
+        self.archive_errors = 0
+        self._archive_lock = threading.Lock()
+
+    def _headers(self, auth: str) -> dict[str, str]:
+        if auth == "bearer":
+            return {"content-type": "application/json", "authorization": f"Bearer {self.api_key}"}
+        return {"content-type": "application/json", "x-api-key": self.api_key, "parallel-beta": BETA_HEADER}
+
+    def request(
+        self,
+        method: str,
+        url: str,
+        body: bytes | None = None,
+        headers: dict[str, str] | None = None,
+        timeout: float | None = None,
+    ) -> tuple[int, dict[str, str], bytes]:
+        """Send one request over a pooled connection; returns ``(status, headers, body)``."""
+        if not url.startswith(("http://", "https://")):
+            url = self.base_url + url
+        parts = urlsplit(url)
+        scheme, host, port = parts.scheme, parts.hostname or "", parts.port
+        target = parts.path or "/"
+        if parts.query:
+            target += "?" + parts.query
+        hdrs = {"accept-encoding": "gzip", "connection": "keep-alive", **(headers or {})}
+
+        conn, reused = self.pool.acquire(scheme, host, port)
+        reusable = False
+        try:
+            try:
+                resp = self._send(conn, method, target, body, hdrs, timeout)
+            except _STALE_ERRORS:
+                if not reused:
+                    raise
+                conn.close()
+                conn = self.pool.discard(scheme, host, port)
+                reused = False
+                resp = self._send(conn, method, target, body, hdrs, timeout)
+            data = resp.read()
+            reusable = not resp.will_close
+        except Exception:
+            self.pool.record(scheme, host, port, reused=reused, error=True)
+            raise
+        finally:
+            self.pool.release(conn, scheme, host, port, reusable)
+
+        self.pool.record(scheme, host, port, reused=reused, nbytes=len(data), error=resp.status >= 400)
+        resp_headers = {k.lower(): v for k, v in resp.getheaders()}
+        if resp_headers.get("content-encoding") == "gzip":
+            data = gzip.decompress(data)
+        return resp.status, resp_headers, data
+
+    def _send(self, conn, method, target, body, headers, timeout) -> http.client.HTTPResponse:
+        t = timeout if timeout is not None else self.timeout
+        conn.timeout = t
+        if conn.sock is not None:
+            conn.sock.settimeout(t)
+        conn.request(method, target, body=body, headers=headers)
+        return conn.getresponse()
+
+    def post_json(self, url: str, payload: dict[str, Any], *, auth: str = "api-key", timeout: float | None = None) -> dict[str, Any]:
+        """POST a JSON payload and decode the JSON response, raising :class:`ParallelAPIError` on non-2xx.
+
+        Search and extract responses are served from / written to ``self.cache``
+        when one is configured. Transient failures are retried by ``self.retry``;
+        :class:`~snowresearch.retry.CircuitOpenError` means the endpoint is failing and was not called.
+        """
+        if self.cache is not None:
+            hit = self.cache.get(url, payload)
+            if hit is not None:
+                return hit
+        body = json.dumps(payload).encode("utf-8")
+        headers = self._headers(auth)
+
+        def send() -> dict[str, Any]:
+            status, resp_headers, data = self.request("POST", url, body, headers, timeout)
+            text = data.decode("utf-8", errors="replace")
+            if status >= 300:
+                raise ParallelAPIError(status, text, url, resp_headers)
+            return json.loads(text)
+
+        endpoint = endpoint_of(url)
+        result = self.retry.call(endpoint, send, hedge=endpoint.endswith(HEDGED_PATHS))
+        if self.cache is not None:
+            self.cache.put(url, payload, result)
+        if self.archive is not None and endpoint.endswith(HEDGED_PATHS):
+            self._archive(endpoint, payload, result)
+        return result
+
+    def _archive(self, endpoint: str, payload: dict[str, Any], result: dict[str, Any]) -> None:
+        # Archiving is a side effect; a full disk must not fail the call that already succeeded.
+        try:
+            self.archive.append(result, kind=endpoint.rsplit("/", 1)[-1], request=payload)
+        except (OSError, RuntimeError):
+            with self._archive_lock:
+                self.archive_errors += 1
+        else:
+            with self._archive_lock:
+                self.archived += 1
+
+    def stream_lines(
+        self, url: str, payload: dict[str, Any], *, auth: str = "api-key", timeout: float | None = None
+    ) -> Iterator[bytes]:
+        """POST a JSON payload and yield the response body line by line as it arrives.
+
+        Opening the stream goes through ``self.retry`` (no hedging); once
+        lines are flowing, errors propagate. Closing the generator early
+        drops the connection instead of returning a half-read socket to the pool.
+        """
+        if not url.startswith(("http://", "https://")):
+            url = self.base_url + url
+        parts = urlsplit(url)
+        scheme, host, port = parts.scheme, parts.hostname or "", parts.port
+        target = (parts.path or "/") + (f"?{parts.query}" if parts.query else "")
+        body = json.dumps(payload).encode("utf-8")
+        hdrs = {
+            **self._headers(auth),
+            "accept": "text/event-stream",
+            "accept-encoding": "identity",
+            "connection": "keep-alive",
+        }
+
+        def open_stream() -> tuple[http.client.HTTPConnection, http.client.HTTPResponse, bool]:
+            conn, reused = self.pool.acquire(scheme, host, port)
+            try:
+                try:
+                    resp = self._send(conn, "POST", target, body, hdrs, timeout)
+                except _STALE_ERRORS:
+                    if not reused:
+                        raise
+                    conn.close()
+                    conn = self.pool.discard(scheme, host, port)
+                    reused = False
+                    resp = self._send(conn, "POST", target, body, hdrs, timeout)
+                if resp.status >= 300:
+                    data = resp.read()
+                    self.pool.record(scheme, host, port, reused=reused, nbytes=len(data), error=True)
+                    self.pool.release(conn, scheme, host, port, not resp.will_close)
+                    raise ParallelAPIError(
+                        resp.status, data.decode("utf-8", errors="replace"), url, {k.lower(): v for k, v in resp.getheaders()}
+                    )
+            except ParallelAPIError:
+                raise
+            except Exception:
+                self.pool.record(scheme, host, port, reused=reused, error=True)
+                self.pool.release(conn, scheme, host, port, False)
+                raise
+            return conn, resp, reused
+
+        conn, resp, reused = self.retry.call(endpoint_of(url), open_stream, hedge=False)
+        nbytes = 0
+        complete = False
+        try:
+            for line in iter(resp.readline, b""):
+                nbytes += len(line)
+                yield line
+            complete = True
+        finally:
+            self.pool.record(scheme, host, port, reused=reused, nbytes=nbytes, error=False)
+            self.pool.release(conn, scheme, host, port, complete and not resp.will_close)
+
+    def search(self, payload: dict[str, Any], *, timeout: float | None = None) -> dict[str, Any]:
+        return self.post_json(SEARCH_PATH, payload, timeout=timeout)
+
+    def extract(self, payload: dict[str, Any], *, timeout: float | None = None) -> dict[str, Any]:
+        """Extract ``payload["urls"]``, serving pages the URL ledger has fresh copies of locally.
+
+        Only the remaining URLs are sent; the response has the usual
+        ``results`` / ``errors`` shape, in request order, whichever way each
+        page was obtained. Fetched pages are recorded in the ledger.
+        """
+        urls = payload.get("urls") or []
+        if self.ledger is None or self.ledger.mode == "off" or not urls:
+            return self.post_json(EXTRACT_PATH, payload, timeout=timeout)
+        from snowresearch.batching import split_response
+
+        served = {}
+        for url in urls:
+            record = self.ledger.lookup(url, payload)
+            if record is not None:
+                served[url] = record
+        missing = [url for url in urls if url not in served]
+        resp: dict[str, Any] = {}
+        fetched: dict[str, dict[str, Any]] = {}
+        if missing:
+            resp = self.post_json(EXTRACT_PATH, {**payload, "urls": missing}, timeout=timeout)
+            fetched = split_response(missing, resp)
+            for url, record in fetched.items():
+                self.ledger.record(url, record)
+            if not served:
+                return resp
+        per_url = {**served, **fetched}
+        return {
+            **{k: v for k, v in resp.items() if k not in ("results", "errors")},
+            "results": [r for url in urls for r in per_url[url].get("results") or []],
+            "errors": [
+                e
+                for url in urls
+                for e in per_url[url].get("errors") or ([per_url[url]] if "error" in per_url[url] else [])
+            ],
+        }
+
+    def chat(self, payload: dict[str, Any], *, url: str = CHAT_PATH, timeout: float | None = None) -> dict[str, Any]:
+        return self.post_json(url, payload, auth="bearer", timeout=timeout)
+
+    def stats(self) -> dict[str, dict[str, Any]]:
+        return self.pool.stats()
+
+    def summary(self) -> str:
+        """Pool, cache and ledger stats, for the summary block at the end of a session."""
+        lines = [format_stats(self.stats())]
+        if self.cache is not None:
+            c = self.cache.stats()
+            lines.append(
+                f"cache ({c['mode']}): {c['hits']} hits, {c['misses']} misses, "
+                f"{c['stores']} stored, {c['evictions']} evicted"
+            )
+        if self.ledger is not None and self.ledger.mode != "off":
+            g = self.ledger.stats()
+            lines.append(
+                f"ledger ({g['mode']}, {g['max_age_days']:g}d): {g['hits']} served locally, {g['misses']} misses, "
+                f"{g['stale']} stale, {g['recorded']} recorded ({g['unchanged']} unchanged)"
+            )
+        if self.archive is not None and (self.archived or self.archive_errors):
+            lines.append(
+                f"archive: {self.archived} responses appended to {self.archive.root}"
+                + (f", {self.archive_errors} failed" if self.archive_errors else "")
+            )
+        lines.append(format_retry_stats(self.retry.stats()))
+        return "\n".join(line for line in lines if line)
+
+    def close(self) -> None:
+        self.pool.close()
+        self.retry.close()
+        if self.ledger is not None:
+            self.ledger.close()
+
+
+_default_client: ParallelClient | None = None
+_default_lock = threading.Lock()
+
+
+def _archive_from_env() -> SegmentStore | None:
+    if os.environ.get("PARALLEL_ARCHIVE", "on").strip().lower() in ("0", "off", "no"):
+        return None
+    return available_store()
+
+
+def get_client() -> ParallelClient:
+    """Return the process-wide shared client so every caller reuses one pool."""
+    global _default_client
+    with _default_lock:
+        if _default_client is None:
+            max_per_host = int(os.environ.get("PARALLEL_MAX_PER_HOST", DEFAULT_MAX_PER_HOST))
+            cache = ResponseCache.from_env()
+            ledger = UrlLedger.from_env()
+            _default_client = ParallelClient(
+                pool=ConnectionPool(max_per_host=max_per_host),
+                cache=None if cache.mode == "off" else cache,
+                retry=RetryPolicy.from_env(),
+                ledger=None if ledger.mode == "off" else ledger,
+                archive=_archive_from_env(),
+            )
+        return _default_client
+
+
+def format_stats(stats: dict[str, dict[str, Any]]) -> str:
+    """One line per host, for the summary block at the end of a session."""
+    lines = []
+    for host, s in stats.items():
+        lines.append(
+            f"{host}: {s['requests']} requests over {s['opened']} connections "
+            f"(reused {s['reused']}, ratio {s['reuse_ratio']:.0%}, errors {s['errors']})"
+        )
+    return "\n".join(lines)
+
+
+def format_retry_stats(stats: dict[str, dict[str, Any]]) -> str:
+    """One line per endpoint that needed retries, hedges or its breaker."""
+    lines = []
+    for endpoint, s in stats.items():
+        if not (s["retries"] or s["hedges"] or s["breaker_opens"] or s["fast_fails"]):
+            continue
+        p95 = f"{s['p95']:.1f}s" if s["p95"] is not None else "n/a"
+        lines.append(
+            f"{endpoint}: {s['calls']} calls, {s['retries']} retries, "
+            f"{s['hedges']} hedged ({s['hedge_wins']} won), p95 {p95}, "
+            f"breaker opened {s['breaker_opens']}x" + (" [OPEN]" if s["open"] else "")
+        )
+    return "\n".join(lines)
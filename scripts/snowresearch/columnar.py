@@ -0,0 +1,388 @@
+"""Columnar (Parquet) export of every stored search result and extract.
+
+Questions about the research history (which domains dominate, how
+result ranks and scores distribute, how publish dates drift, per-topic
+hit rates) used to mean ad-hoc loops over nested JSON in half a dozen
+shapes. :func:`export` flattens the archive (``research/**/*.json`` and
+the segment store, streamed with :mod:`snowresearch.jsonstream`) into two
+typed tables, one row per search result and one row per extracted page,
+written as a hive-partitioned Parquet dataset:
+
+  <root>/results/date=2026-03-04/topic=finops/part-00003-0.parquet
+  <root>/extracts/date=2026-03-04/topic=finops/part-00003-0.parquet
+  <root>/_manifest.json     sources exported so far, with (mtime, size)
+
+Export is incremental: sources already in the manifest are skipped and
+new ones are appended as new part files. If an exported source changed or
+disappeared, its rows cannot be removed in place, so both tables are
+rewritten from scratch (same as ``--rebuild``).
+
+:func:`dataset` opens a table as a ``pyarrow.dataset.Dataset``
+(partition columns ``date`` and ``topic`` included, so ``filter=`` on them
+prunes files); :func:`report` runs the standard summaries with
+``pyarrow.compute`` in milliseconds.
+
+Needs ``pyarrow`` (``pip install pyarrow``).
+
+Usage:
+  scripts/research columnar export [--rebuild]
+  scripts/research columnar report [--topic finops]
+
+  from snowresearch.columnar import dataset
+  results = dataset("results").to_table(filter=pc.field("topic") == "finops")
+
+Env:
+  RESEARCH_COLUMNAR   dataset root (default: ~/.cache/snowresearch/columnar)
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import re
+import shutil
+import time
+from dataclasses import dataclass, field
+from datetime import date, datetime
+from pathlib import Path
+from typing import Any, Iterator
+from urllib.parse import urlsplit
+
+DEFAULT_ROOT = Path.home() / ".cache" / "snowresearch" / "columnar"
+TABLES = ("results", "extracts")
+NO_TOPIC = "none"
+
+_DATE = re.compile(r"^\d{4}-\d{2}-\d{2}")
+
+
+def _pa() -> Any:
+    try:
+        import pyarrow
+        import pyarrow.compute  # noqa: F401
+        import pyarrow.dataset  # noqa: F401
+    except ImportError:
+        raise RuntimeError("the columnar export needs pyarrow (pip install pyarrow)") from None
+    return pyarrow
+
+
+def default_root() -> Path:
+    return Path(os.environ.get("RESEARCH_COLUMNAR") or DEFAULT_ROOT)
+
+
+def schemas() -> dict[str, Any]:
+    pa = _pa()
+    common = [
+        ("source", pa.string()),
+        ("session", pa.string()),
+        ("fetched_at", pa.timestamp("s", tz="UTC")),
+        ("url", pa.string()),
+        ("domain", pa.string()),
+        ("title", pa.string()),
+        ("publish_date", pa.date32()),
+        ("n_excerpts", pa.int16()),
+        ("excerpt_chars", pa.int32()),
+    ]
+    return {
+        "results": pa.schema(
+            [*common[:3], ("query", pa.string()), ("search_id", pa.string()), ("rank", pa.int16()),
+             *common[3:], ("score", pa.float64())]
+        ),
+        "extracts": pa.schema(
+            [*common[:3], ("extract_id", pa.string()), *common[3:], ("content_chars", pa.int32()),
+             ("full_content", pa.bool_())]
+        ),
+    }
+
+
+def partitioning() -> Any:
+    pa = _pa()
+    return pa.dataset.partitioning(pa.schema([("date", pa.date32()), ("topic", pa.string())]), flavor="hive")
+
+
+# -- flattening ------------------------------------------------------------
+
+
+def _day(value: Any) -> date | None:
+    if isinstance(value, str) and _DATE.match(value):
+        try:
+            return date.fromisoformat(value[:10])
+        except ValueError:
+            return None
+    return None
+
+
+def _domain(url: str) -> str:
+    host = (urlsplit(url).hostname or "").lower()
+    return host[4:] if host.startswith("www.") else host
+
+
+def _excerpts(result: dict[str, Any]) -> list[str]:
+    ex = result.get("excerpts")
+    return [e for e in ex if isinstance(e, str)] if isinstance(ex, list) else []
+
+
+def _fetched(ctx: dict[str, Any], default: str) -> datetime:
+    from snowresearch.index import _iso
+
+    for key in ("timestamp", "search_timestamp", "extracted_at", "fetched_at"):
+        stamp = _iso(ctx.get(key))
+        try:
+            return datetime.fromisoformat(stamp[:19])
+        except (TypeError, ValueError):
+            continue
+    return datetime.fromisoformat(default[:19])
+
+
+def flatten(
+    fp: Any, source: str, kind: str, base: dict[str, Any]
+) -> Iterator[tuple[str, dict[str, Any]]]:
+    """``(table, row)`` for every result in one stored payload (any shape).
+
+    ``kind`` is the payload's own kind (search or extract); inside session
+    outputs, ``searches[*]`` rows are search results and ``extracts[*]``
+    rows are extracted pages whatever the file is called. ``base`` holds
+    the defaults for ``topic``, ``session`` and ``fetched_at``.
+    """
+    from snowresearch.jsonstream import CONTEXT_KEYS, is_result, walk
+
+    def visit(value: Any, ctx: dict[str, Any], kind: str, rank: int | None) -> Iterator[tuple[str, dict[str, Any]]]:
+        if is_result(value):
+            yield _row(value, ctx, kind, rank)
+        elif isinstance(value, dict):
+            local = {**ctx, **{k: v for k, v in value.items() if k in CONTEXT_KEYS and isinstance(v, (str, int, float))}}
+            for key, v in value.items():
+                if key == "source" and "extract" in value:
+                    continue  # the search hit an extract was made from; counted under results already
+                sub = "extract" if key == "extract" else kind
+                if isinstance(v, list):
+                    for i, x in enumerate(v):
+                        yield from visit(x, local, sub, i)
+                elif isinstance(v, dict):
+                    yield from visit(v, local, sub, None)
+        elif isinstance(value, list):
+            for i, x in enumerate(value):
+                yield from visit(x, ctx, kind, i)
+
+    def _row(r: dict[str, Any], ctx: dict[str, Any], kind: str, rank: int | None) -> tuple[str, dict[str, Any]]:
+        url = r["url"]
+        excerpts = _excerpts(r)
+        fetched = _fetched(ctx, base["fetched_at"])
+        row = {
+            "date": fetched.date(),
+            "topic": (r.get("topic") if isinstance(r.get("topic"), str) else None) or ctx.get("topic") or base.get("topic") or NO_TOPIC,
+            "source": source,
+            "session": ctx.get("session") or base.get("session"),
+            "fetched_at": fetched,
+            "url": url,
+            "domain": _domain(url),
+            "title": r.get("title") if isinstance(r.get("title"), str) else None,
+            "publish_date": _day(r.get("publish_date")),
+            "n_excerpts": len(excerpts),
+            "excerpt_chars": sum(len(e) for e in excerpts),
+        }
+        if kind == "extract":
+            content = r.get("full_content") if isinstance(r.get("full_content"), str) else ""
+            row.update(extract_id=ctx.get("extract_id"), content_chars=len(content), full_content=bool(content))
+            return "extracts", row
+        score = r.get("score", r.get("relevance_score"))
+        row.update(
+            query=ctx.get("query") or ctx.get("objective"),
+            search_id=ctx.get("search_id"),
+            rank=rank,
+            score=float(score) if isinstance(score, (int, float)) else None,
+        )
+        return "results", row
+
+    counters: dict[tuple[str, ...], int] = {}
+    for item in walk(fp):
+        own = "extract" if "extract_id" in item.context else "search" if "search_id" in item.context else kind
+        sub = {"searches": "search", "extracts": "search"}.get(item.path[0], own) if item.path else own
+        rank = None
+        if item.path and item.path[-1] == "item":
+            rank = counters[item.path] = counters.get(item.path, -1) + 1
+        yield from visit(item.value, item.context, sub, rank)
+
+
+# -- export ----------------------------------------------------------------
+
+
+@dataclass
+class ExportStats:
+    sources: int = 0
+    exported: int = 0
+    rows: dict[str, int] = field(default_factory=lambda: {t: 0 for t in TABLES})
+    rebuilt: bool = False
+    errors: dict[str, str] = field(default_factory=dict)
+    seconds: float = 0.0
+
+    def summary(self) -> str:
+        rows = ", ".join(f"{n} {t}" for t, n in self.rows.items())
+        return (
+            f"{self.exported} of {self.sources} sources exported ({rows})"
+            + (", rebuilt" if self.rebuilt else "")
+            + (f", {len(self.errors)} truncated" if self.errors else "")
+            + f" in {self.seconds:.2f}s"
+        )
+
+
+def _sources(root: Path, store: Any) -> Iterator[tuple[str, Any, Any, dict[str, Any]]]:
+    """``(key, state, opener, base)`` for every file and store record, oldest layout first."""
+    from snowresearch.index import file_kind, file_time, topic_of
+    from snowresearch.notes import load_topics
+
+    topics = set(load_topics())
+    for path in sorted(root.glob("**/*.json")):
+        rel = path.relative_to(root).as_posix()
+        if rel.startswith("sessions/") or not path.is_file():
+            continue
+        st = path.stat()
+        base = {
+            "topic": topic_of(rel, topics),
+            "session": path.stem,
+            "fetched_at": file_time(path, rel, st.st_mtime),
+            "kind": file_kind(path, {}),
+        }
+        yield rel, [st.st_mtime, st.st_size], (lambda p=path: open(p, "rb")), base
+    for rec in store.records() if store is not None else ():
+        source = rec.meta.get("source", "")
+        if source.startswith("research/") and (root / source[len("research/"):]).exists():
+            continue  # migrated but not deleted; the file itself is exported
+        rel = source[len("research/"):] if source.startswith("research/") else ""
+        base = {"topic": topic_of(rel, topics), "session": rec.name, "fetched_at": rec.at, "kind": rec.kind}
+        yield f"store:{rec.ref}", [0, rec.size], rec.open, base
+
+
+def _write(pa: Any, out: Path, table: str, rows: list[dict[str, Any]], run: int) -> None:
+    schema = schemas()[table]
+    full = schema.append(pa.field("date", pa.date32())).append(pa.field("topic", pa.string()))
+    data = pa.Table.from_pylist(rows, schema=full)
+    pa.dataset.write_dataset(
+        data,
+        out / table,
+        format="parquet",
+        partitioning=partitioning(),
+        basename_template=f"part-{run:05d}-{{i}}.parquet",
+        existing_data_behavior="overwrite_or_ignore",
+    )
+
+
+def export(
+    out: str | Path | None = None,
+    root: str | Path | None = None,
+    *,
+    store: Any = None,
+    rebuild: bool = False,
+) -> ExportStats:
+    """Append every not-yet-exported source under ``root`` (and in the store) to the dataset at ``out``."""
+    from snowresearch.index import research_dir
+
+    pa = _pa()
+    started = time.monotonic()
+    out = Path(out or default_root())
+    root = Path(root or research_dir())
+    if store is None:
+        from snowresearch.storage import available_store
+
+        store = available_store()
+    manifest_path = out / "_manifest.json"
+    manifest = json.loads(manifest_path.read_text()) if manifest_path.exists() and not rebuild else {"run": 0, "sources": {}}
+    stats = ExportStats(rebuilt=rebuild)
+    sources = list(_sources(root, store))
+    current = {key: state for key, state, _, _ in sources}
+    known = manifest["sources"]
+    if any(current.get(key) != state for key, state in known.items()):
+        # Rows of a changed or vanished source are spread over shared part files.
+        stats.rebuilt = True
+        manifest, known = {"run": 0, "sources": {}}, {}
+    if stats.rebuilt:
+        for table in TABLES:
+            shutil.rmtree(out / table, ignore_errors=True)
+
+    run = manifest["run"] + 1
+    rows: dict[str, list[dict[str, Any]]] = {t: [] for t in TABLES}
+    for key, state, opener, base in sources:
+        stats.sources += 1
+        if key in known:
+            continue
+        stats.exported += 1
+        with opener() as f:
+            try:
+                for table, row in flatten(f, key, base["kind"], base):
+                    rows[table].append(row)
+            except ValueError as e:
+                stats.errors[key] = str(e)  # truncated dump: keep the rows before the cut
+        known[key] = state
+    out.mkdir(parents=True, exist_ok=True)
+    for table in TABLES:
+        if rows[table]:
+            _write(pa, out, table, rows[table], run)
+        stats.rows[table] = len(rows[table])
+    manifest = {"run": run, "sources": known}
+    tmp = manifest_path.with_suffix(".tmp")
+    tmp.write_text(json.dumps(manifest))
+    os.replace(tmp, manifest_path)
+    stats.seconds = time.monotonic() - started
+    return stats
+
+
+# -- reading ---------------------------------------------------------------
+
+
+def dataset(table: str, out: str | Path | None = None) -> Any:
+    """One exported table as a ``pyarrow.dataset.Dataset`` (``date``/``topic`` partition columns included)."""
+    pa = _pa()
+    if table not in TABLES:
+        raise ValueError(f"unknown table {table!r} (one of {', '.join(TABLES)})")
+    path = Path(out or default_root()) / table
+    if not path.is_dir():
+        raise FileNotFoundError(f"{path} does not exist; run `scripts/research columnar export` first")
+    return pa.dataset.dataset(path, format="parquet", partitioning=partitioning())
+
+
+def report(out: str | Path | None = None, topic: str | None = None, top: int = 10) -> dict[str, Any]:
+    """Domain share, rank/score distribution, publish-date drift and per-topic hit rates."""
+    pa = _pa()
+    pc = pa.compute
+    started = time.perf_counter()
+    flt = pc.field("topic") == topic if topic else None
+    res = dataset("results", out).to_table(filter=flt)
+    ext = dataset("extracts", out).to_table(filter=flt)
+
+    domains = (
+        res.group_by("domain").aggregate([("url", "count"), ("url", "count_distinct")])
+        .sort_by([("url_count", "descending")]).slice(0, top)
+    )
+    scores = res["score"].drop_null()
+    ranks = res["rank"].drop_null()
+    dist = {
+        "scored": len(scores),
+        "score_quantiles": pc.quantile(scores, q=[0.1, 0.5, 0.9]).to_pylist() if len(scores) else [],
+        "rank_quantiles": pc.quantile(ranks, q=[0.1, 0.5, 0.9]).to_pylist() if len(ranks) else [],
+    }
+
+    # Age of results at fetch time, per fetch month.
+    dated = res.filter(pc.is_valid(res["publish_date"]))
+    age = pc.days_between(dated["publish_date"], pc.cast(dated["fetched_at"], pa.date32()))
+    drift = (
+        pa.table({"month": pc.strftime(dated["fetched_at"], format="%Y-%m"), "age": age})
+        .group_by("month").aggregate([("age", "approximate_median"), ("age", "count")])
+        .sort_by("month")
+    )
+
+    extracted = pc.is_in(res["url"], value_set=pc.unique(ext["url"]))
+    docs = pc.equal(res["domain"], "docs.snowflake.com")
+    topics = (
+        pa.table({"topic": res["topic"], "url": res["url"], "extracted": pc.cast(extracted, pa.int64()),
+                  "docs": pc.cast(docs, pa.int64())})
+        .group_by("topic")
+        .aggregate([("url", "count"), ("url", "count_distinct"), ("extracted", "mean"), ("docs", "mean")])
+        .sort_by([("url_count", "descending")])
+    )
+    return {
+        "rows": {"results": res.num_rows, "extracts": ext.num_rows},
+        "domains": domains.to_pylist(),
+        "distribution": dist,
+        "publish_drift": drift.to_pylist(),
+        "topics": topics.to_pylist(),
+        "ms": (time.perf_counter() - started) * 1000,
+    }
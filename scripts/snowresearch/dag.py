@@ -0,0 +1,194 @@
+"""Small dependency-DAG runner for research sessions.
+
+A session is a graph of blocking steps (search -> select -> extract ->
+write). :class:`DAG` runs every node whose dependencies are done on a
+shared thread pool, so independent branches (other queries, other
+sessions) overlap, subject to:
+
+- a global cap on nodes in flight (``concurrency``);
+- optional per-kind caps (``limits={"search": 8, "extract": 3}``);
+- a :class:`Budget` that nodes draw API calls from before spending them.
+
+A node that raises is marked ``failed``, and everything downstream of it
+is ``skipped``; nodes are expected to turn ordinary API errors into
+records themselves, the way the runners' ``parallel_search`` helpers do.
+
+Usage:
+  dag = DAG()
+  dag.add("search/a", "search", lambda: ...)
+  dag.add("select/a", "select", lambda: ..., deps=["search/a"])
+  dag.run(concurrency=8, limits={"extract": 3})
+  dag.nodes["select/a"].result
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from collections import Counter
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from typing import Any, Callable, Iterable
+
+DEFAULT_CONCURRENCY = 8
+
+
+@dataclass
+class Node:
+    name: str
+    kind: str
+    fn: Callable[[], Any]
+    deps: tuple[str, ...] = ()
+    state: str = "pending"  # pending | running | done | failed | skipped
+    result: Any = None
+    error: BaseException | None = None
+    seconds: float = 0.0
+
+
+class Budget:
+    """Thread-safe call allowance per kind (``None`` = unlimited), optionally nested in a global one."""
+
+    def __init__(self, limits: dict[str, int | None] | None = None, parent: Budget | None = None):
+        self.limits = {k: v for k, v in (limits or {}).items() if v is not None}
+        self.parent = parent
+        self.used: Counter[str] = Counter()
+        self.denied: Counter[str] = Counter()
+        self._lock = threading.Lock()
+
+    def _room(self, kind: str) -> float:
+        limit = self.limits.get(kind)
+        return float("inf") if limit is None else max(0, limit - self.used[kind])
+
+    def take(self, kind: str, n: int = 1) -> int:
+        """Reserve up to ``n`` units; returns how many were granted."""
+        with self._lock:
+            granted = int(min(n, self._room(kind)))
+            if self.parent is not None and granted:
+                granted = self.parent.take(kind, granted)
+            self.used[kind] += granted
+            self.denied[kind] += n - granted
+            return granted
+
+    def refund(self, kind: str, n: int = 1) -> None:
+        """Give back units that turned out not to cost anything (cache hits)."""
+        if n <= 0:
+            return
+        with self._lock:
+            self.used[kind] -= n
+        if self.parent is not None:
+            self.parent.refund(kind, n)
+
+    def summary(self) -> dict[str, Any]:
+        with self._lock:
+            return {"used": dict(self.used), "denied": dict(self.denied), "limits": dict(self.limits)}
+
+
+class DAG:
+    def __init__(self) -> None:
+        self.nodes: dict[str, Node] = {}
+
+    def add(self, name: str, kind: str, fn: Callable[[], Any], deps: Iterable[str] = ()) -> Node:
+        if name in self.nodes:
+            raise ValueError(f"duplicate node {name!r}")
+        node = self.nodes[name] = Node(name, kind, fn, tuple(deps))
+        return node
+
+    def _check(self) -> dict[str, list[str]]:
+        """Dependents per node; raises on unknown dependencies and cycles."""
+        dependents: dict[str, list[str]] = {name: [] for name in self.nodes}
+        indegree = {}
+        for node in self.nodes.values():
+            for dep in node.deps:
+                if dep not in self.nodes:
+                    raise ValueError(f"{node.name!r} depends on unknown node {dep!r}")
+                dependents[dep].append(node.name)
+            indegree[node.name] = len(node.deps)
+        ready = [n for n, d in indegree.items() if d == 0]
+        seen = 0
+        while ready:
+            name = ready.pop()
+            seen += 1
+            for child in dependents[name]:
+                indegree[child] -= 1
+                if indegree[child] == 0:
+                    ready.append(child)
+        if seen != len(self.nodes):
+            raise ValueError("dependency cycle in DAG")
+        return dependents
+
+    def run(
+        self,
+        concurrency: int = DEFAULT_CONCURRENCY,
+        limits: dict[str, int] | None = None,
+        on_node: Callable[[Node], Any] | None = None,
+    ) -> dict[str, Node]:
+        """Run every node; returns ``self.nodes`` with states, results and timings filled in."""
+        dependents = self._check()
+        limits = limits or {}
+        waiting = {name: len(node.deps) for name, node in self.nodes.items()}
+        # Insertion order is the tie-breaker, so earlier queries/sessions start first.
+        ready = [name for name, n in waiting.items() if n == 0]
+        in_flight: dict[Future, Node] = {}
+        per_kind: Counter[str] = Counter()
+
+        def skip(name: str) -> None:
+            for child in dependents[name]:
+                node = self.nodes[child]
+                if node.state == "pending":
+                    node.state = "skipped"
+                    if on_node is not None:
+                        on_node(node)
+                    skip(child)
+
+        def call(node: Node) -> Any:
+            started = time.monotonic()
+            try:
+                return node.fn()
+            finally:
+                node.seconds = time.monotonic() - started
+
+        with ThreadPoolExecutor(max_workers=max(1, concurrency), thread_name_prefix="dag") as pool:
+            while ready or in_flight:
+                for name in list(ready):
+                    if len(in_flight) >= concurrency:
+                        break
+                    node = self.nodes[name]
+                    if node.state == "skipped":
+                        ready.remove(name)
+                        continue
+                    if node.kind in limits and per_kind[node.kind] >= limits[node.kind]:
+                        continue
+                    ready.remove(name)
+                    node.state = "running"
+                    per_kind[node.kind] += 1
+                    in_flight[pool.submit(call, node)] = node
+                if not in_flight:
+                    break
+
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for fut in done:
+                    node = in_flight.pop(fut)
+                    per_kind[node.kind] -= 1
+                    try:
+                        node.result = fut.result()
+                        node.state = "done"
+                    except Exception as e:
+                        node.error = e
+                        node.state = "failed"
+                    if on_node is not None:
+                        on_node(node)
+                    if node.state == "failed":
+                        skip(node.name)
+                        continue
+                    for child in dependents[node.name]:
+                        waiting[child] -= 1
+                        if waiting[child] == 0 and self.nodes[child].state == "pending":
+                            ready.append(child)
+        return self.nodes
+
+    def summary(self) -> dict[str, Any]:
+        by_state = Counter(node.state for node in self.nodes.values())
+        busy = Counter()
+        for node in self.nodes.values():
+            busy[node.kind] += node.seconds
+        return {"nodes": len(self.nodes), **by_state, "seconds_by_kind": {k: round(v, 2) for k, v in busy.items()}}
@@ -0,0 +1,447 @@
+"""Near-duplicate excerpt detection: MinHash signatures over word shingles, with an LSH index.
+
+Search responses overlap heavily: the same docs.snowflake.com section is
+mirrored by flexera, greybeam, select.dev and friends, and our own stored
+searches repeat across days. Exact-URL dedup misses all of that. Here each
+excerpt is split into passages, each passage into 3-word shingles, and
+each passage gets a 128-value MinHash signature (the fraction of equal
+values estimates the Jaccard similarity of two passages' shingle sets).
+:class:`LSHIndex` bands the signatures so a lookup only compares against
+passages that share a band, instead of all of them.
+
+Three uses:
+
+- :class:`ExcerptIndex` ``coverage(texts)``: how much of a candidate's
+  excerpts is already covered by passages from other URLs. A spec with
+  ``"select": {"dedup": 0.8}`` skips non-docs candidates whose excerpts
+  are at least 80% covered by something already selected, before they
+  are extracted (see :class:`~snowresearch.pipeline.SelectionPolicy`).
+- :func:`collapse`: drop near-duplicate excerpts from a list of search
+  results before they are printed or fed to synthesis
+  (``scripts/research search --dedup``).
+- :func:`scan_archive`: the same over every stored response under
+  ``research/`` and in the segment store (``scripts/research dedup``),
+  reporting duplicated text, mirror pairs, and URLs whose content other
+  URLs already cover.
+
+Signatures are computed in batches with NumPy (``pip install numpy``):
+shingle hashes are combined from per-token CRC32s, then permuted with
+multiply-shift hashing and reduced per passage with ``minimum.reduceat``.
+
+Usage:
+  from snowresearch.dedup import ExcerptIndex, collapse
+
+  idx = ExcerptIndex(threshold=0.8)
+  idx.add(url, result["excerpts"])
+  frac, by = idx.coverage(other["excerpts"], exclude=other["url"])
+
+  scripts/research dedup [--threshold 0.8] [--coverage 0.8] [--json report.json]
+"""
+
+from __future__ import annotations
+
+import hashlib
+import re
+import time
+import zlib
+from collections import Counter
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Iterable, Sequence
+from urllib.parse import urlsplit
+
+NUM_PERM = 128
+SHINGLE = 3
+DEFAULT_THRESHOLD = 0.8
+MIN_WORDS = 8  # shorter passages are headings/boilerplate, not content
+PASSAGE_WORDS = 40  # paragraphs are merged up to about this size
+BATCH_SHINGLES = 1 << 15
+BOILERPLATE_URLS = 3
+MIN_RECALL = 0.9
+
+_WORD = re.compile(r"\w+", re.UNICODE)
+_PARA = re.compile(r"\n\s*\n")
+
+
+def _np() -> Any:
+    try:
+        import numpy
+    except ImportError:
+        raise RuntimeError("near-duplicate detection needs numpy (pip install numpy)") from None
+    return numpy
+
+
+def passages(text: str, min_words: int = MIN_WORDS, target: int = PASSAGE_WORDS) -> list[str]:
+    """Split text on blank lines, merging short paragraphs into ~``target``-word passages."""
+    out: list[str] = []
+    buf: list[str] = []
+    words = 0
+    for para in _PARA.split(text or ""):
+        para = para.strip()
+        if not para:
+            continue
+        buf.append(para)
+        words += len(para.split())
+        if words >= target:
+            out.append("\n\n".join(buf))
+            buf, words = [], 0
+    if buf and (words >= min_words or not out):
+        out.append("\n\n".join(buf))
+    elif buf:
+        out[-1] += "\n\n" + "\n\n".join(buf)
+    return [p for p in out if len(p.split()) >= min_words]
+
+
+def _bands(threshold: float, num_perm: int, recall: float = MIN_RECALL) -> tuple[int, int]:
+    """``(bands, rows)``: the most selective banding that still finds ``recall`` of pairs at ``threshold``.
+
+    A pair with similarity ``s`` shares a band with probability
+    ``1 - (1 - s**rows)**bands``. Candidates are verified on the full
+    signature afterwards, so extra candidates cost time, missed ones cost
+    recall.
+    """
+    for rows in range(num_perm, 0, -1):
+        if num_perm % rows:
+            continue
+        bands = num_perm // rows
+        if 1 - (1 - threshold**rows) ** bands >= recall:
+            return bands, rows
+    return num_perm, 1
+
+
+class _Vocab(dict):
+    """Token -> CRC32, filled on first sight (token frequencies are Zipfian, so hits dominate)."""
+
+    def __missing__(self, token: str) -> int:
+        if len(self) > 1 << 20:
+            self.clear()
+        h = self[token] = zlib.crc32(token.encode())
+        return h
+
+
+class MinHasher:
+    """MinHash signatures of word-shingle sets, ``num_perm`` uint32 values per text."""
+
+    def __init__(self, num_perm: int = NUM_PERM, shingle: int = SHINGLE, seed: int = 1):
+        np = _np()
+        self.np = np
+        self.num_perm = num_perm
+        self.shingle = shingle
+        rng = np.random.default_rng(seed)
+        self._a = rng.integers(1, 1 << 63, num_perm, dtype=np.uint64) | np.uint64(1)
+        self._b = rng.integers(0, 1 << 63, num_perm, dtype=np.uint64)
+        self._mix = rng.integers(1, 1 << 63, shingle, dtype=np.uint64) | np.uint64(1)
+        self._vocab = _Vocab()
+
+    def shingles(self, text: str) -> Any:
+        np = self.np
+        toks = _WORD.findall(text.lower())
+        h = np.fromiter(map(self._vocab.__getitem__, toks), dtype=np.uint64, count=len(toks))
+        w = min(self.shingle, len(h))
+        if w == 0:
+            return np.zeros(1, dtype=np.uint64)
+        n = len(h) - w + 1
+        out = np.zeros(n, dtype=np.uint64)
+        for j in range(w):
+            out += h[j : j + n] * self._mix[j]
+        return out ^ (out >> np.uint64(29))
+
+    def signatures(self, texts: Sequence[str]) -> Any:
+        """``(len(texts), num_perm)`` uint32 signatures, computed in shingle-bounded batches."""
+        np = self.np
+        out = np.empty((len(texts), self.num_perm), dtype=np.uint32)
+        start = 0
+        while start < len(texts):
+            parts, total, end = [], 0, start
+            while end < len(texts) and (total < BATCH_SHINGLES or end == start):
+                s = self.shingles(texts[end])
+                parts.append(s)
+                total += len(s)
+                end += 1
+            sh = np.concatenate(parts)
+            offsets = np.cumsum([0] + [len(p) for p in parts[:-1]])
+            hashed = ((sh[:, None] * self._a[None, :] + self._b[None, :]) >> np.uint64(32)).astype(np.uint32)
+            out[start:end] = np.minimum.reduceat(hashed, offsets, axis=0)
+            start = end
+        return out
+
+    def signature(self, text: str) -> Any:
+        return self.signatures([text])[0]
+
+
+def similarity(a: Any, b: Any) -> float:
+    """Estimated Jaccard similarity of two signatures."""
+    return float((a == b).mean())
+
+
+class LSHIndex:
+    """Banded LSH over MinHash signatures; ``candidates`` returns keys sharing at least one band."""
+
+    def __init__(self, threshold: float = DEFAULT_THRESHOLD, num_perm: int = NUM_PERM):
+        self.threshold = threshold
+        self.bands, self.rows = _bands(threshold, num_perm)
+        self._tables: list[dict[bytes, list[Any]]] = [{} for _ in range(self.bands)]
+        self._n = 0
+
+    def __len__(self) -> int:
+        return self._n
+
+    def _keys(self, sig: Any) -> Iterable[tuple[int, bytes]]:
+        r = self.rows
+        return ((i, sig[i * r : (i + 1) * r].tobytes()) for i in range(self.bands))
+
+    def add(self, key: Any, sig: Any) -> None:
+        for i, band in self._keys(sig):
+            self._tables[i].setdefault(band, []).append(key)
+        self._n += 1
+
+    def candidates(self, sig: Any) -> set[Any]:
+        found: set[Any] = set()
+        for i, band in self._keys(sig):
+            found.update(self._tables[i].get(band, ()))
+        return found
+
+
+class ExcerptIndex:
+    """Passages seen so far, by owner URL, for near-duplicate and coverage lookups."""
+
+    def __init__(self, threshold: float = DEFAULT_THRESHOLD, num_perm: int = NUM_PERM, hasher: MinHasher | None = None):
+        self.threshold = threshold
+        self.hasher = hasher or MinHasher(num_perm)
+        self.lsh = LSHIndex(threshold, num_perm)
+        self._sigs: list[Any] = []
+        self._owners: list[str] = []
+
+    def __len__(self) -> int:
+        return len(self._sigs)
+
+    def match(self, sig: Any, exclude: str | None = None) -> int | None:
+        """Id of an indexed passage at least ``threshold`` similar (from another owner than ``exclude``)."""
+        best, best_id = self.threshold, None
+        for pid in sorted(self.lsh.candidates(sig)):  # ties go to the earliest passage
+            if exclude is not None and self._owners[pid] == exclude:
+                continue
+            s = similarity(sig, self._sigs[pid])
+            if s > best or (s == best and best_id is None):
+                best, best_id = s, pid
+        return best_id
+
+    def owner(self, pid: int) -> str:
+        return self._owners[pid]
+
+    def add_signatures(self, owner: str, sigs: Any) -> list[int]:
+        ids = []
+        for sig in sigs:
+            pid = len(self._sigs)
+            self._sigs.append(sig)
+            self._owners.append(owner)
+            self.lsh.add(pid, sig)
+            ids.append(pid)
+        return ids
+
+    def add(self, owner: str, texts: Iterable[str]) -> int:
+        """Index the passages of ``texts`` under ``owner``; returns how many were added."""
+        ps = [p for t in texts if t for p in passages(t)]
+        if ps:
+            self.add_signatures(owner, self.hasher.signatures(ps))
+        return len(ps)
+
+    def coverage(self, texts: Iterable[str], exclude: str | None = None) -> tuple[float, list[str]]:
+        """Fraction of the passages in ``texts`` already indexed under other owners, and those owners."""
+        ps = [p for t in texts if t for p in passages(t)]
+        if not ps or not self._sigs:
+            return 0.0, []
+        by: Counter[str] = Counter()
+        hit = 0
+        for sig in self.hasher.signatures(ps):
+            pid = self.match(sig, exclude)
+            if pid is not None:
+                hit += 1
+                by[self._owners[pid]] += 1
+        return hit / len(ps), [o for o, _ in by.most_common()]
+
+
+def collapse(results: Sequence[dict[str, Any]], threshold: float = DEFAULT_THRESHOLD) -> tuple[list[dict[str, Any]], int]:
+    """Copy of search ``results`` with excerpts near-duplicating an earlier one removed.
+
+    A result left with no excerpts keeps its URL and title and gains
+    ``duplicate_of`` (the URL its text came from first). Returns the
+    results and the number of excerpt passages dropped.
+    """
+    idx = ExcerptIndex(threshold)
+    out, dropped = [], 0
+    for r in results:
+        url = r.get("url") or ""
+        kept, first_dup = [], None
+        for ex in r.get("excerpts") or []:
+            ps = passages(ex) if isinstance(ex, str) else []
+            if not ps:
+                kept.append(ex)
+                continue
+            sigs = idx.hasher.signatures(ps)
+            fresh = []
+            for p, sig in zip(ps, sigs):
+                pid = idx.match(sig, exclude=url)
+                if pid is None:
+                    fresh.append(p)
+                else:
+                    dropped += 1
+                    first_dup = first_dup or idx.owner(pid)
+            idx.add_signatures(url, sigs)
+            if fresh:
+                kept.append("\n\n".join(fresh))
+        r = dict(r, excerpts=kept) if "excerpts" in r else dict(r)
+        if not kept and first_dup:
+            r["duplicate_of"] = first_dup
+        out.append(r)
+    return out, dropped
+
+
+# -- batch job over the archive ---------------------------------------------
+
+
+@dataclass
+class DedupReport:
+    results: int = 0
+    passages: int = 0
+    unique: int = 0
+    same_url: int = 0  # repeats of a URL's own earlier text (re-run searches)
+    cross_url: int = 0  # text first seen under another URL (mirrors)
+    boilerplate: int = 0  # passages repeated under BOILERPLATE_URLS+ URLs (banners, navigation)
+    chars: int = 0
+    duplicate_chars: int = 0
+    covered: dict[str, dict[str, Any]] = field(default_factory=dict)
+    mirrors: Counter = field(default_factory=Counter)
+    seconds: float = 0.0
+
+    def summary(self) -> str:
+        dup = self.passages - self.unique
+        return (
+            f"{self.results} results, {self.passages} passages: {self.unique} unique, {dup} near-duplicates "
+            f"({self.same_url} same URL, {self.cross_url} other URLs, {self.boilerplate} boilerplate), "
+            f"{self.duplicate_chars / max(self.chars, 1):.0%} of {self.chars / 1e6:.1f}M chars redundant; "
+            f"{len(self.covered)} URLs covered by others, in {self.seconds:.1f}s"
+        )
+
+    def to_json(self, top: int = 50) -> dict[str, Any]:
+        return {
+            "results": self.results,
+            "passages": self.passages,
+            "unique": self.unique,
+            "same_url": self.same_url,
+            "cross_url": self.cross_url,
+            "boilerplate": self.boilerplate,
+            "chars": self.chars,
+            "duplicate_chars": self.duplicate_chars,
+            "covered": self.covered,
+            "mirrors": [{"domain": a, "mirrors": b, "passages": n} for (a, b), n in self.mirrors.most_common(top)],
+        }
+
+
+def _domain(url: str) -> str:
+    host = urlsplit(url).hostname or ""
+    return host[4:] if host.startswith("www.") else host
+
+
+def _archive_results(root: Path, store: Any) -> Iterable[dict[str, Any]]:
+    from snowresearch.jsonstream import iter_results
+
+    for path in sorted(root.glob("**/*.json")):
+        rel = path.relative_to(root).as_posix()
+        if rel.startswith("sessions/"):
+            continue
+        with open(path, "rb") as f:
+            try:
+                yield from iter_results(f)
+            except ValueError:
+                pass  # truncated dump: keep what came before the cut
+    for rec in store.records() if store is not None else ():
+        source = rec.meta.get("source", "")
+        if source.startswith("research/") and (root / source[len("research/"):]).exists():
+            continue
+        with rec.open() as f:
+            try:
+                yield from iter_results(f)
+            except ValueError:
+                pass
+
+
+def scan_archive(
+    root: str | Path | None = None,
+    *,
+    store: Any = None,
+    threshold: float = DEFAULT_THRESHOLD,
+    coverage: float = DEFAULT_THRESHOLD,
+) -> DedupReport:
+    """Near-duplicate passages across every stored search/extract result, oldest file first.
+
+    A result is *covered* when at least ``coverage`` of its passages were
+    first seen under other URLs; those are the pages an extract could have
+    skipped. Passages that recur under ``BOILERPLATE_URLS`` or more URLs
+    count as redundant text but not as coverage.
+    """
+    from snowresearch.index import research_dir
+    from snowresearch.jsonstream import result_text
+    from snowresearch.urls import canonical
+
+    started = time.monotonic()
+    root = Path(root or research_dir())
+    if store is None:
+        from snowresearch.storage import available_store
+
+        store = available_store()
+    idx = ExcerptIndex(threshold)
+    report = DedupReport()
+    members: dict[int, set[str]] = {}  # passage cluster -> URLs it appeared under
+    seen: list[tuple[str, list[int]]] = []
+    exact: dict[bytes, int] = {}  # re-run searches repeat passages verbatim; skip hashing those
+    for result in _archive_results(root, store):
+        url = canonical(result["url"])
+        ps = passages(result_text(result))
+        if not ps:
+            continue
+        report.results += 1
+        digests = [hashlib.blake2b(p.encode(), digest_size=16).digest() for p in ps]
+        todo = {d: p for p, d in zip(ps, digests) if d not in exact}  # one signature per distinct passage
+        sigs = dict(zip(todo, idx.hasher.signatures(list(todo.values())))) if todo else {}
+        pids = []
+        for p, d in zip(ps, digests):
+            report.passages += 1
+            report.chars += len(p)
+            pid = exact.get(d)
+            if pid is None:
+                sig = sigs[d]
+                pid = idx.match(sig)
+            if pid is None:
+                report.unique += 1
+                pid = idx.add_signatures(url, [sig])[0]
+            else:
+                report.duplicate_chars += len(p)
+                if idx.owner(pid) == url:
+                    report.same_url += 1
+                else:
+                    report.cross_url += 1
+            exact.setdefault(d, pid)
+            members.setdefault(pid, set()).add(url)
+            pids.append(pid)
+        seen.append((url, pids))
+
+    # Cookie banners and site navigation repeat under every page of a site;
+    # they are redundant text but say nothing about one page covering another.
+    boiler = {pid for pid, urls in members.items() if len(urls) >= BOILERPLATE_URLS}
+    done: set[str] = set()
+    for url, pids in seen:
+        report.boilerplate += sum(1 for pid in pids if pid in boiler)
+        content = [pid for pid in pids if pid not in boiler]
+        if url in done or not content:
+            continue
+        done.add(url)
+        by = Counter(idx.owner(pid) for pid in content if idx.owner(pid) != url)
+        for owner, n in by.items():
+            if _domain(owner) != _domain(url):
+                report.mirrors[(_domain(owner), _domain(url))] += n
+        frac = sum(by.values()) / len(content)
+        if frac >= coverage:
+            report.covered[url] = {"coverage": round(frac, 3), "covered_by": [o for o, _ in by.most_common(3)]}
+    report.seconds = time.monotonic() - started
+    return report
@@ -0,0 +1,525 @@
+"""Where have we researched or used a Snowflake object? An inverted entity index.
+
+Every known object name (the ``ACCOUNT_USAGE`` / ``ORGANIZATION_USAGE`` /
+``INFORMATION_SCHEMA`` views and table functions, ``SNOWFLAKE.TELEMETRY``,
+``SYSTEM$`` functions, plus every table and view our own ``sql/*.sql``
+creates or reads) is compiled once into a single trie-shaped pattern, so
+one pass over a text finds all of them at once, the way an Aho-Corasick
+automaton would, with the matching itself running in the C regex engine
+instead of a Python loop over characters. The corpus is the research notes
+(``research/**/*.md``), ``sql/**/*.sql`` and the raw search/extract
+payloads (files and segment-store days); every hit is recorded as a
+mention ``(object, schema, file, line, source URL)`` in a SQLite table
+indexed by object, so :func:`where` is a single index lookup.
+
+Matching is case-insensitive and respects identifier boundaries, so
+``warehouse_metering_history`` in a docs URL counts and
+``WAREHOUSE_METERING_HISTORY_DAILY`` does not. ``ACCOUNT_USAGE.X``,
+``SNOWFLAKE.ORGANIZATION_USAGE.X`` and ``ORG_USAGE.X`` record the schema
+with the mention; one-word names (``USERS``, ``EVENTS``, ``SHARES``) only
+count when qualified. In notes a mention carries the URL on its line, in
+payloads the result's URL and the line within its text.
+
+Indexing is incremental the same way as :mod:`snowresearch.index`: files
+whose ``(mtime, size)`` or hash is unchanged are skipped, and only changed
+files are rescanned. When the vocabulary itself changes (a new
+``CREATE TABLE`` in ``sql/``, a new entry in :data:`CATALOG`) the whole
+corpus is rescanned once.
+
+Usage:
+  scripts/research entities index
+  scripts/research entities where QUERY_ATTRIBUTION_HISTORY
+  scripts/research entities where ORG_USAGE.RATE_SHEET_DAILY --kind note
+  scripts/research entities list --top 30
+
+Env:
+  RESEARCH_ENTITIES  database path (default: ~/.cache/snowresearch/entities.sqlite)
+  RESEARCH_DIR       corpus root (default: <repo>/research)
+"""
+
+from __future__ import annotations
+
+import bisect
+import hashlib
+import os
+import re
+import sqlite3
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Iterable, Iterator
+
+from snowresearch.index import REPO_ROOT, _sha1, file_kind, research_dir
+
+DEFAULT_DB = Path.home() / ".cache" / "snowresearch" / "entities.sqlite"
+SCHEMA_VERSION = 1
+CONTEXT_CHARS = 100  # either side of a hit, within its line
+INSERT_BATCH = 1024
+
+# Objects Snowflake ships, by schema of the SNOWFLAKE database.
+CATALOG: dict[str, tuple[str, ...]] = {
+    "ACCOUNT_USAGE": (
+        "ACCESS_HISTORY", "AGGREGATE_ACCESS_HISTORY", "AGGREGATE_QUERY_HISTORY", "AGGREGATION_POLICIES",
+        "ALERT_HISTORY", "APPLICATION_CONFIGURATION_VALUE_HISTORY", "APPLICATION_CONFIGURATIONS",
+        "APPLICATION_DAILY_USAGE_HISTORY", "APPLICATION_STATE", "AUTOMATIC_CLUSTERING_HISTORY",
+        "BLOCK_STORAGE_HISTORY", "CLASS_INSTANCES", "CLASSES", "COLUMNS", "COMPLETE_TASK_GRAPHS", "COPY_HISTORY",
+        "CORTEX_AGENT_USAGE_HISTORY", "CORTEX_AI_FUNCTIONS_USAGE_HISTORY", "CORTEX_ANALYST_USAGE_HISTORY",
+        "CORTEX_DOCUMENT_PROCESSING_USAGE_HISTORY", "CORTEX_FINE_TUNING_USAGE_HISTORY",
+        "CORTEX_FUNCTIONS_QUERY_USAGE_HISTORY", "CORTEX_FUNCTIONS_USAGE_HISTORY",
+        "CORTEX_SEARCH_DAILY_USAGE_HISTORY", "CORTEX_SEARCH_SERVING_USAGE_HISTORY", "DATA_CLASSIFICATION_LATEST",
+        "DATA_QUALITY_MONITORING_USAGE_HISTORY", "DATA_TRANSFER_HISTORY", "DATABASE_REPLICATION_USAGE_HISTORY",
+        "DATABASE_STORAGE_USAGE_HISTORY", "DATABASES", "DOCUMENT_AI_USAGE_HISTORY", "DYNAMIC_TABLE_REFRESH_HISTORY",
+        "ELEMENT_TYPES", "EVENT_USAGE_HISTORY", "EXTERNAL_ACCESS_HISTORY", "FIELDS", "FILE_FORMATS", "FUNCTIONS",
+        "GRANTS_TO_ROLES", "GRANTS_TO_SHARES", "GRANTS_TO_USERS", "HYBRID_TABLE_USAGE_HISTORY", "HYBRID_TABLES",
+        "INDEX_COLUMNS", "INDEXES", "LISTING_AUTO_FULFILLMENT_DATABASE_STORAGE_DAILY",
+        "LISTING_AUTO_FULFILLMENT_REFRESH_DAILY", "LISTINGS", "LOAD_HISTORY", "LOCK_WAIT_HISTORY", "LOGIN_HISTORY",
+        "MASKING_POLICIES", "MATERIALIZED_VIEW_REFRESH_HISTORY", "METERING_DAILY_HISTORY", "METERING_HISTORY",
+        "NETWORK_POLICIES", "NETWORK_RULE_REFERENCES", "NETWORK_RULES", "OBJECT_DEPENDENCIES", "PASSWORD_POLICIES",
+        "PIPE_USAGE_HISTORY", "PIPES", "POLICY_REFERENCES", "PROCEDURES", "PROJECTION_POLICIES",
+        "QUERY_ACCELERATION_ELIGIBLE", "QUERY_ACCELERATION_HISTORY", "QUERY_ATTRIBUTION_HISTORY", "QUERY_HISTORY",
+        "REFERENTIAL_CONSTRAINTS", "REPLICATION_GROUP_REFRESH_HISTORY", "REPLICATION_GROUP_USAGE_HISTORY",
+        "REPLICATION_USAGE_HISTORY", "RESOURCE_MONITORS", "ROLES", "ROW_ACCESS_POLICIES", "SCHEMATA",
+        "SEARCH_OPTIMIZATION_HISTORY", "SEQUENCES", "SERVERLESS_ALERT_HISTORY", "SERVERLESS_TASK_HISTORY",
+        "SESSION_POLICIES", "SESSIONS", "SHARES", "SNOWFLAKE_INTELLIGENCE_USAGE_HISTORY",
+        "SNOWPARK_CONTAINER_SERVICES_HISTORY", "SNOWPIPE_STREAMING_CLIENT_HISTORY",
+        "SNOWPIPE_STREAMING_FILE_MIGRATION_HISTORY", "STAGE_STORAGE_USAGE_HISTORY", "STAGES", "STORAGE_USAGE",
+        "TABLE_CONSTRAINTS", "TABLE_DML_HISTORY", "TABLE_STORAGE_METRICS", "TABLES", "TAG_REFERENCES", "TAGS",
+        "TASK_HISTORY", "TASK_VERSIONS", "USERS", "VIEWS", "WAREHOUSE_EVENTS_HISTORY", "WAREHOUSE_LOAD_HISTORY",
+        "WAREHOUSE_METERING_HISTORY", "WAREHOUSES",
+    ),
+    "ORGANIZATION_USAGE": (
+        "ACCOUNTS", "AUTOMATIC_CLUSTERING_HISTORY", "CONTRACT_ITEMS", "DATA_TRANSFER_DAILY_HISTORY",
+        "DATA_TRANSFER_HISTORY", "DATABASE_STORAGE_USAGE_HISTORY", "MATERIALIZED_VIEW_REFRESH_HISTORY",
+        "METERING_DAILY_HISTORY", "METERING_HISTORY", "NETWORK_POLICIES", "PIPE_USAGE_HISTORY",
+        "QUERY_ACCELERATION_HISTORY", "QUERY_ATTRIBUTION_HISTORY", "RATE_SHEET_DAILY", "REMAINING_BALANCE_DAILY",
+        "REPLICATION_GROUP_USAGE_HISTORY", "REPLICATION_USAGE_HISTORY", "SEARCH_OPTIMIZATION_HISTORY",
+        "STAGE_STORAGE_USAGE_HISTORY", "STORAGE_DAILY_HISTORY", "TAG_REFERENCES", "USAGE_IN_CURRENCY_DAILY",
+        "WAREHOUSE_METERING_HISTORY",
+    ),
+    "INFORMATION_SCHEMA": (
+        "AUTOMATIC_CLUSTERING_HISTORY", "COPY_HISTORY", "DATABASE_STORAGE_USAGE_HISTORY",
+        "DYNAMIC_TABLE_REFRESH_HISTORY", "LOGIN_HISTORY", "MATERIALIZED_VIEW_REFRESH_HISTORY", "PIPE_USAGE_HISTORY",
+        "QUERY_ACCELERATION_HISTORY", "QUERY_HISTORY", "QUERY_HISTORY_BY_SESSION", "QUERY_HISTORY_BY_USER",
+        "QUERY_HISTORY_BY_WAREHOUSE", "SERVERLESS_TASK_HISTORY", "STAGE_STORAGE_USAGE_HISTORY", "TAG_REFERENCES",
+        "TASK_DEPENDENTS", "TASK_HISTORY", "WAREHOUSE_LOAD_HISTORY", "WAREHOUSE_METERING_HISTORY",
+    ),
+    "DATA_SHARING_USAGE": (
+        "APPLICATION_STATE", "LISTING_ACCESS_HISTORY", "LISTING_CONSUMPTION_DAILY", "LISTING_EVENTS_DAILY",
+        "LISTING_TELEMETRY_DAILY", "MARKETPLACE_DISBURSEMENT_REPORT", "MARKETPLACE_PAID_USAGE_DAILY",
+    ),
+    "TELEMETRY": ("EVENTS", "EVENTS_VIEW"),
+    "CORE": ("BUDGET",),
+    "ML": ("ANOMALY_DETECTION", "FORECAST"),
+    "LOCAL": ("ANOMALY_INSIGHTS", "ACCOUNT_ROOT_BUDGET"),
+    "": (
+        "SYSTEM$CANCEL_QUERY", "SYSTEM$CLUSTERING_INFORMATION", "SYSTEM$ESTIMATE_QUERY_ACCELERATION",
+        "SYSTEM$EXPLAIN_PLAN_JSON", "SYSTEM$GET_PREDECESSOR_RETURN_VALUE", "SYSTEM$GET_TAG",
+        "SYSTEM$LOG", "SYSTEM$REFERENCE", "SYSTEM$SET_RETURN_VALUE", "SYSTEM$SHOW_BUDGETS_IN_ACCOUNT",
+        "SYSTEM$TASK_DEPENDENTS_ENABLE", "SYSTEM$WAIT",
+    ),
+}
+# How schemas are written in notes and docs -> the schema name.
+SCHEMA_ALIASES = {"ORG_USAGE": "ORGANIZATION_USAGE", "INFO_SCHEMA": "INFORMATION_SCHEMA"}
+
+_CREATE = re.compile(
+    r"\bCREATE\s+(?:OR\s+REPLACE\s+)?(?:(?:SECURE|TRANSIENT|TEMPORARY|DYNAMIC|MATERIALIZED)\s+)*"
+    r"(?:TABLE|VIEW|PROCEDURE|FUNCTION|TASK|STREAM|ALERT)\s+(?:IF\s+NOT\s+EXISTS\s+)?"
+    r"((?:[A-Za-z_][\w$]*\.){0,2}[A-Za-z_][\w$]*)",
+    re.IGNORECASE,
+)
+_SNOWFLAKE_REF = re.compile(r"\bSNOWFLAKE\.([A-Za-z_]\w*)\.([A-Za-z_][\w$]*)", re.IGNORECASE)
+_URL = re.compile(r"https?://[^\s)\]>\"'`|]+")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+CREATE TABLE IF NOT EXISTS files (
+    path TEXT PRIMARY KEY,
+    mtime REAL NOT NULL,
+    size INTEGER NOT NULL,
+    sha1 TEXT NOT NULL,
+    mentions INTEGER NOT NULL,
+    error TEXT
+);
+CREATE TABLE IF NOT EXISTS mentions (
+    entity TEXT NOT NULL,
+    schema TEXT,
+    file TEXT NOT NULL,
+    line INTEGER NOT NULL,
+    url TEXT,
+    kind TEXT NOT NULL,
+    hits INTEGER NOT NULL,
+    context TEXT
+);
+CREATE INDEX IF NOT EXISTS mentions_entity ON mentions(entity, schema);
+CREATE INDEX IF NOT EXISTS mentions_file ON mentions(file);
+"""
+
+
+def default_db() -> Path:
+    return Path(os.environ.get("RESEARCH_ENTITIES") or DEFAULT_DB)
+
+
+def connect(db: str | Path | None = None) -> sqlite3.Connection:
+    path = Path(db or default_db())
+    path.parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(path)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.executescript(SCHEMA)
+    conn.execute("INSERT OR IGNORE INTO meta VALUES ('schema', ?)", (str(SCHEMA_VERSION),))
+    return conn
+
+
+# -- vocabulary ------------------------------------------------------------
+
+
+def sql_objects(sql_dir: str | Path | None = None) -> dict[str, set[str]]:
+    """Objects our SQL creates (``FINOPS.CFG_FINOPS_PARAMS``) or reads (``SNOWFLAKE.X.Y``): name -> schemas."""
+    found: dict[str, set[str]] = {}
+    for path in sorted(Path(sql_dir or REPO_ROOT / "sql").glob("**/*.sql")):
+        text = path.read_text(errors="replace")
+        for m in _CREATE.finditer(text):
+            *qual, name = m.group(1).upper().split(".")
+            found.setdefault(name, set()).add(qual[-1] if qual else "")
+        for m in _SNOWFLAKE_REF.finditer(text):
+            found.setdefault(m.group(2).upper(), set()).add(m.group(1).upper())
+    return found
+
+
+def vocabulary(sql_dir: str | Path | None = None) -> dict[str, set[str]]:
+    """Every object name we look for -> the schemas it lives in (``""`` = unqualified)."""
+    vocab: dict[str, set[str]] = {}
+    for schema, names in CATALOG.items():
+        for name in names:
+            vocab.setdefault(name, set()).add(schema)
+    for name, schemas in sql_objects(sql_dir).items():
+        vocab.setdefault(name, set()).update(schemas)
+    return vocab
+
+
+def _trie_pattern(words: Iterable[str]) -> str:
+    """One regex alternation shaped like the trie of ``words`` (shared prefixes matched once)."""
+    trie: dict[str, Any] = {}
+    for word in words:
+        node = trie
+        for ch in word:
+            node = node.setdefault(ch, {})
+        node[""] = {}
+
+    def emit(node: dict[str, Any]) -> str:
+        end = "" in node
+        alts = [re.escape(ch) + emit(child) for ch, child in sorted(node.items()) if ch]
+        if not alts:
+            return ""
+        body = alts[0] if len(alts) == 1 else "(?:" + "|".join(alts) + ")"
+        if end:
+            return f"(?:{body})?"
+        return body
+
+    return emit(trie)
+
+
+class Matcher:
+    """All object names compiled into one pattern; :meth:`scan` finds every mention in one pass."""
+
+    def __init__(self, vocab: dict[str, set[str]]):
+        self.vocab = vocab
+        schemas = {s for ss in vocab.values() for s in ss if s} | set(SCHEMA_ALIASES)
+        # One-word names (USERS, EVENTS, BUDGET) are ordinary words unless qualified.
+        self.qualified_only = frozenset(n for n in vocab if n.isalpha())
+        self.pattern = re.compile(
+            r"(?<![\w$])(?:(?:SNOWFLAKE\.)?(?P<schema>" + _trie_pattern(schemas) + r")\.)?"
+            r"(?P<name>" + _trie_pattern(vocab) + r")(?![\w$])",
+            re.IGNORECASE,
+        )
+        self.version = hashlib.sha1(self.pattern.pattern.encode()).hexdigest()
+
+    def scan(self, text: str) -> Iterator[tuple[str, str | None, int, int]]:
+        """``(name, schema, start, end)`` for every mention in ``text``."""
+        for m in self.pattern.finditer(text):
+            name = m.group("name").upper()
+            schema = m.group("schema")
+            if schema:
+                schema = schema.upper()
+                schema = SCHEMA_ALIASES.get(schema, schema)
+            elif name in self.qualified_only:
+                continue
+            yield name, schema, m.start(), m.end()
+
+
+def _context(text: str, start: int, end: int) -> str:
+    lo = max(text.rfind("\n", 0, start) + 1, start - CONTEXT_CHARS)
+    hi = text.find("\n", end)
+    hi = min(len(text) if hi < 0 else hi, end + CONTEXT_CHARS)
+    return " ".join(text[lo:hi].split())
+
+
+def _lines(text: str) -> list[int]:
+    return [m.end() for m in re.finditer("\n", text)]
+
+
+def text_mentions(matcher: Matcher, text: str, url: str | None = None, per_line: bool = True) -> Iterator[tuple]:
+    """``(entity, schema, line, url, hits, context)`` rows for ``text``.
+
+    With ``per_line`` (notes, SQL) there is one row per object per line, and
+    a note line's own URL wins over ``url``; otherwise (a fetched page) one
+    row per object, at its first line.
+    """
+    breaks: list[int] | None = None
+    rows: dict[tuple, list] = {}
+    for name, schema, start, end in matcher.scan(text):
+        if breaks is None:
+            breaks = _lines(text)
+        line = bisect.bisect_right(breaks, start) + 1
+        key = (name, schema, line) if per_line else (name, schema)
+        row = rows.get(key)
+        if row is not None:
+            row[3] += 1
+            continue
+        link = url
+        if per_line:
+            lo = breaks[line - 2] if line > 1 else 0
+            hi = breaks[line - 1] if line <= len(breaks) else len(text)
+            found = _URL.search(text, lo, hi)
+            link = found.group(0).rstrip(".,;:") if found else url
+        rows[key] = [name, schema, line, 1, link, _context(text, start, end)]
+    for name, schema, line, hits, link, ctx in rows.values():
+        yield name, schema, line, link, hits, ctx
+
+
+# -- ingest ----------------------------------------------------------------
+
+
+@dataclass
+class EntityStats:
+    scanned: int = 0
+    unchanged: int = 0
+    indexed: int = 0
+    removed: int = 0
+    mentions: int = 0
+    entities: int = 0
+    rebuilt: bool = False
+    errors: dict[str, str] = field(default_factory=dict)
+    seconds: float = 0.0
+
+    def summary(self) -> str:
+        return (
+            f"{self.scanned} files scanned, {self.indexed} indexed ({self.mentions} mentions), "
+            f"{self.unchanged} unchanged, {self.removed} removed, {len(self.errors)} unreadable"
+            f"{' (vocabulary changed: full rescan)' if self.rebuilt else ''} in {self.seconds:.2f}s; "
+            f"{self.entities} objects known"
+        )
+
+
+def _insert(conn: sqlite3.Connection, rel: str, rows: Iterable[tuple]) -> int:
+    """Insert ``(entity, schema, line, url, hits, context, kind)`` rows for file ``rel``."""
+    n = 0
+    batch = []
+    try:
+        for entity, schema, line, url, hits, ctx, kind in rows:
+            batch.append((entity, schema, rel, line, url, kind, hits, ctx))
+            n += 1
+            if len(batch) >= INSERT_BATCH:
+                conn.executemany("INSERT INTO mentions VALUES (?, ?, ?, ?, ?, ?, ?, ?)", batch)
+                batch = []
+    finally:
+        # Flushed even when a payload breaks off, so mentions before the cut are kept.
+        conn.executemany("INSERT INTO mentions VALUES (?, ?, ?, ?, ?, ?, ?, ?)", batch)
+    return n
+
+
+def _payload_mentions(matcher: Matcher, fp: Any, kind: str) -> Iterator[tuple]:
+    """Mentions in every result of a payload; ``extract_id``/``search_id`` context overrides ``kind``."""
+    from snowresearch.jsonstream import iter_results, result_text
+
+    for result, ctx in iter_results(fp, with_context=True):
+        title = result.get("title") if isinstance(result.get("title"), str) else ""
+        text = f"{title}\n{result_text(result)}" if title else result_text(result)
+        k = "extract" if "extract_id" in ctx else "search" if "search_id" in ctx else kind
+        for row in text_mentions(matcher, text, result["url"], per_line=False):
+            yield (*row, k)
+
+
+def _sources(root: Path, sql_dir: Path) -> Iterator[tuple[str, Path, str]]:
+    """``(key, path, kind)`` for every file of the corpus; kind ``json`` is settled per result."""
+    for path in sorted(root.glob("**/*")):
+        if not path.is_file() or path.suffix not in (".md", ".json"):
+            continue
+        rel = path.relative_to(root).as_posix()
+        if rel.startswith("sessions/") or rel.startswith("store/"):
+            continue
+        yield f"research/{rel}", path, "note" if path.suffix == ".md" else "json"
+    for path in sorted(sql_dir.glob("**/*.sql")):
+        yield f"sql/{path.relative_to(sql_dir).as_posix()}", path, "sql"
+
+
+def _drop(conn: sqlite3.Connection, rel: str) -> None:
+    conn.execute("DELETE FROM mentions WHERE file = ?", (rel,))
+
+
+def ingest(
+    root: str | Path | None = None,
+    db: str | Path | sqlite3.Connection | None = None,
+    *,
+    sql_dir: str | Path | None = None,
+    rebuild: bool = False,
+    store: Any = None,
+) -> EntityStats:
+    """Bring the mention index up to date with notes, SQL, payloads and the segment store."""
+    started = time.monotonic()
+    root = Path(root or research_dir())
+    sql_dir = Path(sql_dir or REPO_ROOT / "sql")
+    conn = db if isinstance(db, sqlite3.Connection) else connect(db)
+    matcher = Matcher(vocabulary(sql_dir))
+    stats = EntityStats(entities=len(matcher.vocab))
+    row = conn.execute("SELECT value FROM meta WHERE key = 'vocabulary'").fetchone()
+    if rebuild or (row and row[0] != matcher.version):
+        stats.rebuilt = not rebuild
+        conn.executescript("DELETE FROM mentions; DELETE FROM files;")
+    conn.execute("INSERT OR REPLACE INTO meta VALUES ('vocabulary', ?)", (matcher.version,))
+    known = {row[0]: row[1:] for row in conn.execute("SELECT path, mtime, size, sha1 FROM files")}
+    seen = set()
+
+    for rel, path, kind in _sources(root, sql_dir):
+        seen.add(rel)
+        stats.scanned += 1
+        st = path.stat()
+        prev = known.get(rel)
+        if prev and prev[0] == st.st_mtime and prev[1] == st.st_size:
+            stats.unchanged += 1
+            continue
+        sha1 = _sha1(path)
+        if prev and prev[2] == sha1:
+            conn.execute("UPDATE files SET mtime = ?, size = ? WHERE path = ?", (st.st_mtime, st.st_size, rel))
+            stats.unchanged += 1
+            continue
+
+        _drop(conn, rel)
+        error = None
+        n = 0
+        if kind == "json":
+            try:
+                with open(path, "rb") as f:
+                    n = _insert(conn, rel, _payload_mentions(matcher, f, file_kind(path, {})))
+            except ValueError as e:
+                # Truncated dumps: keep the mentions before the cut, record the error.
+                n = conn.execute("SELECT COUNT(*) FROM mentions WHERE file = ?", (rel,)).fetchone()[0]
+                error = f"invalid JSON: {e}" + (f" ({n} mentions salvaged)" if n else "")
+                stats.errors[rel] = error
+        else:
+            text = path.read_text(errors="replace")
+            n = _insert(conn, rel, ((*row, kind) for row in text_mentions(matcher, text)))
+        conn.execute(
+            "INSERT OR REPLACE INTO files (path, mtime, size, sha1, mentions, error) VALUES (?, ?, ?, ?, ?, ?)",
+            (rel, st.st_mtime, st.st_size, sha1, n, error),
+        )
+        stats.indexed += 1
+        stats.mentions += n
+
+    if store is None:
+        from snowresearch.storage import available_store
+
+        store = available_store()
+    for day in store.days() if store is not None else ():
+        rel = f"store:{day}"
+        seen.add(rel)
+        stats.scanned += 1
+        st = store.day_stat(day)
+        prev = known.get(rel)
+        if prev and prev[0] == st.st_mtime and prev[1] == st.st_size:
+            stats.unchanged += 1
+            continue
+        _drop(conn, rel)
+        n = 0
+        for rec in store.scan(since=day, until=day):
+            source = rec.meta.get("source", "")
+            if source.startswith("research/") and (root / source[len("research/"):]).exists():
+                continue  # migrated but not deleted; the file itself is scanned
+            with rec.open() as f:
+                n += _insert(conn, rel, _payload_mentions(matcher, f, rec.kind))
+        conn.execute(
+            "INSERT OR REPLACE INTO files (path, mtime, size, sha1, mentions, error) VALUES (?, ?, ?, ?, ?, NULL)",
+            (rel, st.st_mtime, st.st_size, "", n),
+        )
+        stats.indexed += 1
+        stats.mentions += n
+
+    for rel in set(known) - seen:
+        _drop(conn, rel)
+        conn.execute("DELETE FROM files WHERE path = ?", (rel,))
+        stats.removed += 1
+    conn.commit()
+    stats.seconds = time.monotonic() - started
+    return stats
+
+
+# -- query -----------------------------------------------------------------
+
+
+@dataclass
+class Mention:
+    entity: str
+    schema: str | None
+    file: str
+    line: int
+    url: str | None
+    kind: str
+    hits: int
+    context: str
+
+
+def parse_name(text: str) -> tuple[str, str | None]:
+    """``snowflake.org_usage.rate_sheet_daily`` -> ``("RATE_SHEET_DAILY", "ORGANIZATION_USAGE")``."""
+    parts = text.strip().strip('"').upper().split(".")
+    if parts[0] == "SNOWFLAKE" and len(parts) > 1:
+        parts = parts[1:]
+    schema = SCHEMA_ALIASES.get(parts[-2], parts[-2]) if len(parts) > 1 else None
+    return parts[-1], schema
+
+
+def where(
+    name: str,
+    db: str | Path | sqlite3.Connection | None = None,
+    *,
+    kind: str | None = None,
+    limit: int | None = None,
+) -> list[Mention]:
+    """Mentions of ``name`` (optionally schema-qualified), our own files (SQL, notes) first."""
+    conn = db if isinstance(db, sqlite3.Connection) else connect(db)
+    entity, schema = parse_name(name)
+    sql = "SELECT entity, schema, file, line, url, kind, hits, context FROM mentions WHERE entity = ?"
+    params: list[Any] = [entity]
+    if schema:
+        sql += " AND schema = ?"
+        params.append(schema)
+    if kind:
+        sql += " AND kind = ?"
+        params.append(kind)
+    sql += " ORDER BY CASE kind WHEN 'sql' THEN 0 WHEN 'note' THEN 1 ELSE 2 END, file DESC, line"
+    if limit:
+        sql += f" LIMIT {int(limit)}"
+    return [Mention(*row) for row in conn.execute(sql, params)]
+
+
+def entity_counts(db: str | Path | sqlite3.Connection | None = None) -> list[tuple[str, int, int, int, int]]:
+    """``(entity, mentions, sql files, notes, source urls)``, most mentioned first."""
+    conn = db if isinstance(db, sqlite3.Connection) else connect(db)
+    return conn.execute(
+        "SELECT entity, SUM(hits) AS n, "
+        "COUNT(DISTINCT CASE kind WHEN 'sql' THEN file END), "
+        "COUNT(DISTINCT CASE kind WHEN 'note' THEN file END), "
+        "COUNT(DISTINCT CASE WHEN kind NOT IN ('sql', 'note') THEN url END) "
+        "FROM mentions GROUP BY entity ORDER BY n DESC"
+    ).fetchall()
+
+
+def suggest(name: str, db: str | Path | sqlite3.Connection | None = None) -> list[str]:
+    """Indexed names close to ``name``, for a lookup that found nothing (empty if ``name`` itself is indexed)."""
+    import difflib
+
+    conn = db if isinstance(db, sqlite3.Connection) else connect(db)
+    names = [row[0] for row in conn.execute("SELECT DISTINCT entity FROM mentions")]
+    entity, _ = parse_name(name)
+    if entity in names:
+        return []
+    return [n for n in names if entity in n][:5] or difflib.get_close_matches(entity, names, n=5)
@@ -0,0 +1,129 @@
+"""Bounded-concurrency asyncio fan-out for Parallel API calls.
+
+Looping over ``SEARCH_QUERIES`` one at a time with a fixed
+``time.sleep(0.3-0.5)`` between calls makes a search phase take the sum of
+every latency. ``run_concurrent`` starts the calls together, capped by a
+semaphore, and paces request starts with a token bucket instead of sleeps,
+so a phase takes roughly as long as its slowest call.
+
+The blocking client calls run in worker threads (``asyncio.to_thread``) and
+share the process-wide keep-alive pool from :mod:`snowresearch.client`.
+
+Usage:
+  from snowresearch.executor import run_concurrent
+
+  results = run_concurrent(parallel_search, SEARCH_QUERIES)   # input order
+
+Env:
+  PARALLEL_CONCURRENCY   max calls in flight (default: 8; matches the pool's per-host cap)
+  PARALLEL_RATE          sustained request starts per second (default: 4)
+  PARALLEL_BURST         token bucket capacity (default: same as concurrency)
+"""
+
+from __future__ import annotations
+
+import asyncio
+import os
+import time
+from typing import Any, Callable, Iterable, TypeVar
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+DEFAULT_CONCURRENCY = 8
+DEFAULT_RATE = 4.0
+
+
+class TokenBucket:
+    """Async token bucket: ``rate`` tokens per second, at most ``capacity`` banked."""
+
+    def __init__(self, rate: float, capacity: float | None = None):
+        if rate <= 0:
+            raise ValueError("rate must be > 0")
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(1.0, rate)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self, tokens: float = 1.0) -> float:
+        """Wait until ``tokens`` are available and take them; returns seconds waited."""
+        waited = 0.0
+        # The lock keeps waiters FIFO so a burst can't starve an early caller.
+        async with self._lock:
+            while True:
+                self._refill()
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return waited
+                delay = (tokens - self._tokens) / self.rate
+                await asyncio.sleep(delay)
+                waited += delay
+
+
+def _env_number(name: str, default: float) -> float:
+    raw = os.environ.get(name)
+    return float(raw) if raw else default
+
+
+async def gather_bounded(
+    fn: Callable[[T], R],
+    items: Iterable[T],
+    *,
+    concurrency: int,
+    limiter: TokenBucket | None = None,
+    on_result: Callable[[int, T, R, float], Any] | None = None,
+) -> list[R]:
+    """Run blocking ``fn(item)`` for every item in threads; results keep input order.
+
+    ``on_result(index, item, result, seconds)`` fires as each call completes,
+    so runners can print progress in completion order.
+    """
+    items = list(items)
+    sem = asyncio.Semaphore(max(1, concurrency))
+    results: list[Any] = [None] * len(items)
+
+    async def one(i: int, item: T) -> None:
+        async with sem:
+            if limiter is not None:
+                await limiter.acquire()
+            started = time.monotonic()
+            res = await asyncio.to_thread(fn, item)
+            results[i] = res
+            if on_result is not None:
+                on_result(i, item, res, time.monotonic() - started)
+
+    await asyncio.gather(*(one(i, item) for i, item in enumerate(items)))
+    return results
+
+
+def run_concurrent(
+    fn: Callable[[T], R],
+    items: Iterable[T],
+    *,
+    concurrency: int | None = None,
+    rate: float | None = None,
+    burst: float | None = None,
+    on_result: Callable[[int, T, R, float], Any] | None = None,
+) -> list[R]:
+    """Synchronous entry point for scripts: fan ``fn`` out over ``items`` and wait.
+
+    ``fn`` is expected to handle its own errors the way the runners'
+    ``parallel_search`` helpers do (return an ``{"error": ...}`` record); an
+    exception that escapes ``fn`` is re-raised here.
+    """
+    concurrency = int(concurrency or _env_number("PARALLEL_CONCURRENCY", DEFAULT_CONCURRENCY))
+    rate = rate or _env_number("PARALLEL_RATE", DEFAULT_RATE)
+    burst = burst or _env_number("PARALLEL_BURST", concurrency)
+
+    async def main() -> list[R]:
+        limiter = TokenBucket(rate, burst)
+        return await gather_bounded(fn, items, concurrency=concurrency, limiter=limiter, on_result=on_result)
+
+    return asyncio.run(main())
+
@@ -0,0 +1,474 @@
+"""SQLite FTS5 index over the raw research corpus (``research/**/*.json``).
+
+Hundreds of ``search_*.json`` / ``extract_*.json`` dumps have piled up
+under ``research/`` in half a dozen shapes (raw API responses, session
+outputs, ad-hoc lists). :func:`ingest` walks every file, pulls out each
+``{"url", "title", "excerpts" | "full_content" | ...}`` document it finds,
+and stores it with its URL, kind, topic, session, query and fetch time in
+a SQLite database with an FTS5 index over title, excerpts and extracted
+text. :func:`search` answers BM25-ranked queries in milliseconds.
+
+Payloads already folded into the zstd segment store are indexed too.
+
+Ingest is incremental: a file whose ``(mtime, size)`` is unchanged is not
+even opened, and one that was touched but hashes the same is not
+re-parsed, so re-indexing costs O(new or changed files). Files that no
+longer exist are dropped. Files and store records are parsed as streams
+(:mod:`snowresearch.jsonstream`), so memory stays flat however large a
+dump is. Truncated or invalid JSON is recorded (so it is not retried
+until it changes) and reported, not fatal; documents before the cut are
+kept.
+
+Usage:
+  scripts/research index [--rebuild]
+  scripts/research query WAREHOUSE_METERING_HISTORY idle credits --kind extract -n 5
+
+Env:
+  RESEARCH_INDEX   database path (default: ~/.cache/snowresearch/research_index.sqlite)
+  RESEARCH_DIR     corpus root (default: <repo>/research)
+"""
+
+from __future__ import annotations
+
+import hashlib
+import os
+import re
+import sqlite3
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import IO, Any, Iterable, Iterator
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+DEFAULT_DB = Path.home() / ".cache" / "snowresearch" / "research_index.sqlite"
+SCHEMA_VERSION = 1
+
+# Fields that carry indexable text, in the order they are concatenated.
+EXCERPT_KEYS = ("excerpts", "snippet", "description")
+CONTENT_KEYS = ("full_content", "content", "text", "markdown")
+INSERT_BATCH = 256
+# Per-column BM25 weights: a hit in the title beats one in the excerpts, which beats body text.
+BM25_WEIGHTS = (10.0, 3.0, 1.0)
+
+_EPOCH_IN_NAME = re.compile(r"_(1[5-9]\d{8})(?:\D|$)")
+_DATE_IN_PATH = re.compile(r"(\d{4}-\d{2}-\d{2})(?:[/_](\d{4})\b)?")
+_WORD = re.compile(r"\w+", re.UNICODE)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+CREATE TABLE IF NOT EXISTS files (
+    path TEXT PRIMARY KEY,
+    mtime REAL NOT NULL,
+    size INTEGER NOT NULL,
+    sha1 TEXT NOT NULL,
+    docs INTEGER NOT NULL,
+    error TEXT
+);
+CREATE TABLE IF NOT EXISTS docs (
+    id INTEGER PRIMARY KEY,
+    file TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    url TEXT NOT NULL,
+    title TEXT,
+    topic TEXT,
+    session TEXT,
+    query TEXT,
+    publish_date TEXT,
+    fetched_at TEXT
+);
+CREATE INDEX IF NOT EXISTS docs_file ON docs(file);
+CREATE INDEX IF NOT EXISTS docs_url ON docs(url);
+CREATE VIRTUAL TABLE IF NOT EXISTS docs_fts USING fts5(
+    title, excerpts, content, tokenize = 'porter unicode61 remove_diacritics 2'
+);
+"""
+
+
+def default_db() -> Path:
+    return Path(os.environ.get("RESEARCH_INDEX") or DEFAULT_DB)
+
+
+def research_dir() -> Path:
+    return Path(os.environ.get("RESEARCH_DIR") or REPO_ROOT / "research")
+
+
+def connect(db: str | Path | None = None) -> sqlite3.Connection:
+    path = Path(db or default_db())
+    path.parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(path)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.executescript(SCHEMA)
+    conn.execute("INSERT OR IGNORE INTO meta VALUES ('schema', ?)", (str(SCHEMA_VERSION),))
+    return conn
+
+
+# -- parsing ---------------------------------------------------------------
+
+
+def _text(value: Any) -> str:
+    if isinstance(value, str):
+        return value
+    if isinstance(value, list):
+        return "\n".join(_text(v) for v in value if v)
+    if isinstance(value, dict):
+        return "\n".join(_text(v) for v in value.values() if isinstance(v, (str, list)))
+    return ""
+
+
+def _iso(value: Any) -> str | None:
+    if isinstance(value, (int, float)) and value > 1e9:
+        return datetime.fromtimestamp(value, timezone.utc).replace(tzinfo=None).isoformat(timespec="seconds")
+    if isinstance(value, str) and value[:4].isdigit():
+        return value
+    return None
+
+
+def file_time(path: Path, rel: str, mtime: float) -> str:
+    """Best guess at when a file was fetched: epoch in the name, date in the path, else mtime."""
+    m = _EPOCH_IN_NAME.search(path.name)
+    if m:
+        return _iso(int(m.group(1)))
+    m = _DATE_IN_PATH.search(rel)
+    if m:
+        day, hhmm = m.groups()
+        return f"{day}T{hhmm[:2]}:{hhmm[2:]}:00" if hhmm else f"{day}T00:00:00"
+    return _iso(mtime)
+
+
+def file_kind(path: Path, obj: Any) -> str:
+    if isinstance(obj, dict):
+        if "extract_id" in obj:
+            return "extract"
+        if "search_id" in obj:
+            return "search"
+    return "extract" if "extract" in path.name else "search"
+
+
+def iter_docs(obj: Any, ctx: dict[str, Any]) -> Iterator[dict[str, Any]]:
+    """Yield every document-like dict (has a ``url`` and some text) under ``obj``.
+
+    Context (topic, query, session, timestamp) is inherited from enclosing
+    objects, so a result inside ``{"topic": ..., "query": ..., "results":
+    {...}}`` is tagged with that topic and query.
+    """
+    if isinstance(obj, list):
+        for item in obj:
+            yield from iter_docs(item, ctx)
+        return
+    if not isinstance(obj, dict):
+        return
+    local = dict(ctx)
+    for key in ("topic", "query", "session"):
+        if isinstance(obj.get(key), str):
+            local[key] = obj[key]
+    for key in ("timestamp", "search_timestamp", "extracted_at", "fetched_at"):
+        stamp = _iso(obj.get(key))
+        if stamp:
+            local["fetched_at"] = stamp
+            break
+    url = obj.get("url")
+    if isinstance(url, str) and url.startswith("http"):
+        excerpts = "\n".join(_text(obj.get(k)) for k in EXCERPT_KEYS if obj.get(k))
+        content = "\n".join(_text(obj.get(k)) for k in CONTENT_KEYS if obj.get(k))
+        title = obj.get("title") if isinstance(obj.get("title"), str) else ""
+        if title or excerpts or content:
+            yield {
+                **local,
+                "url": url,
+                "title": title,
+                "excerpts": excerpts,
+                "content": content,
+                "publish_date": obj.get("publish_date") if isinstance(obj.get("publish_date"), str) else None,
+            }
+    for key, value in obj.items():
+        if isinstance(value, (dict, list)) and key not in EXCERPT_KEYS + CONTENT_KEYS:
+            yield from iter_docs(value, local)
+
+
+def topic_of(rel: str, topics: set[str]) -> str | None:
+    first = rel.split("/", 1)[0]
+    return first if first in topics and "/" in rel else None
+
+
+# -- ingest ----------------------------------------------------------------
+
+
+@dataclass
+class IngestStats:
+    scanned: int = 0
+    unchanged: int = 0
+    touched: int = 0  # mtime changed, content did not
+    indexed: int = 0
+    removed: int = 0
+    docs: int = 0
+    errors: dict[str, str] = field(default_factory=dict)
+    seconds: float = 0.0
+
+    def summary(self) -> str:
+        return (
+            f"{self.scanned} files scanned, {self.indexed} indexed ({self.docs} docs), "
+            f"{self.unchanged + self.touched} unchanged, {self.removed} removed, "
+            f"{len(self.errors)} unreadable in {self.seconds:.2f}s"
+        )
+
+
+def _insert(conn: sqlite3.Connection, rel: str, kind: str, docs: Iterable[dict[str, Any]]) -> int:
+    n = 0
+    batch = []
+    try:
+        for doc in docs:
+            cur = conn.execute(
+                "INSERT INTO docs (file, kind, url, title, topic, session, query, publish_date, fetched_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (rel, kind, doc["url"], doc["title"], doc.get("topic"), doc.get("session"), doc.get("query"),
+                 doc["publish_date"], doc.get("fetched_at")),
+            )
+            batch.append((cur.lastrowid, doc["title"], doc["excerpts"], doc["content"]))
+            n += 1
+            if len(batch) >= INSERT_BATCH:
+                conn.executemany("INSERT INTO docs_fts (rowid, title, excerpts, content) VALUES (?, ?, ?, ?)", batch)
+                batch = []
+    finally:
+        # Flushed even when the stream breaks off, so salvaged docs are searchable.
+        conn.executemany("INSERT INTO docs_fts (rowid, title, excerpts, content) VALUES (?, ?, ?, ?)", batch)
+    return n
+
+
+def stream_docs(fp: IO[Any], ctx: dict[str, Any], top: dict[str, Any] | None = None) -> Iterator[dict[str, Any]]:
+    """:func:`iter_docs` over a JSON stream, one array element at a time (see :mod:`snowresearch.jsonstream`).
+
+    Scalar fields of the enclosing objects are applied as context the same
+    way :func:`iter_docs` would; ``top`` collects the context seen so far
+    (``search_id``/``extract_id`` decide the file's kind).
+    """
+    from snowresearch.jsonstream import walk
+
+    for item in walk(fp):
+        local = dict(ctx)
+        for key in ("topic", "query", "session"):
+            if isinstance(item.context.get(key), str):
+                local[key] = item.context[key]
+        for key in ("timestamp", "search_timestamp", "extracted_at", "fetched_at"):
+            stamp = _iso(item.context.get(key))
+            if stamp:
+                local["fetched_at"] = stamp
+                break
+        if top is not None and not top:
+            top.update(item.context)
+        yield from iter_docs(item.value, local)
+
+
+def _sha1(path: Path) -> str:
+    h = hashlib.sha1()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def _drop(conn: sqlite3.Connection, rel: str) -> None:
+    conn.execute("DELETE FROM docs_fts WHERE rowid IN (SELECT id FROM docs WHERE file = ?)", (rel,))
+    conn.execute("DELETE FROM docs WHERE file = ?", (rel,))
+
+
+def ingest(
+    root: str | Path | None = None,
+    db: str | Path | sqlite3.Connection | None = None,
+    *,
+    rebuild: bool = False,
+    pattern: str = "**/*.json",
+    store: Any = None,
+) -> IngestStats:
+    """Bring the index up to date with ``root`` and the segment store; returns what changed.
+
+    Segment-store days (:mod:`snowresearch.storage`) are indexed like files
+    under the key ``store:<date>``; ``store`` defaults to the configured
+    store when zstandard is installed.
+    """
+    from snowresearch.notes import load_topics
+
+    started = time.monotonic()
+    root = Path(root or research_dir())
+    conn = db if isinstance(db, sqlite3.Connection) else connect(db)
+    topics = set(load_topics())
+    stats = IngestStats()
+    if rebuild:
+        conn.executescript("DELETE FROM docs_fts; DELETE FROM docs; DELETE FROM files;")
+    known = {row[0]: row[1:] for row in conn.execute("SELECT path, mtime, size, sha1 FROM files")}
+    seen = set()
+
+    for path in sorted(root.glob(pattern)):
+        rel = path.relative_to(root).as_posix()
+        if rel.startswith("sessions/") or not path.is_file():
+            continue  # specs, not results
+        seen.add(rel)
+        stats.scanned += 1
+        st = path.stat()
+        prev = known.get(rel)
+        if prev and prev[0] == st.st_mtime and prev[1] == st.st_size:
+            stats.unchanged += 1
+            continue
+        sha1 = _sha1(path)
+        if prev and prev[2] == sha1:
+            conn.execute("UPDATE files SET mtime = ?, size = ? WHERE path = ?", (st.st_mtime, st.st_size, rel))
+            stats.touched += 1
+            continue
+
+        _drop(conn, rel)
+        error = None
+        n = 0
+        ctx = {"topic": topic_of(rel, topics), "session": path.stem, "fetched_at": file_time(path, rel, st.st_mtime)}
+        top: dict[str, Any] = {}
+        guess = file_kind(path, {})
+        try:
+            with open(path, "rb") as f:
+                n = _insert(conn, rel, guess, stream_docs(f, ctx, top))
+        except ValueError as e:
+            # Truncated dumps: keep the documents before the cut, record the error.
+            n = conn.execute("SELECT COUNT(*) FROM docs WHERE file = ?", (rel,)).fetchone()[0]
+            error = f"invalid JSON: {e}" + (f" ({n} docs salvaged)" if n else "")
+            stats.errors[rel] = error
+        if file_kind(path, top) != guess:
+            conn.execute("UPDATE docs SET kind = ? WHERE file = ?", (file_kind(path, top), rel))
+        conn.execute(
+            "INSERT OR REPLACE INTO files (path, mtime, size, sha1, docs, error) VALUES (?, ?, ?, ?, ?, ?)",
+            (rel, st.st_mtime, st.st_size, sha1, n, error),
+        )
+        stats.indexed += 1
+        stats.docs += n
+
+    if store is None:
+        from snowresearch.storage import available_store
+
+        store = available_store()
+    for day in store.days() if store is not None else ():
+        # Segments are append-only, so an unchanged index file means an unchanged day.
+        rel = f"store:{day}"
+        seen.add(rel)
+        stats.scanned += 1
+        st = store.day_stat(day)
+        prev = known.get(rel)
+        if prev and prev[0] == st.st_mtime and prev[1] == st.st_size:
+            stats.unchanged += 1
+            continue
+        _drop(conn, rel)
+        n = 0
+        for rec in store.scan(since=day, until=day):
+            source = rec.meta.get("source", "")
+            if source.startswith("research/") and (root / source[len("research/"):]).exists():
+                continue  # migrated but not deleted; the file itself is indexed
+            topic = topic_of(source[len("research/"):], topics) if source.startswith("research/") else None
+            with rec.open() as f:
+                n += _insert(conn, rel, rec.kind, stream_docs(f, {"topic": topic, "session": rec.name, "fetched_at": rec.at}))
+        conn.execute(
+            "INSERT OR REPLACE INTO files (path, mtime, size, sha1, docs, error) VALUES (?, ?, ?, ?, ?, NULL)",
+            (rel, st.st_mtime, st.st_size, "", n),
+        )
+        stats.indexed += 1
+        stats.docs += n
+
+    for rel in set(known) - seen:
+        _drop(conn, rel)
+        conn.execute("DELETE FROM files WHERE path = ?", (rel,))
+        stats.removed += 1
+    conn.commit()
+    if stats.indexed or stats.removed:
+        conn.execute("INSERT INTO docs_fts(docs_fts) VALUES ('optimize')")
+        conn.commit()
+    stats.seconds = time.monotonic() - started
+    return stats
+
+
+# -- query -----------------------------------------------------------------
+
+
+@dataclass
+class Hit:
+    url: str
+    title: str
+    kind: str
+    topic: str | None
+    session: str | None
+    fetched_at: str | None
+    score: float
+    snippet: str
+    file: str
+
+
+def to_match(text: str, any_term: bool = False) -> str:
+    """Plain words -> an FTS5 expression (every term quoted, so ``-``/``:`` are not operators)."""
+    terms = [f'"{w}"' for w in _WORD.findall(text)]
+    return (" OR " if any_term else " ").join(terms)
+
+
+def search(
+    text: str,
+    db: str | Path | sqlite3.Connection | None = None,
+    *,
+    limit: int = 10,
+    kind: str | None = None,
+    topic: str | None = None,
+    any_term: bool = False,
+    raw: bool = False,
+    unique_urls: bool = True,
+) -> list[Hit]:
+    """BM25-ranked hits for ``text`` (lower score = better, as FTS5 reports it).
+
+    With ``unique_urls`` only the best hit per URL is returned, since the
+    same page usually shows up in several searches and extracts.
+    """
+    conn = db if isinstance(db, sqlite3.Connection) else connect(db)
+    match = text if raw else to_match(text, any_term)
+    if not match:
+        return []
+    where, params = ["docs_fts MATCH ?"], [match]
+    if kind:
+        where.append("d.kind = ?")
+        params.append(kind)
+    if topic:
+        where.append("d.topic = ?")
+        params.append(topic)
+    # Rank without snippets first: snippet() re-tokenizes the whole
+    # document, so it is only computed for the rows actually returned.
+    sql = (
+        f"SELECT docs_fts.rowid, d.url, d.title, d.kind, d.topic, d.session, d.fetched_at, "
+        f"bm25(docs_fts, {', '.join(map(str, BM25_WEIGHTS))}) AS score, d.file "
+        f"FROM docs_fts JOIN docs d ON d.id = docs_fts.rowid "
+        f"WHERE {' AND '.join(where)} ORDER BY score"
+    )
+    rows, urls = [], set()
+    for row in conn.execute(sql, params):
+        if unique_urls:
+            if row[1] in urls:
+                continue
+            urls.add(row[1])
+        rows.append(row)
+        if len(rows) >= limit:
+            break
+    if not rows:
+        return []
+    marks = ", ".join("?" * len(rows))
+    snippets = dict(
+        conn.execute(
+            f"SELECT rowid, snippet(docs_fts, -1, '[', ']', ' … ', 16) FROM docs_fts "
+            f"WHERE docs_fts MATCH ? AND rowid IN ({marks})",
+            [match, *(row[0] for row in rows)],
+        )
+    )
+    return [
+        Hit(url, title, kind, topic, session, fetched_at, score, snippets.get(rowid, ""), file)
+        for rowid, url, title, kind, topic, session, fetched_at, score, file in rows
+    ]
+
+
+def index_stats(db: str | Path | sqlite3.Connection | None = None) -> dict[str, Any]:
+    conn = db if isinstance(db, sqlite3.Connection) else connect(db)
+    one = lambda sql: conn.execute(sql).fetchone()[0]  # noqa: E731
+    return {
+        "files": one("SELECT COUNT(*) FROM files"),
+        "unreadable": one("SELECT COUNT(*) FROM files WHERE error IS NOT NULL"),
+        "docs": one("SELECT COUNT(*) FROM docs"),
+        "urls": one("SELECT COUNT(DISTINCT url) FROM docs"),
+    }
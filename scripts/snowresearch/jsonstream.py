@@ -0,0 +1,249 @@
+"""Streaming JSON reader for large search/extract payloads.
+
+``json.load`` on an extract response with ``full_content`` for a dozen
+URLs, or on a session output that embeds every search and extract, holds
+the whole document (several times over, as Python objects) just to look at
+one result at a time. :func:`walk` reads a file in chunks and yields each
+**array element** as soon as it is complete, while only descending through
+objects. Every payload shape we store keeps its per-URL results in arrays
+(``results[*]``, ``data.results[*]``, ``extracts[*].extract.results[*]``,
+``searches[*]``, top-level lists), so memory is bounded by the largest
+single element, not by the file, and corpus-wide jobs stay flat as the
+archive grows.
+
+Scalar fields met on the way down (``topic``, ``query``, ``session``,
+``timestamp``, ``search_id``...) are handed along as context, so a result
+inside ``{"topic": ..., "query": ..., "results": {...}}`` still knows its
+topic. Objects that are never inside an array but carry a ``url`` (a bare
+single-result file) are yielded too; from the ``url`` key on, the rest of
+such an object is built whole.
+
+A truncated file yields everything before the cut and then raises
+:class:`ValueError`, so callers can keep what was salvageable.
+
+Decoding of each element goes through the stdlib's C-accelerated
+``JSONDecoder.raw_decode``; only the skeleton between elements is walked
+in Python.
+
+Usage:
+  from snowresearch.jsonstream import iter_results, result_text
+
+  with open("research/extract_core_1770859338.json", "rb") as f:
+      for result in iter_results(f):
+          print(result["url"], result_text(result)[:400])
+
+  # only the extracted pages of a session output, with their topic/query context
+  for result, ctx in iter_results(f, under="extracts.item.extract", with_context=True): ...
+"""
+
+from __future__ import annotations
+
+import codecs
+import json
+import re
+from dataclasses import dataclass
+from typing import IO, Any, Iterator
+
+CHUNK = 1 << 16
+CONTEXT_KEYS = frozenset(
+    {"topic", "query", "objective", "session", "timestamp", "search_timestamp", "extracted_at",
+     "fetched_at", "search_id", "extract_id"}
+)
+
+RESULT_KEYS = ("title", "excerpts", "full_content", "content", "text", "extracted_data", "snippet")
+
+_WS = re.compile(r"[ \t\n\r]*")
+_decoder = json.JSONDecoder(strict=False)
+
+
+@dataclass
+class Item:
+    path: tuple[str, ...]  # keys down to the array, then "item" (ijson-style prefix)
+    value: Any
+    context: dict[str, Any]
+
+
+class _Reader:
+    def __init__(self, fp: IO[Any], chunk: int = CHUNK):
+        self.fp = fp
+        self.chunk = chunk
+        self.binary = not isinstance(fp.read(0), str)
+        self.dec = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        self.buf = ""
+        self.pos = 0
+        self.base = 0  # chars dropped from the front of buf, for error positions
+        self.eof = False
+
+    def fill(self, want: int = 0) -> bool:
+        """Read at least one more chunk (or ``want`` chars); drop what has been consumed."""
+        if self.eof:
+            return False
+        self.base += self.pos
+        self.buf = self.buf[self.pos :]
+        self.pos = 0
+        need = max(self.chunk, want)
+        got = 0
+        while got < need:
+            data = self.fp.read(self.chunk)
+            if not data:
+                self.buf += self.dec.decode(b"", final=True) if self.binary else ""
+                self.eof = True
+                break
+            text = self.dec.decode(data) if self.binary else data
+            self.buf += text
+            got += len(text)
+        return got > 0 or bool(self.buf)
+
+    def peek(self) -> str:
+        while True:
+            self.pos = _WS.match(self.buf, self.pos).end()
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self.fill():
+                raise ValueError("unexpected end of JSON input")
+
+    def expect(self, ch: str) -> None:
+        if self.peek() != ch:
+            raise ValueError(f"expected {ch!r} at char {self.base + self.pos}, got {self.buf[self.pos]!r}")
+        self.pos += 1
+
+    def value(self) -> Any:
+        """Decode one complete value at the cursor, reading more input until it is whole."""
+        self.peek()
+        grow = self.chunk
+        while True:
+            try:
+                value, end = _decoder.raw_decode(self.buf, self.pos)
+            except json.JSONDecodeError as e:
+                if self.eof:
+                    raise ValueError(f"{e.msg}: char {self.base + e.pos}") from None
+                self.fill(grow)
+                grow *= 2  # big elements: geometric growth keeps re-parsing linear overall
+                continue
+            if end == len(self.buf) and not self.eof:
+                # A number (or literal) flush against the end of the buffer may continue.
+                self.fill()
+                continue
+            self.pos = end
+            return value
+
+
+def walk(fp: IO[Any], context_keys: frozenset[str] | set[str] = CONTEXT_KEYS, chunk: int = CHUNK) -> Iterator[Item]:
+    """Yield every array element (and every ``url``-bearing object outside arrays) as it completes."""
+    r = _Reader(fp, chunk)
+
+    def node(path: tuple[str, ...], ctx: dict[str, Any]) -> Iterator[Item]:
+        c = r.peek()
+        if c == "{":
+            r.pos += 1
+            local = ctx
+            scalars: dict[str, Any] = {}
+            if r.peek() == "}":
+                r.pos += 1
+                return
+            while True:
+                key = r.value()
+                r.expect(":")
+                if r.peek() in "{[" and "url" not in scalars:
+                    yield from node(path + (key,), local)
+                else:
+                    # Once an object has shown a url it is a result: build the rest of it whole.
+                    v = r.value()
+                    scalars[key] = v
+                    if key in context_keys and isinstance(v, (str, int, float)):
+                        if local is ctx:
+                            local = dict(ctx)
+                        local[key] = v
+                c = r.peek()
+                r.pos += 1
+                if c == "}":
+                    break
+                if c != ",":
+                    raise ValueError(f"expected ',' or '}}' at char {r.base + r.pos - 1}, got {c!r}")
+            if isinstance(scalars.get("url"), str):
+                yield Item(path, scalars, ctx)
+        elif c == "[":
+            r.pos += 1
+            if r.peek() == "]":
+                r.pos += 1
+                return
+            item_path = path + ("item",)
+            while True:
+                yield Item(item_path, r.value(), ctx)
+                c = r.peek()
+                r.pos += 1
+                if c == "]":
+                    break
+                if c != ",":
+                    raise ValueError(f"expected ',' or ']' at char {r.base + r.pos - 1}, got {c!r}")
+        else:
+            yield Item(path, r.value(), ctx)
+
+    yield from node((), {})
+
+
+def is_result(obj: Any) -> bool:
+    """A per-URL result: an http ``url`` plus a title or some text (not a ``{url, extract}`` wrapper)."""
+    url = obj.get("url") if isinstance(obj, dict) else None
+    return isinstance(url, str) and url.startswith("http") and any(k in obj for k in RESULT_KEYS)
+
+
+def _results_in(value: Any, ctx: dict[str, Any], context_keys: frozenset[str] | set[str]) -> Iterator[tuple[dict[str, Any], dict[str, Any]]]:
+    if isinstance(value, list):
+        for v in value:
+            yield from _results_in(v, ctx, context_keys)
+    elif isinstance(value, dict):
+        if is_result(value):
+            yield value, ctx
+            return
+        local = {**ctx, **{k: v for k, v in value.items() if k in context_keys and isinstance(v, (str, int, float))}}
+        for v in value.values():
+            if isinstance(v, (dict, list)):
+                yield from _results_in(v, local, context_keys)
+
+
+def _select(value: Any, keys: tuple[str, ...]) -> Iterator[Any]:
+    if not keys:
+        yield value
+    elif keys[0] == "item" and isinstance(value, list):
+        for v in value:
+            yield from _select(v, keys[1:])
+    elif isinstance(value, dict) and keys[0] in value:
+        yield from _select(value[keys[0]], keys[1:])
+
+
+def iter_results(
+    fp: IO[Any],
+    *,
+    under: str | None = None,
+    with_context: bool = False,
+    context_keys: frozenset[str] | set[str] = CONTEXT_KEYS,
+) -> Iterator[Any]:
+    """Yield each per-URL result object (see :func:`is_result`), whatever the file's shape.
+
+    ``under`` is an ijson-style prefix (``"extracts"``, ``"extracts.item.extract"``)
+    restricting where results are looked for. With ``with_context`` each
+    item is ``(result, ctx)``.
+    """
+    want = tuple(under.split(".")) if under else ()
+    for item in walk(fp, context_keys):
+        n = len(item.path)
+        if item.path[: len(want)] != want[:n]:
+            continue
+        for value in _select(item.value, want[n:]):
+            for result, ctx in _results_in(value, item.context, context_keys):
+                yield (result, ctx) if with_context else result
+
+
+def result_text(result: dict[str, Any]) -> str:
+    """The extracted text of a result in any of the shapes we have stored."""
+    for key in ("full_content", "content", "text"):
+        if isinstance(result.get(key), str) and result[key]:
+            return result[key]
+    data = result.get("extracted_data")
+    if isinstance(data, dict) and isinstance(data.get("text"), str):
+        return data["text"]
+    excerpts = result.get("excerpts")
+    if isinstance(excerpts, list):
+        return "\n".join(e for e in excerpts if isinstance(e, str))
+    return result.get("snippet") or ""
@@ -0,0 +1,333 @@
+"""Cross-session URL ledger: which pages we already extracted, when, and where they are.
+
+The response cache only helps when the exact same extract payload comes
+round again within its TTL; the same docs pages (cost-attributing,
+WAREHOUSE_METERING_HISTORY, the well-architected cost pillar) were still
+re-extracted session after session under slightly different payloads.
+The ledger is keyed by canonical URL instead (:func:`snowresearch.urls.canonical`),
+and remembers for each page:
+
+- when it was last extracted and by which session/source;
+- a hash of its extracted content (so a re-fetch that changed nothing is
+  visible as such);
+- where the stored per-URL record lives (a gzip blob, content-addressed,
+  so identical fetches share storage).
+
+:class:`~snowresearch.batching.ExtractDispatcher` consults it before a URL
+enters any batch: a page extracted within the freshness window is served
+from disk (reported as batch size 0, like a cache hit). A stored record
+only satisfies a request it covers: a ``full_content`` request needs a
+record that has full content. Excerpts are served regardless of the
+objective they were pulled for.
+
+Layout:
+  <dir>/ledger.sqlite                   urls(url, raw_url, extracted_at, content_hash, location, ...)
+  <dir>/blobs/<hash[:2]>/<hash>.json.gz single-URL extract response
+
+Env:
+  PARALLEL_LEDGER           on (default) | refresh (ignore hits, still record) | off
+  PARALLEL_LEDGER_DIR       default: ~/.cache/snowresearch/ledger
+  PARALLEL_LEDGER_MAX_AGE   freshness window in days (default: 14)
+
+``--no-cache`` / ``--refresh`` (see :mod:`snowresearch.cache`) switch the
+ledger too; ``research ledger import`` backfills it from research/.
+"""
+
+from __future__ import annotations
+
+import gzip
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from dataclasses import asdict, dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Iterator
+
+from snowresearch.urls import VERSION as URL_VERSION, canonical
+
+MODES = ("on", "refresh", "off")
+DEFAULT_DIR = Path.home() / ".cache" / "snowresearch" / "ledger"
+DEFAULT_MAX_AGE_DAYS = 14.0
+DAY = 86400
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS urls (
+    url TEXT PRIMARY KEY,
+    raw_url TEXT NOT NULL,
+    extracted_at REAL NOT NULL,
+    content_hash TEXT NOT NULL,
+    location TEXT NOT NULL,
+    full_content INTEGER NOT NULL,
+    bytes INTEGER NOT NULL,
+    source TEXT,
+    fetches INTEGER NOT NULL DEFAULT 1,
+    changes INTEGER NOT NULL DEFAULT 0,
+    served INTEGER NOT NULL DEFAULT 0
+);
+"""
+
+
+def _rekey(conn: sqlite3.Connection) -> None:
+    """Re-derive every key from its raw URL after the canonical rules changed; the newest entry wins."""
+    keep: dict[str, tuple[Any, ...]] = {}
+    for row in conn.execute("SELECT * FROM urls ORDER BY extracted_at DESC"):
+        keep.setdefault(canonical(row[1]), row)
+    with conn:
+        conn.execute("DELETE FROM urls")
+        conn.executemany(
+            "INSERT INTO urls VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", [(key, *row[1:]) for key, row in keep.items()]
+        )
+        conn.execute(f"PRAGMA user_version = {URL_VERSION}")
+
+
+def _results(record: dict[str, Any]) -> list[dict[str, Any]]:
+    return [r for r in record.get("results") or [] if isinstance(r, dict)]
+
+
+def content_hash(record: dict[str, Any]) -> str:
+    """Hash of what was extracted (text only, so volatile ids/timestamps do not count as changes)."""
+    h = hashlib.sha256()
+    for r in _results(record):
+        for key in ("title", "full_content", "excerpts"):
+            h.update(json.dumps(r.get(key), ensure_ascii=False, sort_keys=True).encode("utf-8"))
+    return h.hexdigest()
+
+
+def has_full_content(record: dict[str, Any]) -> bool:
+    return any(r.get("full_content") for r in _results(record))
+
+
+def wants_full_content(payload: dict[str, Any]) -> bool:
+    fc = payload.get("full_content")
+    return bool(fc) and fc != {"enabled": False}
+
+
+@dataclass
+class LedgerStats:
+    hits: int = 0
+    misses: int = 0
+    stale: int = 0
+    recorded: int = 0
+    unchanged: int = 0
+
+
+@dataclass
+class Entry:
+    url: str
+    raw_url: str
+    extracted_at: float
+    content_hash: str
+    location: str
+    full_content: bool
+    bytes: int
+    source: str | None
+    fetches: int
+    changes: int
+    served: int
+
+    @property
+    def age_days(self) -> float:
+        return (time.time() - self.extracted_at) / DAY
+
+
+class UrlLedger:
+    """SQLite ledger of extracted pages plus a content-addressed blob store for their records."""
+
+    def __init__(self, directory: str | Path | None = None, max_age_days: float | None = None, mode: str = "on"):
+        if mode not in MODES:
+            raise ValueError(f"ledger mode must be one of {MODES}, got {mode!r}")
+        self.dir = Path(directory or os.environ.get("PARALLEL_LEDGER_DIR") or DEFAULT_DIR)
+        self.max_age_days = (
+            max_age_days
+            if max_age_days is not None
+            else float(os.environ.get("PARALLEL_LEDGER_MAX_AGE", DEFAULT_MAX_AGE_DAYS))
+        )
+        self.mode = mode
+        self._stats = LedgerStats()
+        self._lock = threading.Lock()
+        self._conn: sqlite3.Connection | None = None
+
+    @classmethod
+    def from_env(cls) -> UrlLedger:
+        return cls(mode=os.environ.get("PARALLEL_LEDGER", "on").strip().lower() or "on")
+
+    @property
+    def conn(self) -> sqlite3.Connection:
+        # Opened lazily: sessions that never extract never touch the database.
+        if self._conn is None:
+            self.dir.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(self.dir / "ledger.sqlite", check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(SCHEMA)
+            if conn.execute("PRAGMA user_version").fetchone()[0] != URL_VERSION:
+                _rekey(conn)
+            self._conn = conn
+        return self._conn
+
+    def _blob(self, digest: str) -> Path:
+        return self.dir / "blobs" / digest[:2] / f"{digest}.json.gz"
+
+    def entry(self, url: str) -> Entry | None:
+        with self._lock:
+            row = self.conn.execute("SELECT * FROM urls WHERE url = ?", (canonical(url),)).fetchone()
+        return Entry(*row) if row else None
+
+    def lookup(self, url: str, payload: dict[str, Any] | None = None) -> dict[str, Any] | None:
+        """The stored record for ``url`` if it is fresh and covers ``payload``, else ``None``."""
+        if self.mode != "on":
+            return None
+        entry = self.entry(url)
+        if entry is None or (wants_full_content(payload or {}) and not entry.full_content):
+            with self._lock:
+                self._stats.misses += 1
+            return None
+        if entry.age_days > self.max_age_days:
+            with self._lock:
+                self._stats.stale += 1
+            return None
+        try:
+            record = json.loads(gzip.decompress((self.dir / entry.location).read_bytes()))
+        except (OSError, ValueError, EOFError):
+            with self._lock:
+                self._stats.misses += 1
+            return None
+        with self._lock:
+            self._stats.hits += 1
+            self.conn.execute("UPDATE urls SET served = served + 1 WHERE url = ?", (entry.url,))
+            self.conn.commit()
+        # Point the record at the URL that was asked for, as a fresh single-URL extract would.
+        for r in _results(record):
+            r["url"] = url
+        return record
+
+    def record(
+        self,
+        url: str,
+        record: dict[str, Any],
+        *,
+        source: str | None = None,
+        extracted_at: float | None = None,
+    ) -> bool:
+        """Remember a successful single-URL extract record; returns False if it was not usable."""
+        if self.mode == "off" or not _results(record):
+            return False
+        extracted_at = extracted_at if extracted_at is not None else time.time()
+        digest = content_hash(record)
+        data = gzip.compress(json.dumps(record, separators=(",", ":"), ensure_ascii=False).encode("utf-8"))
+        blob = self._blob(digest)
+        if not blob.exists():
+            blob.parent.mkdir(parents=True, exist_ok=True)
+            tmp = blob.with_suffix(f".tmp{os.getpid()}.{threading.get_ident()}")
+            tmp.write_bytes(data)
+            os.replace(tmp, blob)
+        key = canonical(url)
+        with self._lock:
+            prev = self.conn.execute("SELECT extracted_at, content_hash FROM urls WHERE url = ?", (key,)).fetchone()
+            if prev and prev[0] > extracted_at:
+                return False  # older than what we already have (e.g. an archive import)
+            self.conn.execute(
+                "INSERT INTO urls (url, raw_url, extracted_at, content_hash, location, full_content, bytes, source) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT(url) DO UPDATE SET raw_url = excluded.raw_url, extracted_at = excluded.extracted_at, "
+                "content_hash = excluded.content_hash, location = excluded.location, "
+                "full_content = excluded.full_content, bytes = excluded.bytes, source = excluded.source, fetches = fetches + 1, "
+                "changes = changes + (content_hash != excluded.content_hash)",
+                (key, url, extracted_at, digest, blob.relative_to(self.dir).as_posix(), has_full_content(record), len(data), source),
+            )
+            self.conn.commit()
+            self._stats.recorded += 1
+            if prev and prev[1] == digest:
+                self._stats.unchanged += 1
+        return True
+
+    def entries(self) -> Iterator[Entry]:
+        with self._lock:
+            rows = self.conn.execute("SELECT * FROM urls ORDER BY extracted_at DESC").fetchall()
+        for row in rows:
+            yield Entry(*row)
+
+    def prune(self, older_than_days: float) -> int:
+        """Forget entries older than ``older_than_days`` and delete blobs nothing points at any more."""
+        cutoff = time.time() - older_than_days * DAY
+        with self._lock:
+            n = self.conn.execute("DELETE FROM urls WHERE extracted_at < ?", (cutoff,)).rowcount
+            self.conn.commit()
+            live = {row[0] for row in self.conn.execute("SELECT location FROM urls")}
+        for blob in (self.dir / "blobs").glob("*/*.json.gz"):
+            if blob.relative_to(self.dir).as_posix() not in live:
+                blob.unlink(missing_ok=True)
+        return n
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            return {**asdict(self._stats), "mode": self.mode, "max_age_days": self.max_age_days}
+
+    def summary(self) -> dict[str, Any]:
+        with self._lock:
+            total, fresh, served, changed = self.conn.execute(
+                "SELECT COUNT(*), SUM(extracted_at >= ?), SUM(served), SUM(changes > 0) FROM urls",
+                (time.time() - self.max_age_days * DAY,),
+            ).fetchone()
+        return {"urls": total, "fresh": fresh or 0, "served": served or 0, "changed_since_first_fetch": changed or 0}
+
+    def close(self) -> None:
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+
+def import_archive(ledger: UrlLedger, root: str | Path | None = None) -> tuple[int, int]:
+    """Backfill the ledger from extract responses under research/ and in the segment store.
+
+    Returns ``(files or store records, pages)``.
+
+    Each page is recorded with the fetch time the index infers for its file
+    (epoch in the name, else date in the path, else mtime), so only recent
+    archive files fall inside the freshness window.
+    """
+    from snowresearch.index import file_kind, file_time, research_dir
+    from snowresearch.jsonstream import iter_results
+
+    def record_all(fp: Any, source: str, stamp: float, path: Path | None = None) -> int:
+        found = 0
+        try:
+            for i, (result, ctx) in enumerate(iter_results(fp, with_context=True)):
+                if path is not None and i == 0 and file_kind(path, ctx) != "extract":
+                    return 0  # a search dump
+                if not (result.get("full_content") or result.get("excerpts")):
+                    continue
+                if ledger.record(result["url"], {"results": [result], "errors": []}, source=source, extracted_at=stamp):
+                    found += 1
+        except ValueError:
+            pass  # truncated dump: keep what came before the cut
+        return found
+
+    root = Path(root or research_dir())
+    files = records = 0
+    for path in sorted(root.glob("**/*.json")):
+        rel = path.relative_to(root).as_posix()
+        if rel.startswith("sessions/"):
+            continue
+        fetched = file_time(path, rel, path.stat().st_mtime)
+        stamp = datetime.fromisoformat(fetched).replace(tzinfo=timezone.utc).timestamp()
+        with open(path, "rb") as f:
+            found = record_all(f, f"research/{rel}", stamp, path)
+        files += bool(found)
+        records += found
+    from snowresearch.storage import available_store
+
+    store = available_store()
+    for rec in store.records(kind="extract") if store is not None else ():
+        source = rec.meta.get("source", "")
+        if source.startswith("research/") and (root / source[len("research/"):]).exists():
+            continue  # migrated but not deleted; already imported from the file
+        stamp = datetime.fromisoformat(rec.at).replace(tzinfo=timezone.utc).timestamp()
+        with rec.open() as f:
+            found = record_all(f, f"store:{rec.ref}", stamp)
+        files += bool(found)
+        records += found
+    return files, records
@@ -0,0 +1,63 @@
+"""Research note scaffolding shared by ``research note`` and the note scripts.
+
+Writes:
+  <workspace>/research/<topic>/<YYYY-MM-DD>/<YYYY-MM-DD_HHMM>_<slug>.md
+
+from ``<workspace>/research/<topic>/TEMPLATE.md`` when it exists (with the
+date/time placeholders used by the templates stamped in), or a minimal
+header otherwise. Valid topics live in ``research/topics.json``.
+"""
+
+from __future__ import annotations
+
+import json
+import re
+from datetime import datetime, timezone
+from pathlib import Path
+
+from snowresearch.specs import REPO_ROOT, workspace
+
+TOPICS_FILE = REPO_ROOT / "research" / "topics.json"
+
+
+def load_topics() -> dict[str, str]:
+    """``{topic: description}`` in file order."""
+    return json.loads(TOPICS_FILE.read_text(encoding="utf-8"))
+
+
+def slugify(s: str) -> str:
+    s = re.sub(r"[^a-z0-9]+", "-", s.strip().lower())
+    s = re.sub(r"-+", "-", s).strip("-")
+    if not s:
+        raise ValueError("slug is empty after normalization")
+    return s[:80]
+
+
+def create_note(topic: str, slug: str, root: str | Path | None = None) -> Path:
+    topics = load_topics()
+    if topic not in topics:
+        raise ValueError(f"unknown topic {topic!r}; valid topics: {', '.join(topics)}")
+    base = Path(root) if root else workspace()
+    now = datetime.now(timezone.utc)
+    day = now.strftime("%Y-%m-%d")
+    hhmm = now.strftime("%H%M")
+
+    out_dir = base / "research" / topic / day
+    out_dir.mkdir(parents=True, exist_ok=True)
+    out_path = out_dir / f"{day}_{hhmm}_{slugify(slug)}.md"
+    if out_path.exists():
+        raise FileExistsError(f"refusing to overwrite existing file: {out_path}")
+
+    template = base / "research" / topic / "TEMPLATE.md"
+    if template.exists():
+        content = (
+            template.read_text(encoding="utf-8")
+            .replace("{{DATE}}", day)
+            .replace("{{TIME}}", hhmm)
+            .replace("{{TIMESTAMP}}", now.strftime("%Y-%m-%dT%H:%M:%S"))
+            .replace("<YYYY-MM-DD HH:MM>", now.strftime("%Y-%m-%d %H:%M"))
+        )
+    else:
+        content = f"# Research: {topic} - {day}\n\n**Time:** {now.strftime('%Y-%m-%dT%H:%M:%S')} UTC\n**Topic:** {topic}\n\n---\n\n"
+    out_path.write_text(content, encoding="utf-8")
+    return out_path
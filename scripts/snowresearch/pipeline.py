@@ -0,0 +1,180 @@
+"""Which search candidates a session extracts: :class:`SelectionPolicy`.
+
+The policy is the usual "snowflake URLs only, docs.snowflake.com first"
+filter plus per-topic caps ("top 2 docs + 1 other per topic") and/or
+session-wide caps ("5 docs + 3 others"). :meth:`SelectionPolicy.admit`
+takes one search's candidates as that search completes, so extracts can
+start while later searches are in flight. Admission is first-come; the
+closing :meth:`SelectionPolicy.rank` pass puts the admitted set back into
+topic order and re-applies the caps, so the reported list does not depend
+on which search happened to finish first. With ``ranking`` set, each
+search's candidates are scored locally (:mod:`snowresearch.ranking`) and
+admitted best first, so per-topic caps keep the highest-scoring pages,
+and the closing pass orders by score instead (global caps are still
+first-come at admission, which keeps extracts streaming).
+
+Session specs build the policy from their ``select`` block
+(:func:`snowresearch.specs.make_policy`) and run search -> select ->
+extract as a DAG: see :func:`snowresearch.specs.run_spec` /
+:func:`~snowresearch.specs.run_specs`.
+
+Usage:
+  from snowresearch.pipeline import SelectionPolicy
+
+  policy = SelectionPolicy(per_topic_docs=2, per_topic_other=1, max_total=12)
+  for job, result in searches_as_they_complete:
+      extract_now(policy.admit(collect(job, result)))
+  final_urls = policy.rank([job["topic"] for job in jobs])
+"""
+
+from __future__ import annotations
+
+import sys
+import threading
+from dataclasses import dataclass, field
+from typing import Any, Callable, Sequence
+
+from snowresearch.urls import canonical, is_mirror
+
+Candidate = dict[str, Any]
+
+
+def is_docs_url(url: str) -> bool:
+    return "docs.snowflake.com" in url
+
+
+def is_snowflake_url(url: str) -> bool:
+    return "snowflake" in url.lower()
+
+
+@dataclass
+class SelectionPolicy:
+    """Which search candidates get extracted, applied incrementally and again at the end."""
+
+    per_topic_docs: int | None = None
+    per_topic_other: int | None = None
+    max_docs: int | None = None
+    max_other: int | None = None
+    max_total: int | None = None
+    keep: Callable[[str], bool] = is_snowflake_url
+    is_doc: Callable[[str], bool] = is_docs_url
+    dedup: float | None = None  # skip non-docs candidates whose excerpts are this much covered already
+    ranking: dict[str, Any] | bool | None = None  # score candidates locally (see snowresearch.ranking)
+    ledger: Any = None  # for the ranking's novelty signal
+    _seen: set[str] = field(default_factory=set, repr=False)
+    _admitted: list[Candidate] = field(default_factory=list, repr=False)
+    _covered: list[Candidate] = field(default_factory=list, repr=False)
+    _excerpts: Any = field(default=None, repr=False)
+    _ranker: Any = field(default=None, repr=False)
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def __post_init__(self) -> None:
+        if self.dedup is not None:
+            try:
+                from snowresearch.dedup import ExcerptIndex
+
+                self._excerpts = ExcerptIndex()
+            except RuntimeError as e:
+                print(f"[SELECT] near-duplicate skipping disabled: {e}", file=sys.stderr)
+                self.dedup = None
+        if self.ranking:
+            try:
+                from snowresearch.ranking import Ranker
+
+                self._ranker = Ranker.from_config(self.ranking, ledger=self.ledger)
+            except RuntimeError as e:
+                print(f"[SELECT] candidate ranking disabled: {e}", file=sys.stderr)
+                self.ranking = None
+
+    @property
+    def covered(self) -> list[Candidate]:
+        """Candidates skipped because already-selected pages cover their excerpts."""
+        with self._lock:
+            return list(self._covered)
+
+    @property
+    def unique_count(self) -> int:
+        """Distinct kept URLs seen across all search results so far."""
+        with self._lock:
+            return len(self._seen)
+
+    def _room(self, picked: list[Candidate], topic: str | None, doc: bool) -> bool:
+        same_kind = [c for c in picked if self.is_doc(c["url"]) == doc]
+        topic_cap = self.per_topic_docs if doc else self.per_topic_other
+        global_cap = self.max_docs if doc else self.max_other
+        if topic_cap is not None and sum(1 for c in same_kind if c.get("topic") == topic) >= topic_cap:
+            return False
+        if global_cap is not None and len(same_kind) >= global_cap:
+            return False
+        return self.max_total is None or len(picked) < self.max_total
+
+    def admit(self, candidates: Sequence[Candidate]) -> list[Candidate]:
+        """Return the candidates from one search result that should be extracted now.
+
+        With ``dedup``, a candidate's full ``excerpts`` (if the collector
+        passed them) are checked against those of already-admitted pages and
+        then dropped from the candidate. Docs pages are never skipped: when a
+        mirror was admitted first, the docs page is still the one to cite.
+        With ``ranking``, new candidates are scored against their
+        ``objective`` (also dropped) and taken best first, so admitting
+        several searches' candidates in one call ranks them together; each
+        keeps its score breakdown under ``ranking``.
+        """
+        out = []
+        with self._lock:
+            fresh = []
+            for cand in candidates:
+                url = cand["url"]
+                texts = cand.pop("excerpts", None) or [cand.get("snippet") or ""]
+                objective = cand.pop("objective", None)
+                key = canonical(url)
+                if key in self._seen or not self.keep(url):
+                    continue
+                if is_mirror(url):
+                    # Extract and cite the docs page itself, whichever copy the search returned first.
+                    cand["url"] = url = key
+                # First sighting owns the URL, as in the old global dedup.
+                self._seen.add(key)
+                fresh.append((cand, texts, objective))
+            if self._ranker is not None and fresh:
+                groups: dict[str, list[int]] = {}
+                for i, (_, _, objective) in enumerate(fresh):
+                    groups.setdefault(objective or "", []).append(i)
+                for objective, idx in groups.items():
+                    scores = self._ranker.score([fresh[i][0] for i in idx], objective, [fresh[i][1] for i in idx])
+                    for i, score in zip(idx, scores):
+                        fresh[i][0]["ranking"] = score.as_dict()
+                fresh.sort(key=lambda f: -f[0]["ranking"]["score"])
+            for cand, texts, _ in fresh:
+                url = cand["url"]
+                if self._excerpts is not None and not self.is_doc(url):
+                    frac, by = self._excerpts.coverage(texts, exclude=url)
+                    if frac >= self.dedup:
+                        self._covered.append({**cand, "covered_by": by[0], "coverage": round(frac, 2)})
+                        continue
+                if self._room(self._admitted, cand.get("topic"), self.is_doc(url)):
+                    self._admitted.append(cand)
+                    out.append(cand)
+                    if self._excerpts is not None:
+                        self._excerpts.add(url, texts)
+        return out
+
+    def rank(self, topics: Sequence[str]) -> list[Candidate]:
+        """Final pass: admitted candidates in topic order, docs before others, caps re-applied.
+
+        With ``ranking`` the order is by score alone, so global caps keep the best pages.
+        """
+        order = {t: i for i, t in enumerate(topics)}
+        with self._lock:
+            if self._ranker is not None:
+                admitted = sorted(self._admitted, key=lambda c: -c.get("ranking", {}).get("score", 0.0))
+            else:
+                admitted = sorted(
+                    self._admitted,
+                    key=lambda c: (order.get(c.get("topic"), len(order)), not self.is_doc(c["url"])),
+                )
+        final: list[Candidate] = []
+        for cand in admitted:
+            if self._room(final, cand.get("topic"), self.is_doc(cand["url"])):
+                final.append(cand)
+        return final
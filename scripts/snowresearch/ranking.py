@@ -0,0 +1,280 @@
+"""Local relevance ranking of search candidates, so the extract budget goes to the best pages.
+
+Selection used to be "URLs containing snowflake, docs.snowflake.com first,
+then the first N per topic", i.e. whatever order the API returned within
+each bucket. :class:`Ranker` scores every candidate locally from five
+signals, each in [0, 1]:
+
+- ``bm25``: BM25 of title (counted twice) and excerpts against the
+  session objective, with IDF and average length taken from every
+  candidate the ranker has seen this session, squashed to
+  ``s / (s + m / 4)`` where ``m`` is the score of a document saturated
+  with every query term (a quarter of that maximum scores 0.5);
+- ``authority``: a per-domain weight (:data:`DOMAIN_AUTHORITY`;
+  docs.snowflake.com 1.0, the .cn mirror 0.3, unknown 0.35);
+- ``freshness``: ``publish_date`` decayed with a half-life
+  (180 days by default; undated pages get 0.5);
+- ``api``: the API's own ``score`` when a result has one, else its
+  position in the response (``1 / (1 + pos / 4)``);
+- ``novelty``: 1 for a page the URL ledger has never extracted; a page
+  with a stored copy gets up to 0.5 as that copy ages past the freshness
+  window (it may have changed), so re-reads only win on relevance.
+
+The total is the weighted sum (:class:`RankWeights`, normalized to sum
+to 1). Scoring a batch is one NumPy pass over a candidates × query-terms
+term-frequency matrix; :class:`RankScore` keeps every component, so each
+selection decision can be explained.
+
+A spec with ``"select": {"rank": true}`` (or ``{"rank": {"bm25": 0.5,
+"half_life_days": 90}}``) ranks each search's candidates before the caps
+are applied and orders the final list by score (see
+:class:`~snowresearch.pipeline.SelectionPolicy`);
+``scripts/research search --rank`` re-orders a response and prints the
+breakdown. Needs numpy.
+
+Usage:
+  from snowresearch.ranking import Ranker
+
+  ranker = Ranker(ledger=get_client().ledger)
+  for cand, s in ranker.rank(candidates, objective):
+      print(s.explain(), cand["url"])
+"""
+
+from __future__ import annotations
+
+import re
+from collections import Counter
+from dataclasses import asdict, dataclass, fields
+from datetime import date, datetime
+from typing import Any, Sequence
+from urllib.parse import urlsplit
+
+from snowresearch.urls import canonical
+
+K1 = 1.2
+B = 0.75
+TITLE_WEIGHT = 2  # a title occurrence counts as this many body occurrences
+DEFAULT_HALF_LIFE_DAYS = 180.0
+UNDATED_FRESHNESS = 0.5
+STORED_NOVELTY = 0.5  # ceiling for a page the ledger already holds
+BM25_HALF = 0.25  # share of the maximum BM25 that maps to 0.5
+
+# Host (or parent domain) -> authority; the most specific match wins.
+DOMAIN_AUTHORITY = {
+    "docs.snowflake.com": 1.0,
+    "quickstarts.snowflake.com": 0.8,
+    "snowflake.com": 0.75,
+    "community.snowflake.com": 0.6,
+    "github.com": 0.5,
+    "stackoverflow.com": 0.45,
+    "medium.com": 0.4,
+    "docs.snowflake.cn": 0.3,  # mirror of docs.snowflake.com
+}
+DEFAULT_AUTHORITY = 0.35
+
+_TOKEN = re.compile(r"[a-z0-9]+(?:_[a-z0-9]+)*")
+_STOP = frozenset(
+    "a an and are as at be by for from how in is it of on or that the this to what when which with "
+    "vs via using use into about does do can".split()
+)
+
+
+def _np() -> Any:
+    try:
+        import numpy
+    except ImportError:
+        raise RuntimeError("candidate ranking needs numpy (pip install numpy)") from None
+    return numpy
+
+
+def tokens(text: str) -> list[str]:
+    """Lower-case words; ``WAREHOUSE_METERING_HISTORY`` counts as itself and as each of its parts."""
+    out = []
+    for tok in _TOKEN.findall(text.lower()):
+        if tok in _STOP:
+            continue
+        out.append(tok)
+        if "_" in tok:
+            out.extend(p for p in tok.split("_") if p not in _STOP)
+    return out
+
+
+def authority(url: str) -> float:
+    host = (urlsplit(url).hostname or "").lower()
+    parts = host.split(".")
+    for i in range(len(parts) - 1):
+        weight = DOMAIN_AUTHORITY.get(".".join(parts[i:]))
+        if weight is not None:
+            return weight
+    return DEFAULT_AUTHORITY
+
+
+def _age_days(published: Any, today: date) -> float | None:
+    if not isinstance(published, str) or not published[:4].isdigit():
+        return None
+    try:
+        day = datetime.fromisoformat(published[:10]).date()
+    except ValueError:
+        return None
+    return max(0.0, float((today - day).days))
+
+
+@dataclass
+class RankWeights:
+    bm25: float = 0.40
+    authority: float = 0.20
+    freshness: float = 0.10
+    api: float = 0.15
+    novelty: float = 0.15
+
+    def normalized(self) -> RankWeights:
+        total = sum(getattr(self, f.name) for f in fields(self))
+        if total <= 0:
+            raise ValueError("rank weights must not all be zero")
+        return RankWeights(*(getattr(self, f.name) / total for f in fields(self)))
+
+
+@dataclass
+class RankScore:
+    """One candidate's score and its components, each in [0, 1]."""
+
+    score: float
+    bm25: float
+    authority: float
+    freshness: float
+    api: float
+    novelty: float
+
+    def as_dict(self) -> dict[str, float]:
+        return {k: round(v, 3) for k, v in asdict(self).items()}
+
+    def explain(self, weights: RankWeights | None = None) -> str:
+        w = (weights or RankWeights()).normalized()
+        parts = " + ".join(
+            f"{getattr(w, name):.2f}×{name} {getattr(self, name):.2f}"
+            for name in ("bm25", "authority", "freshness", "api", "novelty")
+        )
+        return f"{self.score:.3f} = {parts}"
+
+
+class Ranker:
+    """Scores candidate batches; corpus statistics for BM25 accumulate across batches.
+
+    Not thread-safe on its own; :class:`~snowresearch.pipeline.SelectionPolicy`
+    calls it under its lock.
+    """
+
+    def __init__(
+        self,
+        weights: RankWeights | None = None,
+        *,
+        ledger: Any = None,
+        half_life_days: float = DEFAULT_HALF_LIFE_DAYS,
+        today: date | None = None,
+    ):
+        self.np = _np()
+        self.weights = (weights or RankWeights()).normalized()
+        self.ledger = ledger if ledger is not None and getattr(ledger, "mode", "on") != "off" else None
+        self.half_life_days = half_life_days
+        self.today = today
+        self._df: Counter[str] = Counter()
+        self._docs = 0
+        self._length = 0
+        self._seen: set[str] = set()
+
+    @classmethod
+    def from_config(cls, conf: dict[str, Any] | bool, *, ledger: Any = None) -> Ranker:
+        """``True`` or ``{"bm25": 0.5, ..., "half_life_days": 90}`` as in a session spec's ``select.rank``."""
+        conf = dict(conf) if isinstance(conf, dict) else {}
+        half_life = float(conf.pop("half_life_days", DEFAULT_HALF_LIFE_DAYS))
+        return cls(RankWeights(**conf), ledger=ledger, half_life_days=half_life)
+
+    def _novelty(self, url: str) -> float:
+        if self.ledger is None:
+            return 1.0
+        entry = self.ledger.entry(url)
+        if entry is None:
+            return 1.0
+        return STORED_NOVELTY * min(1.0, entry.age_days / max(self.ledger.max_age_days, 1e-9))
+
+    def score(
+        self,
+        candidates: Sequence[dict[str, Any]],
+        objective: str,
+        texts: Sequence[Sequence[str] | None] | None = None,
+    ) -> list[RankScore]:
+        """Score one batch; ``texts[i]`` are candidate ``i``'s full excerpts (default: its snippet)."""
+        np = self.np
+        n = len(candidates)
+        if not n:
+            return []
+        terms = list(dict.fromkeys(tokens(objective or "")))
+        col = {t: j for j, t in enumerate(terms)}
+        tf = np.zeros((n, len(terms)))
+        length = np.zeros(n)
+        for i, cand in enumerate(candidates):
+            title = tokens(cand.get("title") or "") if isinstance(cand.get("title"), str) else []
+            body_texts = (texts[i] if texts is not None else None) or [cand.get("snippet") or ""]
+            body = tokens("\n".join(t for t in body_texts if isinstance(t, str)))
+            length[i] = TITLE_WEIGHT * len(title) + len(body)
+            for tok in title:
+                if tok in col:
+                    tf[i, col[tok]] += TITLE_WEIGHT
+            for tok in body:
+                if tok in col:
+                    tf[i, col[tok]] += 1
+            key = canonical(cand["url"])
+            if key not in self._seen:
+                self._seen.add(key)
+                self._df.update(set(title) | set(body))
+                self._docs += 1
+                self._length += int(length[i])
+
+        if terms:
+            df = np.array([self._df[t] for t in terms], dtype=float)
+            idf = np.log1p((self._docs - df + 0.5) / (df + 0.5))
+            avgdl = max(self._length / max(self._docs, 1), 1.0)
+            norm = K1 * (1 - B + B * length / avgdl)
+            raw = (idf * tf * (K1 + 1) / (tf + norm[:, None])).sum(axis=1)
+            half = BM25_HALF * (idf * (K1 + 1)).sum()
+            bm25 = raw / (raw + half) if half > 0 else np.zeros(n)
+        else:
+            bm25 = np.zeros(n)
+
+        auth = np.array([authority(c["url"]) for c in candidates])
+        today = self.today or date.today()
+        ages = [_age_days(c.get("publish_date"), today) for c in candidates]
+        fresh = np.array([UNDATED_FRESHNESS if a is None else 0.5 ** (a / self.half_life_days) for a in ages])
+        api = np.array(
+            [
+                min(max(float(c["score"]), 0.0), 1.0) if isinstance(c.get("score"), (int, float)) else 1 / (1 + i / 4)
+                for i, c in enumerate(candidates)
+            ]
+        )
+        novelty = np.array([self._novelty(c["url"]) for c in candidates])
+
+        parts = np.vstack([bm25, auth, fresh, api, novelty])
+        w = self.weights
+        total = np.array([w.bm25, w.authority, w.freshness, w.api, w.novelty]) @ parts
+        return [RankScore(*(float(v) for v in row)) for row in np.vstack([total, parts]).T]
+
+    def rank(
+        self,
+        candidates: Sequence[dict[str, Any]],
+        objective: str,
+        texts: Sequence[Sequence[str] | None] | None = None,
+    ) -> list[tuple[dict[str, Any], RankScore]]:
+        """Candidates with their scores, best first (ties keep the API's order)."""
+        scores = self.score(candidates, objective, texts)
+        order = sorted(range(len(scores)), key=lambda i: (-scores[i].score, i))
+        return [(candidates[i], scores[i]) for i in order]
+
+
+def objective_of(job: dict[str, Any]) -> str:
+    """What a search job is after: its objective, else its query or queries."""
+    if isinstance(job.get("objective"), str) and job["objective"].strip():
+        return job["objective"]
+    queries = job.get("queries")
+    if isinstance(queries, list):
+        return " ".join(q for q in queries if isinstance(q, str))
+    return str(job.get("query") or "")
@@ -0,0 +1,276 @@
+"""Retry, hedging and circuit breaking for Parallel API calls.
+
+A single transient 429/5xx or a connection drop used to abort a script
+(``sys.exit(1)``) or turn into an ``{"error": ...}`` record that was
+dropped. :class:`RetryPolicy` sits between :class:`ParallelClient` and the
+wire, per endpoint:
+
+- retries 429/5xx and connection errors with capped exponential backoff and
+  full jitter, honoring ``Retry-After`` when the server sends one;
+- once an endpoint has enough latency samples, a call still running past
+  the observed p95 gets one hedged duplicate; whichever answers first wins.
+  Hedges are capped to a fraction of calls so a generally slow API does not
+  double spend;
+- after repeated failed calls (retries exhausted) the endpoint's circuit
+  opens and calls fail fast with :class:`CircuitOpenError` until a
+  cool-down probe succeeds.
+
+Other 4xx responses and read timeouts are not retried: the request reached
+the server, and the extract dispatcher already splits timed-out batches.
+
+Env:
+  PARALLEL_RETRIES   max attempts per call, including the first (default: 4)
+  PARALLEL_HEDGE     1 (default) | 0 to disable hedged requests
+"""
+
+from __future__ import annotations
+
+import http.client
+import os
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import asdict, dataclass, field
+from email.utils import parsedate_to_datetime
+from typing import Any, Callable, TypeVar
+
+R = TypeVar("R")
+
+RETRY_STATUSES = frozenset({408, 429, 500, 502, 503, 504})
+DEFAULT_ATTEMPTS = 4
+DEFAULT_BASE_DELAY = 0.5
+DEFAULT_MAX_DELAY = 30.0
+# Hedging needs a stable p95 and must not run away when everything is slow.
+HEDGE_MIN_SAMPLES = 20
+HEDGE_MAX_RATIO = 0.1
+LATENCY_WINDOW = 200
+BREAKER_THRESHOLD = 5
+BREAKER_COOLDOWN = 30.0
+
+_CONNECTION_ERRORS = (ConnectionError, http.client.HTTPException)
+
+
+class CircuitOpenError(Exception):
+    """The endpoint has failed repeatedly; calls fail fast until the cool-down passes."""
+
+    def __init__(self, endpoint: str, retry_in: float):
+        super().__init__(f"circuit open for {endpoint}; retry in {retry_in:.0f}s")
+        self.endpoint = endpoint
+        self.retry_in = retry_in
+
+
+@dataclass
+class EndpointStats:
+    calls: int = 0
+    retries: int = 0
+    hedges: int = 0
+    hedge_wins: int = 0
+    failures: int = 0
+    breaker_opens: int = 0
+    fast_fails: int = 0
+
+
+@dataclass
+class _Endpoint:
+    latencies: deque[float] = field(default_factory=lambda: deque(maxlen=LATENCY_WINDOW))
+    consecutive_failures: int = 0
+    open_until: float = 0.0
+    probing: bool = False
+    stats: EndpointStats = field(default_factory=EndpointStats)
+
+    def p95(self) -> float | None:
+        if len(self.latencies) < HEDGE_MIN_SAMPLES:
+            return None
+        ordered = sorted(self.latencies)
+        return ordered[min(len(ordered) - 1, int(0.95 * len(ordered)))]
+
+
+def is_retryable(exc: BaseException) -> bool:
+    status = getattr(exc, "status", None)
+    if status is not None:
+        return status in RETRY_STATUSES
+    if isinstance(exc, TimeoutError):
+        return False
+    return isinstance(exc, _CONNECTION_ERRORS)
+
+
+def retry_after(exc: BaseException) -> float | None:
+    """Seconds from a ``Retry-After`` header (delta-seconds or HTTP date), if any."""
+    value = (getattr(exc, "headers", None) or {}).get("retry-after")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class RetryPolicy:
+    """Per-endpoint retry/backoff, p95 hedging and circuit breaker around a blocking call."""
+
+    def __init__(
+        self,
+        max_attempts: int = DEFAULT_ATTEMPTS,
+        base_delay: float = DEFAULT_BASE_DELAY,
+        max_delay: float = DEFAULT_MAX_DELAY,
+        hedge: bool = True,
+        breaker_threshold: int = BREAKER_THRESHOLD,
+        breaker_cooldown: float = BREAKER_COOLDOWN,
+        sleep: Callable[[float], Any] = time.sleep,
+    ):
+        self.max_attempts = max(1, max_attempts)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.hedge = hedge
+        self.breaker_threshold = breaker_threshold
+        self.breaker_cooldown = breaker_cooldown
+        self._sleep = sleep
+        self._endpoints: dict[str, _Endpoint] = {}
+        self._lock = threading.Lock()
+        self._pool: ThreadPoolExecutor | None = None
+
+    @classmethod
+    def from_env(cls) -> RetryPolicy:
+        return cls(
+            max_attempts=int(os.environ.get("PARALLEL_RETRIES", DEFAULT_ATTEMPTS)),
+            hedge=os.environ.get("PARALLEL_HEDGE", "1").strip().lower() not in ("0", "off", "false", "no"),
+        )
+
+    def _endpoint(self, name: str) -> _Endpoint:
+        with self._lock:
+            ep = self._endpoints.get(name)
+            if ep is None:
+                ep = self._endpoints[name] = _Endpoint()
+            return ep
+
+    def backoff(self, attempt: int, exc: BaseException | None = None) -> float:
+        """Delay before retry number ``attempt`` (1-based): full jitter, or the server's Retry-After."""
+        hinted = retry_after(exc) if exc is not None else None
+        if hinted is not None:
+            return min(hinted, self.max_delay)
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** (attempt - 1)))
+
+    # -- circuit breaker ---------------------------------------------------
+
+    def _admit(self, name: str, ep: _Endpoint) -> bool:
+        """Raise :class:`CircuitOpenError` while the circuit is open; True if this call is the half-open probe."""
+        with self._lock:
+            if ep.consecutive_failures < self.breaker_threshold:
+                return False
+            now = time.monotonic()
+            if now < ep.open_until or ep.probing:
+                ep.stats.fast_fails += 1
+                raise CircuitOpenError(name, max(0.0, ep.open_until - now))
+            # Half-open: let a single probe through.
+            ep.probing = True
+            return True
+
+    def _succeeded(self, ep: _Endpoint, seconds: float) -> None:
+        with self._lock:
+            ep.latencies.append(seconds)
+            ep.consecutive_failures = 0
+            ep.probing = False
+
+    def _failed(self, ep: _Endpoint) -> None:
+        with self._lock:
+            ep.stats.failures += 1
+            ep.consecutive_failures += 1
+            ep.probing = False
+            if ep.consecutive_failures >= self.breaker_threshold:
+                if ep.open_until <= time.monotonic():
+                    ep.stats.breaker_opens += 1
+                ep.open_until = time.monotonic() + self.breaker_cooldown
+
+    # -- hedging -----------------------------------------------------------
+
+    def _hedge_after(self, ep: _Endpoint) -> float | None:
+        if not self.hedge:
+            return None
+        with self._lock:
+            if ep.stats.hedges >= max(1, HEDGE_MAX_RATIO * ep.stats.calls):
+                return None
+            return ep.p95()
+
+    def _attempt(self, fn: Callable[[], R], ep: _Endpoint, hedge_after: float | None) -> R:
+        if hedge_after is None:
+            return fn()
+        with self._lock:
+            if self._pool is None:
+                self._pool = ThreadPoolExecutor(max_workers=32, thread_name_prefix="parallel-hedge")
+            pool = self._pool
+        primary = pool.submit(fn)
+        done, _ = wait([primary], timeout=hedge_after)
+        if done:
+            return primary.result()
+
+        with self._lock:
+            ep.stats.hedges += 1
+        hedged = pool.submit(fn)
+        pending: set[Future] = {primary, hedged}
+        error: BaseException | None = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for fut in done:
+                exc = fut.exception()
+                if exc is None:
+                    if fut is hedged:
+                        with self._lock:
+                            ep.stats.hedge_wins += 1
+                    # The loser keeps running until its response arrives; its result is dropped.
+                    return fut.result()
+                error = error or exc
+        assert error is not None
+        raise error
+
+    def call(self, endpoint: str, fn: Callable[[], R], *, hedge: bool = True) -> R:
+        """Run ``fn`` under the endpoint's policy; re-raises the last error when attempts run out."""
+        ep = self._endpoint(endpoint)
+        with self._lock:
+            ep.stats.calls += 1
+        attempt = 0
+        probe = False
+        try:
+            while True:
+                attempt += 1
+                # The probe's own retries are part of the probe: only _succeeded/_failed end it.
+                probe = probe or self._admit(endpoint, ep)
+                started = time.monotonic()
+                try:
+                    result = self._attempt(fn, ep, self._hedge_after(ep) if hedge else None)
+                except Exception as e:
+                    if not is_retryable(e):
+                        raise
+                    if attempt >= self.max_attempts:
+                        # The breaker counts calls that gave up, not attempts, so a
+                        # batch being bisected around one bad URL does not trip it.
+                        self._failed(ep)
+                        raise
+                    with self._lock:
+                        ep.stats.retries += 1
+                    self._sleep(self.backoff(attempt, e))
+                    continue
+                self._succeeded(ep, time.monotonic() - started)
+                return result
+        finally:
+            if probe:
+                with self._lock:
+                    ep.probing = False
+
+    def stats(self) -> dict[str, dict[str, Any]]:
+        with self._lock:
+            return {
+                name: {**asdict(ep.stats), "p95": ep.p95(), "open": ep.consecutive_failures >= self.breaker_threshold}
+                for name, ep in self._endpoints.items()
+            }
+
+    def close(self) -> None:
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=False)
@@ -0,0 +1,276 @@
+"""Append-only JSONL session log with crash-safe resume.
+
+Runners used to hold every search and extract in one ``output`` dict and
+``json.dump`` it at the very end, so a crash or timeout late in a session
+lost all of it and the next run paid for every call again. A
+:class:`SessionLog` writes one JSON record per line as work completes and
+fsyncs after each, so whatever finished before a crash is on disk:
+
+  {"type": "session",   "session", "timestamp", ...}          first line
+  {"type": "search",    "key", "job", "result", "secs"}
+  {"type": "candidate", "url", "source"}
+  {"type": "extract",   "url", "record", "batch"}
+  {"type": "error",     "stage": "search"|"extract", ...}     same fields as above
+  {"type": "end",       ...}                                  clean finish
+
+Resuming replays the log: searches and extracts that completed are read
+back instead of re-requested; ``error`` records are retried. A torn last
+line (crash mid-write) is truncated before appending. Only byte offsets are
+kept in memory; records are read back from disk when needed, and
+:meth:`SessionLog.materialize` writes the runners' usual JSON file by
+streaming records from the log.
+
+Usage:
+  from snowresearch.session import SessionLog, add_session_flags
+
+  log = SessionLog.resume(args.resume) if args.resume else SessionLog.create(path, session="...")
+  ...  # append search/candidate/extract records as work completes
+  log.materialize(json_path, {"session": "..."}, [job_key(q) for q in jobs], final_urls)
+  log.close()
+
+Session specs do all of this per session: :func:`snowresearch.specs.run_spec`
+(``run_spec(spec, resume=args.resume)``) opens or resumes the log with
+:func:`open_session` and materializes it when the session's DAG finishes.
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Iterable, Sequence
+
+
+def job_key(job: Any) -> str:
+    """Stable key for a search job (its canonical JSON, hashed)."""
+    canonical = json.dumps(job, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    return hashlib.sha1(canonical.encode("utf-8")).hexdigest()[:16]
+
+
+def is_error(stage: str, value: Any) -> bool:
+    """Whether a search result / extract record should be retried on resume."""
+    if not isinstance(value, dict):
+        return True
+    if stage == "extract":
+        return "error" in value or bool(value.get("errors") and not value.get("results"))
+    return "error" in value
+
+
+def resolve_session(name: str | Path) -> Path:
+    """``--resume`` accepts the log path with or without its ``.jsonl`` suffix."""
+    path = Path(name).expanduser()
+    if not path.exists() and path.suffix != ".jsonl":
+        path = path.with_name(path.name + ".jsonl")
+    if not path.exists():
+        raise FileNotFoundError(f"no session log at {name}")
+    return path
+
+
+class SessionLog:
+    """Thread-safe append-only JSONL log, fsync'd per record, indexed by byte offset."""
+
+    def __init__(self, path: str | Path, meta: dict[str, Any]):
+        self.path = Path(path)
+        self.meta = meta
+        self.resumed = False
+        self.finished = False
+        self._lock = threading.Lock()
+        self._size = self.path.stat().st_size if self.path.exists() else 0
+        # key / url -> (offset, ok). The latest record wins, so a retried error
+        # that later succeeds points at the success.
+        self._searches: dict[str, tuple[int, bool]] = {}
+        self._extracts: dict[str, tuple[int, bool]] = {}
+        self._candidates: set[str] = set()
+        self._fh = open(self.path, "ab")
+        self._reader = open(self.path, "rb")
+
+    @classmethod
+    def create(cls, path: str | Path, **meta: Any) -> SessionLog:
+        """Start a new log at ``path``, replacing any previous one."""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(b"")
+        meta = {"timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"), **meta}
+        log = cls(path, meta)
+        log._write({"type": "session", **meta, "pid": os.getpid()})
+        try:
+            fd = os.open(path.parent, os.O_RDONLY)
+        except OSError:
+            return log
+        try:
+            os.fsync(fd)
+        except OSError:
+            pass
+        finally:
+            os.close(fd)
+        return log
+
+    @classmethod
+    def resume(cls, name: str | Path) -> SessionLog:
+        """Replay an existing log and reopen it for appending."""
+        path = resolve_session(name)
+        meta: dict[str, Any] = {}
+        index: list[tuple[int, dict[str, Any]]] = []
+        good = 0
+        with open(path, "rb") as f:
+            for line in iter(f.readline, b""):
+                if not line.endswith(b"\n"):
+                    break
+                try:
+                    rec = json.loads(line)
+                except ValueError:
+                    break
+                index.append((good, rec))
+                good += len(line)
+        if good != path.stat().st_size:
+            with open(path, "r+b") as f:
+                f.truncate(good)
+        for _, rec in index:
+            if rec.get("type") == "session":
+                meta = {k: v for k, v in rec.items() if k not in ("type", "pid")}
+                break
+
+        log = cls(path, meta)
+        log.resumed = True
+        for offset, rec in index:
+            log._index(offset, rec)
+        log._write({"type": "resume", "pid": os.getpid()})
+        return log
+
+    def _index(self, offset: int, rec: dict[str, Any]) -> None:
+        kind = rec.get("type")
+        stage = rec.get("stage") if kind == "error" else kind
+        if stage == "search":
+            self._searches[rec["key"]] = (offset, kind == "search")
+        elif stage == "extract":
+            self._extracts[rec["url"]] = (offset, kind == "extract")
+        elif kind == "candidate":
+            self._candidates.add(rec["url"])
+        elif kind == "end":
+            self.finished = True
+        elif kind == "resume":
+            self.finished = False
+
+    def _write(self, rec: dict[str, Any]) -> None:
+        line = (json.dumps(rec, ensure_ascii=False, separators=(",", ":")) + "\n").encode("utf-8")
+        with self._lock:
+            offset = self._size
+            self._fh.write(line)
+            self._fh.flush()
+            os.fsync(self._fh.fileno())
+            self._size += len(line)
+            self._index(offset, rec)
+
+    def _read(self, offset: int) -> dict[str, Any]:
+        with self._lock:
+            self._reader.seek(offset)
+            return json.loads(self._reader.readline())
+
+    # -- writers -----------------------------------------------------------
+
+    def search(self, key: str, job: Any, result: Any, secs: float = 0.0) -> None:
+        ok = not is_error("search", result)
+        rec = {"key": key, "job": job, "result": result, "secs": round(secs, 3)}
+        self._write({"type": "search", **rec} if ok else {"type": "error", "stage": "search", **rec})
+
+    def candidate(self, cand: dict[str, Any]) -> None:
+        if cand["url"] not in self._candidates:
+            self._write({"type": "candidate", "url": cand["url"], "source": cand})
+
+    def extract(self, url: str, record: dict[str, Any], batch: int = 0) -> None:
+        ok = not is_error("extract", record)
+        rec = {"url": url, "record": record, "batch": batch}
+        self._write({"type": "extract", **rec} if ok else {"type": "error", "stage": "extract", **rec})
+
+    def close(self, **summary: Any) -> None:
+        if not self._fh.closed:
+            self._write({"type": "end", **summary})
+            self._fh.close()
+            self._reader.close()
+
+    # -- replay ------------------------------------------------------------
+
+    def has_search(self, key: str) -> bool:
+        entry = self._searches.get(key)
+        return entry is not None and entry[1]
+
+    def load_search(self, key: str) -> Any:
+        return self._read(self._searches[key][0])["result"]
+
+    def has_extract(self, url: str) -> bool:
+        entry = self._extracts.get(url)
+        return entry is not None and entry[1]
+
+    def load_extract(self, url: str) -> dict[str, Any]:
+        return self._read(self._extracts[url][0])["record"]
+
+    def counts(self) -> dict[str, int]:
+        with self._lock:
+            return {
+                "searches": sum(ok for _, ok in self._searches.values()),
+                "extracts": sum(ok for _, ok in self._extracts.values()),
+                "errors": sum(not ok for _, ok in self._searches.values())
+                + sum(not ok for _, ok in self._extracts.values()),
+                "candidates": len(self._candidates),
+            }
+
+    def materialize(
+        self,
+        path: str | Path,
+        header: dict[str, Any],
+        search_keys: Sequence[str],
+        sources: Iterable[dict[str, Any]],
+    ) -> Path:
+        """Write ``{**header, "searches": [...], "extracts": [{"source", "extract"}]}`` from the log.
+
+        Records are streamed from disk one at a time; the file is written to
+        a temp name and swapped in, so a crash never leaves a half-written JSON.
+        """
+        path = Path(path)
+        tmp = path.with_suffix(path.suffix + ".tmp")
+
+        def block(value: Any) -> str:
+            return "    " + json.dumps(value, indent=2).replace("\n", "\n    ")
+
+        with open(tmp, "w") as f:
+            f.write("{\n")
+            for k, v in header.items():
+                f.write(f"  {json.dumps(k)}: {json.dumps(v)},\n")
+            f.write('  "searches": [')
+            sep = "\n"
+            for key in search_keys:
+                if key in self._searches:
+                    f.write(sep + block(self.load_search(key)))
+                    sep = ",\n"
+            f.write("\n  ],\n" if sep != "\n" else "],\n")
+            f.write('  "extracts": [')
+            sep = "\n"
+            for src in sources:
+                if src["url"] in self._extracts:
+                    f.write(sep + block({"source": src, "extract": self.load_extract(src["url"])}))
+                    sep = ",\n"
+            f.write("\n  ]\n}" if sep != "\n" else "]\n}")
+        os.replace(tmp, path)
+        return path
+
+
+def add_session_flags(ap: argparse.ArgumentParser) -> None:
+    ap.add_argument(
+        "--resume",
+        metavar="SESSION",
+        help="session log (.jsonl) from an interrupted run; completed searches/extracts are replayed, not re-requested",
+    )
+
+
+def open_session(resume: str | None, path: str | Path, **meta: Any) -> SessionLog:
+    """``SessionLog.resume(resume)`` when resuming, else a fresh log at ``path``."""
+    if resume:
+        log = SessionLog.resume(resume)
+        c = log.counts()
+        print(f"[RESUME] {log.path}: {c['searches']} searches, {c['extracts']} extracts already done")
+        return log
+    return SessionLog.create(path, **meta)
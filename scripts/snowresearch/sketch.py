@@ -0,0 +1,137 @@
+"""Mergeable latency sketches (DDSketch) for ``FACT_APP_OPERATION_WINDOW``.
+
+Each 15-minute window stores ``p50_ms``/``p95_ms`` as final numbers, so
+an hourly, daily or per-version rollup used to need the raw spans again.
+The refresh procedures now also store a ``duration_sketch``. It is a
+DDSketch: durations are counted in logarithmic buckets,
+``key = CEIL(LN(ms) / LN(gamma))``. Every value in bucket ``key`` lies
+within ``(gamma - 1) / (gamma + 1)`` relative error of its estimate
+``2 * gamma^key / (gamma + 1)``. With ``gamma = 1.02`` that is about 1%,
+at any quantile. Merging two sketches adds their bucket counts. The
+result is exactly the sketch of the combined spans, so p50/p95/p99 at any
+grain come from the windows alone.
+
+The serialized form is what the SQL stores in the VARIANT column::
+
+    {"gamma": 1.02, "buckets": {"82": 3, "83": 11, ...}}
+
+Durations below ``MIN_MS`` (including 0 and clock-skew negatives) count
+in ``MIN_MS``'s bucket. ``sql/telemetry_v0_pipeline.sql`` builds the
+buckets with ``OBJECT_AGG`` in the refresh and defines the ``DDS_MERGE``
+and ``DDS_QUANTILE`` Python UDFs with the same logic as :func:`merge`
+and :func:`quantile` here. Those read the VARIANT column in Snowflake;
+this module reads it anywhere else, such as exported facts, notebooks or
+the emulator.
+
+Usage:
+  from snowresearch import sketch
+
+  s = sketch.DDSketch.of(durations_ms)
+  s.quantile(0.95)
+  day = sketch.merge(row["DURATION_SKETCH"] for row in windows)   # serialized in, serialized out
+  sketch.quantile(day, 0.99)
+"""
+
+from __future__ import annotations
+
+import json
+import math
+from typing import Any, Iterable
+
+GAMMA = 1.02  # bucket ratio: relative error (GAMMA - 1) / (GAMMA + 1), about 1%
+MIN_MS = 0.001  # smaller durations share this bucket
+
+
+class DDSketch:
+    """Bucket counts at ratio ``gamma``; ``add`` values, ``merge`` sketches, read ``quantile``s."""
+
+    def __init__(self, gamma: float = GAMMA, buckets: dict[int, int] | None = None):
+        if gamma <= 1:
+            raise ValueError(f"gamma must be > 1, got {gamma}")
+        self.gamma = gamma
+        self._ln = math.log(gamma)
+        self.buckets: dict[int, int] = dict(buckets or {})
+
+    @classmethod
+    def of(cls, values: Iterable[float], gamma: float = GAMMA) -> DDSketch:
+        s = cls(gamma)
+        for v in values:
+            s.add(v)
+        return s
+
+    @property
+    def relative_error(self) -> float:
+        return (self.gamma - 1) / (self.gamma + 1)
+
+    @property
+    def count(self) -> int:
+        return sum(self.buckets.values())
+
+    def key(self, value: float) -> int:
+        return math.ceil(math.log(max(value, MIN_MS)) / self._ln)
+
+    def estimate(self, key: int) -> float:
+        return 2 * self.gamma**key / (self.gamma + 1)
+
+    def add(self, value: float, count: int = 1) -> None:
+        k = self.key(value)
+        self.buckets[k] = self.buckets.get(k, 0) + count
+
+    def merge(self, other: DDSketch) -> DDSketch:
+        """Add ``other``'s counts into this sketch (same ``gamma`` only); returns self."""
+        if not math.isclose(other.gamma, self.gamma):
+            raise ValueError(f"cannot merge sketches with gamma {self.gamma} and {other.gamma}")
+        for k, n in other.buckets.items():
+            self.buckets[k] = self.buckets.get(k, 0) + n
+        return self
+
+    def quantile(self, q: float) -> float | None:
+        """Estimated ``q``-quantile (0..1); None for an empty sketch."""
+        if not 0 <= q <= 1:
+            raise ValueError(f"quantile must be in [0, 1], got {q}")
+        total = self.count
+        if not total:
+            return None
+        rank = q * (total - 1)
+        seen = 0
+        for k in sorted(self.buckets):
+            seen += self.buckets[k]
+            if seen > rank:
+                return self.estimate(k)
+        return self.estimate(max(self.buckets))
+
+    def to_dict(self) -> dict[str, Any]:
+        return {"gamma": self.gamma, "buckets": {str(k): n for k, n in sorted(self.buckets.items())}}
+
+    def to_json(self) -> str:
+        return json.dumps(self.to_dict(), separators=(",", ":"))
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any] | str) -> DDSketch:
+        """A sketch from its serialized form (a dict, or the JSON text of a VARIANT column)."""
+        if isinstance(data, str):
+            data = json.loads(data)
+        buckets = {int(k): int(n) for k, n in (data.get("buckets") or {}).items()}
+        return cls(float(data.get("gamma") or GAMMA), buckets)
+
+    def __len__(self) -> int:
+        return len(self.buckets)
+
+    def __repr__(self) -> str:
+        return f"DDSketch(gamma={self.gamma:g}, count={self.count}, buckets={len(self.buckets)})"
+
+
+def merge(sketches: Iterable[dict[str, Any] | str | None]) -> dict[str, Any] | None:
+    """Merge serialized sketches (NULLs skipped); None if there were none. ``DDS_MERGE`` in SQL."""
+    out: DDSketch | None = None
+    for data in sketches:
+        if not data:
+            continue
+        s = DDSketch.from_dict(data)
+        out = s if out is None else out.merge(s)
+    return None if out is None else out.to_dict()
+
+
+def quantile(sketch: dict[str, Any] | str | None, q: float) -> float | None:
+    """The ``q``-quantile of a serialized sketch. ``DDS_QUANTILE`` in SQL."""
+    return DDSketch.from_dict(sketch).quantile(q) if sketch else None
@@ -0,0 +1,448 @@
+"""Session specs: topics, queries and selection rules as data files, run as one DAG.
+
+Each session runner used to carry its own ``SEARCH_QUERIES`` list, search
+payload shape, "top N docs + M others" rule and output path in code. A
+spec in ``research/sessions/<name>.json`` (or ``.yaml`` with PyYAML
+installed) holds the same things as data:
+
+  {
+    "session": "warehouse-sizing-research",
+    "title": "Warehouse Sizing Deep Research Session",
+    "output": "{workspace}/research/finops/{date}/research_raw_{stamp}.json",
+    "search": {"payload": {"query": "{query}", "limit": 8}, "timeout": 60},
+    "select": {"max_docs": 6, "max_other": 3, "max_total": 9, "keep": ["snowflake"]},
+    "extract": {"payload": {"include_graph_data": true}},
+    "budget": {"search": 20, "extract": 15},
+    "snippet_chars": 200,
+    "queries": [{"topic": "...", "query": "...", "objective": "..."}]
+  }
+
+:func:`run_specs` turns one or more specs into a single
+:class:`~snowresearch.dag.DAG` (per query: search -> select -> extract; per
+session: write), so several sessions share one process, connection pool,
+response cache and budget, and a page two sessions both select is fetched
+once. Every session still gets its own resumable
+:class:`~snowresearch.session.SessionLog` and JSON output.
+
+``select.dedup`` (e.g. ``0.8``) skips non-docs candidates whose search
+excerpts are at least that much covered by pages already selected
+(MinHash near-duplicates, :mod:`snowresearch.dedup`; needs numpy), so
+mirrors of a docs page are not extracted a second time. ``select.rank``
+(``true``, or a dict of weights and ``half_life_days``) scores candidates
+locally, by BM25 against the query's objective, domain authority,
+freshness, API score and novelty against the URL ledger
+(:mod:`snowresearch.ranking`), so the caps keep the best pages rather
+than the first ones; each selected URL carries its score breakdown.
+
+Strings in ``search.payload`` are filled from each query entry: a value
+that is exactly ``"{name}"`` is replaced by that field as-is (so a
+``"{queries}"`` list stays a list), anything else goes through
+``str.format``. ``output`` may use ``{workspace}``, ``{date}``
+(YYYY-MM-DD), ``{stamp}`` (YYYYMMDD_HHMM) and ``{session}``; a bare
+``output_dir`` means ``<output_dir>/{session}_{stamp}.json``.
+
+Env:
+  RESEARCH_SESSIONS_DIR   default: <repo>/research/sessions
+  OPENCLAW_WORKSPACE      default: /home/ubuntu/.openclaw/workspace
+  PARALLEL_CONCURRENCY    DAG nodes in flight (default: 8)
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import re
+import threading
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+DEFAULT_WORKSPACE = "/home/ubuntu/.openclaw/workspace"
+SPEC_SUFFIXES = (".json", ".yaml", ".yml")
+DEFAULT_CONCURRENCY = 8
+DEFAULT_EXTRACT_WORKERS = 3
+
+_PLACEHOLDER = re.compile(r"^\{(\w+)\}$")
+
+
+def sessions_dir() -> Path:
+    return Path(os.environ.get("RESEARCH_SESSIONS_DIR") or REPO_ROOT / "research" / "sessions")
+
+
+def workspace() -> Path:
+    return Path(os.environ.get("OPENCLAW_WORKSPACE") or os.environ.get("WORKSPACE") or DEFAULT_WORKSPACE)
+
+
+def list_specs() -> list[str]:
+    d = sessions_dir()
+    if not d.is_dir():
+        return []
+    return sorted({p.stem for p in d.iterdir() if p.suffix in SPEC_SUFFIXES})
+
+
+def spec_path(name: str | Path) -> Path:
+    """A spec name from :func:`list_specs`, or a path to a spec file."""
+    path = Path(name)
+    if path.suffix in SPEC_SUFFIXES and path.exists():
+        return path
+    for suffix in SPEC_SUFFIXES:
+        candidate = sessions_dir() / f"{name}{suffix}"
+        if candidate.exists():
+            return candidate
+    known = ", ".join(list_specs()) or "none"
+    raise FileNotFoundError(f"no session spec {name!r} (known: {known})")
+
+
+def load_spec(name: str | Path) -> dict[str, Any]:
+    path = spec_path(name)
+    text = path.read_text(encoding="utf-8")
+    if path.suffix == ".json":
+        spec = json.loads(text)
+    else:
+        try:
+            import yaml
+        except ImportError:
+            raise RuntimeError(f"{path} is YAML; install PyYAML (pip install pyyaml) or use a .json spec") from None
+        spec = yaml.safe_load(text)
+    for key in ("session", "queries"):
+        if key not in spec:
+            raise ValueError(f"session spec {name!r} is missing {key!r}")
+    return spec
+
+
+def fill(template: Any, fields: dict[str, Any]) -> Any:
+    """Fill ``{field}`` placeholders in every string of a JSON-like template."""
+    if isinstance(template, dict):
+        return {k: fill(v, fields) for k, v in template.items()}
+    if isinstance(template, list):
+        return [fill(v, fields) for v in template]
+    if isinstance(template, str):
+        m = _PLACEHOLDER.match(template)
+        if m and m.group(1) in fields:
+            return fields[m.group(1)]
+        return template.format_map(fields)
+    return template
+
+
+def output_path(spec: dict[str, Any], started: datetime) -> Path:
+    template = spec.get("output")
+    if template is None:
+        template = spec.get("output_dir", "{workspace}/research/sessions/{date}").rstrip("/") + "/{session}_{stamp}.json"
+    return Path(
+        template.format(
+            workspace=workspace(),
+            date=started.strftime("%Y-%m-%d"),
+            stamp=started.strftime("%Y%m%d_%H%M"),
+            session=spec["session"],
+        )
+    )
+
+
+def search_results(resp: Any) -> list[dict[str, Any]]:
+    """Result rows from either search response shape (``results`` or ``data.results``)."""
+    if not isinstance(resp, dict):
+        return []
+    rows = resp.get("results")
+    if not isinstance(rows, list):
+        rows = (resp.get("data") or {}).get("results") if isinstance(resp.get("data"), dict) else None
+    return [r for r in rows or [] if isinstance(r, dict) and r.get("url")]
+
+
+def make_search(spec: dict[str, Any]):
+    """``job -> {"topic", "query", "results" | "error"}``, the runners' search record shape."""
+    from snowresearch.client import get_client
+
+    conf = spec.get("search") or {}
+    template = conf.get("payload") or {"search_queries": ["{query}"], "max_results": 10}
+    timeout = conf.get("timeout", 60)
+
+    def search(job: dict[str, Any]) -> dict[str, Any]:
+        record = {k: job[k] for k in ("topic", "query", "queries", "objective") if k in job}
+        try:
+            record["results"] = get_client().search(fill(template, job), timeout=timeout)
+        except Exception as e:
+            record["error"] = str(e)
+        return record
+
+    return search
+
+
+def make_collect(spec: dict[str, Any]):
+    from snowresearch.ranking import objective_of
+
+    snippet = int(spec.get("snippet_chars", 200))
+    select = spec.get("select") or {}
+    # Near-duplicate selection and ranking read full excerpts (and ranking the
+    # objective); the policy drops both from the candidate when admitting.
+    ranking = bool(select.get("rank"))
+    excerpts = select.get("dedup") is not None or ranking
+
+    def collect(job: dict[str, Any], record: dict[str, Any]) -> list[dict[str, Any]]:
+        return [
+            {
+                "url": r["url"],
+                "title": r.get("title", "N/A"),
+                "snippet": (r.get("snippet") or " ".join(r.get("excerpts") or []))[:snippet],
+                "publish_date": r.get("publish_date", "N/A"),
+                "topic": job.get("topic"),
+                **({"score": r["score"]} if isinstance(r.get("score"), (int, float)) else {}),
+                **({"excerpts": r.get("excerpts") or []} if excerpts else {}),
+                **({"objective": objective_of(job)} if ranking else {}),
+            }
+            for r in search_results(record.get("results"))
+        ]
+
+    return collect
+
+
+def make_policy(spec: dict[str, Any]):
+    from snowresearch.pipeline import SelectionPolicy
+
+    conf = dict(spec.get("select") or {})
+    keep = [k.lower() for k in conf.pop("keep", ["snowflake"])]
+    ranking = conf.pop("rank", None)
+    ledger = None
+    if ranking:
+        from snowresearch.client import get_client
+
+        ledger = getattr(get_client(), "ledger", None)
+    return SelectionPolicy(**conf, ranking=ranking, ledger=ledger, keep=lambda url: any(k in url.lower() for k in keep))
+
+
+@dataclass
+class SpecResult:
+    session: str
+    path: Path | None
+    searches: list[Any]
+    final_urls: list[dict[str, Any]]
+    extracts: list[dict[str, Any]]
+    counts: dict[str, int] = field(default_factory=dict)
+
+
+class SharedExtracts:
+    """Per-process ``(url, payload)`` claim table, so two sessions never fetch the same page twice.
+
+    The first extract node to claim a URL fetches it; later claimants wait
+    for its record. Owners publish before waiting on anything, so claims
+    cannot deadlock.
+    """
+
+    def __init__(self) -> None:
+        self._entries: dict[tuple[str, str], list[Any]] = {}
+        self._lock = threading.Lock()
+
+    def claim(self, url: str, payload: dict[str, Any]) -> tuple[bool, list[Any]]:
+        key = (url, json.dumps(payload, sort_keys=True))
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                entry = self._entries[key] = [threading.Event(), None]
+                return True, entry
+            return False, entry
+
+    @staticmethod
+    def publish(entry: list[Any], record: dict[str, Any]) -> None:
+        entry[1] = record
+        entry[0].set()
+
+    @staticmethod
+    def wait(entry: list[Any]) -> dict[str, Any]:
+        entry[0].wait()
+        return entry[1]
+
+
+def _say(quiet: bool):
+    return (lambda *a: None) if quiet else print
+
+
+def plan_spec(
+    dag: Any,
+    spec: dict[str, Any],
+    *,
+    budget: Any,
+    shared: SharedExtracts,
+    resume: str | None = None,
+    quiet: bool = False,
+) -> str:
+    """Add one session's nodes to ``dag``; returns the name of its write node.
+
+    Per query: ``search`` -> ``select`` (admit candidates under the spec's
+    caps) -> ``extract`` (the admitted URLs). One ``write`` node per session
+    waits for all of them, ranks the final URL list and materializes the
+    JSON from the session log. Searches and extracts already in a resumed
+    log are replayed instead of re-requested.
+    """
+    from snowresearch.batching import ExtractDispatcher
+    from snowresearch.session import job_key, open_session
+
+    say = _say(quiet)
+    name = spec["session"]
+    started = datetime.now(timezone.utc).replace(tzinfo=None)
+    log = open_session(
+        resume, output_path(spec, started).with_suffix(".jsonl"), session=name, timestamp=started.isoformat()
+    )
+    started = datetime.fromisoformat(log.meta.get("timestamp", started.isoformat()))
+    queries = spec["queries"]
+    search, collect, policy = make_search(spec), make_collect(spec), make_policy(spec)
+    extract_payload = (spec.get("extract") or {}).get("payload") or {}
+    dispatcher = ExtractDispatcher(payload=extract_payload, concurrency=1, source=name)
+    searches: list[Any] = [None] * len(queries)
+    extracted: dict[str, dict[str, Any]] = {}
+    lock = threading.Lock()
+
+    def search_node(i: int, job: dict[str, Any]):
+        def run() -> Any:
+            key = job_key(job)
+            if log.has_search(key):
+                record = log.load_search(key)
+            elif not budget.take("search"):
+                record = {k: job[k] for k in ("topic", "query") if k in job}
+                record["error"] = "search budget exhausted"
+            else:
+                t = time.monotonic()
+                record = search(job)
+                log.search(key, job, record, time.monotonic() - t)
+            searches[i] = record
+            return record
+
+        return run
+
+    def select_node(i: int, job: dict[str, Any]):
+        def run() -> list[dict[str, Any]]:
+            admitted = policy.admit(collect(job, searches[i]))
+            for cand in admitted:
+                log.candidate(cand)
+            say(
+                f"→ [{name}] {job.get('topic')}: {str(job.get('query', job.get('objective', '')))[:50]}... "
+                f"({len(admitted)} selected)"
+            )
+            return admitted
+
+        return run
+
+    def extract_node(select_name: str):
+        def run() -> int:
+            admitted = dag.nodes[select_name].result or []
+            mine, theirs = [], []
+            for cand in admitted:
+                url = cand["url"]
+                if log.has_extract(url):
+                    with lock:
+                        extracted[url] = log.load_extract(url)
+                    continue
+                owner, entry = shared.claim(url, extract_payload)
+                (mine if owner else theirs).append((url, entry))
+
+            granted = budget.take("extract", len(mine))
+            fetch = [url for url, _ in mine[:granted]]
+            records = {url: {"error": "extract budget exhausted", "url": url} for url, _ in mine[granted:]}
+
+            def done(url: str, record: dict[str, Any], n: int) -> None:
+                if n == 0:
+                    budget.refund("extract")
+                log.extract(url, record, n)
+                say(f"→ [{name}] {url[:70]}... (batch of {n})")
+
+            try:
+                if fetch:
+                    records.update(dispatcher.run(fetch, on_result=done))
+            except Exception as e:
+                records.update({url: {"error": str(e), "url": url} for url in fetch if url not in records})
+            finally:
+                # Other sessions may be waiting on these URLs; always release them.
+                for url, entry in mine:
+                    shared.publish(entry, records.get(url) or {"error": "extract did not run", "url": url})
+            for url, entry in theirs:
+                record = shared.wait(entry)
+                log.extract(url, record, 0)
+                records[url] = record
+            with lock:
+                extracted.update(records)
+            return len(records)
+
+        return run
+
+    def write_node() -> SpecResult:
+        final = policy.rank([q.get("topic") for q in queries])
+        out = output_path(spec, started)
+        out.parent.mkdir(parents=True, exist_ok=True)
+        log.materialize(
+            out, {"timestamp": started.isoformat(), "session": name}, [job_key(q) for q in queries], final
+        )
+        counts = log.counts()
+        log.close(**counts)
+        covered = policy.covered
+        skipped = f", {len(covered)} skipped as near-duplicates" if covered else ""
+        say(f"\n✓ [{name}] {policy.unique_count} unique URLs, {len(final)} selected{skipped}; saved to {out}")
+        for c in covered:
+            say(f"  ≈ {c['url'][:70]} ({c['coverage']:.0%} covered by {c['covered_by'][:60]})")
+        extracts = [{"source": c, "extract": extracted[c["url"]]} for c in final if c["url"] in extracted]
+        return SpecResult(name, out, searches, final, extracts, counts)
+
+    tails = []
+    for i, job in enumerate(queries):
+        base = f"{name}/{i}:{job.get('topic', i)}"
+        dag.add(f"{base}/search", "search", search_node(i, job))
+        dag.add(f"{base}/select", "select", select_node(i, job), deps=[f"{base}/search"])
+        dag.add(f"{base}/extract", "extract", extract_node(f"{base}/select"), deps=[f"{base}/select"])
+        tails.append(f"{base}/extract")
+    dag.add(f"{name}/write", "write", write_node, deps=tails)
+    return f"{name}/write"
+
+
+def run_specs(
+    specs: list[dict[str, Any]],
+    *,
+    resume: str | None = None,
+    concurrency: int | None = None,
+    limits: dict[str, int] | None = None,
+    budget: dict[str, int | None] | None = None,
+    quiet: bool = False,
+) -> dict[str, SpecResult]:
+    """Run one or more session specs as a single DAG over the shared client, pool and cache.
+
+    ``budget`` (``{"search": N, "extract": M}``) caps API calls across all
+    sessions; a spec's own ``budget`` block caps that session. ``resume``
+    only makes sense with a single spec.
+    """
+    from snowresearch.dag import DAG, Budget
+
+    if resume and len(specs) != 1:
+        raise ValueError("--resume takes a single session")
+    say = _say(quiet)
+    concurrency = int(concurrency or os.environ.get("PARALLEL_CONCURRENCY") or DEFAULT_CONCURRENCY)
+    limits = {"search": concurrency, "extract": DEFAULT_EXTRACT_WORKERS, **(limits or {})}
+    total = Budget(budget)
+    shared = SharedExtracts()
+    dag = DAG()
+    writes = {}
+    for spec in specs:
+        say("=" * 70)
+        say(f"{spec.get('title', spec['session'])} ({len(spec['queries'])} queries)")
+        say("=" * 70)
+        session_budget = Budget(spec.get("budget"), parent=total)
+        writes[spec["session"]] = plan_spec(
+            dag, spec, budget=session_budget, shared=shared, resume=resume, quiet=quiet
+        )
+
+    def on_node(node: Any) -> None:
+        if node.state in ("failed", "skipped") and not quiet:
+            print(f"✗ {node.name}: {node.state}" + (f" ({node.error})" if node.error else ""))
+
+    dag.run(concurrency=concurrency, limits=limits, on_node=on_node)
+    spent = total.summary()
+    say(f"\n[DAG] {dag.summary()}  budget used {spent['used']}" + (f", denied {spent['denied']}" if any(spent["denied"].values()) else ""))
+    results = {}
+    for session, write in writes.items():
+        node = dag.nodes[write]
+        results[session] = node.result if node.state == "done" else SpecResult(session, None, [], [], [])
+    return results
+
+
+def run_spec(spec: dict[str, Any], *, resume: str | None = None, quiet: bool = False, **kwargs: Any) -> tuple[Path | None, SpecResult]:
+    """Run a single session spec; returns ``(json_path, SpecResult)``."""
+    result = run_specs([spec], resume=resume, quiet=quiet, **kwargs)[spec["session"]]
+    return result.path, result
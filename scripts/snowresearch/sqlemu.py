@@ -0,0 +1,1449 @@
+"""Run the ``sql/`` pipelines locally: DuckDB stand-ins for the SNOWFLAKE views, plus benchmarks.
+
+None of ``sql/*.sql`` could be exercised without a live account, so
+nobody knew how ``SP_REFRESH_FACTS``, ``SP_REFRESH_TELEMETRY_FACTS_15M``
+or ``FINOPS_IDLE_WAREHOUSE_7D_VW`` scale. :class:`Emulator` opens an
+in-process DuckDB database and provides:
+
+- stand-ins for the ``SNOWFLAKE.ACCOUNT_USAGE`` / ``ORGANIZATION_USAGE`` /
+  ``TELEMETRY`` views and ``INFORMATION_SCHEMA.LISTINGS`` the files read
+  (:data:`STANDINS`; a ``SNOWFLAKE`` catalog is attached, so three-part
+  names resolve as written). :meth:`Emulator.populate` fills them with
+  deterministic synthetic data at a scale factor.
+- a statement translator (:func:`translate`) for what the files use:
+  ``DATEADD``, ``IFF``, ``APPROX_PERCENTILE``, ``OBJECT_CONSTRUCT`` (also
+  ``(*)``), ``ARRAY_CONSTRUCT``, ``TRY_TO_NUMBER``, NULL-propagating
+  ``GREATEST``/``LEAST``, global ``REGEXP_REPLACE``, ``col:"path"``
+  variant access, backslash escapes in literals, and Snowflake types.
+  ``QUALIFY``, ``MERGE`` and ``DATEDIFF`` run natively. ``CURRENT_TIMESTAMP()``
+  and ``CURRENT_DATE()`` read the emulator's fixed clock (:attr:`Emulator.now`),
+  so runs are repeatable.
+- a small Snowflake Scripting interpreter for the procedures
+  (``DECLARE``, ``BEGIN … EXCEPTION WHEN OTHER … END``, ``IF``, ``:=``,
+  ``SELECT … INTO``, ``EXECUTE IMMEDIATE``, ``RETURN`` / ``RETURN TABLE``),
+  called with :meth:`Emulator.call`.
+- inline ``LANGUAGE PYTHON`` UDFs, run as DuckDB Python functions
+  (VARIANT/OBJECT/ARRAY arguments arrive as dicts and lists, as in Snowflake).
+
+The emulator runs what Snowflake would reject, but it records lint
+findings on the way: a ``$$`` nested inside a ``$$`` body, a variable
+used bare in a SQL statement (Snowflake needs ``:name``), ``UNIQUE`` on
+expressions, and columns the stand-ins add only because the SQL reads
+them (:data:`ASSUMED_COLUMNS`). Known gaps: ``OBJECT_CONSTRUCT`` keeps
+NULL values, ``TIMESTAMP_LTZ`` is treated as NTZ in UTC, constraints are
+dropped (Snowflake does not enforce them either) and tasks are not
+scheduled.
+
+:func:`bench` loads every file at each scale (1×/10×/100× by default),
+calls each refresh procedure with its task arguments (:data:`CALLS`),
+materializes every view and reports median time and row counts. The
+growth exponent between the smallest and largest scale flags
+super-linear steps. Pass ``baseline=`` to compare with an earlier
+``--json`` report and fail on regressions. Needs duckdb.
+
+:func:`replay` compares the full and the watermark-driven telemetry
+refresh (:data:`REPLAY`) over a sequence of 15-minute task runs while
+events keep arriving, some of them late: EVENTS_VIEW rows scanned, fact
+rows merged, time, and whether both end with the same facts.
+
+Usage:
+  scripts/research sql check
+  scripts/research sql bench --scales 1,10,100 --json /tmp/bench.json [--baseline prev.json]
+  scripts/research sql bench --data /tmp/synth     (output of `research synth`)
+  scripts/research sql replay --scale 50 --ticks 16 [--late-share 0.05 --late-max 45]
+
+  from snowresearch.sqlemu import Emulator
+  emu = Emulator()
+  emu.populate(scale=10)
+  emu.run_file("sql/telemetry_v0_pipeline.sql")
+  emu.call("SP_REFRESH_TELEMETRY_FACTS_15M", lookback_hours=6)
+"""
+
+from __future__ import annotations
+
+import math
+import os
+import re
+import statistics
+import time
+from dataclasses import asdict, dataclass, field
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from pathlib import Path
+from typing import Any, Iterable, Sequence
+
+from snowresearch.index import REPO_ROOT
+
+DEFAULT_NOW = datetime(2026, 3, 1, 6, 0)
+DEFAULT_SCALES = (1, 10, 100)
+DEFAULT_REPEAT = 3
+DEFAULT_TOLERANCE = 1.5  # a step this many times slower than the baseline is a regression
+SUPERLINEAR = 1.2  # growth exponent above this is flagged
+DEFAULT_TICKS = 16  # replayed task runs (15 minutes apart)
+
+# Row counts at scale 1; everything but the org-level tables grows linearly.
+BASE = {"warehouses": 5, "days": 30, "queries": 20_000, "events": 20_000, "event_days": 7, "grants": 50}
+
+# Stand-in views, in Snowflake types (translated like any other DDL).
+STANDINS = {
+    "ACCOUNT_USAGE.WAREHOUSE_METERING_HISTORY": """
+        START_TIME TIMESTAMP_LTZ, END_TIME TIMESTAMP_LTZ, WAREHOUSE_ID NUMBER, WAREHOUSE_NAME STRING,
+        CREDITS_USED NUMBER(38,9), CREDITS_USED_COMPUTE NUMBER(38,9), CREDITS_USED_CLOUD_SERVICES NUMBER(38,9),
+        CREDITS_ATTRIBUTED_COMPUTE_QUERIES NUMBER(38,9)""",
+    "ACCOUNT_USAGE.WAREHOUSES": """
+        WAREHOUSE_ID NUMBER, WAREHOUSE_NAME STRING, WAREHOUSE_SIZE STRING, WAREHOUSE_TYPE STRING, STATE STRING,
+        AUTO_SUSPEND NUMBER, AUTO_RESUME BOOLEAN, MIN_CLUSTER_COUNT NUMBER, MAX_CLUSTER_COUNT NUMBER,
+        CREATED TIMESTAMP_LTZ, DELETED TIMESTAMP_LTZ""",
+    "ACCOUNT_USAGE.QUERY_HISTORY": """
+        QUERY_ID STRING, QUERY_TYPE STRING, QUERY_TAG STRING, USER_NAME STRING, ROLE_NAME STRING,
+        WAREHOUSE_ID NUMBER, WAREHOUSE_NAME STRING, WAREHOUSE_SIZE STRING, CLUSTER_NUMBER NUMBER,
+        EXECUTION_STATUS STRING, START_TIME TIMESTAMP_LTZ, END_TIME TIMESTAMP_LTZ, TOTAL_ELAPSED_TIME NUMBER,
+        EXECUTION_TIME NUMBER, CREDITS_USED_CLOUD_SERVICES NUMBER(38,9)""",
+    "ACCOUNT_USAGE.QUERY_ATTRIBUTION_HISTORY": """
+        QUERY_ID STRING, PARENT_QUERY_ID STRING, ROOT_QUERY_ID STRING, WAREHOUSE_ID NUMBER, WAREHOUSE_NAME STRING,
+        QUERY_HASH STRING, QUERY_PARAMETERIZED_HASH STRING, QUERY_TAG STRING, USER_NAME STRING,
+        START_TIME TIMESTAMP_LTZ, END_TIME TIMESTAMP_LTZ, CREDITS_ATTRIBUTED_COMPUTE NUMBER(38,9),
+        CREDITS_USED_QUERY_ACCELERATION NUMBER(38,9)""",
+    "ACCOUNT_USAGE.METERING_HISTORY": """
+        SERVICE_TYPE STRING, START_TIME TIMESTAMP_LTZ, END_TIME TIMESTAMP_LTZ, ENTITY_ID NUMBER, ENTITY_TYPE STRING,
+        NAME STRING, DATABASE_NAME STRING, SCHEMA_NAME STRING, CREDITS_USED_COMPUTE NUMBER(38,9),
+        CREDITS_USED_CLOUD_SERVICES NUMBER(38,9), CREDITS_USED NUMBER(38,9)""",
+    "ACCOUNT_USAGE.GRANTS_TO_SHARES": """
+        CREATED_ON TIMESTAMP_LTZ, DELETED_ON TIMESTAMP_LTZ, PRIVILEGE STRING, GRANTED_ON STRING, NAME STRING,
+        TABLE_CATALOG STRING, TABLE_SCHEMA STRING, GRANTED_TO STRING, SHARE_NAME STRING, GRANTEE_NAME STRING,
+        GRANT_OPTION BOOLEAN, GRANTED_BY STRING""",
+    "ORGANIZATION_USAGE.METERING_DAILY_HISTORY": """
+        ORGANIZATION_NAME STRING, ACCOUNT_NAME STRING, ACCOUNT_LOCATOR STRING, REGION STRING, SERVICE_TYPE STRING,
+        USAGE_DATE DATE, CREDITS_USED_COMPUTE NUMBER(38,9), CREDITS_USED_CLOUD_SERVICES NUMBER(38,9),
+        CREDITS_USED NUMBER(38,9), CREDITS_ADJUSTMENT_CLOUD_SERVICES NUMBER(38,9), CREDITS_BILLED NUMBER(38,9)""",
+    "ORGANIZATION_USAGE.USAGE_IN_CURRENCY_DAILY": """
+        ORGANIZATION_NAME STRING, ACCOUNT_NAME STRING, ACCOUNT_LOCATOR STRING, REGION STRING, USAGE_DATE DATE,
+        USAGE_TYPE STRING, SERVICE_TYPE STRING, CURRENCY STRING, USAGE NUMBER(38,9), USAGE_IN_CURRENCY NUMBER(38,9),
+        BALANCE_SOURCE STRING, BILLING_TYPE STRING, RATING_TYPE STRING, IS_ADJUSTMENT BOOLEAN""",
+    # VALUE is a VARIANT in Snowflake; log bodies are strings, and VALUE::string must yield the bare text.
+    "TELEMETRY.EVENTS_VIEW": """
+        TIMESTAMP TIMESTAMP_NTZ, START_TIMESTAMP TIMESTAMP_NTZ, OBSERVED_TIMESTAMP TIMESTAMP_NTZ, TRACE VARIANT,
+        RESOURCE VARIANT, RESOURCE_ATTRIBUTES VARIANT, SCOPE VARIANT, SCOPE_ATTRIBUTES VARIANT, RECORD_TYPE STRING,
+        RECORD VARIANT, RECORD_ATTRIBUTES VARIANT, VALUE STRING, EXEMPLARS VARIANT""",
+    # Columns as read by gov_audit_listing_share_audit.sql, which still has to confirm them.
+    "INFORMATION_SCHEMA.LISTINGS": """
+        LISTING_NAME STRING, LISTING_GLOBAL_NAME STRING, LISTING_OWNER STRING, LISTING_STATE STRING,
+        LISTING_TYPE STRING, TARGET_ACCOUNTS VARIANT, CREATED_ON TIMESTAMP_LTZ, LAST_ALTERED TIMESTAMP_LTZ""",
+}
+
+# Read by sql/ but not in the documented views; added so the statements bind, and reported by ``check``.
+ASSUMED_COLUMNS = {
+    "ACCOUNT_USAGE.QUERY_HISTORY": {"CREDITS_USED_COMPUTE": "NUMBER(38,9)"},
+    "ACCOUNT_USAGE.QUERY_ATTRIBUTION_HISTORY": {"CREDITS_ATTRIBUTED_CLOUD_SERVICES": "NUMBER(38,9)"},
+}
+
+# Procedure -> arguments, as the tasks in sql/ call them.
+CALLS = {
+    "FINOPS_INTELLIGENCE.SP_REFRESH_FACTS": {"lookback_days": 30},
+    "SP_REFRESH_TELEMETRY_FACTS_15M": {"lookback_hours": 6},
+    "SP_REFRESH_TELEMETRY_FACTS_15M_INCR": {"lookback_hours": 6, "late_minutes": 60},
+    "SP_REFRESH_TELEMETRY_INGEST_COST_ATTR": {"lookback_hours": 24},
+    "GOV_AUDIT.SP_REFRESH_LISTING_SHARE_AUDIT": {"since_ts": None},
+    "FINOPS.SP_GENERATE_WAREHOUSE_AUTOSUSPEND_SQL": {"warehouse_name": "WH_0001"},
+}
+
+# Refresh modes compared by :func:`replay`: variant -> (procedure, task arguments).
+REPLAY = {
+    "full": ("SP_REFRESH_TELEMETRY_FACTS_15M", {"lookback_hours": 6}),
+    "incremental": ("SP_REFRESH_TELEMETRY_FACTS_15M_INCR", {"lookback_hours": 6, "late_minutes": 60}),
+}
+
+_DATE_PARTS = {
+    "to_years": ("year", "years", "y", "yy", "yyyy", "yr", "yrs"),
+    "to_months": ("month", "months", "mm", "mon", "mons"),
+    "to_days": ("day", "days", "d", "dd", "dayofmonth"),
+    "to_hours": ("hour", "hours", "h", "hh", "hr", "hrs"),
+    "to_minutes": ("minute", "minutes", "m", "mi", "min", "mins"),
+    "to_seconds": ("second", "seconds", "s", "sec", "secs"),
+    "to_milliseconds": ("millisecond", "milliseconds", "ms", "msec"),
+    "to_microseconds": ("microsecond", "microseconds", "us", "usec"),
+}
+_WEEK = ("week", "weeks", "w", "wk", "weekofyear", "woy", "wy")
+
+
+def _dateadd_macro() -> str:
+    whens = [
+        f"WHEN lower(part) IN ({', '.join(repr(p) for p in parts)}) THEN ts + {fn}(CAST(n AS BIGINT))"
+        for fn, parts in _DATE_PARTS.items()
+    ]
+    whens.append(f"WHEN lower(part) IN ({', '.join(repr(p) for p in _WEEK)}) THEN ts + to_days(CAST(7 * n AS BIGINT))")
+    return f"CREATE OR REPLACE MACRO dateadd(part, n, ts) AS CASE {' '.join(whens)} END"
+
+
+MACROS = [
+    "CREATE OR REPLACE MACRO iff(c, a, b) AS CASE WHEN c THEN a ELSE b END",
+    "CREATE OR REPLACE MACRO sf_greatest(a, b) AS CASE WHEN a IS NULL OR b IS NULL THEN NULL ELSE greatest(a, b) END",
+    "CREATE OR REPLACE MACRO sf_least(a, b) AS CASE WHEN a IS NULL OR b IS NULL THEN NULL ELSE least(a, b) END",
+    "CREATE OR REPLACE MACRO sf_try_to_number(x) AS TRY_CAST(x AS DECIMAL(38, 0))",
+    "CREATE OR REPLACE MACRO sf_rand(i, salt) AS ((hash(i, salt) % 1000003) / 1000003.0)",
+    "CREATE OR REPLACE MACRO sf_now() AS CAST(getvariable('sf_now') AS TIMESTAMP)",
+    _dateadd_macro(),
+]
+
+_RENAMES = {
+    "APPROX_PERCENTILE": "approx_quantile",
+    "ARRAY_CONSTRUCT": "json_array",
+    "OBJECT_AGG": "json_group_object",
+    "TRY_TO_NUMBER": "sf_try_to_number",
+    "TO_NUMBER": "sf_try_to_number",
+    "TIMEADD": "dateadd",
+    "TIMESTAMPADD": "dateadd",
+}
+_TYPES = [
+    (re.compile(r"(?<![\w.\"])TIMESTAMP_(?:NTZ|LTZ|TZ)\b", re.I), "TIMESTAMP"),
+    (re.compile(r"(?<![\w.\"])NUMBER\s*\(\s*(\d+)\s*,\s*(\d+)\s*\)", re.I), r"DECIMAL(\1,\2)"),
+    (re.compile(r"(?<![\w.\"])NUMBER\s*\(\s*(\d+)\s*\)", re.I), r"DECIMAL(\1,0)"),
+    (re.compile(r"(?<![\w.\"])NUMBER\b", re.I), "DECIMAL(38,0)"),
+    (re.compile(r"(?<![\w.\"])(?:VARIANT|OBJECT|ARRAY)\b(?!\s*\()", re.I), "JSON"),
+]
+_NOW = re.compile(r"(?<![\w.])(?:CURRENT_TIMESTAMP|SYSDATE|GETDATE|LOCALTIMESTAMP)\b(?:\s*\(\s*\))?", re.I)
+_TODAY = re.compile(r"(?<![\w.])CURRENT_DATE\b(?:\s*\(\s*\))?", re.I)
+_INFO_SCHEMA = re.compile(r"(?<![\w.\"])INFORMATION_SCHEMA\.", re.I)
+_PATH = re.compile(r"(?<![\w.:])([A-Za-z_]\w*):(?!:)(?:\"([^\"]+)\"|([A-Za-z_]\w*))")
+_TS_COLUMN = re.compile(r"(?<![\w.\"])TIMESTAMP\b(?![\w\"(])(?!\s*(?:'|\x00))", re.I)
+_TS_COLUMN_AFTER = re.compile(r"(?:^|[(,=<>+\-*/]|\b(?:SELECT|BY|WHERE|AND|OR|ON|THEN|ELSE|WHEN))\s*$", re.I)
+_CONSTRAINT = re.compile(r",\s*CONSTRAINT\s+\w+\s+(?:UNIQUE|PRIMARY\s+KEY)\s*\(", re.I)
+_LITERAL = re.compile(r"'(?:[^'\\]|\\.|'')*'", re.S)
+_PLACEHOLDER = re.compile(r"\x00(\d+)\x00")
+_ESCAPE = re.compile(r"\\(.)|''", re.S)
+_ESCAPES = {"n": "\n", "t": "\t", "r": "\r", "0": "\0", "b": "\b", "f": "\f"}
+
+
+def _duckdb() -> Any:
+    try:
+        import duckdb
+    except ImportError:
+        raise RuntimeError("the SQL emulator needs duckdb (pip install duckdb)") from None
+    return duckdb
+
+
+# -- splitting
+
+
+@dataclass
+class Statement:
+    line: int
+    sql: str
+    notes: list[str] = field(default_factory=list)
+
+    @property
+    def head(self) -> str:
+        return " ".join(self.sql.split()[:6])
+
+
+def split_statements(text: str, *, keep_comments: bool = False) -> list[Statement]:
+    """Split a script at top-level ``;``, keeping quoted strings and ``$$`` bodies whole.
+
+    Comments are dropped outside ``$$`` bodies (kept inside, where the
+    procedure parser strips them). A ``$$`` right after ``EXECUTE
+    IMMEDIATE`` inside a body opens a nested body: the files do that,
+    and Snowflake would end the outer body there, so it is noted.
+    """
+    out: list[Statement] = []
+    buf: list[str] = []
+    notes: list[str] = []
+    depth = 0
+    line = 1
+    start: int | None = None
+    i, n = 0, len(text)
+    while i < n:
+        ch = text[i]
+        if text.startswith("--", i) or text.startswith("//", i) and depth == 0:
+            j = text.find("\n", i)
+            j = n if j < 0 else j
+            if depth or keep_comments:
+                buf.append(text[i:j])
+            i = j
+            continue
+        if text.startswith("/*", i):
+            j = text.find("*/", i + 2)
+            j = n if j < 0 else j + 2
+            line += text.count("\n", i, j)
+            if depth or keep_comments:
+                buf.append(text[i:j])
+            i = j
+            continue
+        if text.startswith("$$", i):
+            if start is None:
+                start = line
+            before = "".join(buf[-40:]).rstrip()
+            if depth == 0:
+                depth = 1
+            elif re.search(r"\bIMMEDIATE$", before, re.I):
+                depth += 1
+                notes.append(f"line {line}: $$ nested inside a $$ body; Snowflake ends the body here (quote with '...')")
+            else:
+                depth -= 1
+            buf.append("$$")
+            i += 2
+            continue
+        if ch == "'":
+            m = _LITERAL.match(text, i)
+            j = m.end() if m else n
+            if start is None:
+                start = line
+            buf.append(text[i:j])
+            line += text.count("\n", i, j)
+            i = j
+            continue
+        if ch == ";" and depth == 0:
+            sql = "".join(buf).strip()
+            if sql:
+                out.append(Statement(start or line, sql, notes))
+            buf, notes, start = [], [], None
+            i += 1
+            continue
+        if ch == "\n":
+            line += 1
+        elif start is None and not ch.isspace():
+            start = line
+        buf.append(ch)
+        i += 1
+    sql = "".join(buf).strip()
+    if sql:
+        out.append(Statement(start or line, sql, notes))
+    return out
+
+
+def _strip_comments(text: str) -> str:
+    return "\n".join(s.sql + ";" for s in split_statements(text))
+
+
+# -- translation
+
+
+def _split_args(code: str, open_at: int) -> tuple[list[str], int]:
+    """Top-level arguments of the call whose ``(`` is at ``open_at``, and the index of its ``)``."""
+    depth = 0
+    args, start = [], open_at + 1
+    for k in range(open_at, len(code)):
+        c = code[k]
+        if c == "(":
+            depth += 1
+        elif c == ")":
+            depth -= 1
+            if depth == 0:
+                args.append(code[start:k])
+                args = [a.strip() for a in args]
+                return ([] if args == [""] else args), k
+        elif c == "," and depth == 1:
+            args.append(code[start:k])
+            start = k + 1
+    raise ValueError(f"unbalanced parentheses after {code[max(0, open_at - 20):open_at + 1]!r}")
+
+
+def _rewrite_calls(code: str, name: str, fn: Any) -> str:
+    """Replace ``name(args)`` with ``fn(args)`` (``None`` keeps the call), innermost calls included."""
+    pattern = re.compile(rf"(?<![\w.$]){name}\s*\(", re.I)
+    out, pos = [], 0
+    while (m := pattern.search(code, pos)) is not None:
+        args, end = _split_args(code, m.end() - 1)
+        args = [_rewrite_calls(a, name, fn) for a in args]
+        new = fn(args)
+        if new is None:
+            new = code[m.start() : m.end() - 1] + "(" + ", ".join(args) + ")"
+        out.append(code[pos : m.start()])
+        out.append(new)
+        pos = end + 1
+    out.append(code[pos:])
+    return "".join(out)
+
+
+def _duck_literal(lit: str) -> str:
+    """A Snowflake ``'...'`` literal (backslash escapes, ``''``) as a DuckDB one."""
+
+    def unescape(m: re.Match[str]) -> str:
+        if m.group(0) == "''":
+            return "'"
+        ch = m.group(1)
+        return _ESCAPES.get(ch, ch)
+
+    body = _ESCAPE.sub(unescape, lit[1:-1])
+    return "'" + body.replace("'", "''") + "'"
+
+
+def _quote_ts_column(code: str) -> str:
+    def repl(m: re.Match[str]) -> str:
+        return '"TIMESTAMP"' if _TS_COLUMN_AFTER.search(code[: m.start()]) else m.group(0)
+
+    return _TS_COLUMN.sub(repl, code)
+
+
+def translate(sql: str, notes: list[str] | None = None) -> str:
+    """One Snowflake statement as DuckDB SQL (see the module docstring for what is covered)."""
+    literals: list[str] = []
+
+    def protect(text: str) -> str:
+        literals.append(text)
+        return f"\x00{len(literals) - 1}\x00"
+
+    code = _LITERAL.sub(lambda m: protect(_duck_literal(m.group(0))), sql)
+
+    def path(m: re.Match[str]) -> str:
+        key = m.group(2) if m.group(2) is not None else m.group(3)
+        return f"({m.group(1)}->>{protect(_duck_literal(repr_path(key)))})"
+
+    def repr_path(key: str) -> str:
+        return "'$.\"" + key.replace("'", "''") + "\"'"
+
+    code = _PATH.sub(path, code)
+    code = _quote_ts_column(code)
+    for pattern, repl in _TYPES:
+        code = pattern.sub(repl, code)
+    code = _NOW.sub("sf_now()", code)
+    code = _TODAY.sub("CAST(sf_now() AS DATE)", code)
+    code = _INFO_SCHEMA.sub("sf_information_schema.", code)
+    for old, new in _RENAMES.items():
+        code = re.sub(rf"(?<![\w.$]){old}(?=\s*\()", new, code, flags=re.I)
+
+    def object_construct(args: list[str]) -> str:
+        if args == ["*"]:
+            return "to_json(struct_pack(*COLUMNS(*)))"
+        return f"json_object({', '.join(args)})"
+
+    def two_args(fn: str) -> Any:
+        def rewrite(args: list[str]) -> str | None:
+            if len(args) == 2:
+                return f"{fn}({args[0]}, {args[1]})"
+            if notes is not None:
+                notes.append(f"{fn[3:].upper()} with {len(args)} arguments ignores NULLs here (Snowflake returns NULL)")
+            return None
+
+        return rewrite
+
+    code = _rewrite_calls(code, "OBJECT_CONSTRUCT", object_construct)
+    code = _rewrite_calls(code, "GREATEST", two_args("sf_greatest"))
+    code = _rewrite_calls(code, "LEAST", two_args("sf_least"))
+    code = _rewrite_calls(
+        code, "REGEXP_REPLACE", lambda a: f"regexp_replace({', '.join(a)}, 'g')" if len(a) == 3 else None
+    )
+    code = _rewrite_calls(code, "IDENTIFIER", lambda a: f"({a[0]})" if len(a) == 1 else None)
+
+    m = _CONSTRAINT.search(code)
+    while m is not None:
+        cols, end = _split_args(code, m.end() - 1)
+        if notes is not None and any("(" in c for c in cols):
+            notes.append("UNIQUE constraint on expressions is not valid Snowflake DDL")
+        code = code[: m.start()] + code[end + 1 :]
+        m = _CONSTRAINT.search(code)
+
+    return _PLACEHOLDER.sub(lambda m: literals[int(m.group(1))], code)
+
+
+# -- procedures
+
+
+@dataclass
+class Procedure:
+    name: str
+    params: list[tuple[str, str]]
+    returns: str
+    body: str
+    file: str = ""
+    line: int = 0
+    notes: list[str] = field(default_factory=list)
+
+
+class _Return(Exception):
+    def __init__(self, value: Any):
+        self.value = value
+
+
+_PROC = re.compile(
+    r"CREATE\s+(?:OR\s+REPLACE\s+)?PROCEDURE\s+([\w.$\"]+)\s*\((.*?)\)\s*RETURNS\s+(.*?)\s+LANGUAGE\s+(\w+)"
+    r".*?\bAS\s*\$\$(.*)\$\$\s*$",
+    re.I | re.S,
+)
+
+
+_FUNCTION = re.compile(
+    r"CREATE\s+(?:OR\s+REPLACE\s+)?(?:SECURE\s+)?FUNCTION\s+(?:IF\s+NOT\s+EXISTS\s+)?([\w.$\"]+)\s*\((.*?)\)"
+    r"\s*RETURNS\s+(.*?)\s+LANGUAGE\s+(\w+)(.*?)\bAS\s*\$\$(.*)\$\$\s*$",
+    re.I | re.S,
+)
+_UDF_TYPES = {"ARRAY": "JSON[]", "FLOAT": "DOUBLE", "FLOAT4": "DOUBLE", "FLOAT8": "DOUBLE", "REAL": "DOUBLE"}
+_UDF_JSON = ("VARIANT", "OBJECT")
+
+
+def _udf_type(typ: str) -> str:
+    typ = typ.strip().upper()
+    if typ in _UDF_TYPES:
+        return _UDF_TYPES[typ]
+    for pattern, repl in _TYPES:
+        typ = pattern.sub(repl, typ)
+    return typ
+
+
+def _udf_wrapper(handler: Any, params: list[str], returns: str) -> Any:
+    """``handler`` with JSON arguments decoded and a VARIANT/OBJECT/ARRAY result encoded."""
+    import inspect
+    import json
+
+    def decode(value: Any, typ: str) -> Any:
+        if typ == "ARRAY" and value is not None:
+            return [json.loads(v) if isinstance(v, str) else v for v in value]
+        if typ in _UDF_JSON and isinstance(value, str):
+            return json.loads(value)
+        return value
+
+    encode = returns.upper() in (*_UDF_JSON, "ARRAY")
+
+    def call(*args: Any) -> Any:
+        out = handler(*(decode(a, t) for a, t in zip(args, params)))
+        return json.dumps(out) if encode and out is not None else out
+
+    call.__signature__ = inspect.signature(handler)  # type: ignore[attr-defined]  # DuckDB checks the arity
+    return call
+
+
+def parse_procedure(stmt: Statement, file: str = "") -> Procedure | None:
+    m = _PROC.match(stmt.sql)
+    if m is None:
+        return None
+    params = []
+    for part in filter(None, (p.strip() for p in m.group(2).split(","))):
+        name, _, typ = part.partition(" ")
+        params.append((name.upper(), typ.strip()))
+    proc = Procedure(m.group(1).upper(), params, m.group(3).strip(), m.group(5), file, stmt.line, list(stmt.notes))
+    if m.group(4).upper() != "SQL":
+        proc.notes.append(f"LANGUAGE {m.group(4)} procedures are not emulated")
+    return proc
+
+
+class _Parser:
+    """Chunks of a procedure body (split at ``;``) -> a small statement tree."""
+
+    def __init__(self, body: str):
+        self.chunks = [s.sql for s in split_statements(body)]
+        self.i = 0
+
+    def peek(self) -> str:
+        return self.chunks[self.i] if self.i < len(self.chunks) else ""
+
+    def eat(self, pattern: str) -> re.Match[str] | None:
+        m = re.match(pattern, self.peek(), re.I | re.S)
+        if m is None:
+            return None
+        rest = self.peek()[m.end() :].strip()
+        if rest:
+            self.chunks[self.i] = rest
+        else:
+            self.i += 1
+        return m
+
+    def take(self) -> str:
+        chunk = self.peek()
+        self.i += 1
+        return chunk
+
+    def block(self) -> tuple:
+        decls = []
+        if self.eat(r"DECLARE\b"):
+            while self.peek() and not re.match(r"BEGIN\b", self.peek(), re.I):
+                m = re.match(r"(\w+)\s+([^:]*?)(?:\s+(?:DEFAULT|:=)\s+(.*))?$", self.take(), re.S | re.I)
+                if m:
+                    decls.append((m.group(1).upper(), m.group(3), m.group(2).strip()))
+        if not self.eat(r"BEGIN\b"):
+            raise ValueError(f"expected BEGIN, got {self.peek()[:40]!r}")
+        stmts = self.stmts(r"(?:END|EXCEPTION)\b")
+        handlers = []
+        if self.eat(r"EXCEPTION\b"):
+            while (m := self.eat(r"WHEN\s+(\w+(?:\s+OR\s+\w+)*)\s+THEN\b")) is not None:
+                handlers.append((m.group(1).upper(), self.stmts(r"(?:WHEN|END)\b")))
+        if not self.eat(r"END\b(?:\s+\w+)?$"):
+            raise ValueError(f"expected END, got {self.peek()[:40]!r}")
+        return ("block", decls, stmts, handlers)
+
+    def stmts(self, stop: str) -> list[tuple]:
+        out = []
+        while self.peek() and not re.match(stop, self.peek(), re.I):
+            out.append(self.stmt())
+        return out
+
+    def stmt(self) -> tuple:
+        chunk = self.peek()
+        if re.match(r"(?:DECLARE|BEGIN)\b", chunk, re.I):
+            return self.block()
+        if re.match(r"IF\s*\(", chunk, re.I):
+            return self.if_()
+        chunk = self.take()
+        if m := re.match(r"RETURN\s+TABLE\s*\((.*)\)$", chunk, re.I | re.S):
+            return ("return_table", m.group(1))
+        if m := re.match(r"RETURN\b(.*)$", chunk, re.I | re.S):
+            return ("return", m.group(1).strip() or "NULL")
+        if m := re.match(r"(?:LET\s+)?(\w+)\s*:=\s*(.*)$", chunk, re.I | re.S):
+            return ("assign", m.group(1).upper(), m.group(2))
+        if m := re.match(r"(SELECT\s.*?)\s+INTO\s+(:?\w+(?:\s*,\s*:?\w+)*)(\s+FROM\b.*)?$", chunk, re.I | re.S):
+            names = [n.strip().lstrip(":").upper() for n in m.group(2).split(",")]
+            return ("select_into", m.group(1) + (m.group(3) or ""), names)
+        if m := re.match(r"EXECUTE\s+IMMEDIATE\s+(?:\$\$(.*)\$\$|('(?:[^']|'')*'))$", chunk, re.I | re.S):
+            return ("sql", m.group(1) if m.group(1) is not None else m.group(2)[1:-1].replace("''", "'"))
+        if re.match(r"NULL$", chunk, re.I):
+            return ("null",)
+        if re.match(r"ALTER\s+SESSION\b", chunk, re.I):
+            return ("null",)
+        return ("sql", chunk)
+
+    def if_(self) -> tuple:
+        branches = []
+        chunk = self.peek()
+        m = re.match(r"(?:IF|ELSEIF)\s*", chunk, re.I)
+        while m is not None:
+            args, end = _split_args(chunk, m.end())
+            cond = chunk[m.end() + 1 : end]
+            self.chunks[self.i] = chunk[end + 1 :].strip()
+            if not self.eat(r"THEN\b"):
+                raise ValueError(f"expected THEN after IF ({cond[:40]})")
+            branches.append((cond, self.stmts(r"(?:ELSEIF|ELSE|END\s+IF)\b")))
+            chunk = self.peek()
+            m = re.match(r"ELSEIF\s*", chunk, re.I)
+        orelse = self.stmts(r"END\s+IF\b") if self.eat(r"ELSE\b") else []
+        if not self.eat(r"END\s+IF$"):
+            raise ValueError(f"expected END IF, got {self.peek()[:40]!r}")
+        return ("if", branches, orelse)
+
+
+def _sql_value(v: Any, typ: str | None = None) -> str:
+    """A Python value as a Snowflake literal (bound into a statement before translation).
+
+    ``typ`` (the declared type) casts NULL, which DuckDB cannot resolve
+    untyped in e.g. ``DATEADD('minute', -5, NULL)``.
+    """
+    if v is None:
+        return f"CAST(NULL AS {typ})" if typ else "NULL"
+    if isinstance(v, bool):
+        return "TRUE" if v else "FALSE"
+    if isinstance(v, (int, float, Decimal)):
+        return str(v)
+    if isinstance(v, datetime):
+        return f"'{v.isoformat(sep=' ')}'::TIMESTAMP_NTZ"
+    if isinstance(v, date):
+        return f"'{v.isoformat()}'::DATE"
+    text = str(v).replace("\\", "\\\\").replace("'", "\\'")
+    return f"'{text}'"
+
+
+def _names_in(node: tuple) -> Iterable[tuple[str, str]]:
+    """(kind, text) of every expression and SQL statement under ``node``."""
+    kind = node[0]
+    if kind == "block":
+        for _, default, _ in node[1]:
+            if default:
+                yield "expr", default
+        for child in node[2]:
+            yield from _names_in(child)
+        for _, stmts in node[3]:
+            for child in stmts:
+                yield from _names_in(child)
+    elif kind == "if":
+        for cond, stmts in node[1]:
+            yield "expr", cond
+            for child in stmts:
+                yield from _names_in(child)
+        for child in node[2]:
+            yield from _names_in(child)
+    elif kind in ("assign",):
+        yield "expr", node[2]
+    elif kind == "return":
+        yield "expr", node[1]
+    elif kind in ("sql", "return_table", "select_into"):
+        yield "sql", node[1]
+
+
+def _bind(
+    sql: str, env: dict[str, Any], bare: set[str], found: set[str] | None = None, types: dict[str, str] | None = None
+) -> str:
+    """Substitute ``:name`` and (for names in ``bare``) unqualified ``name`` with literal values."""
+    if not env:
+        return sql
+    names = "|".join(sorted(map(re.escape, env), key=len, reverse=True))
+    colon = re.compile(rf"(?<![\w:]):({names})\b", re.I)
+    plain = re.compile(rf"(?<![\w.:$\"])({names})\b(?!\s*(?:\(|=>|\"))", re.I)
+
+    def sub(code: str) -> str:
+        types_ = types or {}
+        code = colon.sub(lambda m: _sql_value(env[m.group(1).upper()], types_.get(m.group(1).upper())), code)
+
+        def bare_sub(m: re.Match[str]) -> str:
+            name = m.group(1).upper()
+            if name not in bare or re.search(r"\bAS\s*$", code[: m.start()], re.I):
+                return m.group(0)
+            if found is not None:
+                found.add(name)
+            return _sql_value(env[name], types_.get(name))
+
+        return plain.sub(bare_sub, code)
+
+    parts, pos = [], 0
+    for m in _LITERAL.finditer(sql):
+        parts.append(sub(sql[pos : m.start()]))
+        parts.append(m.group(0))
+        pos = m.end()
+    parts.append(sub(sql[pos:]))
+    return "".join(parts)
+
+
+# -- the emulator
+
+
+@dataclass
+class StepRun:
+    name: str
+    seconds: float
+    rows: int | None = None
+    scanned: int | None = None  # rows read by table scans (with profile_scans)
+    source_scanned: int | None = None  # of those, rows read from the SNOWFLAKE stand-ins
+
+
+@dataclass
+class FileReport:
+    file: str
+    executed: int = 0
+    views: list[str] = field(default_factory=list)
+    procedures: list[str] = field(default_factory=list)
+    functions: list[str] = field(default_factory=list)
+    skipped: list[tuple[int, str]] = field(default_factory=list)
+    failed: list[tuple[int, str, str]] = field(default_factory=list)
+    notes: list[str] = field(default_factory=list)
+
+    def summary(self) -> str:
+        return (
+            f"{self.executed} statements, {len(self.views)} views, {len(self.procedures)} procedures, "
+            + (f"{len(self.functions)} functions, " if self.functions else "")
+            + f"{len(self.skipped)} skipped, {len(self.failed)} failed, {len(self.notes)} lint"
+        )
+
+
+class Emulator:
+    """A DuckDB database with the SNOWFLAKE stand-ins and a fixed clock."""
+
+    def __init__(self, database: str = ":memory:", *, now: datetime = DEFAULT_NOW, profile_scans: bool = False):
+        duckdb = _duckdb()
+        self.error = duckdb.Error
+        self.conn = duckdb.connect(database)
+        self.procedures: dict[str, Procedure] = {}
+        self.functions: set[str] = set()
+        self.steps: list[StepRun] = []
+        self._profile: Path | None = None
+        if profile_scans:
+            import tempfile
+
+            fd, name = tempfile.mkstemp(prefix="sqlemu-profile-", suffix=".json")
+            os.close(fd)
+            self._profile = Path(name)
+            self.conn.execute("PRAGMA enable_profiling = 'json'")
+            self.conn.execute(f"PRAGMA profiling_output = '{name}'")
+        self.conn.execute("ATTACH ':memory:' AS snowflake")
+        for schema in sorted({name.split(".")[0] for name in STANDINS} - {"INFORMATION_SCHEMA"}):
+            self.conn.execute(f"CREATE SCHEMA IF NOT EXISTS snowflake.{schema}")
+        self.conn.execute("CREATE SCHEMA IF NOT EXISTS sf_information_schema")
+        for macro in MACROS:
+            self.conn.execute(macro)
+        self.set_now(now)
+        for name, columns in STANDINS.items():
+            extra = "".join(f", {col} {typ}" for col, typ in ASSUMED_COLUMNS.get(name, {}).items())
+            self.conn.execute(translate(f"CREATE TABLE {self.standin(name)} ({columns}{extra})"))
+
+    @staticmethod
+    def standin(name: str) -> str:
+        schema, _, view = name.partition(".")
+        return f"sf_information_schema.{view}" if schema == "INFORMATION_SCHEMA" else f"snowflake.{schema}.{view}"
+
+    def set_now(self, now: datetime) -> None:
+        # A variable, not a redefined macro: column DEFAULTs that read the clock depend on sf_now().
+        self.now = now
+        self.conn.execute(f"SET VARIABLE sf_now = TIMESTAMP '{now.isoformat(sep=' ')}'")
+
+    def execute(self, sql: str, notes: list[str] | None = None) -> Any:
+        return self.conn.execute(translate(sql, notes))
+
+    def populate(self, scale: float = 1, *, days: int | None = None, seed: int = 42) -> dict[str, int]:
+        """Fill the stand-ins with deterministic synthetic data; returns rows per stand-in."""
+        started = time.perf_counter()
+        counts = _populate(self, scale, days or BASE["days"], seed)
+        self.steps.append(StepRun("populate", time.perf_counter() - started, sum(counts.values())))
+        return counts
+
+    def load(self, data: str | Path) -> dict[str, int]:
+        """Replace the stand-ins with ``<data>/<SCHEMA.VIEW>/*.parquet`` (or ``*.csv``), e.g. from :mod:`snowresearch.synth`.
+
+        Columns are matched by name; a stand-in without a directory is left
+        empty. The clock moves to the data's end (``_profile.json``), so the
+        procedures' lookbacks land on it.
+        """
+        data = Path(data)
+        if not data.is_dir():
+            raise FileNotFoundError(f"no data directory {data}")
+        started = time.perf_counter()
+        counts = {}
+        for name in STANDINS:
+            table = self.standin(name)
+            self.conn.execute(f"DELETE FROM {table}")
+            folder = data / name
+            for fmt, reader in (("parquet", "read_parquet"), ("csv", "read_csv_auto")):
+                if any(folder.glob(f"*.{fmt}")):
+                    path = (folder / f"*.{fmt}").as_posix().replace("'", "''")
+                    self.conn.execute(f"INSERT INTO {table} BY NAME SELECT * FROM {reader}('{path}')")
+                    break
+            counts[name] = self.rows(table)
+        meta = data / "_profile.json"
+        if meta.exists():
+            import json
+
+            end = json.loads(meta.read_text(encoding="utf-8")).get("end")
+            if end:
+                self.set_now(datetime.fromisoformat(end))
+        self.steps.append(StepRun("load data", time.perf_counter() - started, sum(counts.values())))
+        return counts
+
+    # -- loading files
+
+    def run_file(self, path: str | Path) -> FileReport:
+        path = Path(path)
+        rel = path.relative_to(REPO_ROOT).as_posix() if path.is_absolute() and REPO_ROOT in path.parents else str(path)
+        report = FileReport(rel)
+        for stmt in split_statements(path.read_text(encoding="utf-8")):
+            report.notes.extend(f"{rel}:{stmt.line}: {n}" for n in stmt.notes if not n.startswith("line"))
+            head = stmt.head.upper()
+            if re.match(r"CREATE\s+(OR\s+REPLACE\s+)?PROCEDURE\b", head):
+                proc = parse_procedure(stmt, rel)
+                if proc is None:
+                    report.failed.append((stmt.line, stmt.head, "could not parse the procedure header"))
+                    continue
+                self.register(proc)
+                report.procedures.append(proc.name)
+                report.notes.extend(f"{rel}:{proc.line}: {proc.name}: {n}" for n in proc.notes)
+                continue
+            if re.match(r"CREATE\s+(OR\s+REPLACE\s+)?(SECURE\s+)?FUNCTION\b", head):
+                try:
+                    name = self.register_function(stmt.sql, f"{rel}:{stmt.line}")
+                except (ValueError, SyntaxError, ImportError, self.error) as e:
+                    report.failed.append((stmt.line, stmt.head, str(e).splitlines()[0]))
+                    continue
+                if name is None:
+                    report.skipped.append((stmt.line, "only LANGUAGE PYTHON functions are emulated"))
+                else:
+                    report.functions.append(name)
+                continue
+            if re.match(r"CREATE\s+(OR\s+REPLACE\s+)?TASK\b", head):
+                report.skipped.append((stmt.line, "tasks are not scheduled locally; call the procedure"))
+                continue
+            if re.match(r"(ALTER\s+SESSION|USE)\b", head):
+                report.skipped.append((stmt.line, stmt.head))
+                continue
+            notes: list[str] = []
+            try:
+                self.execute(stmt.sql, notes)
+            except self.error as e:
+                report.failed.append((stmt.line, stmt.head, str(e).splitlines()[0]))
+                continue
+            report.executed += 1
+            report.notes.extend(f"{rel}:{stmt.line}: {n}" for n in notes)
+            if m := re.match(r"CREATE\s+(?:OR\s+REPLACE\s+)?(?:SECURE\s+)?VIEW\s+([\w.$\"]+)", stmt.sql, re.I):
+                report.views.append(m.group(1).upper())
+        return report
+
+    def run_dir(self, sql_dir: str | Path | None = None) -> list[FileReport]:
+        return [self.run_file(p) for p in sorted(Path(sql_dir or REPO_ROOT / "sql").glob("*.sql"))]
+
+    def register(self, proc: Procedure) -> None:
+        tree = _Parser(proc.body).block()
+        proc.tree = tree  # type: ignore[attr-defined]
+        proc.types = {name: typ for name, _, typ in tree[1] if typ} | dict(proc.params)  # type: ignore[attr-defined]
+        declared = {name for name, _, _ in tree[1]} | {name for name, _ in proc.params}
+        colon_style = {n.upper() for n in re.findall(r"(?<![\w:]):(\w+)", proc.body)} & declared
+        proc.bare = declared - colon_style  # type: ignore[attr-defined]
+        used: set[str] = set()
+        env = {name: None for name in declared}
+        for kind, text in _names_in(tree):
+            if kind == "sql":
+                _bind(text, env, proc.bare, used)  # type: ignore[attr-defined]
+        for name in sorted(used):
+            proc.notes.append(f"variable {name.lower()} used bare in a SQL statement; Snowflake needs :{name.lower()}")
+        self.procedures[proc.name] = proc
+
+    def register_function(self, sql: str, where: str = "<sql>") -> str | None:
+        """Register an inline Python UDF as a DuckDB function; None for other languages."""
+        m = _FUNCTION.match(sql)
+        if m is None:
+            raise ValueError("could not parse the function header")
+        if m.group(4).upper() != "PYTHON":
+            return None
+        handler = re.search(r"\bHANDLER\s*=\s*'([\w.]+)'", m.group(5), re.I)
+        if handler is None:
+            raise ValueError("a Python function needs HANDLER = '<name>'")
+        ns: dict[str, Any] = {}
+        exec(compile(m.group(6), where, "exec"), ns)
+        params = [p.strip().split(None, 1)[1].upper() for p in filter(None, (p.strip() for p in m.group(2).split(",")))]
+        name = m.group(1).split(".")[-1].strip('"').lower()
+        if name in self.functions:
+            self.conn.remove_function(name)
+        duckdb = _duckdb()
+        self.conn.create_function(
+            name,
+            _udf_wrapper(ns[handler.group(1)], params, m.group(3).strip()),
+            [duckdb.sqltype(_udf_type(t)) for t in params],
+            duckdb.sqltype(_udf_type(m.group(3))),
+        )
+        self.functions.add(name)
+        return name.upper()
+
+    # -- calling procedures
+
+    def procedure(self, name: str) -> Procedure:
+        key = name.upper()
+        if key in self.procedures:
+            return self.procedures[key]
+        matches = [p for n, p in self.procedures.items() if n.split(".")[-1] == key.split(".")[-1]]
+        if len(matches) != 1:
+            raise KeyError(f"no procedure {name}" if not matches else f"{name} is ambiguous")
+        return matches[0]
+
+    def call(self, name: str, *args: Any, **kwargs: Any) -> Any:
+        """Run a procedure; returns its RETURN value (rows for ``RETURN TABLE``). Steps land in :attr:`steps`."""
+        proc = self.procedure(name)
+        env: dict[str, Any] = {}
+        for (pname, _), value in zip(proc.params, args):
+            env[pname] = value
+        for key, value in kwargs.items():
+            env[key.upper()] = value
+        missing = [p for p, _ in proc.params if p not in env]
+        if missing:
+            raise TypeError(f"{proc.name}: missing arguments {', '.join(missing)}")
+        try:
+            self._run(proc.tree, env, proc)  # type: ignore[attr-defined]
+        except _Return as r:
+            return r.value
+        return None
+
+    def _scalar(self, expr: str, env: dict[str, Any], proc: Procedure) -> Any:
+        row = self.execute("SELECT " + _bind(expr, env, set(env), types=proc.types)).fetchone()  # type: ignore[attr-defined]
+        return row[0] if row else None
+
+    def _sql(self, sql: str, env: dict[str, Any], proc: Procedure, label: str) -> Any:
+        started = time.perf_counter()
+        cur = self.execute(_bind(sql, env, proc.bare, types=proc.types))  # type: ignore[attr-defined]
+        rows = result = None
+        if re.match(r"\s*(MERGE|INSERT|UPDATE|DELETE)\b", sql, re.I):
+            fetched = cur.fetchone()
+            rows = int(fetched[0]) if fetched else 0
+            env["SQLROWCOUNT"] = rows
+        elif re.match(r"\s*(SELECT|WITH)\b", sql, re.I):
+            result = cur.fetchall()  # the profile is written once the result is consumed
+            rows = len(result)
+        step = StepRun(label, time.perf_counter() - started, rows)
+        if self._profile is not None:
+            step.scanned, step.source_scanned = self._scans()
+        self.steps.append(step)
+        return result
+
+    def _scans(self) -> tuple[int, int]:
+        """Rows read by the last statement's table scans: all tables, and the SNOWFLAKE stand-ins only."""
+        import json
+
+        try:
+            tree = json.loads(self._profile.read_text(encoding="utf-8"))  # type: ignore[union-attr]
+        except (OSError, ValueError):
+            return 0, 0
+        total = source = 0
+        stack = [tree]
+        while stack:
+            node = stack.pop()
+            stack.extend(node.get("children") or ())
+            if node.get("operator_type") == "TABLE_SCAN":
+                n = int(node.get("operator_rows_scanned") or 0)
+                total += n
+                info = node.get("extra_info") or {}
+                if isinstance(info, dict) and str(info.get("Table", "")).lower().startswith("snowflake."):
+                    source += n
+        return total, source
+
+    def _run(self, node: tuple, env: dict[str, Any], proc: Procedure) -> None:
+        kind = node[0]
+        if kind == "block":
+            for name, default, _ in node[1]:
+                env[name] = self._scalar(default, env, proc) if default else None
+            try:
+                for child in node[2]:
+                    self._run(child, env, proc)
+            except self.error:
+                if not node[3]:
+                    raise
+                for _, stmts in node[3]:
+                    for child in stmts:
+                        self._run(child, env, proc)
+        elif kind == "if":
+            for cond, stmts in node[1]:
+                if self._scalar(cond, env, proc):
+                    for child in stmts:
+                        self._run(child, env, proc)
+                    return
+            for child in node[2]:
+                self._run(child, env, proc)
+        elif kind == "assign":
+            env[node[1]] = self._scalar(node[2], env, proc)
+        elif kind == "return":
+            raise _Return(self._scalar(node[1], env, proc))
+        elif kind == "select_into":
+            result = self._sql(node[1], env, proc, f"{proc.name}: SELECT INTO")
+            for name, value in zip(node[2], result[0] if result else [None] * len(node[2])):
+                env[name] = value
+        elif kind == "return_table":
+            raise _Return(self._sql(node[1], env, proc, f"{proc.name}: RETURN TABLE"))
+        elif kind == "sql":
+            m = re.match(r"\s*(MERGE\s+INTO|INSERT\s+INTO|UPDATE|DELETE\s+FROM|CREATE(?:\s+OR\s+REPLACE)?(?:\s+TEMP(?:ORARY)?)?\s+TABLE|SELECT)\s+([\w.$\"]+)?", node[1], re.I)
+            label = f"{proc.name}: {' '.join(m.group(1).split()).upper()} {m.group(2) or ''}".rstrip() if m else proc.name
+            self._sql(node[1], env, proc, label)
+
+    def rows(self, table: str) -> int:
+        return int(self.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0])
+
+    def close(self) -> None:
+        self.conn.close()
+        if self._profile is not None:
+            self._profile.unlink(missing_ok=True)
+
+
+# -- synthetic data
+
+_SIZES = ("'X-Small'", "'Small'", "'Medium'", "'Large'")
+_SIZE_CREDITS = "[1, 2, 4, 8]"
+_TAGS = 24  # distinct query tags; a third of the queries carry none
+_APPS = ("FINOPS_APP", "TELEMETRY_APP", "GOV_APP")
+
+
+def _populate(emu: Emulator, scale: float, days: int, seed: int) -> dict[str, int]:
+    """Deterministic rows for every stand-in, sized by :data:`BASE` × ``scale``; generated inside DuckDB."""
+    wh = max(1, round(BASE["warehouses"] * scale))
+    hours = days * 24
+    nq = max(1, round(BASE["queries"] * scale))
+    ne = max(1, round(BASE["events"] * scale))
+    event_secs = BASE["event_days"] * 86400
+    ng = max(1, round(BASE["grants"] * scale))
+    now = f"TIMESTAMP '{emu.now.isoformat(sep=' ')}'"
+    since = f"({now} - INTERVAL {hours} HOUR)"
+    r = lambda salt: f"sf_rand(i, {seed * 100 + salt})"  # noqa: E731  uniform [0, 1) per row
+    statements = {
+        "ACCOUNT_USAGE.WAREHOUSES": f"""
+            SELECT i + 1, printf('WH_%04d', i + 1), list_extract([{', '.join(_SIZES)}], i % 4 + 1), 'STANDARD',
+                   'STARTED', list_extract([60, 300, 600, 3600], CAST(floor({r(1)} * 4) AS INT) + 1), TRUE, 1,
+                   iff(i % 5 = 0, 3, 1), {since} - INTERVAL 90 DAY, NULL
+            FROM range({wh}) t(i)""",
+        # One row per warehouse-hour; utilization is diurnal and a fifth of the warehouses mostly idle.
+        "ACCOUNT_USAGE.WAREHOUSE_METERING_HISTORY": f"""
+            WITH h AS (
+                SELECT i, i // {hours} AS w, i % {hours} AS hr,
+                       list_extract({_SIZE_CREDITS}, (i // {hours}) % 4 + 1)
+                       * iff((i // {hours}) % 5 = 4, 0.1, 0.3 + 0.6 * {r(2)})
+                       * (0.6 + 0.4 * sin(2 * pi() * ((i % {hours}) % 24) / 24)) AS compute
+                FROM range({wh * hours}) t(i))
+            SELECT {since} + to_hours(hr), {since} + to_hours(hr + 1), w + 1, printf('WH_%04d', w + 1),
+                   compute * 1.05, compute, compute * 0.05, compute * (0.2 + 0.75 * {r(3)})
+            FROM h""",
+        "ACCOUNT_USAGE.QUERY_HISTORY": f"""
+            WITH q AS (
+                SELECT i, i % {wh} AS w, {since} + to_microseconds(CAST({r(4)} * {hours * 3600e6} AS BIGINT)) AS st,
+                       CAST(50 + 2e5 * pow({r(5)}, 4) AS BIGINT) AS ms
+                FROM range({nq}) t(i))
+            SELECT printf('q%012d', i), iff(i % 10 = 0, 'INSERT', 'SELECT'),
+                   iff(i % 3 = 0, '', printf('team:%02d', hash(i, {seed}) % {_TAGS})), printf('USER_%03d', i % 97),
+                   'ANALYST', w + 1, printf('WH_%04d', w + 1), list_extract([{', '.join(_SIZES)}], w % 4 + 1), 1,
+                   iff(i % 50 = 0, 'FAIL', 'SUCCESS'), st, st + to_milliseconds(ms), ms, ms, ms * 1e-7, ms * 3e-6
+            FROM q""",
+        # Attribution lags a little: the newest 2% of queries have no row yet.
+        "ACCOUNT_USAGE.QUERY_ATTRIBUTION_HISTORY": f"""
+            SELECT query_id, NULL, NULL, warehouse_id, warehouse_name, md5(query_type), md5(query_type || user_name),
+                   query_tag, user_name, start_time, end_time, credits_used_compute * 0.9, 0, credits_used_cloud_services
+            FROM snowflake.account_usage.query_history
+            WHERE start_time < {now} - INTERVAL {max(1, hours // 50)} HOUR""",
+        "ACCOUNT_USAGE.METERING_HISTORY": f"""
+            SELECT list_extract(['WAREHOUSE_METERING', 'TELEMETRY_DATA_INGEST', 'SERVERLESS_TASK'], i % 3 + 1),
+                   {since} + to_hours(i // 3), {since} + to_hours(i // 3 + 1), i % 3, 'SERVICE', 'ACCOUNT', NULL, NULL,
+                   {scale} * {r(6)}, {scale} * 0.01 * {r(7)}, {scale} * 1.01 * {r(6)}
+            FROM range({hours * 3}) t(i)""",
+        "ACCOUNT_USAGE.GRANTS_TO_SHARES": f"""
+            SELECT {since} + to_hours(i % {hours}), iff(i % 17 = 0, {now} - INTERVAL 1 HOUR, NULL),
+                   iff(i % 4 = 0, 'USAGE', 'SELECT'), list_extract(['DATABASE', 'SCHEMA', 'TABLE', 'VIEW'], i % 4 + 1),
+                   printf('OBJ_%05d', i), 'APP_DB', 'PUBLIC', 'SHARE', printf('SHARE_%03d', i % 20),
+                   printf('ORG.CONSUMER_%03d', i % 40), FALSE, 'ACCOUNTADMIN'
+            FROM range({ng}) t(i)""",
+        "INFORMATION_SCHEMA.LISTINGS": f"""
+            SELECT printf('LISTING_%03d', i), printf('GZ%08d', i), 'ACCOUNTADMIN', iff(i % 7 = 0, 'DRAFT', 'PUBLISHED'),
+                   'PRIVATE', json_array(printf('ORG.CONSUMER_%03d', i % 40)), {since}, {now} - to_hours(i % 48)
+            FROM range({max(1, ng // 5)}) t(i)""",
+        "ORGANIZATION_USAGE.METERING_DAILY_HISTORY": f"""
+            SELECT 'ORG', 'ACCOUNT', 'AB12345', 'AWS_US_WEST_2',
+                   list_extract(['WAREHOUSE_METERING', 'TELEMETRY_DATA_INGEST', 'SERVERLESS_TASK'], i % 3 + 1),
+                   CAST({since} AS DATE) + CAST(i // 3 AS INT), 24 * {wh} * {r(8)}, {wh} * {r(9)},
+                   25 * {wh} * {r(8)}, -0.5 * {wh} * {r(9)}, 24 * {wh} * {r(8)}
+            FROM range({(days + 1) * 3}) t(i)""",
+        "ORGANIZATION_USAGE.USAGE_IN_CURRENCY_DAILY": f"""
+            SELECT 'ORG', 'ACCOUNT', 'AB12345', 'AWS_US_WEST_2', CAST({since} AS DATE) + CAST(i // 2 AS INT),
+                   iff(i % 2 = 0, 'compute', 'adjustment for cloud services'), 'WAREHOUSE_METERING', 'USD',
+                   24 * {wh} * {r(10)}, 72 * {wh} * {r(10)}, 'capacity', 'consumption', 'compute', i % 2 = 1
+            FROM range({(days + 1) * 2}) t(i)""",
+        # Spans and logs from a few apps over the last BASE["event_days"] days; some logs are warnings or errors.
+        "TELEMETRY.EVENTS_VIEW": f"""
+            WITH e AS (
+                SELECT i, {now} - to_microseconds(CAST({r(11)} * {event_secs * 1e6} AS BIGINT)) AS ts,
+                       i % 5 < 3 AS span, list_extract([{', '.join(repr(a) for a in _APPS)}], i % 3 + 1) AS app
+                FROM range({ne}) t(i))
+            SELECT ts, iff(span, ts - to_microseconds(CAST(1e3 + 2e6 * pow({r(12)}, 3) AS BIGINT)), NULL), ts,
+                   json_object('trace_id', md5(CAST(i // 8 AS VARCHAR))), NULL,
+                   json_object('snow.application.package.name', app,
+                               'snow.application.version', printf('v%d', 1 + i % 2),
+                               'snow.application.consumer.organization', printf('ORG_%02d', i % 7),
+                               'snow.application.consumer.name', printf('CONSUMER_%03d', i % 40)),
+                   NULL, NULL, iff(span, 'SPAN', 'LOG'),
+                   iff(span, json_object('name', printf('op_%02d', i % 12)),
+                       json_object('severity_text', list_extract(['INFO', 'INFO', 'INFO', 'WARN', 'INFO',
+                                                                  'INFO', 'INFO', 'INFO', 'INFO', 'ERROR'], i % 10 + 1))),
+                   NULL, iff(span, NULL, printf('request %d failed after %d ms', i % 1000, i % 9000)), NULL
+            FROM e""",
+    }
+    counts = {}
+    for name, select in statements.items():
+        table = emu.standin(name)
+        emu.conn.execute(f"DELETE FROM {table}")
+        emu.conn.execute(f"INSERT INTO {table} BY POSITION {select}")
+        counts[name] = emu.rows(table)
+    return counts
+
+
+# -- benchmarks
+
+
+@dataclass
+class BenchRow:
+    scale: float
+    kind: str  # populate | load | proc | step | view
+    name: str
+    seconds: float
+    rows: int | None = None
+
+
+@dataclass
+class BenchReport:
+    rows: list[BenchRow] = field(default_factory=list)
+    inputs: dict[str, dict[str, int]] = field(default_factory=dict)
+    lint: list[str] = field(default_factory=list)
+    failed: list[str] = field(default_factory=list)
+
+    def scales(self) -> list[float]:
+        return sorted({r.scale for r in self.rows})
+
+    def table(self) -> dict[tuple[str, str], dict[float, BenchRow]]:
+        out: dict[tuple[str, str], dict[float, BenchRow]] = {}
+        for r in self.rows:
+            out.setdefault((r.kind, r.name), {})[r.scale] = r
+        return out
+
+    def growth(self, by_scale: dict[float, BenchRow]) -> float | None:
+        """Exponent ``k`` in time ∝ scale^k between the smallest and largest scale."""
+        scales = sorted(s for s, r in by_scale.items() if r.seconds > 0)
+        if len(scales) < 2:
+            return None
+        lo, hi = by_scale[scales[0]], by_scale[scales[-1]]
+        if lo.seconds < 0.002:
+            return None  # fixed overhead dominates; no signal
+        return math.log(hi.seconds / lo.seconds) / math.log(scales[-1] / scales[0])
+
+    def as_dict(self) -> dict[str, Any]:
+        return {"rows": [asdict(r) for r in self.rows], "inputs": self.inputs, "lint": self.lint, "failed": self.failed}
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> BenchReport:
+        return cls([BenchRow(**r) for r in data.get("rows", [])], data.get("inputs", {}), data.get("lint", []), data.get("failed", []))
+
+    def regressions(self, baseline: BenchReport, tolerance: float = DEFAULT_TOLERANCE) -> list[str]:
+        """Steps at least ``tolerance`` times slower than in ``baseline`` (ignoring sub-10 ms ones)."""
+        base = {(r.scale, r.kind, r.name): r for r in baseline.rows}
+        out = []
+        for r in self.rows:
+            b = base.get((r.scale, r.kind, r.name))
+            if b is None or max(b.seconds, r.seconds) < 0.01:
+                continue
+            if r.seconds > tolerance * b.seconds:
+                out.append(f"{r.name} at {r.scale:g}×: {b.seconds * 1000:.0f} ms -> {r.seconds * 1000:.0f} ms")
+        return out
+
+
+def _median_run(fn: Any, repeat: int) -> tuple[float, Any]:
+    times, result = [], None
+    for _ in range(max(repeat, 1)):
+        started = time.perf_counter()
+        result = fn()
+        times.append(time.perf_counter() - started)
+    return statistics.median(times), result
+
+
+def bench(
+    scales: Sequence[float] = DEFAULT_SCALES,
+    *,
+    repeat: int = DEFAULT_REPEAT,
+    sql_dir: str | Path | None = None,
+    days: int | None = None,
+    database: str = ":memory:",
+    data: str | Path | None = None,
+    progress: Any = None,
+) -> BenchReport:
+    """Load every ``sql/*.sql`` file at each scale, call the refresh procedures and materialize the views.
+
+    With ``data`` (a :mod:`snowresearch.synth` output directory) there is
+    one run, reported as scale 1, on that data instead of :meth:`Emulator.populate`.
+    """
+    report = BenchReport()
+    for i, scale in enumerate((1,) if data is not None else scales):
+        if database != ":memory:":
+            Path(database).unlink(missing_ok=True)
+        emu = Emulator(database)
+        if data is not None:
+            report.inputs[f"{scale:g}"] = emu.load(data)
+        else:
+            report.inputs[f"{scale:g}"] = emu.populate(scale, days=days)
+        step = emu.steps[-1]
+        report.rows.append(BenchRow(scale, "populate", step.name, step.seconds, step.rows))
+        started = time.perf_counter()
+        files = emu.run_dir(sql_dir)
+        report.rows.append(BenchRow(scale, "load", "load sql/", time.perf_counter() - started))
+        if i == 0:
+            for f in files:
+                report.lint.extend(f.notes)
+                report.failed.extend(f"{f.file}:{line}: {head}: {err}" for line, head, err in f.failed)
+
+        for name, kwargs in CALLS.items():
+            try:
+                emu.procedure(name)
+            except KeyError:
+                continue
+            calls: list[list[StepRun]] = []
+
+            def run(name: str = name, kwargs: dict[str, Any] = kwargs) -> None:
+                emu.steps.clear()
+                emu.call(name, **kwargs)
+                calls.append(list(emu.steps))
+
+            try:
+                seconds, _ = _median_run(run, repeat)
+            except emu.error as e:
+                report.failed.append(f"{name} at {scale:g}×: {str(e).splitlines()[0]}")
+                continue
+            report.rows.append(BenchRow(scale, "proc", name, seconds))
+            by_step: dict[str, list[StepRun]] = {}
+            for steps in calls:
+                seen: dict[str, int] = {}
+                for step in steps:
+                    seen[step.name] = seen.get(step.name, 0) + 1
+                    label = step.name if seen[step.name] == 1 else f"{step.name} #{seen[step.name]}"
+                    by_step.setdefault(label, []).append(step)
+            for step_name, runs in by_step.items():
+                # The last call is the steady state: MERGE updates what the first call inserted.
+                report.rows.append(
+                    BenchRow(scale, "step", step_name, statistics.median(s.seconds for s in runs), runs[-1].rows)
+                )
+            if progress:
+                progress(f"{scale:g}× {name}: {seconds * 1000:.0f} ms")
+
+        for f in files:
+            for view in f.views:
+
+                def materialize(view: str = view) -> int:
+                    emu.execute(f"CREATE OR REPLACE TEMP TABLE _bench AS SELECT * FROM {view}")
+                    return emu.rows("_bench")
+
+                try:
+                    seconds, n = _median_run(materialize, repeat)
+                except emu.error as e:
+                    report.failed.append(f"{view} at {scale:g}×: {str(e).splitlines()[0]}")
+                    continue
+                report.rows.append(BenchRow(scale, "view", view, seconds, n))
+        if progress:
+            progress(f"{scale:g}× done")
+        emu.close()
+    return report
+
+
+def check(sql_dir: str | Path | None = None) -> list[FileReport]:
+    """Load every file into empty stand-ins; what failed or needs attention before shipping."""
+    emu = Emulator()
+    reports = emu.run_dir(sql_dir)
+    assumed = [
+        f"stand-in {name}.{col} is not in the documented view (read by sql/)"
+        for name, cols in ASSUMED_COLUMNS.items()
+        for col in cols
+    ]
+    if reports:
+        reports[0].notes[:0] = assumed
+    for name, kwargs in CALLS.items():
+        try:
+            emu.call(name, **kwargs)
+        except KeyError:
+            continue
+        except (emu.error, ValueError, TypeError) as e:
+            proc = emu.procedure(name)
+            for r in reports:
+                if r.file == proc.file:
+                    r.failed.append((proc.line, f"CALL {name}", str(e).splitlines()[0]))
+    return reports
+
+
+# -- incremental replay
+
+
+@dataclass
+class ReplayRun:
+    variant: str
+    tick: int
+    seconds: float
+    arrived: int  # events inserted since the previous run
+    source_scanned: int  # EVENTS_VIEW rows read
+    scanned: int  # rows read from every table
+    merged: int  # fact rows inserted or updated
+
+
+@dataclass
+class ReplayReport:
+    runs: list[ReplayRun] = field(default_factory=list)
+    events: int = 0
+    late: int = 0  # events that arrived after their 15-minute window had been refreshed
+    compared: int = 0  # fact rows in the last lookback, full refresh
+    mismatched: int = 0  # of those, rows the incremental refresh has differently (or not at all)
+
+    def totals(self, variant: str) -> dict[str, float]:
+        runs = [r for r in self.runs if r.variant == variant]
+        return {
+            "runs": len(runs),
+            "seconds": sum(r.seconds for r in runs),
+            "source_scanned": sum(r.source_scanned for r in runs),
+            "scanned": sum(r.scanned for r in runs),
+            "merged": sum(r.merged for r in runs),
+        }
+
+    def summary(self) -> str:
+        full, incr = self.totals("full"), self.totals("incremental")
+
+        def ratio(key: str) -> str:
+            return f"{full[key] / incr[key]:.1f}×" if incr[key] else "-"
+
+        return (
+            f"{self.events} events ({self.late} late), {int(full['runs'])} runs: "
+            f"scanned {ratio('source_scanned')} fewer rows, merged {ratio('merged')} fewer, {ratio('seconds')} faster; "
+            f"{self.mismatched}/{self.compared} fact rows differ"
+        )
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            "runs": [asdict(r) for r in self.runs],
+            "events": self.events,
+            "late": self.late,
+            "compared": self.compared,
+            "mismatched": self.mismatched,
+            "totals": {v: self.totals(v) for v in REPLAY},
+        }
+
+
+def replay(
+    ticks: int = DEFAULT_TICKS,
+    *,
+    scale: float = 1,
+    data: str | Path | None = None,
+    late_share: float = 0.05,
+    late_max_minutes: float = 45,
+    sql_dir: str | Path | None = None,
+    seed: int = 42,
+    progress: Any = None,
+) -> ReplayReport:
+    """Replay ``ticks`` task runs of each :data:`REPLAY` variant over arriving telemetry events.
+
+    Events arrive up to 2 minutes after their TIMESTAMP; ``late_share``
+    of them up to ``late_max_minutes`` after. Before the first tick every
+    event that has arrived is loaded (in arrival order, so EVENTS_VIEW is
+    clustered the way Snowflake's is) and refreshed once; then each tick
+    inserts what arrived in its 15 minutes and runs the procedure. Rows
+    scanned come from DuckDB's profiler, which skips row groups the
+    ``TIMESTAMP`` predicate prunes. Afterwards the facts of the last
+    lookback are compared on counts and ``max_ms`` (percentiles are
+    approximate in both).
+    """
+    tick = timedelta(minutes=15)
+    lookback = timedelta(hours=REPLAY["full"][1]["lookback_hours"])
+    emu = Emulator(profile_scans=True)
+    report = ReplayReport()
+    try:
+        if data is not None:
+            emu.load(data)
+        else:
+            emu.populate(scale, seed=seed)
+        files = emu.run_dir(sql_dir)
+        failed = [f"{f.file}:{line}: {err}" for f in files for line, _, err in f.failed]
+        if failed:
+            raise ValueError(f"sql/ did not load: {failed[0]}")
+        end = emu.now
+        t0 = end - ticks * tick
+        events = emu.standin("TELEMETRY.EVENTS_VIEW")
+        on_time, late = 120e6, late_max_minutes * 60e6  # microseconds
+        emu.conn.execute(f"""
+            CREATE OR REPLACE TEMP TABLE _replay_events AS
+            SELECT * EXCLUDE (i), "TIMESTAMP" + to_microseconds(CAST(
+                       iff(sf_rand(i, {seed}) < {late_share}, {on_time} + ({late} - {on_time}) * sf_rand(i, {seed + 1}),
+                           {on_time} * sf_rand(i, {seed + 2})) AS BIGINT)) AS _arrival
+            FROM (SELECT *, row_number() OVER (ORDER BY "TIMESTAMP") AS i FROM {events})""")
+        report.events = int(emu.conn.execute(
+            "SELECT COUNT(*) FROM _replay_events WHERE _arrival > ? AND _arrival <= ?", [t0, end]).fetchone()[0])
+        report.late = int(emu.conn.execute(f"""
+            SELECT COUNT(*) FROM _replay_events
+            WHERE _arrival > ? AND _arrival <= ?
+              AND _arrival > time_bucket(INTERVAL 15 MINUTE, "TIMESTAMP") + INTERVAL 15 MINUTE""",
+            [t0, end]).fetchone()[0])
+        facts = {
+            "FACT_APP_OPERATION_WINDOW": "window_start, app_package, app_version, operation_name, consumer_org, "
+            "consumer_name, spans, max_ms",
+            "FACT_APP_ERROR_WINDOW": "window_start, app_package, app_version, consumer_org, consumer_name, severity, "
+            "message_fingerprint, occurrences",
+        }
+
+        for variant, (name, kwargs) in REPLAY.items():
+            for table in (events, *facts, "TELEMETRY_REFRESH_WATERMARK"):
+                emu.conn.execute(f"DELETE FROM {table}")
+            emu.conn.execute(f"INSERT INTO {events} SELECT * EXCLUDE (_arrival) FROM _replay_events "
+                             "WHERE _arrival <= ? ORDER BY _arrival", [t0])
+            emu.set_now(t0)
+            emu.call(name, **kwargs)
+            for k in range(1, ticks + 1):
+                now = t0 + k * tick
+                arrived = emu.conn.execute(
+                    f"INSERT INTO {events} SELECT * EXCLUDE (_arrival) FROM _replay_events "
+                    "WHERE _arrival > ? AND _arrival <= ? ORDER BY _arrival", [now - tick, now]).fetchone()[0]
+                emu.set_now(now)
+                emu.steps.clear()
+                started = time.perf_counter()
+                emu.call(name, **kwargs)
+                seconds = time.perf_counter() - started
+                report.runs.append(ReplayRun(
+                    variant, k, seconds, int(arrived),
+                    sum(s.source_scanned or 0 for s in emu.steps),
+                    sum(s.scanned or 0 for s in emu.steps),
+                    sum(s.rows or 0 for s in emu.steps if ": MERGE INTO FACT_" in s.name),
+                ))
+            for table, cols in facts.items():
+                emu.conn.execute(f"CREATE OR REPLACE TEMP TABLE _replay_{variant}_{table} AS "
+                                 f"SELECT {cols} FROM {table} WHERE window_start >= ?", [end - lookback])
+            if progress:
+                totals = report.totals(variant)
+                progress(f"{variant}: {int(totals['source_scanned']):,d} rows scanned, "
+                         f"{int(totals['merged']):,d} merged in {totals['seconds']:.2f}s")
+
+        for table in facts:
+            full, incr = f"_replay_full_{table}", f"_replay_incremental_{table}"
+            report.compared += emu.rows(full)
+            report.mismatched += int(emu.conn.execute(
+                f"SELECT (SELECT COUNT(*) FROM (SELECT * FROM {full} EXCEPT ALL SELECT * FROM {incr})) "
+                f"+ (SELECT COUNT(*) FROM (SELECT * FROM {incr} EXCEPT ALL SELECT * FROM {full}))").fetchone()[0])
+    finally:
+        emu.close()
+    return report
@@ -0,0 +1,456 @@
+"""Append-only, zstd-compressed, date-partitioned segment storage for raw API payloads.
+
+Raw search/extract responses used to be written as pretty-printed JSON,
+one file per call, scattered over ``research/``, ``research/<topic>/<date>/``,
+``tmp/`` and the repo root. :class:`SegmentStore` appends them to one
+segment per day instead:
+
+  <root>/<YYYY>/<YYYY-MM-DD>.zst   concatenated zstd frames, one per payload
+  <root>/<YYYY>/<YYYY-MM-DD>.idx   JSON line per payload: offset, length, kind, name, time, sha1, ...
+  <root>/dict/<id>.zdict           trained zstd dictionaries; dict/CURRENT names the one new frames use
+
+Each payload is compressed as its own frame, so :meth:`SegmentStore.get`
+decompresses exactly one record (seek + read ``length`` bytes) and
+:meth:`SegmentStore.scan` streams a whole corpus record by record without
+ever holding a decompressed segment in memory. Appends take an exclusive
+lock on the segment, write and fsync the frame, then the index line; a
+crash in between leaves unreferenced bytes, never a dangling index entry,
+and a torn last index line is ignored on read.
+
+Small JSON payloads share most of their structure (keys, URL prefixes,
+docs boilerplate) but compress independently, so the store can train a
+zstd dictionary (:meth:`SegmentStore.train_dictionary`; ``migrate`` does
+it on first use): about 5x instead of 3.7x on the current corpus. Index
+entries record which dictionary their frame needs, so retraining never
+invalidates old frames.
+
+A record is addressed by ``<date>:<offset>`` (see :class:`Ref`).
+
+Needs the ``zstandard`` package (``pip install zstandard``).
+
+Usage:
+  store = SegmentStore()
+  ref = store.append(resp, kind="search", name="warehouse-sizing")
+  store.get(ref)
+  for rec in store.scan(kind="extract", since="2026-03-01"):
+      rec.payload
+  for rec in store.records(kind="extract"):
+      with rec.open() as f:                       # decompressed bytes, streamed
+          for result in jsonstream.iter_results(f): ...
+
+  scripts/research store migrate [--delete]     # fold existing *.json dumps into segments
+  scripts/research store stats
+
+Env:
+  RESEARCH_STORE        default: ~/.cache/snowresearch/store
+  RESEARCH_STORE_LEVEL  zstd level (default: 10)
+"""
+
+from __future__ import annotations
+
+import fcntl
+import hashlib
+import json
+import os
+import threading
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import IO, Any, Iterator
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+DEFAULT_ROOT = Path.home() / ".cache" / "snowresearch" / "store"
+DEFAULT_LEVEL = 10
+SEGMENT_SUFFIX = ".zst"
+INDEX_SUFFIX = ".idx"
+DICT_SIZE = 112_640
+MIN_DICT_SAMPLES = 20
+MAX_DICT_SAMPLE_BYTES = 64 << 20  # zstd trains on a sample; no need to hold more
+
+# Raw dumps the migration picks up, relative to the repo root. Session specs,
+# topics.json and notes are not payloads; of what the globs match, only files
+# shaped like an API response are migrated (see is_response).
+MIGRATE_GLOBS = ("research/**/*.json", "tmp/*.json", "*.json", "tmp_search*.txt")
+MIGRATE_SKIP = ("research/sessions/", "research/topics.json", "research/store/")  # research/store: the old default root
+
+
+def _zstd():
+    try:
+        import zstandard
+    except ImportError:
+        raise RuntimeError("segment storage needs zstandard (pip install zstandard)") from None
+    return zstandard
+
+
+def default_root() -> Path:
+    return Path(os.environ.get("RESEARCH_STORE") or DEFAULT_ROOT).expanduser()
+
+
+def available_store() -> SegmentStore | None:
+    """The configured store, or ``None`` when zstandard is not installed (readers then skip it)."""
+    import importlib.util
+
+    if importlib.util.find_spec("zstandard") is None:
+        return None
+    return SegmentStore()
+
+
+def _utc(when: datetime | str | float | None) -> datetime:
+    if when is None:
+        return datetime.now(timezone.utc)
+    if isinstance(when, (int, float)):
+        return datetime.fromtimestamp(when, timezone.utc)
+    if isinstance(when, str):
+        when = datetime.fromisoformat(when)
+    return when if when.tzinfo else when.replace(tzinfo=timezone.utc)
+
+
+@dataclass(frozen=True)
+class Ref:
+    day: str  # YYYY-MM-DD
+    offset: int
+
+    def __str__(self) -> str:
+        return f"{self.day}:{self.offset}"
+
+    @classmethod
+    def parse(cls, text: str) -> Ref:
+        day, _, offset = text.rpartition(":")
+        return cls(day, int(offset))
+
+
+@dataclass
+class Record:
+    ref: Ref
+    kind: str
+    name: str | None
+    at: str
+    sha1: str
+    size: int
+    length: int
+    meta: dict[str, Any] = field(default_factory=dict)
+    dict_id: int | None = None
+    _store: SegmentStore | None = field(default=None, repr=False, compare=False)
+    _payload: Any = field(default=None, repr=False, compare=False)
+
+    @property
+    def payload(self) -> Any:
+        if self._payload is None and self._store is not None:
+            self._payload = self._store.get(self.ref)
+        return self._payload
+
+    def open(self) -> IO[bytes]:
+        """The decompressed payload as a binary stream (for :mod:`snowresearch.jsonstream`)."""
+        if self._store is None:
+            raise ValueError(f"record {self.ref} is not attached to a store")
+        return self._store._open_frame(self.ref, self.dict_id)
+
+
+@dataclass
+class StoreStats:
+    segments: int = 0
+    records: int = 0
+    raw_bytes: int = 0
+    stored_bytes: int = 0
+
+    @property
+    def ratio(self) -> float:
+        return self.raw_bytes / self.stored_bytes if self.stored_bytes else 0.0
+
+
+class SegmentStore:
+    def __init__(self, root: str | Path | None = None, level: int | None = None):
+        self.root = Path(root or default_root())
+        self.level = level if level is not None else int(os.environ.get("RESEARCH_STORE_LEVEL", DEFAULT_LEVEL))
+        self._local = threading.local()  # zstd compressors are not thread-safe
+        self._dicts: dict[int, Any] = {}
+        self._write_dict: int | None = None
+        self._write_dict_loaded = False
+
+    def _paths(self, day: str) -> tuple[Path, Path]:
+        base = self.root / day[:4] / day
+        return base.with_suffix(SEGMENT_SUFFIX), base.with_suffix(INDEX_SUFFIX)
+
+    def append(
+        self,
+        payload: Any,
+        *,
+        kind: str,
+        name: str | None = None,
+        when: datetime | str | float | None = None,
+        **meta: Any,
+    ) -> Ref:
+        """Compress ``payload`` (any JSON value) onto its day's segment; returns where it went."""
+        dict_id = self.current_dictionary()
+        if getattr(self._local, "dict_id", -1) != dict_id:
+            self._local.cctx = _zstd().ZstdCompressor(level=self.level, dict_data=self._dict(dict_id))
+            self._local.dict_id = dict_id
+        cctx = self._local.cctx
+        at = _utc(when)
+        day = at.strftime("%Y-%m-%d")
+        raw = json.dumps(payload, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+        frame = cctx.compress(raw)
+        seg, idx = self._paths(day)
+        seg.parent.mkdir(parents=True, exist_ok=True)
+        with open(seg, "ab") as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                offset = f.seek(0, os.SEEK_END)
+                f.write(frame)
+                f.flush()
+                os.fsync(f.fileno())
+                entry = {
+                    "o": offset,
+                    "n": len(frame),
+                    "kind": kind,
+                    "name": name,
+                    "at": at.replace(tzinfo=None).isoformat(timespec="seconds"),
+                    "sha1": hashlib.sha1(raw).hexdigest(),
+                    "size": len(raw),
+                }
+                if dict_id is not None:
+                    entry["d"] = dict_id
+                if meta:
+                    entry["meta"] = meta
+                with open(idx, "a+b") as ix:
+                    # Start a new line after a torn tail rather than gluing onto it.
+                    torn = ix.seek(0, os.SEEK_END) > 0 and ix.seek(-1, os.SEEK_END) >= 0 and ix.read(1) != b"\n"
+                    ix.write((b"\n" if torn else b"") + json.dumps(entry, ensure_ascii=False).encode("utf-8") + b"\n")
+                    ix.flush()
+                    os.fsync(ix.fileno())
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+        return Ref(day, offset)
+
+    def get(self, ref: Ref | str) -> Any:
+        if isinstance(ref, str):
+            ref = Ref.parse(ref)
+        seg, _ = self._paths(ref.day)
+        entry = next((e for e in self._index(ref.day) if e["o"] == ref.offset), None)
+        if entry is None:
+            raise KeyError(f"no record at {ref}")
+        with open(seg, "rb") as f:
+            f.seek(ref.offset)
+            return json.loads(self._decompressor(entry.get("d")).decompress(f.read(entry["n"])))
+
+    def open(self, ref: Ref | str) -> IO[bytes]:
+        """Stream one record's decompressed bytes without materializing the payload."""
+        if isinstance(ref, str):
+            ref = Ref.parse(ref)
+        entry = next((e for e in self._index(ref.day) if e["o"] == ref.offset), None)
+        if entry is None:
+            raise KeyError(f"no record at {ref}")
+        return self._open_frame(ref, entry.get("d"))
+
+    def _open_frame(self, ref: Ref, dict_id: int | None) -> IO[bytes]:
+        f = open(self._paths(ref.day)[0], "rb")
+        f.seek(ref.offset)
+        return self._decompressor(dict_id).stream_reader(f, read_across_frames=False, closefd=True)
+
+    # -- dictionaries ------------------------------------------------------
+
+    def _dict(self, dict_id: int | None) -> Any:
+        if dict_id is None:
+            return None
+        if dict_id not in self._dicts:
+            data = (self.root / "dict" / f"{dict_id}.zdict").read_bytes()
+            self._dicts[dict_id] = _zstd().ZstdCompressionDict(data)
+        return self._dicts[dict_id]
+
+    def _decompressor(self, dict_id: int | None) -> Any:
+        return _zstd().ZstdDecompressor(dict_data=self._dict(dict_id))
+
+    def current_dictionary(self) -> int | None:
+        """Id of the dictionary new frames are compressed with, if one has been trained."""
+        if not self._write_dict_loaded:
+            try:
+                self._write_dict = int((self.root / "dict" / "CURRENT").read_text().strip())
+            except (FileNotFoundError, ValueError):
+                self._write_dict = None
+            self._write_dict_loaded = True
+        return self._write_dict
+
+    def train_dictionary(self, samples: list[bytes], size: int = DICT_SIZE) -> int:
+        """Train a dictionary on compact-JSON ``samples`` and use it for every later append."""
+        trained = _zstd().train_dictionary(size, samples, level=self.level)
+        dict_id = trained.dict_id()
+        d = self.root / "dict"
+        d.mkdir(parents=True, exist_ok=True)
+        (d / f"{dict_id}.zdict").write_bytes(trained.as_bytes())
+        tmp = d / f"CURRENT.tmp{os.getpid()}"
+        tmp.write_text(f"{dict_id}\n")
+        os.replace(tmp, d / "CURRENT")
+        self._write_dict, self._write_dict_loaded = dict_id, True
+        return dict_id
+
+    def days(self) -> list[str]:
+        if not self.root.is_dir():
+            return []
+        return sorted(p.stem for p in self.root.glob(f"*/*{INDEX_SUFFIX}"))
+
+    def day_stat(self, day: str) -> os.stat_result:
+        """``os.stat`` of a day's index file; it grows with every append, so readers use it to skip unchanged days."""
+        return self._paths(day)[1].stat()
+
+    def _index(self, day: str) -> Iterator[dict[str, Any]]:
+        _, idx = self._paths(day)
+        try:
+            with open(idx, encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        yield json.loads(line)
+                    except ValueError:
+                        continue  # torn tail of an interrupted append
+        except FileNotFoundError:
+            return
+
+    def records(
+        self, *, kind: str | None = None, since: str | None = None, until: str | None = None
+    ) -> Iterator[Record]:
+        """Index entries only (payloads load lazily via ``Record.payload``)."""
+        for day in self.days():
+            if (since and day < since[:10]) or (until and day > until[:10]):
+                continue
+            for e in self._index(day):
+                if kind and e["kind"] != kind:
+                    continue
+                yield Record(
+                    Ref(day, e["o"]), e["kind"], e.get("name"), e["at"], e["sha1"], e["size"], e["n"],
+                    e.get("meta") or {}, e.get("d"), self,
+                )
+
+    def scan(
+        self, *, kind: str | None = None, since: str | None = None, until: str | None = None
+    ) -> Iterator[Record]:
+        """Stream records with payloads, one frame at a time, reading each segment front to back."""
+        dctxs: dict[int | None, Any] = {}
+        current, f = None, None
+        try:
+            for rec in self.records(kind=kind, since=since, until=until):
+                if rec.ref.day != current:
+                    if f is not None:
+                        f.close()
+                    current = rec.ref.day
+                    f = open(self._paths(current)[0], "rb")
+                if rec.dict_id not in dctxs:
+                    dctxs[rec.dict_id] = self._decompressor(rec.dict_id)
+                f.seek(rec.ref.offset)
+                rec._payload = json.loads(dctxs[rec.dict_id].decompress(f.read(rec.length)))
+                yield rec
+        finally:
+            if f is not None:
+                f.close()
+
+    def stats(self) -> StoreStats:
+        s = StoreStats()
+        for day in self.days():
+            s.segments += 1
+            for e in self._index(day):
+                s.records += 1
+                s.raw_bytes += e["size"]
+                s.stored_bytes += e["n"]
+        return s
+
+
+# -- migration ---------------------------------------------------------------
+
+
+@dataclass
+class MigrateStats:
+    files: int = 0
+    migrated: int = 0
+    duplicates: int = 0
+    unreadable: list[str] = field(default_factory=list)
+    skipped: list[str] = field(default_factory=list)  # valid JSON, but not a response (request payloads, session outputs)
+    source_bytes: int = 0
+    deleted: int = 0
+
+
+def is_response(obj: Any) -> bool:
+    """Whether ``obj`` looks like a raw search/extract response rather than a request payload or a runner's output."""
+    if not isinstance(obj, dict):
+        return False
+    return "search_id" in obj or "extract_id" in obj or any(isinstance(obj.get(k), list) for k in ("results", "errors"))
+
+
+def _load_compact(path: Path) -> tuple[Any, bytes]:
+    try:
+        obj = json.loads(path.read_bytes().decode("utf-8"), strict=False)
+    except ValueError:
+        return None, b""
+    return obj, json.dumps(obj, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+
+def migrate(
+    store: SegmentStore,
+    root: str | Path | None = None,
+    *,
+    delete: bool = False,
+    dry_run: bool = False,
+) -> MigrateStats:
+    """Append every raw payload dump under ``root`` (default: the repo) to ``store``.
+
+    Payloads already in the store (same SHA-1 of their compact JSON) are
+    not added twice, so the migration can be re-run. Each record keeps its
+    original path (``meta.source``) and the fetch time inferred from its
+    name or directory. Files that are not valid JSON (there are truncated
+    dumps) are reported and left alone, as are files that are not API
+    responses (request payloads such as ``parallel_search_payload.json``,
+    session outputs) and dotfiles. With ``delete`` every migrated or
+    duplicate file is removed.
+    """
+    from snowresearch.index import file_kind, file_time
+
+    root = Path(root or REPO_ROOT)
+    stats = MigrateStats()
+    have = {rec.sha1 for rec in store.records()}
+    paths = sorted({p for pattern in MIGRATE_GLOBS for p in root.glob(pattern) if p.is_file()})
+    todo: list[tuple[Path, str, bool]] = []
+    samples: list[bytes] = []
+    sample_bytes = 0
+    for path in paths:
+        rel = path.relative_to(root).as_posix()
+        if rel.startswith(MIGRATE_SKIP) or any(part.startswith(".") for part in Path(rel).parts):
+            continue
+        obj, compact = _load_compact(path)
+        if obj is None:
+            stats.unreadable.append(rel)
+            continue
+        if not is_response(obj):
+            stats.skipped.append(rel)
+            continue
+        stats.files += 1
+        stats.source_bytes += path.stat().st_size
+        sha1 = hashlib.sha1(compact).hexdigest()
+        if sha1 in have:
+            stats.duplicates += 1
+            todo.append((path, rel, False))
+        else:
+            have.add(sha1)
+            stats.migrated += 1
+            todo.append((path, rel, True))
+            if sample_bytes < MAX_DICT_SAMPLE_BYTES:
+                samples.append(compact)
+                sample_bytes += len(compact)
+    if dry_run:
+        return stats
+
+    # Only paths are kept between passes (plus a capped dictionary sample), so
+    # migrating a large archive does not hold it in memory.
+    if store.current_dictionary() is None and len(samples) >= MIN_DICT_SAMPLES:
+        store.train_dictionary(samples)
+    del samples
+    for path, rel, fresh in todo:
+        if fresh:
+            obj, _ = _load_compact(path)
+            store.append(
+                obj,
+                kind=file_kind(path, obj),
+                name=path.stem,
+                when=file_time(path, rel, path.stat().st_mtime),
+                source=rel,
+            )
+        if delete:
+            path.unlink()
+            stats.deleted += 1
+    return stats
@@ -0,0 +1,140 @@
+"""Server-sent-event streaming for Parallel chat completions.
+
+With ``"stream": False`` a synthesis call shows nothing until the whole
+completion is done, then gets truncated to ``--max-chars`` anyway.
+:func:`stream_chat` asks for ``"stream": true``, parses the SSE body as it
+arrives, hands each text delta to a callback, and stops reading (dropping
+the connection) once ``max_chars`` of text have been produced.
+
+Timing is recorded in :class:`StreamStats`: time to first token, total
+time, and tokens/sec (from the server's ``usage`` block when it sends one,
+otherwise the number of content deltas).
+
+Usage:
+  from snowresearch.streaming import stream_chat
+
+  text, stats = stream_chat(payload, on_text=lambda s: print(s, end="", flush=True))
+  print(stats.summary())
+"""
+
+from __future__ import annotations
+
+import json
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Iterable, Iterator
+
+from snowresearch.client import CHAT_PATH, ParallelClient, get_client
+
+
+@dataclass
+class StreamStats:
+    ttft: float | None = None
+    elapsed: float = 0.0
+    deltas: int = 0
+    chars: int = 0
+    tokens: int | None = None
+    truncated: bool = False
+    finish_reason: str | None = None
+
+    @property
+    def token_count(self) -> int:
+        return self.tokens if self.tokens is not None else self.deltas
+
+    @property
+    def tokens_per_sec(self) -> float:
+        # Measured from the first token: that is the generation rate, TTFT is reported separately.
+        gen = self.elapsed - (self.ttft or 0.0)
+        return self.token_count / gen if gen > 0 else 0.0
+
+    def summary(self) -> str:
+        ttft = f"{self.ttft:.2f}s" if self.ttft is not None else "n/a"
+        unit = "tokens" if self.tokens is not None else "chunks"
+        return (
+            f"ttft {ttft}, {self.token_count} {unit} / {self.chars} chars in {self.elapsed:.1f}s "
+            f"({self.tokens_per_sec:.1f} {unit}/s)" + (", stopped at --max-chars" if self.truncated else "")
+        )
+
+
+def iter_sse(lines: Iterable[bytes]) -> Iterator[str]:
+    """Yield the ``data`` of each server-sent event; multi-line data is joined with newlines."""
+    data: list[str] = []
+    for raw in lines:
+        line = raw.decode("utf-8", errors="replace").rstrip("\r\n")
+        if not line:
+            if data:
+                yield "\n".join(data)
+                data = []
+            continue
+        if line.startswith(":"):
+            continue
+        field, _, value = line.partition(":")
+        if field == "data":
+            data.append(value[1:] if value.startswith(" ") else value)
+    if data:
+        yield "\n".join(data)
+
+
+def _delta_text(chunk: dict[str, Any]) -> str:
+    choices = chunk.get("choices") or []
+    if not choices:
+        return ""
+    choice = choices[0]
+    delta = choice.get("delta") or choice.get("message") or {}
+    return delta.get("content") or ""
+
+
+def stream_chat(
+    payload: dict[str, Any],
+    *,
+    url: str = CHAT_PATH,
+    client: ParallelClient | None = None,
+    max_chars: int | None = None,
+    on_text: Callable[[str], Any] | None = None,
+    timeout: float | None = 60,
+) -> tuple[str, StreamStats]:
+    """Stream a chat completion; returns ``(text, stats)``.
+
+    ``on_text`` receives each delta as it arrives (already cut at
+    ``max_chars``). ``timeout`` applies per socket read, not to the whole stream.
+    """
+    client = client or get_client()
+    stats = StreamStats()
+    parts: list[str] = []
+    started = time.monotonic()
+    lines = client.stream_lines(url, {**payload, "stream": True}, auth="bearer", timeout=timeout)
+    try:
+        for data in iter_sse(lines):
+            if data.strip() == "[DONE]":
+                # Read the (empty) tail so the keep-alive connection can be reused.
+                for _ in lines:
+                    pass
+                break
+            try:
+                chunk = json.loads(data)
+            except ValueError:
+                continue
+            usage = chunk.get("usage") or {}
+            if usage.get("completion_tokens") is not None:
+                stats.tokens = usage["completion_tokens"]
+            if chunk.get("choices"):
+                stats.finish_reason = chunk["choices"][0].get("finish_reason") or stats.finish_reason
+            text = _delta_text(chunk)
+            if not text:
+                continue
+            if stats.ttft is None:
+                stats.ttft = time.monotonic() - started
+            if max_chars and stats.chars + len(text) > max_chars:
+                text = text[: max_chars - stats.chars]
+                stats.truncated = True
+            stats.deltas += 1
+            stats.chars += len(text)
+            parts.append(text)
+            if on_text is not None and text:
+                on_text(text)
+            if stats.truncated:
+                break
+    finally:
+        lines.close()
+        stats.elapsed = time.monotonic() - started
+    return "".join(parts), stats
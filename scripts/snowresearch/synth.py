@@ -0,0 +1,623 @@
+"""Synthetic ACCOUNT_USAGE / ORGANIZATION_USAGE / EVENTS_VIEW workloads at load-test volume.
+
+The stand-in data in :mod:`snowresearch.sqlemu` is good for a smoke test,
+but load-testing the FinOps facts needs realistic volume and shape:
+hundreds of warehouses, months of hourly metering, tens of millions of
+queries with a skewed ``QUERY_TAG`` distribution, and event-table spans
+and logs. :class:`Generator` builds all of that with NumPy, one chunk of
+hours at a time (:attr:`Profile.chunk_rows` bounds the queries in memory),
+and streams each chunk to Parquet or CSV:
+
+  <out>/ACCOUNT_USAGE.WAREHOUSE_METERING_HISTORY/part-00000.parquet
+  <out>/ACCOUNT_USAGE.QUERY_HISTORY/part-00000.parquet
+  ...
+  <out>/_profile.json      profile, time range and row counts
+
+Every warehouse follows one load pattern (:data:`KINDS`), mixed per
+:attr:`Profile.mix`:
+
+- ``diurnal``: business-hours curve, quiet weekends;
+- ``etl``: a few scheduled hours of heavy, long queries a day, else idle;
+- ``idle``: sporadic small queries on a long ``AUTO_SUSPEND``, so it bills
+  far more than it works;
+- ``multi_cluster``: diurnal, scaling out to ``MAX_CLUSTER_COUNT`` at peak.
+
+Rows are consistent across views the way Snowflake's are. The
+credits billed for a warehouse-hour cover the time it was running, which
+is at least the time it was busy. Query credits are the busy share split
+over that hour's queries by execution time, truncated to 9 decimals, and
+per hour ``CREDITS_ATTRIBUTED_COMPUTE_QUERIES`` equals their sum, so it is
+never more than ``CREDITS_USED_COMPUTE``. ``QUERY_ATTRIBUTION_HISTORY`` leaves
+out queries shorter than 100 ms, as Snowflake does. ``METERING_HISTORY``
+repeats the warehouse rows and adds hourly ``TELEMETRY_DATA_INGEST``
+credits proportional to the events written that hour.
+``ORGANIZATION_USAGE`` is the daily roll-up of those rows, with the 10%
+cloud-services adjustment applied. ``QUERY_HISTORY.CREDITS_USED_COMPUTE`` and
+``QUERY_ATTRIBUTION_HISTORY.CREDITS_ATTRIBUTED_CLOUD_SERVICES`` are written
+because ``sql/`` reads them (see :data:`snowresearch.sqlemu.ASSUMED_COLUMNS`).
+
+Output is deterministic for a given profile (seed included). Load it
+into the SQL emulator with ``Emulator.load(out)`` or
+``research sql bench --data <out>``. Needs numpy and pyarrow.
+
+Usage:
+  scripts/research synth --profile mixed --days 30 --out /tmp/synth [--format csv]
+  scripts/research synth --profile bursty-etl --warehouses 500 --queries-per-day 5000000 --out /tmp/etl
+
+  from snowresearch.synth import Generator, Profile
+  stats = Generator(Profile.named("idle-heavy", days=7)).write("/tmp/idle")
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import shutil
+import time
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Iterator
+
+KINDS = ("diurnal", "etl", "idle", "multi_cluster")
+SIZES = ("X-Small", "Small", "Medium", "Large", "X-Large", "2X-Large")
+SIZE_CREDITS = (1, 2, 4, 8, 16, 32)
+QUERY_TYPES = ("SELECT", "INSERT", "MERGE", "COPY", "CREATE_TABLE_AS_SELECT")
+SEVERITIES = ("INFO", "WARN", "ERROR", "FATAL")
+FORMATS = ("parquet", "csv")
+
+CLOUD_SERVICES_FREE = 0.10  # daily cloud services up to this share of compute are not billed
+INGEST_CREDITS_PER_MILLION = 1.0  # TELEMETRY_DATA_INGEST credits per million events
+CREDIT_PRICE = 3.0  # USD, for USAGE_IN_CURRENCY_DAILY
+QAH_MIN_MS = 100  # QUERY_ATTRIBUTION_HISTORY leaves out shorter queries
+ZIPF_BITS = 20  # resolution of the skewed-choice lookup tables
+
+# Per kind: median execution ms, query mix over QUERY_TYPES, relative query rate while busy.
+_KIND_EXEC_MS = (800.0, 60_000.0, 300.0, 1_500.0)
+_KIND_TYPES = (
+    (0.90, 0.04, 0.02, 0.01, 0.03),
+    (0.20, 0.30, 0.30, 0.15, 0.05),
+    (0.95, 0.02, 0.01, 0.01, 0.01),
+    (0.92, 0.03, 0.02, 0.01, 0.02),
+)
+_KIND_RATE = (1.0, 0.15, 0.3, 1.5)
+_OPS = (
+    "refresh_facts", "load_usage", "compute_recos", "render_dashboard", "export_report", "sync_tags",
+    "ingest_events", "evaluate_alerts", "score_warehouses", "apply_policy", "snapshot_grants", "diff_listings",
+)
+_MESSAGES = (
+    ("request ", " failed after ", " ms"),
+    ("retrying batch ", " (attempt ", ")"),
+    ("warehouse WH_", " suspended after ", " s idle"),
+    ("query q", " exceeded ", " MB of spill"),
+    ("refresh of window ", " lagged ", " minutes"),
+)
+
+PROFILES: dict[str, dict[str, Any]] = {
+    "diurnal": {"mix": {"diurnal": 1.0}},
+    "bursty-etl": {"mix": {"etl": 0.7, "diurnal": 0.3}},
+    "idle-heavy": {"mix": {"idle": 0.6, "diurnal": 0.4}},
+    "multi-cluster": {"mix": {"multi_cluster": 0.5, "diurnal": 0.5}},
+    "mixed": {"mix": {"diurnal": 0.45, "etl": 0.25, "idle": 0.15, "multi_cluster": 0.15}},
+}
+
+
+def _np() -> Any:
+    try:
+        import numpy
+    except ImportError:
+        raise RuntimeError("the workload generator needs numpy (pip install numpy)") from None
+    return numpy
+
+
+def _pa() -> Any:
+    try:
+        import pyarrow
+        import pyarrow.compute  # noqa: F401
+        import pyarrow.csv  # noqa: F401
+        import pyarrow.parquet  # noqa: F401
+    except ImportError:
+        raise RuntimeError("the workload generator needs pyarrow (pip install pyarrow)") from None
+    return pyarrow
+
+
+@dataclass
+class Profile:
+    """What to generate; :meth:`named` starts from one of :data:`PROFILES`."""
+
+    name: str = "mixed"
+    warehouses: int = 200
+    days: int = 30
+    queries_per_day: int = 1_000_000
+    events_per_day: int = 200_000
+    mix: dict[str, float] = field(default_factory=lambda: dict(PROFILES["mixed"]["mix"]))
+    tags: int = 400
+    tag_skew: float = 1.1  # Zipf exponent over tags (and query templates)
+    untagged: float = 0.25
+    templates: int = 5_000
+    users: int = 1_000
+    apps: int = 4
+    consumers: int = 150
+    end: str | None = None  # exclusive end, ISO date or datetime (UTC); default: today 00:00
+    chunk_rows: int = 2_000_000  # queries generated per chunk, at most about this many
+    seed: int = 42
+
+    @classmethod
+    def named(cls, name: str, **overrides: Any) -> Profile:
+        if name not in PROFILES:
+            raise ValueError(f"unknown profile {name!r} (choose from {', '.join(PROFILES)})")
+        base = {"name": name, **PROFILES[name]}
+        base.update({k: v for k, v in overrides.items() if v is not None})
+        return cls(**base)
+
+    def end_time(self) -> datetime:
+        if self.end:
+            return datetime.fromisoformat(self.end).replace(tzinfo=None)
+        return datetime.now(timezone.utc).replace(tzinfo=None, hour=0, minute=0, second=0, microsecond=0)
+
+    def validate(self) -> None:
+        unknown = set(self.mix) - set(KINDS)
+        if unknown or not self.mix or sum(self.mix.values()) <= 0:
+            raise ValueError(f"mix must weight {', '.join(KINDS)} (got {self.mix})")
+        if min(self.warehouses, self.days, self.tags, self.templates, self.users, self.apps, self.consumers) < 1:
+            raise ValueError("warehouses, days, tags, templates, users, apps and consumers must be positive")
+
+
+@dataclass
+class SynthStats:
+    rows: dict[str, int] = field(default_factory=dict)
+    chunks: int = 0
+    seconds: float = 0.0
+    bytes: int = 0
+
+    def summary(self) -> str:
+        total = sum(self.rows.values())
+        rate = total / self.seconds if self.seconds else 0.0
+        return (
+            f"{total:,} rows in {len(self.rows)} views, {self.chunks} chunks, {self.bytes / 1e6:.0f} MB "
+            f"in {self.seconds:.1f}s ({rate / 1e6:.2f}M rows/s)"
+        )
+
+
+class _Sink:
+    """One streaming writer per view; each chunk becomes a row group (or a CSV block)."""
+
+    def __init__(self, out: Path, fmt: str, pa: Any, compression: str):
+        self.out, self.fmt, self.pa, self.compression = out, fmt, pa, compression
+        self.writers: dict[str, Any] = {}
+        self.paths: dict[str, Path] = {}
+
+    def write(self, view: str, table: Any) -> None:
+        if table.num_rows == 0:
+            return
+        if self.fmt == "csv":
+            # The CSV writer wants plain types; dictionaries only help Parquet.
+            table = table.cast(self.pa.schema([f.with_type(_plain(self.pa, f.type)) for f in table.schema]))
+        writer = self.writers.get(view)
+        if writer is None:
+            path = self.out / view / f"part-00000.{self.fmt}"
+            path.parent.mkdir(parents=True, exist_ok=True)
+            if self.fmt == "csv":
+                writer = self.pa.csv.CSVWriter(str(path), table.schema)
+            else:
+                writer = self.pa.parquet.ParquetWriter(str(path), table.schema, compression=self.compression)
+            self.writers[view], self.paths[view] = writer, path
+        writer.write_table(table)
+
+    def close(self) -> int:
+        for writer in self.writers.values():
+            writer.close()
+        return sum(p.stat().st_size for p in self.paths.values())
+
+
+def _plain(pa: Any, typ: Any) -> Any:
+    return typ.value_type if pa.types.is_dictionary(typ) else typ
+
+
+class Generator:
+    """Generates a :class:`Profile`; :meth:`chunks` yields ``(view, pyarrow.Table)`` pairs."""
+
+    def __init__(self, profile: Profile | None = None):
+        profile = profile or Profile()
+        profile.validate()
+        self.np, self.pa = _np(), _pa()
+        self.p = profile
+        self.end = profile.end_time()
+        self.start = self.end - timedelta(days=profile.days)
+        np = self.np
+        rng = np.random.default_rng([profile.seed, 0])
+        W = profile.warehouses
+
+        kinds = list(profile.mix)
+        weights = np.array([profile.mix[k] for k in kinds], dtype=float)
+        counts = np.floor(weights / weights.sum() * W).astype(int)
+        counts[np.argmax(weights)] += W - counts.sum()
+        self.kind = rng.permutation(np.repeat([KINDS.index(k) for k in kinds], counts))
+        self.size = np.minimum(rng.geometric(0.45, W) - 1, len(SIZES) - 1)
+        self.size[self.kind == 1] = np.minimum(self.size[self.kind == 1] + 2, len(SIZES) - 1)
+        self.credits = np.array(SIZE_CREDITS, dtype=float)[self.size]
+        self.auto_suspend = np.where(
+            self.kind == 2, rng.choice([1800, 3600], W), rng.choice([60, 300, 600], W, p=[0.4, 0.4, 0.2])
+        )
+        self.max_clusters = np.where(self.kind == 3, rng.integers(3, 11, W), 1)
+        self.base = rng.uniform(0.03, 0.2, W)
+        self.amp = rng.uniform(0.4, 0.85, W)
+        self.etl_start = rng.integers(0, 6, W)
+        self.etl_hours = rng.integers(1, 5, W)
+        self.idle_p = rng.uniform(0.3, 0.8, W)
+        self.tag_offset = rng.integers(0, profile.tags, W)
+
+        self.tag_table = self._zipf_table(profile.tags, profile.tag_skew)
+        self.template_table = self._zipf_table(profile.templates, profile.tag_skew)
+        self.combo_table = self._zipf_table(profile.apps * profile.consumers, 1.0)
+        self.type_cdf = np.cumsum(np.array(_KIND_TYPES), axis=1)
+
+        self._dicts()
+        # Mean query weight per hour over the first week, so a chunk of any length gets its share of queries.
+        busy, _, clusters = self._load(np.arange(min(168, profile.days * 24)), np.random.default_rng([profile.seed, 1]))
+        self.rate = np.array(_KIND_RATE)[self.kind]
+        self.mean_weight = max(float((busy * clusters * self.rate[:, None]).sum(axis=0).mean()), 1e-9)
+        self.next_query = 0
+
+    def _zipf_table(self, n: int, skew: float) -> Any:
+        """Inverse CDF of Zipf(``skew``) over ``n`` values at 2^:data:`ZIPF_BITS` steps (a gather beats searchsorted)."""
+        np = self.np
+        weights = np.arange(1, n + 1, dtype=float) ** -skew
+        cdf = np.cumsum(weights) / weights.sum()
+        return np.searchsorted(cdf, (np.arange(1 << ZIPF_BITS) + 0.5) / (1 << ZIPF_BITS)).astype(np.int32)
+
+    def _zipf(self, table: Any, n: int, rng: Any) -> Any:
+        return table[rng.integers(0, 1 << ZIPF_BITS, n)]
+
+    def _dicts(self) -> None:
+        pa, p = self.pa, self.p
+        W = p.warehouses
+        self.wh_names = pa.array([f"WH_{i + 1:04d}" for i in range(W)])
+        self.size_names = pa.array(SIZES)
+        self.tag_dict = pa.array([""] + [f"team-{k % 25:02d}/job-{k:04d}" for k in range(p.tags)])
+        self.template_dict = pa.array([hashlib.md5(f"template-{k}".encode()).hexdigest() for k in range(p.templates)])
+        self.user_dict = pa.array([f"USER_{k:04d}" for k in range(p.users)])
+        self.type_dict = pa.array(QUERY_TYPES)
+        self.status_dict = pa.array(["SUCCESS", "FAIL"])
+        self.role_dict = pa.array(["ANALYST"])
+        self.resource_dict = pa.array(
+            [
+                json.dumps(
+                    {
+                        "snow.application.package.name": f"APP_{a:02d}",
+                        "snow.application.version": f"v{1 + (c + a) % 3}",
+                        "snow.application.consumer.organization": f"ORG_{c % 40:02d}",
+                        "snow.application.consumer.name": f"CONSUMER_{c:04d}",
+                    }
+                )
+                for c in range(p.consumers)
+                for a in range(p.apps)
+            ]
+        )
+        self.op_dict = pa.array([json.dumps({"name": op}) for op in _OPS])
+        self.severity_dict = pa.array([json.dumps({"severity_text": s}) for s in SEVERITIES])
+        self.record_types = pa.array(["SPAN", "LOG"])
+
+    # -- load model
+
+    def _load(self, hours: Any, rng: Any) -> tuple[Any, Any, Any]:
+        """(busy, running, clusters) per warehouse × hour, hours counted from :attr:`start`."""
+        np = self.np
+        W, H = self.p.warehouses, len(hours)
+        hod = (hours + self.start.hour) % 24
+        dow = (self.start.weekday() + (hours + self.start.hour) // 24) % 7
+        weekday = np.where(dow < 5, 1.0, 0.35)
+        curve = np.clip(np.sin(np.pi * (hod - 7) / 12), 0, None) * weekday
+        noise = rng.normal(0, 0.05, (W, H))
+        u = rng.random((W, H))
+
+        diurnal = np.clip(self.base[:, None] + self.amp[:, None] * curve + noise, 0, 1)
+        in_window = ((hod[None, :] - self.etl_start[:, None]) % 24) < self.etl_hours[:, None]
+        etl = np.where(in_window, 0.7 + 0.3 * u, np.where(u < 0.05, 0.1 * u, 0.0))
+        idle = np.where(u < self.idle_p[:, None], 0.01 + 0.07 * rng.random((W, H)), 0.0)
+        multi = np.clip(self.base[:, None] + (self.amp[:, None] + 0.15) * curve + noise, 0, 1)
+        busy = np.choose(self.kind[:, None], [diurnal, etl, idle, multi])
+
+        tail = self.auto_suspend[:, None] / 3600 * np.where(self.kind[:, None] == 2, 4.0, 1.5) * (0.5 + u)
+        running = np.where(busy > 0, np.minimum(1.0, busy + tail), 0.0)
+        clusters = np.where(
+            self.kind[:, None] == 3,
+            1 + np.floor((self.max_clusters[:, None] - 1) * np.clip((busy - 0.5) / 0.5, 0, 1)),
+            1.0,
+        )
+        return busy, running, clusters
+
+    # -- chunks
+
+    def chunk_hours(self) -> int:
+        per_hour = max(self.p.queries_per_day / 24, 1.0)
+        return int(max(1, min(24, self.p.chunk_rows // per_hour)))
+
+    def chunks(self) -> Iterator[tuple[str, Any]]:
+        """``(view, table)`` pairs: the warehouse dimension first, then every chunk, then the daily roll-ups."""
+        np = self.np
+        yield "ACCOUNT_USAGE.WAREHOUSES", self._warehouses()
+        step = self.chunk_hours()
+        total_hours = self.p.days * 24
+        self.daily: dict[tuple[int, str], list[float]] = {}
+        for h0 in range(0, total_hours, step):
+            hours = np.arange(h0, min(h0 + step, total_hours))
+            rng = np.random.default_rng([self.p.seed, 2, h0])
+            yield from self._chunk(hours, rng)
+        yield from self._org()
+
+    def _warehouses(self) -> Any:
+        pa, np, W = self.pa, self.np, self.p.warehouses
+        created = pa.scalar(self.start - timedelta(days=90), pa.timestamp("us"))
+        return pa.table(
+            {
+                "WAREHOUSE_ID": pa.array(np.arange(1, W + 1)),
+                "WAREHOUSE_NAME": self.wh_names,
+                "WAREHOUSE_SIZE": self.size_names.take(pa.array(self.size)),
+                "WAREHOUSE_TYPE": pa.array(["STANDARD"] * W),
+                "STATE": pa.array(["STARTED"] * W),
+                "AUTO_SUSPEND": pa.array(self.auto_suspend),
+                "AUTO_RESUME": pa.array([True] * W),
+                "MIN_CLUSTER_COUNT": pa.array(np.ones(W, dtype=np.int64)),
+                "MAX_CLUSTER_COUNT": pa.array(self.max_clusters.astype(np.int64)),
+                "CREATED": pa.array([created.as_py()] * W, pa.timestamp("us")),
+            }
+        )
+
+    def _ts(self, micros: Any) -> Any:
+        """Microseconds since :attr:`start` as a timestamp array."""
+        base = self.np.datetime64(self.start, "us")
+        return self.pa.array(base + micros.astype("timedelta64[us]"))
+
+    def _chunk(self, hours: Any, rng: Any) -> Iterator[tuple[str, Any]]:
+        np, pa, pc, p = self.np, self.pa, self.pa.compute, self.p
+        W, H = p.warehouses, len(hours)
+        busy, running, clusters = self._load(hours, rng)
+        compute = self.credits[:, None] * running * clusters
+        cloud = np.where(running > 0, compute * rng.uniform(0.02, 0.1, (W, H)), 0.0)
+        cap = self.credits[:, None] * busy * clusters * rng.uniform(0.75, 0.98, (W, H))
+
+        # Queries: Poisson per warehouse-hour, proportional to how busy it is.
+        lam = p.queries_per_day / 24 * busy * clusters * self.rate[:, None] / self.mean_weight
+        counts = rng.poisson(lam).ravel()
+        n = int(counts.sum())
+        cell = np.repeat(np.arange(W * H), counts)
+        w = cell // H
+        h = hours[cell % H]
+        kind = self.kind[w]
+        exec_ms = np.maximum(
+            1.0, rng.lognormal(np.log(np.array(_KIND_EXEC_MS)[kind]), 1.2)
+        ).round()
+        queued = np.where(rng.random(n) < 0.05, rng.exponential(2_000, n), 0.0).round()
+        elapsed = exec_ms + queued
+        start_us = (h * 3600 + rng.random(n) * 3600) * 1e6
+        end_us = start_us + elapsed * 1e3
+
+        share = exec_ms / np.bincount(cell, exec_ms, W * H)[cell] if n else exec_ms
+        attributed = np.floor(cap.ravel()[cell] * share * 1e9) / 1e9
+        cloud_q = np.floor(cloud.ravel()[cell] * 0.8 * share * 1e9) / 1e9
+        attributed_hour = np.bincount(cell, attributed, W * H).reshape(W, H)
+
+        tag = (self._zipf(self.tag_table, n, rng) + self.tag_offset[w]) % p.tags + 1
+        tag[rng.random(n) < p.untagged] = 0
+        template = self._zipf(self.template_table, n, rng)
+        user = (w * 13 + rng.integers(0, 20, n)) % p.users
+        qtype = (rng.random(n)[:, None] > self.type_cdf[kind]).sum(axis=1)
+        failed = (rng.random(n) < 0.015).astype(np.int8)
+        cluster = 1 + np.floor(rng.random(n) * clusters.ravel()[cell]).astype(np.int64)
+
+        ids = pc.binary_join_element_wise(
+            "01c",
+            pc.utf8_lpad(pc.cast(pa.array(np.arange(self.next_query, self.next_query + n)), pa.string()), 13, "0"),
+            "",
+        )
+        self.next_query += n
+        dict_of = pa.DictionaryArray.from_arrays
+        wh_id = pa.array(w + 1)
+        wh_name = dict_of(pa.array(w.astype(np.int32)), self.wh_names)
+        tag_arr = dict_of(pa.array(tag.astype(np.int32)), self.tag_dict)
+        user_arr = dict_of(pa.array(user.astype(np.int32)), self.user_dict)
+        st, en = self._ts(start_us), self._ts(end_us)
+        yield "ACCOUNT_USAGE.QUERY_HISTORY", pa.table(
+            {
+                "QUERY_ID": ids,
+                "QUERY_TYPE": dict_of(pa.array(qtype.astype(np.int32)), self.type_dict),
+                "QUERY_TAG": tag_arr,
+                "USER_NAME": user_arr,
+                "ROLE_NAME": dict_of(pa.array(np.zeros(n, dtype=np.int8)), self.role_dict),
+                "WAREHOUSE_ID": wh_id,
+                "WAREHOUSE_NAME": wh_name,
+                "WAREHOUSE_SIZE": dict_of(pa.array(self.size[w].astype(np.int32)), self.size_names),
+                "CLUSTER_NUMBER": pa.array(cluster),
+                "EXECUTION_STATUS": dict_of(pa.array(failed), self.status_dict),
+                "START_TIME": st,
+                "END_TIME": en,
+                "TOTAL_ELAPSED_TIME": pa.array(elapsed.astype(np.int64)),
+                "EXECUTION_TIME": pa.array(exec_ms.astype(np.int64)),
+                "CREDITS_USED_CLOUD_SERVICES": pa.array(cloud_q),
+                "CREDITS_USED_COMPUTE": pa.array(attributed),
+            }
+        )
+        keep = pa.array(exec_ms >= QAH_MIN_MS)
+        template_arr = dict_of(pa.array(template.astype(np.int32)), self.template_dict)
+        yield "ACCOUNT_USAGE.QUERY_ATTRIBUTION_HISTORY", pa.table(
+            {
+                "QUERY_ID": ids,
+                "WAREHOUSE_ID": wh_id,
+                "WAREHOUSE_NAME": wh_name,
+                "QUERY_HASH": template_arr,
+                "QUERY_PARAMETERIZED_HASH": template_arr,
+                "QUERY_TAG": tag_arr,
+                "USER_NAME": user_arr,
+                "START_TIME": st,
+                "END_TIME": en,
+                "CREDITS_ATTRIBUTED_COMPUTE": pa.array(attributed),
+                "CREDITS_USED_QUERY_ACCELERATION": pa.array(np.zeros(n)),
+                "CREDITS_ATTRIBUTED_CLOUD_SERVICES": pa.array(cloud_q),
+            }
+        ).filter(keep)
+        del ids, st, en, tag_arr, user_arr, template_arr
+
+        # Warehouse-hours that ran at all.
+        ww, hh = np.nonzero(running > 0)
+        hour_us = hours[hh] * 3_600_000_000
+        metering = {
+            "START_TIME": self._ts(hour_us),
+            "END_TIME": self._ts(hour_us + 3_600_000_000),
+            "WAREHOUSE_ID": pa.array(ww + 1),
+            "WAREHOUSE_NAME": self.wh_names.take(pa.array(ww)),
+            "CREDITS_USED": pa.array(compute[ww, hh] + cloud[ww, hh]),
+            "CREDITS_USED_COMPUTE": pa.array(compute[ww, hh]),
+            "CREDITS_USED_CLOUD_SERVICES": pa.array(cloud[ww, hh]),
+        }
+        yield "ACCOUNT_USAGE.WAREHOUSE_METERING_HISTORY", pa.table(
+            {**metering, "CREDITS_ATTRIBUTED_COMPUTE_QUERIES": pa.array(attributed_hour[ww, hh])}
+        )
+
+        # Events: diurnal volume across all apps and consumers.
+        hod = (hours + self.start.hour) % 24
+        per_hour = rng.poisson(p.events_per_day / 24 * (1 + 0.6 * np.sin(np.pi * (hod - 9) / 12)))
+        ne = int(per_hour.sum())
+        eh = np.repeat(hours, per_hour)
+        ts_us = (eh * 3600 + rng.random(ne) * 3600) * 1e6
+        span = rng.random(ne) < 0.6
+        op = rng.integers(0, len(_OPS), ne)
+        dur_us = rng.lognormal(np.log(50_000 * (1 + op)), 1.0)
+        severity = np.searchsorted(np.cumsum([0.85, 0.1, 0.045, 0.005]), rng.random(ne) * 0.99999)
+        msg = rng.integers(0, len(_MESSAGES), ne)
+        nums = [pc.cast(pa.array(rng.integers(0, 10 ** k, ne)), pa.string()) for k in (4, 5)]
+        parts = [pa.array([m[i] for m in _MESSAGES]).take(pa.array(msg)) for i in range(3)]
+        message = pc.binary_join_element_wise(parts[0], nums[0], parts[1], nums[1], parts[2], "")
+        combo = self._zipf(self.combo_table, ne, rng)
+        ts = self._ts(ts_us)
+        yield "TELEMETRY.EVENTS_VIEW", pa.table(
+            {
+                "TIMESTAMP": ts,
+                "START_TIMESTAMP": pc.if_else(pa.array(span), self._ts(ts_us - dur_us), None),
+                "OBSERVED_TIMESTAMP": ts,
+                "RESOURCE_ATTRIBUTES": dict_of(pa.array(combo.astype(np.int32)), self.resource_dict),
+                "RECORD_TYPE": dict_of(pa.array((~span).astype(np.int8)), self.record_types),
+                "RECORD": pc.if_else(
+                    pa.array(span),
+                    dict_of(pa.array(op.astype(np.int32)), self.op_dict).cast(pa.string()),
+                    dict_of(pa.array(severity.astype(np.int32)), self.severity_dict).cast(pa.string()),
+                ),
+                "VALUE": pc.if_else(pa.array(span), pa.nulls(ne, pa.string()), message),
+            }
+        )
+
+        # METERING_HISTORY: the warehouse rows again, plus ingest credits per hour.
+        ingest = per_hour * INGEST_CREDITS_PER_MILLION / 1e6
+        ingest_us = hours * 3_600_000_000
+        yield "ACCOUNT_USAGE.METERING_HISTORY", pa.concat_tables(
+            [
+                pa.table(
+                    {
+                        "SERVICE_TYPE": pa.array(np.full(len(ww), "WAREHOUSE_METERING")),
+                        "START_TIME": metering["START_TIME"],
+                        "END_TIME": metering["END_TIME"],
+                        "ENTITY_ID": metering["WAREHOUSE_ID"],
+                        "ENTITY_TYPE": pa.array(np.full(len(ww), "WAREHOUSE")),
+                        "NAME": metering["WAREHOUSE_NAME"].cast(pa.string()),
+                        "CREDITS_USED_COMPUTE": metering["CREDITS_USED_COMPUTE"],
+                        "CREDITS_USED_CLOUD_SERVICES": metering["CREDITS_USED_CLOUD_SERVICES"],
+                        "CREDITS_USED": metering["CREDITS_USED"],
+                    }
+                ),
+                pa.table(
+                    {
+                        "SERVICE_TYPE": pa.array(np.full(H, "TELEMETRY_DATA_INGEST")),
+                        "START_TIME": self._ts(ingest_us),
+                        "END_TIME": self._ts(ingest_us + 3_600_000_000),
+                        "ENTITY_ID": pa.array(np.zeros(H, dtype=np.int64)),
+                        "ENTITY_TYPE": pa.array(np.full(H, "ACCOUNT")),
+                        "NAME": pa.array(np.full(H, "TELEMETRY_DATA_INGEST")),
+                        "CREDITS_USED_COMPUTE": pa.array(ingest),
+                        "CREDITS_USED_CLOUD_SERVICES": pa.array(np.zeros(H)),
+                        "CREDITS_USED": pa.array(ingest),
+                    }
+                ),
+            ]
+        )
+
+        # Daily roll-up for ORGANIZATION_USAGE, emitted once at the end.
+        day = hours // 24
+        for d in np.unique(day):
+            cols = day == d
+            for service, comp, cs in (
+                ("WAREHOUSE_METERING", compute[:, cols].sum(), cloud[:, cols].sum()),
+                ("TELEMETRY_DATA_INGEST", ingest[cols].sum(), 0.0),
+            ):
+                acc = self.daily.setdefault((int(d), service), [0.0, 0.0])
+                acc[0] += float(comp)
+                acc[1] += float(cs)
+
+    def _org(self) -> Iterator[tuple[str, Any]]:
+        pa = self.pa
+        keys = sorted(self.daily)
+        days = [(self.start + timedelta(days=d)).date() for d, _ in keys]
+        comp = [self.daily[k][0] for k in keys]
+        cs = [self.daily[k][1] for k in keys]
+        adjust = [-min(c, CLOUD_SERVICES_FREE * x) for x, c in zip(comp, cs)]
+        billed = [x + c + a for x, c, a in zip(comp, cs, adjust)]
+        common = {
+            "ORGANIZATION_NAME": pa.array(["ORG"] * len(keys)),
+            "ACCOUNT_NAME": pa.array(["ACCOUNT"] * len(keys)),
+            "ACCOUNT_LOCATOR": pa.array(["AB12345"] * len(keys)),
+            "REGION": pa.array(["AWS_US_WEST_2"] * len(keys)),
+            "SERVICE_TYPE": pa.array([s for _, s in keys]),
+            "USAGE_DATE": pa.array(days, pa.date32()),
+        }
+        yield "ORGANIZATION_USAGE.METERING_DAILY_HISTORY", pa.table(
+            {
+                **common,
+                "CREDITS_USED_COMPUTE": pa.array(comp),
+                "CREDITS_USED_CLOUD_SERVICES": pa.array(cs),
+                "CREDITS_USED": pa.array([x + c for x, c in zip(comp, cs)]),
+                "CREDITS_ADJUSTMENT_CLOUD_SERVICES": pa.array(adjust),
+                "CREDITS_BILLED": pa.array(billed),
+            }
+        )
+        yield "ORGANIZATION_USAGE.USAGE_IN_CURRENCY_DAILY", pa.table(
+            {
+                **common,
+                "USAGE_TYPE": pa.array(["compute"] * len(keys)),
+                "CURRENCY": pa.array(["USD"] * len(keys)),
+                "USAGE": pa.array(billed),
+                "USAGE_IN_CURRENCY": pa.array([b * CREDIT_PRICE for b in billed]),
+                "BALANCE_SOURCE": pa.array(["capacity"] * len(keys)),
+                "BILLING_TYPE": pa.array(["consumption"] * len(keys)),
+                "RATING_TYPE": pa.array(["compute"] * len(keys)),
+                "IS_ADJUSTMENT": pa.array([False] * len(keys)),
+            }
+        )
+
+    def write(self, out: str | Path, *, fmt: str = "parquet", compression: str = "snappy") -> SynthStats:
+        """Stream every chunk to ``out`` (replacing earlier output); returns row counts and throughput."""
+        if fmt not in FORMATS:
+            raise ValueError(f"format must be one of {', '.join(FORMATS)}")
+        out = Path(out)
+        if out.exists():
+            if not (out / "_profile.json").exists() and any(out.iterdir()):
+                raise ValueError(f"{out} is not empty and not an earlier synth output")
+            shutil.rmtree(out)
+        out.mkdir(parents=True)
+        stats = SynthStats()
+        sink = _Sink(out, fmt, self.pa, compression)
+        started = time.perf_counter()
+        for view, table in self.chunks():
+            sink.write(view, table)
+            stats.rows[view] = stats.rows.get(view, 0) + table.num_rows
+            stats.chunks += view == "ACCOUNT_USAGE.QUERY_HISTORY"
+        stats.bytes = sink.close()
+        stats.seconds = time.perf_counter() - started
+        meta = {
+            "profile": asdict(self.p),
+            "start": self.start.isoformat(),
+            "end": self.end.isoformat(),
+            "format": fmt,
+            "rows": stats.rows,
+        }
+        (out / "_profile.json").write_text(json.dumps(meta, indent=2) + "\n", encoding="utf-8")
+        return stats
+
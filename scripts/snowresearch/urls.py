@@ -0,0 +1,182 @@
+"""Canonical URLs: the one key every dedup, ledger and cache lookup uses.
+
+Runners used to dedup on raw strings, so ``http://`` vs ``https://``, a
+trailing slash, a ``#section`` anchor, ``?utm_source=...`` or
+``docs.snowflake.com/ja/...`` vs ``/en/...`` each cost another extract.
+:func:`canonical` maps all of those to one form:
+
+- scheme ``https`` (a bare ``host/path`` gets one too), host lower-case
+  without ``www.``, userinfo or a default port;
+- no fragment; tracking parameters (:data:`TRACKING_PARAMS`, plus
+  per-host ones such as Medium's ``source``) dropped, the rest sorted;
+- percent-escapes of characters that need none decoded (``%40`` -> ``@``),
+  the others upper-cased; duplicate slashes, a trailing slash and a
+  trailing ``index.html`` removed;
+- Snowflake docs: the ``.cn`` mirror maps to ``docs.snowflake.com``, the
+  path is lower-cased, any locale segment (``/ja/``, ``/En/``, none)
+  becomes ``/en/`` and the legacy ``.html`` suffix is dropped;
+- redirects learned from earlier extract responses (an extract of ``A``
+  that came back as ``B``, see :func:`learn_redirect`) are followed.
+
+The rule part is pure and memoized (LRU, :data:`MEMO_SIZE` entries); the
+redirect map is a small JSON file read once per process. Bump
+:data:`VERSION` when the rules change so stored keys get rebuilt (the URL
+ledger re-keys itself on open).
+
+Env:
+  RESEARCH_REDIRECTS   learned redirects file (default: ~/.cache/snowresearch/redirects.json), or "off"
+
+Usage:
+  from snowresearch.urls import canonical
+
+  canonical("http://docs.snowflake.com/ja/user-guide/cost-attributing/#top")
+  # -> "https://docs.snowflake.com/en/user-guide/cost-attributing"
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import re
+import threading
+from functools import lru_cache
+from pathlib import Path
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+VERSION = 1
+MEMO_SIZE = 1 << 16
+DEFAULT_REDIRECTS = Path.home() / ".cache" / "snowresearch" / "redirects.json"
+MAX_HOPS = 5
+
+DOCS_HOST = "docs.snowflake.com"
+DOCS_LOCALE = "en"
+MIRRORS = {"docs.snowflake.cn": DOCS_HOST}
+
+# Query parameters that only say where a click came from (prefixes).
+TRACKING_PARAMS = (
+    "utm_", "gclid", "dclid", "fbclid", "msclkid", "yclid", "igshid",
+    "mc_cid", "mc_eid", "ref_src", "_hsenc", "_hsmi", "_ga", "trk",
+)
+# Host (or parent domain) -> extra parameters that are tracking there.
+HOST_PARAMS = {"medium.com": ("source",)}
+
+_UNESCAPED = frozenset("ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789-._~@:!$'()*,;")
+_ESCAPE = re.compile(r"%([0-9A-Fa-f]{2})")
+_SLASHES = re.compile(r"/{2,}")
+_LOCALE = re.compile(r"^/[a-z]{2}(?:[-_][a-z]{2,4})?(?=/|$)", re.I)
+_INDEX = re.compile(r"/index\.(?:html?|php)$", re.I)
+
+_lock = threading.Lock()
+_redirects: dict[str, str] | None = None
+
+
+def _unescape(m: re.Match[str]) -> str:
+    ch = chr(int(m.group(1), 16))
+    return ch if ch in _UNESCAPED else "%" + m.group(1).upper()
+
+
+def _host_params(host: str) -> tuple[str, ...]:
+    parts = host.split(".")
+    for i in range(len(parts) - 1):
+        extra = HOST_PARAMS.get(".".join(parts[i:]))
+        if extra:
+            return extra
+    return ()
+
+
+@lru_cache(maxsize=MEMO_SIZE)
+def _rules(url: str) -> str:
+    url = url.strip()
+    if "://" not in url and not url.startswith("//") and "." in url.split("/", 1)[0]:
+        url = "//" + url  # bare host/path
+    parts = urlsplit(url)
+    scheme = (parts.scheme or "https").lower()
+    if scheme == "http":
+        scheme = "https"
+    host = (parts.hostname or "").rstrip(".")
+    if host.startswith("www."):
+        host = host[4:]
+    host = MIRRORS.get(host, host)
+    try:
+        port = parts.port
+    except ValueError:
+        port = None
+    netloc = f"{host}:{port}" if port and port not in (80, 443) else host
+
+    path = _SLASHES.sub("/", _ESCAPE.sub(_unescape, parts.path))
+    path = _INDEX.sub("", path).rstrip("/")
+    if host == DOCS_HOST:
+        path = path.lower()
+        if path.endswith(".html"):
+            path = path[:-5]
+        path = f"/{DOCS_LOCALE}" + (_LOCALE.sub("", path) if _LOCALE.match(path) else path)
+    path = path or "/"
+
+    drop = TRACKING_PARAMS + _host_params(host)
+    query = urlencode(
+        sorted((k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True) if not k.lower().startswith(drop))
+    )
+    return urlunsplit((scheme, netloc, path, query, ""))
+
+
+def _redirects_path() -> Path | None:
+    value = os.environ.get("RESEARCH_REDIRECTS", "").strip()
+    if value.lower() == "off":
+        return None
+    return Path(value).expanduser() if value else DEFAULT_REDIRECTS
+
+
+def redirects() -> dict[str, str]:
+    """Learned redirects, canonical source -> canonical target (loaded once)."""
+    global _redirects
+    if _redirects is None:
+        with _lock:
+            if _redirects is None:
+                loaded: dict[str, str] = {}
+                path = _redirects_path()
+                if path is not None:
+                    try:
+                        data = json.loads(path.read_text(encoding="utf-8"))
+                        loaded = {k: v for k, v in data.items() if isinstance(k, str) and isinstance(v, str)}
+                    except (OSError, ValueError, AttributeError):
+                        pass
+                _redirects = loaded
+    return _redirects
+
+
+def canonical(url: str) -> str:
+    """The canonical form of ``url``, with learned redirects followed."""
+    key = _rules(url)
+    learned = redirects()
+    for _ in range(MAX_HOPS):
+        nxt = learned.get(key)
+        if nxt is None or nxt == key:
+            break
+        key = nxt
+    return key
+
+
+def is_mirror(url: str) -> bool:
+    """True for a page on a mirror host (:data:`MIRRORS`); fetch its :func:`canonical` form instead."""
+    host = (urlsplit(url.strip() if "//" in url else "//" + url.strip()).hostname or "").rstrip(".")
+    return (host[4:] if host.startswith("www.") else host) in MIRRORS
+
+
+def learn_redirect(requested: str, served: str) -> bool:
+    """Remember that fetching ``requested`` returned ``served``; True if that was new."""
+    src, dst = _rules(requested), canonical(served)
+    learned = redirects()
+    if src == dst or learned.get(src) == dst or canonical(dst) == src:
+        return False
+    with _lock:
+        learned[src] = dst
+        path = _redirects_path()
+        if path is not None:
+            try:
+                path.parent.mkdir(parents=True, exist_ok=True)
+                tmp = path.with_suffix(f".tmp{os.getpid()}")
+                tmp.write_text(json.dumps(learned, indent=0, sort_keys=True), encoding="utf-8")
+                os.replace(tmp, path)
+            except OSError:
+                pass  # still applies for this process
+    return True
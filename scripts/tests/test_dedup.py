@@ -0,0 +1,24 @@
+import json
+
+from snowresearch.dedup import scan_archive
+
+
+class _NoStore:
+    def records(self):
+        return []
+
+
+def _paragraph(topic: str) -> str:
+    return " ".join(f"{topic} word{i} describes warehouse credits and idle time in detail" for i in range(5))
+
+
+def test_repeated_passage_keeps_later_signatures(tmp_path):
+    a, b = _paragraph("alpha"), _paragraph("bravo")
+    result = {"url": "https://docs.snowflake.com/en/user-guide/cost", "full_content": f"{a}\n\n{a}\n\n{b}"}
+    (tmp_path / "extract.json").write_text(json.dumps({"results": [result]}))
+
+    report = scan_archive(tmp_path, store=_NoStore())
+
+    assert report.passages == 3
+    assert report.unique == 2
+    assert report.same_url == 1
@@ -0,0 +1,45 @@
+from snowresearch.retry import CircuitOpenError, RetryPolicy
+
+
+class Unavailable(Exception):
+    status = 503
+
+
+def test_half_open_probe_retries_then_closes():
+    policy = RetryPolicy(max_attempts=2, hedge=False, breaker_threshold=1, breaker_cooldown=0, sleep=lambda s: None)
+
+    def down():
+        raise Unavailable()
+
+    try:
+        policy.call("search", down)
+    except Unavailable:
+        pass
+    assert policy.stats()["search"]["open"]
+
+    # The probe fails once, then its retry succeeds: the circuit closes.
+    outcomes = iter([Unavailable(), "ok"])
+
+    def flaky():
+        result = next(outcomes)
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+    assert policy.call("search", flaky) == "ok"
+    assert not policy.stats()["search"]["open"]
+    assert policy.call("search", lambda: "again") == "again"
+
+
+def test_open_circuit_fails_fast():
+    policy = RetryPolicy(max_attempts=1, hedge=False, breaker_threshold=1, breaker_cooldown=60, sleep=lambda s: None)
+    try:
+        policy.call("extract", lambda: (_ for _ in ()).throw(Unavailable()))
+    except Unavailable:
+        pass
+    try:
+        policy.call("extract", lambda: "ok")
+    except CircuitOpenError:
+        pass
+    else:
+        raise AssertionError("expected CircuitOpenError")
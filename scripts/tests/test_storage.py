@@ -0,0 +1,42 @@
+import json
+
+import pytest
+
+pytest.importorskip("zstandard")
+
+from snowresearch.storage import SegmentStore, migrate
+
+
+def _tree(root):
+    response = {"search_id": "search_1", "results": [{"url": "https://docs.snowflake.com/en/a", "excerpts": ["x"]}]}
+    (root / "research").mkdir()
+    (root / "research" / "search_1772477633.json").write_text(json.dumps(response))
+    (root / "parallel_search_payload.json").write_text(json.dumps({"objective": "credits", "limit": 10}))
+    (root / ".tmp_parallel_search.json").write_text(json.dumps({"objective": "credits"}))
+    (root / "research" / "extract_cut.json").write_text('{"extract_id": "extract_1", "results": [{"url": ')
+    return response
+
+
+def test_migrate_stores_only_responses(tmp_path):
+    response = _tree(tmp_path)
+    store = SegmentStore(tmp_path / "store")
+
+    stats = migrate(store, tmp_path)
+
+    assert [rec.payload for rec in store.scan()] == [response]
+    assert [rec.kind for rec in store.records()] == ["search"]
+    assert stats.migrated == 1
+    assert stats.skipped == ["parallel_search_payload.json"]
+    assert stats.unreadable == ["research/extract_cut.json"]
+
+
+def test_migrate_delete_removes_only_migrated_files(tmp_path):
+    _tree(tmp_path)
+    store = SegmentStore(tmp_path / "store")
+
+    stats = migrate(store, tmp_path, delete=True)
+
+    assert stats.deleted == 1
+    assert not (tmp_path / "research" / "search_1772477633.json").exists()
+    for kept in ("parallel_search_payload.json", ".tmp_parallel_search.json", "research/extract_cut.json"):
+        assert (tmp_path / kept).exists()
@@ -23,8 +23,12 @@ import datetime as dt
 import os
 from pathlib import Path
 import re
+import sys
 
-TOPICS = {"finops", "native-apps", "snowpark", "scs", "governance", "observability"}
+sys.path.insert(0, str(Path(__file__).resolve().parents[3] / "scripts"))
+from snowresearch.notes import load_topics  # noqa: E402
+
+TOPICS = set(load_topics())
 
 
 def _slugify(s: str) -> str:
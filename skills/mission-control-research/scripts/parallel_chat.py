@@ -12,6 +12,9 @@ Examples:
     --model "basic" \
     --max-chars 6000
 
+  # Stream tokens as they arrive, stop at --max-chars, log TTFT and tokens/sec to stderr
+  python3 parallel_chat.py "Summarize ..." --stream --out notes/draft.md
+
 Notes:
 - Endpoint inferred from Akhil-provided docs: https://search-mcp.parallel.ai/v1beta/chat/completions
 - Many OpenAI params are ignored by Parallel per their docs; we keep the request minimal.
@@ -24,7 +27,11 @@ import json
 import os
 import sys
 import textwrap
-import urllib.request
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[3] / "scripts"))
+from snowresearch.client import get_client  # noqa: E402
+from snowresearch.streaming import stream_chat  # noqa: E402
 
 DEFAULT_URL = "https://api.parallel.ai/chat/completions"
 
@@ -36,6 +43,8 @@ def main() -> None:
     ap.add_argument("--model", default="research", help="model name (recommend: research; avoid speed for synthesis)")
     ap.add_argument("--url", default=DEFAULT_URL, help="override endpoint")
     ap.add_argument("--max-chars", type=int, default=12000, help="truncate output for terminals")
+    ap.add_argument("--stream", action="store_true", help="stream tokens as they arrive (SSE); stops early at --max-chars")
+    ap.add_argument("--out", help="with --stream: write the text to this note file instead of stdout")
     args = ap.parse_args()
 
     api_key = os.environ.get("PARALLEL_API_KEY")
@@ -54,20 +63,12 @@ def main() -> None:
         "messages": messages,
     }
 
-    data = json.dumps(payload).encode("utf-8")
-    req = urllib.request.Request(
-        args.url,
-        data=data,
-        headers={
-            "content-type": "application/json",
-            "authorization": f"Bearer {api_key}",
-        },
-        method="POST",
-    )
+    if args.stream:
+        stream(payload, args)
+        return
 
     try:
-        with urllib.request.urlopen(req, timeout=60) as resp:
-            raw = resp.read().decode("utf-8", errors="replace")
+        raw = json.dumps(get_client().chat(payload, url=args.url, timeout=60))
     except Exception as e:
         print(f"request failed: {e}", file=sys.stderr)
         sys.exit(1)
@@ -85,5 +86,27 @@ def main() -> None:
     print(text)
 
 
+def stream(payload: dict, args: argparse.Namespace) -> None:
+    out = open(args.out, "w") if args.out else sys.stdout
+
+    def write(chunk: str) -> None:
+        out.write(chunk)
+        out.flush()
+
+    try:
+        _, stats = stream_chat(payload, url=args.url, max_chars=args.max_chars, on_text=write)
+    except Exception as e:
+        print(f"request failed: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    if stats.truncated:
+        write("\n\n[truncated]")
+    write("\n")
+    if out is not sys.stdout:
+        out.close()
+        print(f"wrote {args.out}", file=sys.stderr)
+    print(f"[stream] {stats.summary()}", file=sys.stderr)
+
+
 if __name__ == "__main__":
     main()
@@ -21,10 +21,13 @@ import argparse
 import json
 import os
 import sys
-import urllib.request
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[3] / "scripts"))
+from snowresearch.cache import add_cache_flags, apply_cache_flags  # noqa: E402
+from snowresearch.client import get_client  # noqa: E402
 
 DEFAULT_URL = "https://api.parallel.ai/v1beta/extract"
-BETA_HEADER = "search-extract-2025-10-10"
 
 
 def main() -> None:
@@ -35,7 +38,9 @@ def main() -> None:
     ap.add_argument("--full-content", action="store_true", default=False)
     ap.add_argument("--endpoint", default=DEFAULT_URL)
     ap.add_argument("--truncate", type=int, default=0)
+    add_cache_flags(ap)
     args = ap.parse_args()
+    apply_cache_flags(args)
 
     api_key = os.environ.get("PARALLEL_API_KEY")
     if not api_key:
@@ -49,20 +54,12 @@ def main() -> None:
         "full_content": bool(args.full_content),
     }
 
-    data = json.dumps(payload).encode("utf-8")
-    req = urllib.request.Request(
-        args.endpoint,
-        data=data,
-        headers={
-            "content-type": "application/json",
-            "x-api-key": api_key,
-            "parallel-beta": BETA_HEADER,
-        },
-        method="POST",
-    )
-
-    with urllib.request.urlopen(req, timeout=60) as resp:
-        raw = resp.read().decode("utf-8", errors="replace")
+    client = get_client()
+    if args.endpoint == DEFAULT_URL:
+        resp = client.extract(payload, timeout=60)  # consults the URL ledger first
+    else:
+        resp = client.post_json(args.endpoint, payload, timeout=60)
+    raw = json.dumps(resp)
 
     if args.truncate and len(raw) > args.truncate:
         raw = raw[: args.truncate] + "\n[truncated]\n"
@@ -26,10 +26,13 @@ import argparse
 import json
 import os
 import sys
-import urllib.request
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[3] / "scripts"))
+from snowresearch.cache import add_cache_flags, apply_cache_flags  # noqa: E402
+from snowresearch.client import get_client  # noqa: E402
 
 DEFAULT_URL = "https://api.parallel.ai/v1beta/search"
-BETA_HEADER = "search-extract-2025-10-10"
 
 
 def main() -> None:
@@ -40,7 +43,9 @@ def main() -> None:
     ap.add_argument("--max-chars", type=int, default=8000, help="max excerpt chars per result")
     ap.add_argument("--url", default=DEFAULT_URL)
     ap.add_argument("--truncate", type=int, default=0, help="truncate printed output chars")
+    add_cache_flags(ap)
     args = ap.parse_args()
+    apply_cache_flags(args)
 
     api_key = os.environ.get("PARALLEL_API_KEY")
     if not api_key:
@@ -54,20 +59,7 @@ def main() -> None:
         "excerpts": {"max_chars_per_result": args.max_chars},
     }
 
-    data = json.dumps(payload).encode("utf-8")
-    req = urllib.request.Request(
-        args.url,
-        data=data,
-        headers={
-            "content-type": "application/json",
-            "x-api-key": api_key,
-            "parallel-beta": BETA_HEADER,
-        },
-        method="POST",
-    )
-
-    with urllib.request.urlopen(req, timeout=60) as resp:
-        raw = resp.read().decode("utf-8", errors="replace")
+    raw = json.dumps(get_client().post_json(args.url, payload, timeout=60))
 
     if args.truncate and len(raw) > args.truncate:
         raw = raw[: args.truncate] + "\n[truncated]\n"
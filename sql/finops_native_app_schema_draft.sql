@@ -113,9 +113,11 @@ CREATE TABLE IF NOT EXISTS FACT_APP_OPERATION_WINDOW (
   p50_ms              NUMBER(38,3),
   p95_ms              NUMBER(38,3),
   max_ms              NUMBER(38,3),
+  duration_sketch     VARIANT,   -- mergeable DDSketch of duration_ms (see telemetry_v0_pipeline.sql 1b)
   extracted_at        TIMESTAMP_NTZ DEFAULT CURRENT_TIMESTAMP(),
   CONSTRAINT uq_app_op_window UNIQUE (window_start, app_package, app_version, operation_name, consumer_org, consumer_name)
 );
+ALTER TABLE FACT_APP_OPERATION_WINDOW ADD COLUMN IF NOT EXISTS duration_sketch VARIANT;
 
 -- Error log aggregation (RECORD_TYPE='LOG' + severity in WARN/ERROR/FATAL)
 CREATE TABLE IF NOT EXISTS FACT_APP_ERROR_WINDOW (
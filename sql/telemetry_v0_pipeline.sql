@@ -53,7 +53,10 @@ SELECT
   operation_name,
   consumer_org,
   consumer_name,
-  duration_ms
+  duration_ms,
+  -- DDSketch bucket (gamma 1.02, about 1% relative error); durations under 1 µs share the lowest bucket
+  CEIL(LN(GREATEST(duration_ms, 0.001)) / LN(1.02))::NUMBER AS duration_key,
+  ts  -- event TIMESTAMP: filter on this (not window_start) so EVENTS_VIEW can be pruned
 FROM V_EVENT_SPANS;
 
 CREATE OR REPLACE VIEW V_LOGS_15M AS
@@ -70,10 +73,65 @@ SELECT
   consumer_name,
   severity,
   message,
-  SHA1(LOWER(REGEXP_REPLACE(message, '\\d+', '<n>'))) AS message_fingerprint
+  SHA1(LOWER(REGEXP_REPLACE(message, '\\d+', '<n>'))) AS message_fingerprint,
+  ts
 FROM V_EVENT_LOGS
 WHERE severity IN ('WARN','ERROR','FATAL');
 
+-- ----------------------------------------------------------------------------
+-- 1b) Duration sketches: merge and query
+-- ----------------------------------------------------------------------------
+-- FACT_APP_OPERATION_WINDOW.duration_sketch is {"gamma": 1.02, "buckets": {"<duration_key>": count}}.
+-- Merging adds counts per bucket, so p50/p95/p99 at any grain (hour, day, version, 90 days)
+-- come from the window facts without rescanning V_EVENT_SPANS. Same logic as
+-- scripts/snowresearch/sketch.py, which reads the column outside Snowflake.
+CREATE OR REPLACE FUNCTION DDS_MERGE(sketches ARRAY)
+RETURNS VARIANT
+LANGUAGE PYTHON
+RUNTIME_VERSION = '3.11'
+HANDLER = 'dds_merge'
+AS
+$$
+import math
+
+def dds_merge(sketches):
+    gamma, buckets = None, {}
+    for s in sketches or ():
+        if not s:
+            continue
+        g = float(s["gamma"])
+        if gamma is None:
+            gamma = g
+        elif not math.isclose(g, gamma):
+            raise ValueError(f"cannot merge sketches with gamma {gamma} and {g}")
+        for k, n in (s.get("buckets") or {}).items():
+            buckets[k] = buckets.get(k, 0) + int(n)
+    return None if gamma is None else {"gamma": gamma, "buckets": buckets}
+$$;
+
+CREATE OR REPLACE FUNCTION DDS_QUANTILE(sketch VARIANT, q FLOAT)
+RETURNS FLOAT
+LANGUAGE PYTHON
+RUNTIME_VERSION = '3.11'
+HANDLER = 'dds_quantile'
+AS
+$$
+def dds_quantile(sketch, q):
+    if not sketch or q is None:
+        return None
+    gamma = float(sketch["gamma"])
+    buckets = sorted((int(k), int(n)) for k, n in (sketch.get("buckets") or {}).items())
+    total = sum(n for _, n in buckets)
+    if not total:
+        return None
+    rank, seen = min(max(q, 0.0), 1.0) * (total - 1), 0
+    for k, n in buckets:
+        seen += n
+        if seen > rank:
+            break
+    return 2 * gamma ** k / (gamma + 1)
+$$;
+
 -- ----------------------------------------------------------------------------
 -- 2) Upsert window facts (idempotent MERGE)
 -- ----------------------------------------------------------------------------
@@ -83,7 +141,9 @@ LANGUAGE SQL
 AS
 $$
 BEGIN
-  -- Operation performance facts
+  -- Operation performance facts. Durations are counted in DDSketch buckets (duration_key,
+  -- see V_SPANS_15M); p50/p95 are read off the same buckets, so a window agrees with any
+  -- rollup of its duration_sketch (DDS_MERGE / DDS_QUANTILE below).
   MERGE INTO FACT_APP_OPERATION_WINDOW t
   USING (
     SELECT
@@ -94,14 +154,29 @@ BEGIN
       operation_name,
       consumer_org,
       consumer_name,
-      COUNT(*) AS spans,
+      SUM(n) AS spans,
       -- v0: errors derived from logs; set 0 here (can join later)
       0 AS errors,
-      APPROX_PERCENTILE(duration_ms, 0.50) AS p50_ms,
-      APPROX_PERCENTILE(duration_ms, 0.95) AS p95_ms,
-      MAX(duration_ms) AS max_ms
-    FROM V_SPANS_15M
-    WHERE window_start >= DATEADD('hour', -lookback_hours, CURRENT_TIMESTAMP())
+      2 * POWER(1.02, MIN(IFF(cum > 0.50 * (total - 1), duration_key, NULL))) / 2.02 AS p50_ms,
+      2 * POWER(1.02, MIN(IFF(cum > 0.95 * (total - 1), duration_key, NULL))) / 2.02 AS p95_ms,
+      MAX(bucket_max_ms) AS max_ms,
+      OBJECT_CONSTRUCT('gamma', 1.02, 'buckets', OBJECT_AGG(duration_key::STRING, n::VARIANT)) AS duration_sketch
+    FROM (
+      SELECT
+        b.*,
+        SUM(n) OVER (PARTITION BY window_start, app_package, app_version, operation_name, consumer_org, consumer_name ORDER BY duration_key) AS cum,
+        SUM(n) OVER (PARTITION BY window_start, app_package, app_version, operation_name, consumer_org, consumer_name) AS total
+      FROM (
+        SELECT
+          window_start, window_end, app_package, app_version, operation_name, consumer_org, consumer_name,
+          duration_key,
+          COUNT(*) AS n,
+          MAX(duration_ms) AS bucket_max_ms
+        FROM V_SPANS_15M
+        WHERE window_start >= DATEADD('hour', -lookback_hours, CURRENT_TIMESTAMP())
+        GROUP BY 1,2,3,4,5,6,7,8
+      ) b
+    )
     GROUP BY 1,2,3,4,5,6,7
   ) s
   ON t.window_start = s.window_start
@@ -117,13 +192,14 @@ BEGIN
     p50_ms = s.p50_ms,
     p95_ms = s.p95_ms,
     max_ms = s.max_ms,
+    duration_sketch = s.duration_sketch,
     extracted_at = CURRENT_TIMESTAMP()
   WHEN NOT MATCHED THEN INSERT (
     window_start, window_end, app_package, app_version, operation_name,
-    consumer_org, consumer_name, spans, errors, p50_ms, p95_ms, max_ms
+    consumer_org, consumer_name, spans, errors, p50_ms, p95_ms, max_ms, duration_sketch
   ) VALUES (
     s.window_start, s.window_end, s.app_package, s.app_version, s.operation_name,
-    s.consumer_org, s.consumer_name, s.spans, s.errors, s.p50_ms, s.p95_ms, s.max_ms
+    s.consumer_org, s.consumer_name, s.spans, s.errors, s.p50_ms, s.p95_ms, s.max_ms, s.duration_sketch
   );
 
   -- Error facts
@@ -169,13 +245,282 @@ END;
 $$;
 
 -- ----------------------------------------------------------------------------
--- 3) Task (runs every 15 minutes)
+-- 2b) Incremental refresh (watermark per source)
+-- ----------------------------------------------------------------------------
+-- The full refresh re-aggregates and MERGEs every window in lookback_hours (24 windows
+-- at lookback_hours => 6) on every run, and its window_start predicate cannot prune
+-- EVENTS_VIEW. The incremental mode keeps, per source, the newest event TIMESTAMP it
+-- has aggregated (the watermark) and on each run:
+--   - scans only events with ts >= the window containing (watermark - late_minutes);
+--   - re-aggregates only windows that have events newer than the watermark, or whose
+--     event count no longer matches the facts (late arrivals);
+--   - MERGEs only rows whose aggregates changed.
+-- Events that arrive more than late_minutes behind the watermark are not picked up here;
+-- TASK_RECONCILE_TELEMETRY_FACTS_DAILY runs the full refresh over 24h to catch them.
+-- The horizon never reaches further back than lookback_hours, so the first run (no
+-- watermark yet) covers the same range as the full refresh.
+CREATE TABLE IF NOT EXISTS TELEMETRY_REFRESH_WATERMARK (
+  source             STRING,         -- 'SPANS' | 'LOGS'
+  high_watermark     TIMESTAMP_NTZ,  -- newest event TIMESTAMP aggregated
+  refreshed_at       TIMESTAMP_NTZ,
+  rows_scanned       NUMBER,         -- last run: events read from the horizon
+  windows_refreshed  NUMBER,         -- last run: windows re-aggregated
+  rows_merged        NUMBER,         -- last run: fact rows inserted or updated
+  CONSTRAINT uq_tel_refresh_watermark UNIQUE (source)
+);
+
+CREATE OR REPLACE PROCEDURE SP_REFRESH_TELEMETRY_FACTS_15M_INCR(lookback_hours NUMBER, late_minutes NUMBER)
+RETURNS STRING
+LANGUAGE SQL
+AS
+$$
+DECLARE
+  v_now            TIMESTAMP_NTZ;
+  v_span_wm        TIMESTAMP_NTZ;
+  v_log_wm         TIMESTAMP_NTZ;
+  v_span_floor     TIMESTAMP_NTZ;
+  v_log_floor      TIMESTAMP_NTZ;
+  v_span_max       TIMESTAMP_NTZ;
+  v_log_max        TIMESTAMP_NTZ;
+  v_span_scanned   NUMBER DEFAULT 0;
+  v_log_scanned    NUMBER DEFAULT 0;
+  v_span_windows   NUMBER DEFAULT 0;
+  v_log_windows    NUMBER DEFAULT 0;
+  v_span_merged    NUMBER DEFAULT 0;
+  v_log_merged     NUMBER DEFAULT 0;
+BEGIN
+  v_now := CURRENT_TIMESTAMP();
+  SELECT MAX(IFF(source = 'SPANS', high_watermark, NULL)), MAX(IFF(source = 'LOGS', high_watermark, NULL))
+    INTO :v_span_wm, :v_log_wm
+    FROM TELEMETRY_REFRESH_WATERMARK;
+
+  -- Horizon start: late_minutes behind the watermark, never further back than lookback_hours,
+  -- floored to its 15-minute window so touched windows are re-aggregated whole.
+  v_span_floor := DATEADD('hour', -lookback_hours, v_now);
+  v_span_floor := GREATEST(COALESCE(DATEADD('minute', -late_minutes, v_span_wm), v_span_floor), v_span_floor);
+  v_span_floor := DATEADD('minute', 15 * FLOOR(DATE_PART('minute', v_span_floor) / 15), DATE_TRUNC('hour', v_span_floor));
+  v_log_floor := DATEADD('hour', -lookback_hours, v_now);
+  v_log_floor := GREATEST(COALESCE(DATEADD('minute', -late_minutes, v_log_wm), v_log_floor), v_log_floor);
+  v_log_floor := DATEADD('minute', 15 * FLOOR(DATE_PART('minute', v_log_floor) / 15), DATE_TRUNC('hour', v_log_floor));
+
+  -- Operation performance facts
+  CREATE OR REPLACE TEMPORARY TABLE _TEL_SPAN_HORIZON AS
+    SELECT * FROM V_SPANS_15M WHERE ts >= :v_span_floor;
+  SELECT COUNT(*), MAX(ts) INTO :v_span_scanned, :v_span_max FROM _TEL_SPAN_HORIZON;
+
+  CREATE OR REPLACE TEMPORARY TABLE _TEL_SPAN_TOUCHED AS
+    SELECT h.window_start
+    FROM (
+      SELECT window_start, COUNT(*) AS spans, MAX(ts) AS max_ts
+      FROM _TEL_SPAN_HORIZON
+      GROUP BY 1
+    ) h
+    LEFT JOIN (
+      SELECT window_start, SUM(spans) AS spans
+      FROM FACT_APP_OPERATION_WINDOW
+      WHERE window_start >= :v_span_floor
+      GROUP BY 1
+    ) f ON f.window_start = h.window_start
+    WHERE :v_span_wm IS NULL OR h.max_ts > :v_span_wm OR f.spans IS NULL OR f.spans <> h.spans;
+  SELECT COUNT(*) INTO :v_span_windows FROM _TEL_SPAN_TOUCHED;
+
+  MERGE INTO FACT_APP_OPERATION_WINDOW t
+  USING (
+    SELECT
+      window_start,
+      window_end,
+      app_package,
+      app_version,
+      operation_name,
+      consumer_org,
+      consumer_name,
+      SUM(n) AS spans,
+      0 AS errors,
+      2 * POWER(1.02, MIN(IFF(cum > 0.50 * (total - 1), duration_key, NULL))) / 2.02 AS p50_ms,
+      2 * POWER(1.02, MIN(IFF(cum > 0.95 * (total - 1), duration_key, NULL))) / 2.02 AS p95_ms,
+      MAX(bucket_max_ms) AS max_ms,
+      OBJECT_CONSTRUCT('gamma', 1.02, 'buckets', OBJECT_AGG(duration_key::STRING, n::VARIANT)) AS duration_sketch
+    FROM (
+      SELECT
+        b.*,
+        SUM(n) OVER (PARTITION BY window_start, app_package, app_version, operation_name, consumer_org, consumer_name ORDER BY duration_key) AS cum,
+        SUM(n) OVER (PARTITION BY window_start, app_package, app_version, operation_name, consumer_org, consumer_name) AS total
+      FROM (
+        SELECT
+          h.window_start, h.window_end, h.app_package, h.app_version, h.operation_name, h.consumer_org,
+          h.consumer_name, h.duration_key,
+          COUNT(*) AS n,
+          MAX(h.duration_ms) AS bucket_max_ms
+        FROM _TEL_SPAN_HORIZON h
+        JOIN _TEL_SPAN_TOUCHED w ON w.window_start = h.window_start
+        GROUP BY 1,2,3,4,5,6,7,8
+      ) b
+    )
+    GROUP BY 1,2,3,4,5,6,7
+  ) s
+  ON t.window_start = s.window_start
+     AND t.app_package = s.app_package
+     AND COALESCE(t.app_version,'') = COALESCE(s.app_version,'')
+     AND t.operation_name = s.operation_name
+     AND COALESCE(t.consumer_org,'') = COALESCE(s.consumer_org,'')
+     AND COALESCE(t.consumer_name,'') = COALESCE(s.consumer_name,'')
+  WHEN MATCHED AND (t.spans <> s.spans OR t.max_ms <> s.max_ms OR t.duration_sketch IS NULL) THEN UPDATE SET
+    window_end = s.window_end,
+    spans = s.spans,
+    errors = s.errors,
+    p50_ms = s.p50_ms,
+    p95_ms = s.p95_ms,
+    max_ms = s.max_ms,
+    duration_sketch = s.duration_sketch,
+    extracted_at = CURRENT_TIMESTAMP()
+  WHEN NOT MATCHED THEN INSERT (
+    window_start, window_end, app_package, app_version, operation_name,
+    consumer_org, consumer_name, spans, errors, p50_ms, p95_ms, max_ms, duration_sketch
+  ) VALUES (
+    s.window_start, s.window_end, s.app_package, s.app_version, s.operation_name,
+    s.consumer_org, s.consumer_name, s.spans, s.errors, s.p50_ms, s.p95_ms, s.max_ms, s.duration_sketch
+  );
+  v_span_merged := SQLROWCOUNT;
+
+  -- Error facts
+  CREATE OR REPLACE TEMPORARY TABLE _TEL_LOG_HORIZON AS
+    SELECT * FROM V_LOGS_15M WHERE ts >= :v_log_floor;
+  SELECT COUNT(*), MAX(ts) INTO :v_log_scanned, :v_log_max FROM _TEL_LOG_HORIZON;
+
+  CREATE OR REPLACE TEMPORARY TABLE _TEL_LOG_TOUCHED AS
+    SELECT h.window_start
+    FROM (
+      SELECT window_start, COUNT(*) AS occurrences, MAX(ts) AS max_ts
+      FROM _TEL_LOG_HORIZON
+      GROUP BY 1
+    ) h
+    LEFT JOIN (
+      SELECT window_start, SUM(occurrences) AS occurrences
+      FROM FACT_APP_ERROR_WINDOW
+      WHERE window_start >= :v_log_floor
+      GROUP BY 1
+    ) f ON f.window_start = h.window_start
+    WHERE :v_log_wm IS NULL OR h.max_ts > :v_log_wm OR f.occurrences IS NULL OR f.occurrences <> h.occurrences;
+  SELECT COUNT(*) INTO :v_log_windows FROM _TEL_LOG_TOUCHED;
+
+  MERGE INTO FACT_APP_ERROR_WINDOW t
+  USING (
+    SELECT
+      h.window_start,
+      h.window_end,
+      h.app_package,
+      h.app_version,
+      h.consumer_org,
+      h.consumer_name,
+      h.severity,
+      h.message_fingerprint,
+      ANY_VALUE(h.message) AS message_sample,
+      COUNT(*) AS occurrences
+    FROM _TEL_LOG_HORIZON h
+    JOIN _TEL_LOG_TOUCHED w ON w.window_start = h.window_start
+    GROUP BY 1,2,3,4,5,6,7,8
+  ) s
+  ON t.window_start = s.window_start
+     AND t.app_package = s.app_package
+     AND COALESCE(t.app_version,'') = COALESCE(s.app_version,'')
+     AND COALESCE(t.consumer_org,'') = COALESCE(s.consumer_org,'')
+     AND COALESCE(t.consumer_name,'') = COALESCE(s.consumer_name,'')
+     AND t.severity = s.severity
+     AND t.message_fingerprint = s.message_fingerprint
+  WHEN MATCHED AND t.occurrences <> s.occurrences THEN UPDATE SET
+    window_end = s.window_end,
+    message_sample = s.message_sample,
+    occurrences = s.occurrences,
+    extracted_at = CURRENT_TIMESTAMP()
+  WHEN NOT MATCHED THEN INSERT (
+    window_start, window_end, app_package, app_version, consumer_org, consumer_name,
+    severity, message_fingerprint, message_sample, occurrences
+  ) VALUES (
+    s.window_start, s.window_end, s.app_package, s.app_version, s.consumer_org, s.consumer_name,
+    s.severity, s.message_fingerprint, s.message_sample, s.occurrences
+  );
+  v_log_merged := SQLROWCOUNT;
+
+  -- Advance the watermarks (never backwards) and keep the run's volumes for monitoring.
+  MERGE INTO TELEMETRY_REFRESH_WATERMARK t
+  USING (
+    SELECT 'SPANS' AS source,
+           GREATEST(COALESCE(:v_span_wm, :v_span_max), COALESCE(:v_span_max, :v_span_wm)) AS high_watermark,
+           :v_span_scanned AS rows_scanned, :v_span_windows AS windows_refreshed, :v_span_merged AS rows_merged
+    UNION ALL
+    SELECT 'LOGS',
+           GREATEST(COALESCE(:v_log_wm, :v_log_max), COALESCE(:v_log_max, :v_log_wm)),
+           :v_log_scanned, :v_log_windows, :v_log_merged
+  ) s
+  ON t.source = s.source
+  WHEN MATCHED THEN UPDATE SET
+    high_watermark = s.high_watermark,
+    refreshed_at = :v_now,
+    rows_scanned = s.rows_scanned,
+    windows_refreshed = s.windows_refreshed,
+    rows_merged = s.rows_merged
+  WHEN NOT MATCHED THEN INSERT (source, high_watermark, refreshed_at, rows_scanned, windows_refreshed, rows_merged)
+    VALUES (s.source, s.high_watermark, :v_now, s.rows_scanned, s.windows_refreshed, s.rows_merged);
+
+  RETURN 'ok: spans ' || v_span_scanned || ' scanned, ' || v_span_windows || ' windows, ' || v_span_merged || ' merged; '
+      || 'logs ' || v_log_scanned || ' scanned, ' || v_log_windows || ' windows, ' || v_log_merged || ' merged';
+END;
+$$;
+
+-- ----------------------------------------------------------------------------
+-- 2c) Latency rollups from sketches
+-- ----------------------------------------------------------------------------
+-- Daily latency per operation and version, across consumers. It reads only the window facts.
+-- For longer ranges, merge the daily sketches again, e.g. a 90-day p95:
+--   SELECT DDS_QUANTILE(DDS_MERGE(ARRAY_AGG(duration_sketch)), 0.95)
+--   FROM V_APP_OPERATION_LATENCY_DAY WHERE day >= DATEADD('day', -90, CURRENT_DATE());
+-- Windows refreshed before duration_sketch existed have none, and the scheduled refreshes only reach back
+-- 24h, so older windows stay sketch-less: DDS_MERGE skips them and their spans are missing from the
+-- quantiles while still counting in spans. Backfill once after deploying, as far back as
+-- the event table still holds spans (here 90 days):
+--   CALL SP_REFRESH_TELEMETRY_FACTS_15M(lookback_hours => 2160);
+-- Windows whose spans have already aged out of the event table cannot be backfilled.
+CREATE OR REPLACE VIEW V_APP_OPERATION_LATENCY_DAY AS
+SELECT
+  day,
+  app_package,
+  app_version,
+  operation_name,
+  spans,
+  DDS_QUANTILE(duration_sketch, 0.50) AS p50_ms,
+  DDS_QUANTILE(duration_sketch, 0.95) AS p95_ms,
+  DDS_QUANTILE(duration_sketch, 0.99) AS p99_ms,
+  max_ms,
+  duration_sketch
+FROM (
+  SELECT
+    DATE_TRUNC('day', window_start)::DATE AS day,
+    app_package,
+    app_version,
+    operation_name,
+    SUM(spans) AS spans,
+    MAX(max_ms) AS max_ms,
+    DDS_MERGE(ARRAY_AGG(duration_sketch)) AS duration_sketch
+  FROM FACT_APP_OPERATION_WINDOW
+  GROUP BY 1,2,3,4
+);
+
+-- ----------------------------------------------------------------------------
+-- 3) Tasks
 -- ----------------------------------------------------------------------------
 -- NOTE: warehouse name and schedule should be parameterized per install.
+-- Every 15 minutes: incremental refresh (late events accepted up to 60 minutes behind).
 CREATE OR REPLACE TASK TASK_REFRESH_TELEMETRY_FACTS_15M
   WAREHOUSE = '<SET_WAREHOUSE>'
   SCHEDULE = '15 MINUTE'
 AS
-  CALL SP_REFRESH_TELEMETRY_FACTS_15M(lookback_hours => 6);
+  CALL SP_REFRESH_TELEMETRY_FACTS_15M_INCR(lookback_hours => 6, late_minutes => 60);
+
+-- Daily: full refresh over 24h, for events that arrived after the late-arrival horizon.
+CREATE OR REPLACE TASK TASK_RECONCILE_TELEMETRY_FACTS_DAILY
+  WAREHOUSE = '<SET_WAREHOUSE>'
+  SCHEDULE = 'USING CRON 30 3 * * * UTC'
+AS
+  CALL SP_REFRESH_TELEMETRY_FACTS_15M(lookback_hours => 24);
 
 -- End.